@@ -2,24 +2,32 @@
 
 from __future__ import annotations
 
+import calendar
 import logging
+from collections.abc import Callable
+from dataclasses import dataclass
 from datetime import date, datetime
 from decimal import Decimal
+from typing import Any, TypeVar
 
-from result import Result
+from result import Err, Result
+from sqlalchemy.orm import Session
 
 from controllers.base_controller import BaseController
 from controllers.exchange_rate_controller import ExchangeRateController
 from controllers.installment_controller import InstallmentController
-from models.ai_model import AIContext, AIRequest, AIResponse
+from core.unit_of_work import UnitOfWork
+from models.ai_model import AIContext, AIRequest, AIResponse, CategoryMetric
 from models.errors import AppError
 from models.expense_model import Expense
+from models.income_model import Income
 from repositories.expense_repository import ExpenseRepository
 from repositories.family_member_repository import FamilyMemberRepository
 from repositories.income_repository import IncomeRepository
 from repositories.memoria_repository import MemoriaRepository
 from repositories.monthly_snapshot_repository import MonthlySnapshotRepository
 from services.ai.ai_advisor_service import AIAdvisorService
+from services.ai.context_pipeline import ContextPipeline, run_in_db_pool
 from services.ai.embedding_service import EmbeddingService
 from services.ai.expense_formatters import (
     agrupar_gastos,
@@ -28,12 +36,13 @@ from services.ai.expense_formatters import (
 )
 from services.ai.ia_memory_service import IAMemoryService
 from services.ai.query_analyzer import QueryAnalyzer
-from services.domain.expense_service import ExpenseService
 from services.domain.family_member_service import FamilyMemberService
 from services.domain.income_service import IncomeService
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 _MESES_NUM: dict[int, str] = {
     1: "Enero",
     2: "Febrero",
@@ -50,6 +59,75 @@ _MESES_NUM: dict[int, str] = {
 }
 
 
+@dataclass(frozen=True)
+class _Periodo:
+    """Período consultado: rango detectado por QueryAnalyzer o mes actual."""
+
+    es_rango: bool
+    mes_ini: int
+    anio_ini: int
+    mes_fin: int
+    anio_fin: int
+
+    @classmethod
+    def desde_intencion(
+        cls, rango: tuple[int, int, int, int] | None, ahora: datetime
+    ) -> _Periodo:
+        if rango:
+            mes_ini, anio_ini, mes_fin, anio_fin = rango
+            return cls(True, mes_ini, anio_ini, mes_fin, anio_fin)
+        return cls(False, ahora.month, ahora.year, ahora.month, ahora.year)
+
+    @property
+    def mes_prev(self) -> int:
+        return self.mes_fin - 1 if self.mes_fin > 1 else 12
+
+    @property
+    def anio_prev(self) -> int:
+        return self.anio_fin if self.mes_fin > 1 else self.anio_fin - 1
+
+    @property
+    def primer_dia(self) -> date:
+        return date(self.anio_ini, self.mes_ini, 1)
+
+    @property
+    def ultimo_dia(self) -> date:
+        last_day = calendar.monthrange(self.anio_fin, self.mes_fin)[1]
+        return date(self.anio_fin, self.mes_fin, last_day)
+
+    @property
+    def fecha_min(self) -> date | None:
+        """Inicio del rango para el subtotal semántico (None = sin filtro)."""
+        return self.primer_dia if self.es_rango else None
+
+    @property
+    def fecha_max(self) -> date | None:
+        """Último día del rango para el subtotal semántico (None = sin filtro)."""
+        return self.ultimo_dia if self.es_rango else None
+
+    @property
+    def label(self) -> str:
+        """Etiqueta del período consultado."""
+        if self.es_rango:
+            return (
+                f"de {_MESES_NUM[self.mes_ini]} {self.anio_ini}"
+                f" a {_MESES_NUM[self.mes_fin]} {self.anio_fin}"
+            )
+        return f"de {_MESES_NUM[self.mes_fin]} {self.anio_fin}"
+
+    def meses(self) -> list[tuple[int, int]]:
+        """(anio, mes) de cada mes del período, en orden."""
+        resultado: list[tuple[int, int]] = []
+        m, a = self.mes_ini, self.anio_ini
+        while (a, m) <= (self.anio_fin, self.mes_fin):
+            resultado.append((a, m))
+            m += 1
+            if m > 12:
+                m = 1
+                a += 1
+        return resultado
+
+
 class AIController(BaseController):
     """Controlador para interactuar con el Contador Oriental"""
 
@@ -59,16 +137,36 @@ class AIController(BaseController):
         self.embedding_service = EmbeddingService()
         self.last_context: AIContext = AIContext()
         self.last_pregunta: str = ""
+        self.last_timings: dict[str, float] = {}
 
     def _get_memory_service(self, session) -> IAMemoryService:
         """Crear IAMemoryService con sesión activa."""
         repo = MemoriaRepository(session, self._familia_id or 0)
         return IAMemoryService(repo, self.embedding_service)
 
-    async def _calcular_subtotal_semantico(
+    async def _ejecutar_db(self, fn: Callable[[Session], T]) -> T:
+        """
+        Ejecutar una lectura de BD fuera del event loop, con sesión propia.
+
+        Una Session de SQLAlchemy no se comparte entre hilos: si el controller
+        recibió sesión o UnitOfWork inyectados (tests), se usa esa sesión en el
+        loop; si no, cada etapa abre su UnitOfWork dentro del pool de BD.
+        """
+        if self._session is not None or self._uow is not None:
+            with self._get_session() as session:
+                return fn(session)
+
+        def _con_sesion() -> T:
+            with UnitOfWork() as uow:
+                return fn(uow.session)
+
+        return await run_in_db_pool(_con_sesion)
+
+    def _calcular_subtotal_semantico(
         self,
+        embedding: list[float],
         pregunta: str,
-        session,
+        session: Session,
         umbral_cosine: float = 0.30,
         fecha_min: date | None = None,
         fecha_max: date | None = None,
@@ -79,25 +177,16 @@ class AIController(BaseController):
         Retorna (subtotal, label) — (Decimal('0'), '') si no hay resultados.
 
         Args:
-            pregunta: Texto a buscar semánticamente
+            embedding: Vector de la pregunta (calculado una sola vez por consulta)
+            pregunta: Texto de la pregunta, usado como label
             session: Sesión de DB
             umbral_cosine: Similitud mínima (0=exacta, 0.5=moderada, 0.8=baja)
             fecha_min: Filtrar solo gastos desde esta fecha
             fecha_max: Filtrar solo gastos hasta esta fecha
         """
-        from result import Err
-
-        embedding_result = await self.embedding_service.generar_embedding(pregunta)
-        if isinstance(embedding_result, Err):
-            logger.warning(
-                "[SUBTOTAL] No se pudo generar embedding: %s", embedding_result.err()
-            )
-            return Decimal("0"), ""
-
-        emb = embedding_result.ok()
         repo = ExpenseRepository(session, self._familia_id)
         resultados = repo.buscar_por_similitud(
-            emb,
+            embedding,
             umbral_cosine=umbral_cosine,
             fecha_min=fecha_min,
             fecha_max=fecha_max,
@@ -119,245 +208,287 @@ class AIController(BaseController):
         )
         return subtotal, label
 
-    async def _construir_contexto(
+    def _cargar_gastos(self, session: Session, periodo: _Periodo) -> list[Expense]:
+        """Gastos del rango detectado o del mes actual (una sola query)."""
+        expense_repo = ExpenseRepository(session, self._familia_id)
+        gastos = list(
+            expense_repo.get_by_date_range(periodo.primer_dia, periodo.ultimo_dia)
+        )
+        if periodo.es_rango:
+            logger.info(
+                "[RANGO] %d gastos históricos cargados (%s)",
+                len(gastos),
+                periodo.label,
+            )
+        return gastos
+
+    def _cargar_ingresos(self, session: Session, periodo: _Periodo) -> list[Income]:
+        """Ingresos del mismo período que los gastos (incluye recurrentes).
+
+        Una sola query para todo el rango; los recurrentes cuentan una vez
+        por mes, igual que al sumar list_for_month mes a mes.
+        """
+        income_service = IncomeService(IncomeRepository(session, self._familia_id))
+        por_mes = income_service.list_for_months(periodo.meses())
+        ingresos = [inc for mes in periodo.meses() for inc in por_mes[mes]]
+        if periodo.es_rango:
+            logger.info(
+                "[RANGO] %d ingresos históricos cargados (%s)",
+                len(ingresos),
+                periodo.label,
+            )
+        return ingresos
+
+    def _cargar_comparativa(
+        self, session: Session, periodo: _Periodo
+    ) -> list[CategoryMetric]:
+        """Comparativa del mes objetivo contra el anterior (snapshots + LAG).
+
+        Los snapshots se mantienen por deltas; solo se recalculan los meses
+        marcados dirty (o nunca materializados), sin commit en el caso común.
+        """
+        snapshot_repo = MonthlySnapshotRepository(session, self._familia_id)
+        snapshot_repo.asegurar_meses(
+            [
+                (periodo.anio_fin, periodo.mes_fin),
+                (periodo.anio_prev, periodo.mes_prev),
+            ]
+        )
+        return snapshot_repo.obtener_comparativa_mensual(
+            periodo.anio_fin, periodo.mes_fin
+        )
+
+    def _cargar_empalme(
+        self,
+        session: Session,
+        periodo: _Periodo,
+        categorias: list[str],
+    ) -> dict[str, Any]:
+        """Cierre del mes anterior, como kwargs de AIContext (vacío si no hay)."""
+        anio_emp, mes_emp = periodo.anio_prev, periodo.mes_prev
+        gastos_emp = list(
+            ExpenseRepository(session, self._familia_id).get_by_month(anio_emp, mes_emp)
+        )
+        if not gastos_emp:
+            return {}
+
+        gastos_emp_filtrados = filtrar_por_categorias(gastos_emp, categorias)
+        empalme_total_gastos = sum((g.monto for g in gastos_emp), Decimal("0"))
+        # Usar income_service para incluir ingresos recurrentes
+        income_service = IncomeService(IncomeRepository(session, self._familia_id))
+        empalme_ingresos_total = sum(
+            (i.monto for i in income_service.list_for_month(anio_emp, mes_emp)),
+            Decimal("0"),
+        )
+        empalme_mes_label = f"{_MESES_NUM[mes_emp]} {anio_emp}"
+        logger.info(
+            "[EMPALME] Cierre de %s: %d gastos ($%s), ingresos $%s",
+            empalme_mes_label,
+            len(gastos_emp),
+            empalme_total_gastos,
+            empalme_ingresos_total,
+        )
+        return {
+            "empalme_gastos": (
+                agrupar_gastos(gastos_emp_filtrados) if gastos_emp_filtrados else {}
+            ),
+            "empalme_ingresos_total": empalme_ingresos_total,
+            "empalme_mes_label": empalme_mes_label,
+            "empalme_total_gastos": empalme_total_gastos,
+        }
+
+    def _buscar_memoria_vectorial(
+        self, session: Session, embedding: list[float], pregunta: str
+    ) -> str:
+        """Recupera contexto de memoria vectorial RAG para enriquecer la respuesta.
+
+        Siempre consulta la memoria vectorial: incluso con gastos del mes,
+        el contexto histórico de meses anteriores es valioso para la IA.
+        La pregunta se pasa para la búsqueda híbrida (comercios por nombre).
+        """
+        memory_service = self._get_memory_service(session)
+        if not memory_service.tiene_memoria():
+            return ""
+        contextos = memory_service.buscar_contexto_con_embedding(
+            embedding, limit=5, consulta=pregunta
+        )
+        if not contextos:
+            return ""
+        logger.info("Memoria vectorial: %d recuerdos recuperados", len(contextos))
+        return "\n".join(f"- {c}" for c in contextos)
+
+    async def _preparar_consulta(
         self,
         pregunta: str,
-    ) -> AIContext:
-        """Construye el AIContext con datos financieros del mes para una pregunta.
+        incluir_gastos: bool,
+    ) -> tuple[AIContext, str, bool]:
+        """Arma AIContext, memoria RAG y cuota de Llama 3 para una pregunta.
+
+        Las etapas se ejecutan como DAG (ContextPipeline): el embedding de la
+        pregunta, las lecturas de BD, la proyección de cuotas y la cotización
+        corren en paralelo; el subtotal semántico y la memoria vectorial
+        arrancan apenas está el embedding, y el empalme apenas están los gastos.
+        Los tiempos por etapa quedan en self.last_timings.
 
-        Extrae gastos, ingresos, miembros, snapshot comparativo y subtotal semántico.
         Si el QueryAnalyzer detecta un rango (ej: "abril"), sincroniza gastos,
         ingresos y comparativa a ese rango.
         Si el mes actual tiene pocos movimientos (< 5 gastos), inyecta el cierre
         del mes anterior como contexto de empalme.
+
+        Returns:
+            (ctx, memoria_vectorial, has_quota)
         """
-        with self._get_session() as session:
-            ahora = datetime.now()
-            mes_actual = ahora.month
-            anio_actual = ahora.year
-
-            expense_repo = ExpenseRepository(session, self._familia_id)
-            expense_service = ExpenseService(expense_repo)
-            income_repo = IncomeRepository(session, self._familia_id)
-            income_service = IncomeService(income_repo)
-
-            intencion = QueryAnalyzer.detectar_intenciones(pregunta)
-
-            # ── Gastos: rango detectado o mes actual ──────────────────────
-            if intencion.rango:
-                mes_ini, anio_ini, mes_fin, anio_fin = intencion.rango
-                gastos_mes: list[Expense] = []
-                m, a = mes_ini, anio_ini
-                while (a, m) <= (anio_fin, mes_fin):
-                    gastos_mes += list(expense_repo.get_by_month(a, m))
-                    m += 1
-                    if m > 12:
-                        m = 1
-                        a += 1
-                logger.info(
-                    "[RANGO] %d gastos históricos cargados (%d/%d→%d/%d)",
-                    len(gastos_mes),
-                    mes_ini,
-                    anio_ini,
-                    mes_fin,
-                    anio_fin,
-                )
-            else:
-                gastos_mes = [
-                    g
-                    for g in expense_service.list_expenses()
-                    if g.fecha.month == mes_actual and g.fecha.year == anio_actual
-                ]
-
-            # ── Ingresos: mismo rango que gastos ──────────────────────────
-            if intencion.rango:
-                mes_ini, anio_ini, mes_fin, anio_fin = intencion.rango
-                ingresos: list = []
-                m, a = mes_ini, anio_ini
-                while (a, m) <= (anio_fin, mes_fin):
-                    # Usar income_service para incluir ingresos recurrentes
-                    ingresos += income_service.list_for_month(a, m)
-                    m += 1
-                    if m > 12:
-                        m = 1
-                        a += 1
-                logger.info(
-                    "[RANGO] %d ingresos históricos cargados (%d/%d→%d/%d)",
-                    len(ingresos),
-                    mes_ini,
-                    anio_ini,
-                    mes_fin,
-                    anio_fin,
-                )
-            else:
-                # Usar income_service para incluir ingresos recurrentes
-                ingresos = income_service.list_for_month(mes_actual, anio_actual)
-            ingresos_total = sum((i.monto for i in ingresos), Decimal("0"))
-
-            # ── Filtrado por categorías ───────────────────────────────────
-            gastos_filtrados = filtrar_por_categorias(gastos_mes, intencion.categorias)
-
-            total_gastos_mes = sum((g.monto for g in gastos_mes), Decimal("0"))
-            resumen_gastos: dict[str, dict[str, dict]] = {}
-            total_gastos_count = 0
-            if gastos_filtrados:
-                resumen_gastos = agrupar_gastos(gastos_filtrados)
-                total_gastos_count = len(gastos_filtrados)
-
-            # ── Subtotal semántico con filtro de fechas ────────────────────
-            fecha_min: date | None = None
-            fecha_max: date | None = None
-            if intencion.rango:
-                fecha_min = date(anio_ini, mes_ini, 1)
-                # Ultimo día del mes de fin
-                import calendar
-
-                last_day = calendar.monthrange(anio_fin, mes_fin)[1]
-                fecha_max = date(anio_fin, mes_fin, last_day)
-
-            subtotal_desc, label_desc = await self._calcular_subtotal_semantico(
-                pregunta,
-                session,
-                fecha_min=fecha_min,
-                fecha_max=fecha_max,
+        from services.infrastructure.quota_manager import QuotaManager
+
+        familia_id = self._familia_id
+        intencion = QueryAnalyzer.detectar_intenciones(pregunta)
+        periodo = _Periodo.desde_intencion(intencion.rango, datetime.now())
+
+        async def _embedding(_: dict[str, Any]) -> Result[list[float], AppError]:
+            return await self.embedding_service.generar_embedding(pregunta)
+
+        async def _cuota(_: dict[str, Any]) -> bool:
+            return await self._ejecutar_db(
+                lambda s: QuotaManager(s, familia_id).can_use_llama3()
             )
 
-            # ── Miembros ──────────────────────────────────────────────────
-            member_repo = FamilyMemberRepository(session, self._familia_id)
-            member_service = FamilyMemberService(member_repo)
-            miembros = member_service.list_members()
+        async def _memoria(deps: dict[str, Any]) -> str:
+            emb = deps["embedding"]
+            if isinstance(emb, Err):
+                logger.warning("[MEMORY] Sin embedding de consulta: %s", emb.err())
+                return ""
+            return await self._ejecutar_db(
+                lambda s: self._buscar_memoria_vectorial(s, emb.ok(), pregunta)
+            )
 
-            # ── Comparativa: relativa al rango o mes actual ──────────────
-            if intencion.rango:
-                _, _, mes_target, anio_target = intencion.rango
-            else:
-                mes_target = mes_actual
-                anio_target = anio_actual
-
-            mes_prev = mes_target - 1 if mes_target > 1 else 12
-            anio_prev = anio_target if mes_target > 1 else anio_target - 1
-
-            snapshot_repo = MonthlySnapshotRepository(session, self._familia_id)
-            comparativa: list = []
-            try:
-                snapshot_repo.upsert_mes_actual(anio_target, mes_target)
-                snapshot_repo.upsert_mes_actual(anio_prev, mes_prev)
-                comparativa = snapshot_repo.obtener_comparativa_mensual(
-                    anio_target, mes_target
+        pipeline = ContextPipeline()
+        pipeline.add_stage("embedding", _embedding)
+        pipeline.add_stage("cuota", _cuota)
+        pipeline.add_stage("memoria", _memoria, depends_on=("embedding",), fallback="")
+
+        if incluir_gastos:
+
+            async def _gastos(_: dict[str, Any]) -> list[Expense]:
+                return await self._ejecutar_db(
+                    lambda s: self._cargar_gastos(s, periodo)
                 )
-            except Exception as snap_err:
-                logger.warning("Comparativa no disponible: %s", snap_err)
-
-            # ── Empalme: cierre del mes anterior si mes actual tiene pocos
-            #    movimientos y no hay rango explícito ─────────────────────
-            empalme_gastos: dict = {}
-            empalme_ingresos_total = Decimal("0")
-            empalme_mes_label = ""
-            empalme_total_gastos = Decimal("0")
-
-            if not intencion.rango and len(gastos_mes) < 5:
-                mes_emp = mes_prev  # = mes_actual - 1 ya calculado
-                anio_emp = anio_prev
-                gastos_emp = list(expense_repo.get_by_month(anio_emp, mes_emp))
-                if gastos_emp:
-                    gastos_emp_filtrados = filtrar_por_categorias(
-                        gastos_emp, intencion.categorias
-                    )
-                    empalme_gastos = (
-                        agrupar_gastos(gastos_emp_filtrados)
-                        if gastos_emp_filtrados
-                        else {}
-                    )
-                    empalme_total_gastos = sum(
-                        (g.monto for g in gastos_emp), Decimal("0")
-                    )
-                    # Usar income_service para incluir ingresos recurrentes
-                    ingresos_emp = income_service.list_for_month(anio_emp, mes_emp)
-                    empalme_ingresos_total = sum(
-                        (i.monto for i in ingresos_emp), Decimal("0")
-                    )
-                    empalme_mes_label = f"{_MESES_NUM[mes_emp]} {anio_emp}"
-                    logger.info(
-                        "[EMPALME] Cierre de %s: %d gastos ($%s), ingresos $%s",
-                        empalme_mes_label,
-                        len(gastos_emp),
-                        empalme_total_gastos,
-                        empalme_ingresos_total,
+
+            async def _ingresos(_: dict[str, Any]) -> list[Income]:
+                return await self._ejecutar_db(
+                    lambda s: self._cargar_ingresos(s, periodo)
+                )
+
+            async def _miembros(_: dict[str, Any]) -> int:
+                return await self._ejecutar_db(
+                    lambda s: len(
+                        FamilyMemberService(
+                            FamilyMemberRepository(s, familia_id)
+                        ).list_members()
                     )
+                )
 
-            # ── Proyección de cuotas futuras ───────────────────────────────
-            proyeccion = {}
-            try:
-                inst_ctrl = InstallmentController(familia_id=self._familia_id)
-                proyeccion = inst_ctrl.proyectar_meses(6)
-            except Exception as proy_err:
-                logger.warning("Proyeccion no disponible: %s", proy_err)
-
-            # ── Cotización del dólar ──────────────────────────────────────
-            exchange_ctrl = ExchangeRateController()
-            compra, venta, is_fresh = exchange_ctrl.get_display_rate()
-            cotizacion = compra if is_fresh else Decimal("0")
-
-            # ── Etiqueta del período consultado ──────────────────────────
-            if intencion.rango:
-                periodo_label = (
-                    f"de {_MESES_NUM[mes_ini]} {anio_ini}"
-                    f" a {_MESES_NUM[mes_fin]} {anio_fin}"
+            async def _comparativa(_: dict[str, Any]) -> list[CategoryMetric]:
+                return await self._ejecutar_db(
+                    lambda s: self._cargar_comparativa(s, periodo)
                 )
-            else:
-                periodo_label = f"de {_MESES_NUM[mes_actual]} {anio_actual}"
-
-            return AIContext(
-                resumen_gastos=resumen_gastos,
-                total_gastos_count=total_gastos_count,
-                total_gastos_mes=total_gastos_mes,
-                ingresos_total=ingresos_total,
-                miembros_count=len(miembros),
-                resumen_metodos_pago=resumir_metodos_pago(gastos_mes),
-                comparativa_meses=comparativa,
-                subtotal_descripcion=subtotal_desc if subtotal_desc else None,
-                terminos_buscados=label_desc,
-                proyeccion_cuotas=proyeccion,
-                cotizacion_dolar=cotizacion if cotizacion > 0 else None,
-                empalme_gastos=empalme_gastos,
-                empalme_ingresos_total=empalme_ingresos_total,
-                empalme_mes_label=empalme_mes_label,
-                empalme_total_gastos=empalme_total_gastos,
-                periodo_label=periodo_label,
-            )
 
-    async def _buscar_memoria_vectorial(self, pregunta: str, ctx: AIContext) -> str:
-        """Recupera contexto de memoria vectorial RAG para enriquecer la respuesta.
+            async def _empalme(deps: dict[str, Any]) -> dict[str, Any]:
+                if periodo.es_rango or len(deps["gastos"]) >= 5:
+                    return {}
+                return await self._ejecutar_db(
+                    lambda s: self._cargar_empalme(s, periodo, intencion.categorias)
+                )
 
-        Siempre consulta la memoria vectorial: incluso con gastos del mes,
-        el contexto histórico de meses anteriores es valioso para la IA.
-        """
-        try:
-            with self._get_session() as session:
-                memory_service = self._get_memory_service(session)
-                if not memory_service.tiene_memoria():
-                    return ""
-                from result import Ok as MemOk
+            async def _proyeccion(_: dict[str, Any]) -> dict[str, Decimal]:
+                return await run_in_db_pool(
+                    lambda: InstallmentController(
+                        familia_id=familia_id
+                    ).proyectar_meses(6)
+                )
 
-                mem_result = await memory_service.buscar_contexto_para_pregunta(
-                    pregunta=pregunta, limit=5
+            async def _cotizacion(_: dict[str, Any]) -> Decimal:
+                compra, _venta, is_fresh = await run_in_db_pool(
+                    ExchangeRateController().get_display_rate
                 )
-                if isinstance(mem_result, MemOk) and mem_result.ok():
-                    logger.info(
-                        "Memoria vectorial: %d recuerdos recuperados",
-                        len(mem_result.ok()),
+                return compra if is_fresh else Decimal("0")
+
+            async def _subtotal(deps: dict[str, Any]) -> tuple[Decimal, str]:
+                emb = deps["embedding"]
+                if isinstance(emb, Err):
+                    logger.warning(
+                        "[SUBTOTAL] No se pudo generar embedding: %s", emb.err()
+                    )
+                    return Decimal("0"), ""
+                return await self._ejecutar_db(
+                    lambda s: self._calcular_subtotal_semantico(
+                        emb.ok(),
+                        pregunta,
+                        s,
+                        fecha_min=periodo.fecha_min,
+                        fecha_max=periodo.fecha_max,
                     )
-                    return "\n".join(f"- {c}" for c in mem_result.ok())
-        except Exception as mem_err:
-            logger.warning("[MEMORY] No se pudo recuperar contexto: %s", mem_err)
-        return ""
+                )
+
+            pipeline.add_stage("gastos", _gastos)
+            pipeline.add_stage("ingresos", _ingresos)
+            pipeline.add_stage("miembros", _miembros)
+            pipeline.add_stage("comparativa", _comparativa, fallback=[])
+            pipeline.add_stage("empalme", _empalme, depends_on=("gastos",))
+            pipeline.add_stage("proyeccion", _proyeccion, fallback={})
+            pipeline.add_stage("cotizacion", _cotizacion)
+            pipeline.add_stage("subtotal", _subtotal, depends_on=("embedding",))
+
+        resultados = await pipeline.run()
+        self.last_timings = dict(pipeline.timings)
+        logger.info("[CONTEXTO] Timings: %s", pipeline.resumen_timings())
+
+        ctx = AIContext()
+        if incluir_gastos:
+            ctx = self._ensamblar_contexto(resultados, periodo, intencion.categorias)
+        return ctx, resultados["memoria"], resultados["cuota"]
+
+    def _ensamblar_contexto(
+        self,
+        resultados: dict[str, Any],
+        periodo: _Periodo,
+        categorias: list[str],
+    ) -> AIContext:
+        """Construye el AIContext a partir de los resultados del pipeline."""
+        gastos_mes: list[Expense] = resultados["gastos"]
+        ingresos: list[Income] = resultados["ingresos"]
+
+        gastos_filtrados = filtrar_por_categorias(gastos_mes, categorias)
+        resumen_gastos: dict[str, dict[str, dict]] = {}
+        total_gastos_count = 0
+        if gastos_filtrados:
+            resumen_gastos = agrupar_gastos(gastos_filtrados)
+            total_gastos_count = len(gastos_filtrados)
+
+        subtotal_desc, label_desc = resultados["subtotal"]
+        cotizacion: Decimal = resultados["cotizacion"]
+
+        return AIContext(
+            resumen_gastos=resumen_gastos,
+            total_gastos_count=total_gastos_count,
+            total_gastos_mes=sum((g.monto for g in gastos_mes), Decimal("0")),
+            ingresos_total=sum((i.monto for i in ingresos), Decimal("0")),
+            miembros_count=resultados["miembros"],
+            resumen_metodos_pago=resumir_metodos_pago(gastos_mes),
+            comparativa_meses=resultados["comparativa"],
+            subtotal_descripcion=subtotal_desc if subtotal_desc else None,
+            terminos_buscados=label_desc,
+            proyeccion_cuotas=resultados["proyeccion"],
+            cotizacion_dolar=cotizacion if cotizacion > 0 else None,
+            periodo_label=periodo.label,
+            **resultados["empalme"],
+        )
 
     async def consultar_contador(
         self, pregunta: str, incluir_gastos: bool = True, from_history: bool = False
     ) -> Result[AIResponse, AppError]:
         """
         Consulta al Contador Oriental con detección inteligente de contexto.
-        La parte de IA es asíncrona; la BD permanece síncrona.
+        La parte de IA es asíncrona; la BD corre en un pool de hilos.
 
         Args:
             pregunta: Pregunta del usuario
@@ -369,21 +500,7 @@ class AIController(BaseController):
         """
         logger.info(f"Consulta recibida: '{pregunta}' (from_history={from_history})")
 
-        # Detectar rango temporal para routing
-        intencion = QueryAnalyzer.detectar_intenciones(pregunta)
-        range_months = 1
-        if intencion.rango:
-            mes_ini, anio_ini, mes_fin, anio_fin = intencion.rango
-            range_months = (anio_fin - anio_ini) * 12 + (mes_fin - mes_ini) + 1
-            logger.info("[RANGO] Consulta abarca %d meses", range_months)
-
-        # Verificar cuota de Llama 3
-        has_quota = True
-        with self._get_session() as session:
-            from services.infrastructure.quota_manager import QuotaManager
-
-            quota = QuotaManager(session, self._familia_id)
-            has_quota = quota.can_use_llama3()
+        range_months = self._calcular_range_months(pregunta)
 
         # Crear request
         request = AIRequest(
@@ -392,15 +509,12 @@ class AIController(BaseController):
             incluir_gastos_recientes=incluir_gastos,
         )
 
-        ctx = AIContext()
-        if incluir_gastos:
-            ctx = await self._construir_contexto(pregunta)
-
+        ctx, memoria_str, has_quota = await self._preparar_consulta(
+            pregunta, incluir_gastos
+        )
         self.last_context = ctx
         self.last_pregunta = pregunta
 
-        memoria_str = await self._buscar_memoria_vectorial(pregunta, ctx)
-
         result = await self.ai_service.consultar(
             request,
             ctx=ctx,
@@ -410,8 +524,8 @@ class AIController(BaseController):
             range_months=range_months,
         )
 
-        # Registrar uso de modelo en cuota
-        if result.is_ok():
+        # Registrar uso de modelo en cuota (una respuesta cacheada no gasta)
+        if result.is_ok() and not result.ok().desde_cache:
             modelo_usado = "llama3" if (has_quota and from_history) else "gemma2"
             # El router decide internamente, pero registramos lo que se usó
             # Esto se podría mejorar extrayendo el modelo del resultado
@@ -447,21 +561,7 @@ class AIController(BaseController):
         """
         logger.info("Stream consulta: '%s' (from_history=%s)", pregunta, from_history)
 
-        # Detectar rango temporal para routing
-        intencion = QueryAnalyzer.detectar_intenciones(pregunta)
-        range_months = 1
-        if intencion.rango:
-            mes_ini, anio_ini, mes_fin, anio_fin = intencion.rango
-            range_months = (anio_fin - anio_ini) * 12 + (mes_fin - mes_ini) + 1
-            logger.info("[RANGO] Consulta abarca %d meses", range_months)
-
-        # Verificar cuota de Llama 3
-        has_quota = True
-        with self._get_session() as session:
-            from services.infrastructure.quota_manager import QuotaManager
-
-            quota = QuotaManager(session, self._familia_id)
-            has_quota = quota.can_use_llama3()
+        range_months = self._calcular_range_months(pregunta)
 
         request = AIRequest(
             pregunta=pregunta,
@@ -469,15 +569,12 @@ class AIController(BaseController):
             incluir_gastos_recientes=incluir_gastos,
         )
 
-        ctx = AIContext()
-        if incluir_gastos:
-            ctx = await self._construir_contexto(pregunta)
-
+        ctx, memoria_str, has_quota = await self._preparar_consulta(
+            pregunta, incluir_gastos
+        )
         self.last_context = ctx
         self.last_pregunta = pregunta
 
-        memoria_str = await self._buscar_memoria_vectorial(pregunta, ctx)
-
         # Determinar modelo para registro de cuota
         from services.ai.model_router import ModelRouter
 
@@ -490,6 +587,12 @@ class AIController(BaseController):
             range_months=range_months,
         )
 
+        desde_cache = False
+
+        def _marcar_desde_cache() -> None:
+            nonlocal desde_cache
+            desde_cache = True
+
         async for token in self.ai_service.consultar_stream(
             request,
             ctx=ctx,
@@ -497,9 +600,13 @@ class AIController(BaseController):
             has_quota=has_quota,
             from_history=from_history,
             range_months=range_months,
+            on_cache_hit=_marcar_desde_cache,
         ):
             yield token
 
+        if desde_cache:
+            return
+
         # Registrar uso después del stream
         with self._get_session() as session:
             from services.infrastructure.quota_manager import QuotaManager
@@ -510,6 +617,17 @@ class AIController(BaseController):
             else:
                 quota.register_gemma2_usage()
 
+    @staticmethod
+    def _calcular_range_months(pregunta: str) -> int:
+        """Cantidad de meses que abarca la pregunta (1 si no hay rango)."""
+        intencion = QueryAnalyzer.detectar_intenciones(pregunta)
+        if not intencion.rango:
+            return 1
+        mes_ini, anio_ini, mes_fin, anio_fin = intencion.rango
+        range_months = (anio_fin - anio_ini) * 12 + (mes_fin - mes_ini) + 1
+        logger.info("[RANGO] Consulta abarca %d meses", range_months)
+        return range_months
+
     def get_title(self) -> str:
         """Título de la vista"""
         return "🧮 Contador Oriental"
@@ -0,0 +1,107 @@
+"""
+Controller del Dashboard — balance del mes e historial en un solo round-trip.
+"""
+
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from controllers.base_controller import BaseController
+from controllers.history_controller import (
+    HistoryController,
+    HistoryData,
+    ultimos_meses,
+)
+from repositories.aggregation_repository import (
+    TIPO_GASTO,
+    AggregationRepository,
+    TotalAgrupado,
+    agrupar_por_mes,
+)
+
+MESES_HISTORIAL = 3
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    """Totales del mes por moneda y categoría, más el historial reciente."""
+
+    year: int
+    month: int
+    total_ingresos: dict[str, Decimal]
+    total_gastos: dict[str, Decimal]
+    ingresos_por_categoria: dict[tuple[str, str], Decimal]  # (categoría, moneda)
+    gastos_por_categoria: dict[tuple[str, str], Decimal]
+    historial: HistoryData
+
+    def ingresos(self, currency: str) -> Decimal:
+        return self.total_ingresos.get(currency, Decimal("0"))
+
+    def gastos(self, currency: str) -> Decimal:
+        return self.total_gastos.get(currency, Decimal("0"))
+
+    def balance(self, currency: str) -> Decimal:
+        return self.ingresos(currency) - self.gastos(currency)
+
+
+class DashboardController(BaseController):
+    """Controller para la vista del Dashboard."""
+
+    def get_title(self) -> str:
+        return "Dashboard"
+
+    def get_snapshot(self, year: int, month: int) -> DashboardSnapshot:
+        """
+        Totales del mes y de los meses previos con una única query agregada.
+
+        PostgreSQL agrupa por (mes, moneda, categoría); acá solo se reparten
+        las filas resultantes, sin materializar Expense/Income.
+        """
+        periodos = ultimos_meses(year, month, MESES_HISTORIAL)
+        anio_ini, mes_ini = periodos[-1]
+
+        with self._get_session() as session:
+            totales = AggregationRepository(
+                session, self._familia_id
+            ).totales_agrupados(
+                date(anio_ini, mes_ini, 1),
+                date(year, month, calendar.monthrange(year, month)[1]),
+            )
+        return self.armar_snapshot(year, month, periodos, totales)
+
+    @staticmethod
+    def armar_snapshot(
+        year: int,
+        month: int,
+        periodos: list[tuple[int, int]],
+        totales: list[TotalAgrupado],
+    ) -> DashboardSnapshot:
+        """Construir el snapshot a partir de totales ya agregados."""
+        del_mes = agrupar_por_mes(totales, [(year, month)])[(year, month)]
+
+        total_ingresos: dict[str, Decimal] = {}
+        total_gastos: dict[str, Decimal] = {}
+        ingresos_por_categoria: dict[tuple[str, str], Decimal] = {}
+        gastos_por_categoria: dict[tuple[str, str], Decimal] = {}
+
+        for t in del_mes:
+            if t.tipo == TIPO_GASTO:
+                por_moneda, por_categoria = total_gastos, gastos_por_categoria
+            else:
+                por_moneda, por_categoria = total_ingresos, ingresos_por_categoria
+            por_moneda[t.currency] = por_moneda.get(t.currency, Decimal("0")) + t.total
+            key = (t.categoria, t.currency)
+            por_categoria[key] = por_categoria.get(key, Decimal("0")) + t.total
+
+        return DashboardSnapshot(
+            year=year,
+            month=month,
+            total_ingresos=total_ingresos,
+            total_gastos=total_gastos,
+            ingresos_por_categoria=ingresos_por_categoria,
+            gastos_por_categoria=gastos_por_categoria,
+            historial=HistoryController.armar_historial(periodos, totales),
+        )
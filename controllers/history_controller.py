@@ -5,14 +5,18 @@ Python puro calcula todo, sin IA.
 
 from __future__ import annotations
 
+import calendar
 from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal
 
 from controllers.base_controller import BaseController
-from repositories.expense_repository import ExpenseRepository
-from repositories.income_repository import IncomeRepository
-from services.domain.income_service import IncomeService
+from repositories.aggregation_repository import (
+    TIPO_GASTO,
+    AggregationRepository,
+    TotalAgrupado,
+    agrupar_por_mes,
+)
 
 _MESES: dict[int, str] = {
     1: "Enero",
@@ -56,6 +60,19 @@ class HistoryData:
     variacion_gastos: Decimal | None  # % vs mes anterior, None si no hay (sobre UYU)
 
 
+def ultimos_meses(anio: int, mes: int, cantidad: int) -> list[tuple[int, int]]:
+    """(anio, mes) del mes indicado hacia atrás: [actual, anterior, ...]."""
+    periodos: list[tuple[int, int]] = []
+    for i in range(cantidad):
+        m = mes - i
+        a = anio
+        while m < 1:
+            m += 12
+            a -= 1
+        periodos.append((a, m))
+    return periodos
+
+
 class HistoryController(BaseController):
     """Controller para la vista de Historial Familiar."""
 
@@ -65,74 +82,78 @@ class HistoryController(BaseController):
     def get_last_3_months(self) -> HistoryData:
         """
         Obtiene resumen de los últimos 3 meses (mes actual y 2 anteriores).
-        Una sola sesión de DB para los 3 meses — sin IA, sin embeddings.
+        Una sola query agregada en PostgreSQL — sin IA, sin embeddings.
         """
         today = date.today()
-        meses: list[MonthSummary] = []
+        periodos = ultimos_meses(today.year, today.month, 3)
+        anio_ini, mes_ini = periodos[-1]
+        anio_fin, mes_fin = periodos[0]
 
-        # Una sola sesión para los 3 meses
         with self._get_session() as session:
-            expense_repo = ExpenseRepository(session, self._familia_id)
-            income_repo = IncomeRepository(session, self._familia_id)
-            income_service = IncomeService(income_repo)
-
-            for i in range(3):
-                # Mes actual, anterior, ante-anterior
-                mes = today.month - i
-                anio = today.year
-                while mes < 1:
-                    mes += 12
-                    anio -= 1
-
-                gastos = list(expense_repo.get_by_month(anio, mes))
-                # Usar IncomeService para incluir ingresos recurrentes
-                ingresos = income_service.list_for_month(anio, mes)
-
-                # Totales por moneda — nunca sumar monedas distintas
-                total_gastos: dict[str, Decimal] = {}
-                for g in gastos:
-                    total_gastos[g.currency] = (
-                        total_gastos.get(g.currency, Decimal("0")) + g.monto
-                    )
+            totales = AggregationRepository(
+                session, self._familia_id
+            ).totales_agrupados(
+                date(anio_ini, mes_ini, 1),
+                date(anio_fin, mes_fin, calendar.monthrange(anio_fin, mes_fin)[1]),
+            )
+        return self.armar_historial(periodos, totales)
 
-                total_ingresos: dict[str, Decimal] = {}
-                for i in ingresos:
-                    total_ingresos[i.currency] = (
-                        total_ingresos.get(i.currency, Decimal("0")) + i.monto
-                    )
+    @staticmethod
+    def armar_historial(
+        periodos: list[tuple[int, int]], totales: list[TotalAgrupado]
+    ) -> HistoryData:
+        """
+        Construir HistoryData a partir de totales ya agregados.
 
-                all_currencies = set(total_gastos.keys()) | set(total_ingresos.keys())
-                balance: dict[str, Decimal] = {}
-                for ccy in all_currencies:
-                    balance[ccy] = total_ingresos.get(
-                        ccy, Decimal("0")
-                    ) - total_gastos.get(ccy, Decimal("0"))
-
-                # Gastos por categoría y moneda
-                gastos_por_categoria: dict[str, dict[str, Decimal]] = {}
-                for g in gastos:
-                    cat = g.categoria.value
-                    if cat not in gastos_por_categoria:
-                        gastos_por_categoria[cat] = {}
-                    gastos_por_categoria[cat][g.currency] = (
-                        gastos_por_categoria[cat].get(g.currency, Decimal("0"))
-                        + g.monto
-                    )
+        Args:
+            periodos: Meses (anio, mes) del más reciente al más antiguo.
+            totales: Resultado de AggregationRepository.totales_agrupados.
+        """
+        por_mes = agrupar_por_mes(totales, periodos)
+        meses: list[MonthSummary] = []
 
-                label = f"{_MESES[mes]} {anio}"
-
-                meses.append(
-                    MonthSummary(
-                        year=anio,
-                        month=mes,
-                        label=label,
-                        total_gastos=total_gastos,
-                        total_ingresos=total_ingresos,
-                        balance=balance,
-                        gastos_por_categoria=gastos_por_categoria,
-                        cantidad_gastos=len(gastos),
+        for anio, mes in periodos:
+            total_gastos: dict[str, Decimal] = {}
+            total_ingresos: dict[str, Decimal] = {}
+            # Gastos por categoría y moneda
+            gastos_por_categoria: dict[str, dict[str, Decimal]] = {}
+            cantidad_gastos = 0
+
+            # Totales por moneda — nunca sumar monedas distintas
+            for t in por_mes[(anio, mes)]:
+                if t.tipo == TIPO_GASTO:
+                    total_gastos[t.currency] = (
+                        total_gastos.get(t.currency, Decimal("0")) + t.total
+                    )
+                    por_moneda = gastos_por_categoria.setdefault(t.categoria, {})
+                    por_moneda[t.currency] = (
+                        por_moneda.get(t.currency, Decimal("0")) + t.total
+                    )
+                    cantidad_gastos += t.cantidad
+                else:
+                    total_ingresos[t.currency] = (
+                        total_ingresos.get(t.currency, Decimal("0")) + t.total
                     )
+
+            all_currencies = set(total_gastos.keys()) | set(total_ingresos.keys())
+            balance: dict[str, Decimal] = {}
+            for ccy in all_currencies:
+                balance[ccy] = total_ingresos.get(ccy, Decimal("0")) - total_gastos.get(
+                    ccy, Decimal("0")
+                )
+
+            meses.append(
+                MonthSummary(
+                    year=anio,
+                    month=mes,
+                    label=f"{_MESES[mes]} {anio}",
+                    total_gastos=total_gastos,
+                    total_ingresos=total_ingresos,
+                    balance=balance,
+                    gastos_por_categoria=gastos_por_categoria,
+                    cantidad_gastos=cantidad_gastos,
                 )
+            )
 
         # Máximo gasto para normalizar barras (entre todas las monedas y meses)
         max_gasto = Decimal("1")
@@ -14,6 +14,7 @@ from controllers.base_controller import BaseController
 from models.errors import AppError
 from models.ticket_model import PartialExpense
 from repositories.expense_repository import ExpenseRepository
+from repositories.merchant_category_repository import MerchantCategoryRepository
 from services.ai.ai_advisor_service import AIAdvisorService
 from services.ai.embedding_service import EmbeddingService
 from services.infrastructure.ocr_service import OCRService
@@ -49,6 +50,7 @@ class OCRController(BaseController):
                 embedding_service=EmbeddingService(),
                 expense_repo=expense_repo,
                 ai_service=AIAdvisorService(),
+                merchant_repo=MerchantCategoryRepository(session, self._familia_id),
             )
             resultado = await ticket_service.procesar_ticket(
                 imagen_path,
@@ -60,3 +62,17 @@ class OCRController(BaseController):
             "ok" if hasattr(resultado, "ok") else "err",
         )
         return resultado
+
+    def sugerir_categoria(self, comercio: str) -> str | None:
+        """Categoría que la familia suele elegir para el comercio (o None)."""
+        with self._get_session() as session:
+            return MerchantCategoryRepository(session, self._familia_id).sugerir(
+                comercio
+            )
+
+    def aprender_categoria(self, comercio: str, categoria: str) -> None:
+        """Registrar la categoría confirmada para un gasto cargado por ticket."""
+        with self._get_session() as session:
+            MerchantCategoryRepository(session, self._familia_id).registrar(
+                comercio, categoria
+            )
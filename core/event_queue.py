@@ -0,0 +1,531 @@
+"""
+EventWorkerPool — Modo worker pool del EventSystem.
+
+En lugar de una task por evento (sin límite, sin reintentos), cada
+(evento, handler) es un trabajo que pasa por:
+- una asyncio.Queue acotada atendida por N workers (backpressure: una
+  importación masiva no dispara cientos de embeddings concurrentes),
+- reintentos con backoff exponencial + jitter si el handler falla,
+- un outbox en PostgreSQL (event_outbox) para que lo pendiente sobreviva
+  reinicios: al arrancar, y periódicamente, se reclaman las filas vencidas.
+
+Métricas: profundidad de cola, contadores y latencias p50/p95 de espera
+en cola y de ejecución (`EventWorkerPool.metrics()`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Coroutine, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any
+
+from core.events import AsyncHandler, Event, EventSystem, EventType, handler_key
+
+if TYPE_CHECKING:
+    from repositories.event_outbox_repository import (
+        EventOutboxRepository,
+        OutboxRow,
+    )
+
+logger = logging.getLogger(__name__)
+
+EVENT_WORKERS = int(os.getenv("EVENT_WORKERS", "2"))
+EVENT_QUEUE_MAX = int(os.getenv("EVENT_QUEUE_MAX", "256"))
+EVENT_MAX_INTENTOS = int(os.getenv("EVENT_MAX_INTENTOS", "5"))
+EVENT_BACKOFF_BASE = float(os.getenv("EVENT_BACKOFF_BASE_SECONDS", "2"))
+EVENT_BACKOFF_MAX = float(os.getenv("EVENT_BACKOFF_MAX_SECONDS", "300"))
+EVENT_OUTBOX_ENABLED = os.getenv("EVENT_OUTBOX_ENABLED", "true").lower() == "true"
+EVENT_OUTBOX_SWEEP_SECONDS = float(os.getenv("EVENT_OUTBOX_SWEEP_SECONDS", "30"))
+# Mientras un trabajo está en memoria su fila queda reservada este tiempo;
+# si el proceso muere, al vencer otro arranque la retoma.
+EVENT_OUTBOX_LEASE_SECONDS = float(os.getenv("EVENT_OUTBOX_LEASE_SECONDS", "600"))
+
+_MUESTRAS_LATENCIA = 1000
+
+
+def calcular_backoff(intento: int, base: float, maximo: float) -> float:
+    """Espera antes del reintento `intento` (1, 2, ...): exponencial con jitter."""
+    exponencial = min(maximo, base * (2 ** max(intento - 1, 0)))
+    return exponencial * random.uniform(0.5, 1.0)
+
+
+def _percentil(muestras: deque[float], p: float) -> float:
+    if not muestras:
+        return 0.0
+    ordenadas = sorted(muestras)
+    return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+@dataclass
+class _Trabajo:
+    event: Event
+    handler: AsyncHandler
+    intentos: int = 0
+    outbox_id: int | None = None
+    encolado_en: float = field(default_factory=time.monotonic)
+
+
+@dataclass(frozen=True)
+class EventQueueMetrics:
+    """Snapshot de métricas del pool (latencias en ms)."""
+
+    profundidad: int
+    capacidad: int
+    workers: int
+    encolados: int
+    procesados: int
+    reintentos: int
+    fallidos: int
+    diferidos: int  # cola llena: quedaron en el outbox para el próximo sweep
+    descartados: int  # cola llena sin outbox: se pierden
+    espera_p50_ms: float
+    espera_p95_ms: float
+    ejecucion_p50_ms: float
+    ejecucion_p95_ms: float
+
+
+class EventOutbox:
+    """
+    Persistencia de trabajos en event_outbox.
+
+    Cada operación abre su propio UnitOfWork; los errores de BD se loguean y
+    no rompen el pool (sin outbox el trabajo sigue vivo solo en memoria).
+    """
+
+    def __init__(self, lease_seg: float = EVENT_OUTBOX_LEASE_SECONDS) -> None:
+        self.lease_seg = lease_seg
+
+    def registrar(
+        self, event: Event, handlers: list[str], reclamado: bool
+    ) -> list[int] | None:
+        """Persistir un trabajo por handler; None si la BD no está disponible."""
+        try:
+            with _outbox_repo() as repo:
+                return repo.insertar(
+                    event_type=event.type.value,
+                    familia_id=event.familia_id,
+                    source_id=event.source_id,
+                    data=event.data,
+                    handlers=handlers,
+                    lease_seg=self.lease_seg if reclamado else 0,
+                )
+        except Exception as e:
+            logger.warning("[EVENT_OUTBOX] No se pudo persistir el evento: %s", e)
+            return None
+
+    def reclamar(self, limite: int) -> list[OutboxRow]:
+        try:
+            with _outbox_repo() as repo:
+                return repo.reclamar(limite, self.lease_seg)
+        except Exception as e:
+            logger.warning("[EVENT_OUTBOX] No se pudo leer el outbox: %s", e)
+            return []
+
+    def completar(self, outbox_id: int) -> None:
+        try:
+            with _outbox_repo() as repo:
+                repo.completar(outbox_id)
+        except Exception as e:
+            logger.warning(
+                "[EVENT_OUTBOX] No se pudo completar id=%s: %s", outbox_id, e
+            )
+
+    def reprogramar(
+        self, outbox_id: int, intentos: int, delay_seg: float, error: str
+    ) -> None:
+        try:
+            with _outbox_repo() as repo:
+                repo.reprogramar(outbox_id, intentos, delay_seg, error)
+        except Exception as e:
+            logger.warning(
+                "[EVENT_OUTBOX] No se pudo reprogramar id=%s: %s", outbox_id, e
+            )
+
+    def marcar_fallido(self, outbox_id: int, intentos: int, error: str) -> None:
+        try:
+            with _outbox_repo() as repo:
+                repo.marcar_fallido(outbox_id, intentos, error)
+        except Exception as e:
+            logger.warning(
+                "[EVENT_OUTBOX] No se pudo marcar fallido id=%s: %s", outbox_id, e
+            )
+
+
+@contextmanager
+def _outbox_repo() -> Iterator[EventOutboxRepository]:
+    """UnitOfWork + EventOutboxRepository (commit al salir)."""
+    from core.unit_of_work import UnitOfWork
+    from repositories.event_outbox_repository import EventOutboxRepository
+
+    with UnitOfWork() as uow:
+        yield EventOutboxRepository(uow.session)
+
+
+class EventWorkerPool:
+    """
+    Cola acotada + N workers para los handlers del EventSystem.
+
+    Uso:
+        pool = EventWorkerPool(event_system, outbox=EventOutbox())
+        await pool.start()
+        event_system.attach_worker_pool(pool)
+        ...
+        await pool.stop()
+
+    `submit` es thread-safe: los controllers síncronos pueden llamarlo desde
+    cualquier hilo; el trabajo se encola en el loop del pool.
+    """
+
+    def __init__(
+        self,
+        event_system: EventSystem,
+        workers: int = EVENT_WORKERS,
+        max_queue: int = EVENT_QUEUE_MAX,
+        max_intentos: int = EVENT_MAX_INTENTOS,
+        backoff_base: float = EVENT_BACKOFF_BASE,
+        backoff_max: float = EVENT_BACKOFF_MAX,
+        outbox: EventOutbox | None = None,
+        sweep_interval: float = EVENT_OUTBOX_SWEEP_SECONDS,
+    ) -> None:
+        self.event_system = event_system
+        self.workers = max(workers, 1)
+        self.max_queue = max(max_queue, 1)
+        self.max_intentos = max(max_intentos, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.outbox = outbox
+        self.sweep_interval = sweep_interval
+
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._queue: asyncio.Queue[_Trabajo] | None = None
+        self._tasks: list[asyncio.Task[None]] = []
+        self._start_lock = threading.Lock()
+        self._en_fondo: set[asyncio.Task[None]] = set()
+
+        self._encolados = 0
+        self._procesados = 0
+        self._reintentos = 0
+        self._fallidos = 0
+        self._diferidos = 0
+        self._descartados = 0
+        self._espera_ms: deque[float] = deque(maxlen=_MUESTRAS_LATENCIA)
+        self._ejecucion_ms: deque[float] = deque(maxlen=_MUESTRAS_LATENCIA)
+
+    @property
+    def activo(self) -> bool:
+        return self._loop is not None and not self._loop.is_closed()
+
+    async def start(self) -> None:
+        """Arrancar workers (y sweep del outbox) en el loop actual. Idempotente."""
+        loop = asyncio.get_running_loop()
+        with self._start_lock:
+            if self._loop is loop:
+                return
+            self._loop = loop
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._tasks = [
+                loop.create_task(self._worker(), name=f"event-worker-{i}")
+                for i in range(self.workers)
+            ]
+            if self.outbox is not None:
+                # El primer sweep recupera lo pendiente de ejecuciones anteriores
+                self._tasks.append(
+                    loop.create_task(self._sweep_loop(), name="event-outbox-sweep")
+                )
+        logger.info(
+            "[EVENT_QUEUE] Pool iniciado: workers=%d capacidad=%d outbox=%s",
+            self.workers,
+            self.max_queue,
+            self.outbox is not None,
+        )
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """
+        Esperar hasta `timeout` a que se vacíe la cola y cancelar los workers.
+        Lo que quede sin procesar sigue en el outbox para el próximo arranque.
+        """
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self.join(), timeout)
+            except TimeoutError:
+                logger.warning(
+                    "[EVENT_QUEUE] Stop con %d trabajos en cola", self._queue.qsize()
+                )
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+        self._queue = None
+
+    async def join(self) -> None:
+        """
+        Esperar a que la cola quede vacía (útil en tests y scripts),
+        incluidos los eventos que todavía se están registrando en el outbox.
+        """
+        while self._en_fondo:
+            await asyncio.gather(*self._en_fondo, return_exceptions=True)
+        if self._queue is not None:
+            await self._queue.join()
+
+    def submit(self, event: Event) -> None:
+        """
+        Encolar un trabajo por cada handler suscripto al evento.
+
+        Con el pool activo, el INSERT en el outbox corre en un hilo desde el
+        loop del pool: publicar nunca espera a PostgreSQL. Sin pool solo queda
+        el outbox (sin reserva) y se escribe en el hilo de quien publica.
+        """
+        handlers = self.event_system.handlers_for(event.type)
+        if not handlers:
+            return
+
+        loop = self._loop
+        if not self.activo or loop is None:
+            if (
+                self.outbox is None
+                or self.outbox.registrar(
+                    event, [handler_key(h) for h in handlers], False
+                )
+                is None
+            ):
+                logger.warning(
+                    "[EVENT_QUEUE] Pool inactivo y sin outbox: evento '%s' perdido",
+                    event.type.value,
+                )
+            return
+
+        if _en_loop(loop):
+            self._aceptar(event, handlers)
+        else:
+            loop.call_soon_threadsafe(self._aceptar, event, handlers)
+
+    def metrics(self) -> EventQueueMetrics:
+        """Snapshot de las métricas actuales."""
+        return EventQueueMetrics(
+            profundidad=self._queue.qsize() if self._queue is not None else 0,
+            capacidad=self.max_queue,
+            workers=self.workers,
+            encolados=self._encolados,
+            procesados=self._procesados,
+            reintentos=self._reintentos,
+            fallidos=self._fallidos,
+            diferidos=self._diferidos,
+            descartados=self._descartados,
+            espera_p50_ms=_percentil(self._espera_ms, 0.50),
+            espera_p95_ms=_percentil(self._espera_ms, 0.95),
+            ejecucion_p50_ms=_percentil(self._ejecucion_ms, 0.50),
+            ejecucion_p95_ms=_percentil(self._ejecucion_ms, 0.95),
+        )
+
+    # ------------------------------------------------------------------
+    # Internos (siempre en el loop del pool)
+    # ------------------------------------------------------------------
+
+    def _aceptar(self, event: Event, handlers: list[AsyncHandler]) -> None:
+        if self.outbox is None:
+            for handler in handlers:
+                self._encolar(_Trabajo(event=event, handler=handler))
+            return
+        self._seguir(self._registrar_y_encolar(event, handlers))
+
+    async def _registrar_y_encolar(
+        self, event: Event, handlers: list[AsyncHandler]
+    ) -> None:
+        assert self.outbox is not None
+        ids = await asyncio.to_thread(
+            self.outbox.registrar, event, [handler_key(h) for h in handlers], True
+        )
+        for i, handler in enumerate(handlers):
+            self._encolar(
+                _Trabajo(
+                    event=event,
+                    handler=handler,
+                    outbox_id=ids[i] if ids is not None else None,
+                )
+            )
+
+    def _encolar(self, trabajo: _Trabajo) -> None:
+        if self._queue is None:
+            return
+        trabajo.encolado_en = time.monotonic()
+        try:
+            self._queue.put_nowait(trabajo)
+            self._encolados += 1
+        except asyncio.QueueFull:
+            if trabajo.outbox_id is None:
+                self._descartados += 1
+                logger.warning(
+                    "[EVENT_QUEUE] Cola llena (%d): evento '%s' descartado",
+                    self.max_queue,
+                    trabajo.event.type.value,
+                )
+                return
+            # Liberar la fila para que la retome el próximo sweep
+            self._diferidos += 1
+            assert self.outbox is not None
+            self._en_segundo_plano(
+                self.outbox.reprogramar,
+                trabajo.outbox_id,
+                trabajo.intentos,
+                0,
+                "cola llena",
+            )
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        queue = self._queue
+        while True:
+            trabajo = await queue.get()
+            try:
+                await self._ejecutar(trabajo)
+            except Exception as e:  # nunca matar al worker
+                logger.error("[EVENT_QUEUE] Error interno del worker: %s", e)
+            finally:
+                queue.task_done()
+
+    async def _ejecutar(self, trabajo: _Trabajo) -> None:
+        self._espera_ms.append((time.monotonic() - trabajo.encolado_en) * 1000)
+        inicio = time.perf_counter()
+        try:
+            await trabajo.handler(trabajo.event)
+        except Exception as e:
+            self._ejecucion_ms.append((time.perf_counter() - inicio) * 1000)
+            await self._registrar_fallo(trabajo, e)
+            return
+        self._ejecucion_ms.append((time.perf_counter() - inicio) * 1000)
+        self._procesados += 1
+        if trabajo.outbox_id is not None and self.outbox is not None:
+            await asyncio.to_thread(self.outbox.completar, trabajo.outbox_id)
+
+    async def _registrar_fallo(self, trabajo: _Trabajo, error: Exception) -> None:
+        trabajo.intentos += 1
+        mensaje = f"{type(error).__name__}: {error}"[:500]
+
+        if trabajo.intentos >= self.max_intentos:
+            self._fallidos += 1
+            logger.error(
+                "[EVENT_QUEUE] Trabajo fallido tras %d intentos: "
+                "familia_id=%s event_type=%s handler=%s error=%s",
+                trabajo.intentos,
+                trabajo.event.familia_id,
+                trabajo.event.type.value,
+                handler_key(trabajo.handler),
+                mensaje,
+            )
+            if trabajo.outbox_id is not None and self.outbox is not None:
+                await asyncio.to_thread(
+                    self.outbox.marcar_fallido,
+                    trabajo.outbox_id,
+                    trabajo.intentos,
+                    mensaje,
+                )
+            return
+
+        self._reintentos += 1
+        delay = calcular_backoff(trabajo.intentos, self.backoff_base, self.backoff_max)
+        logger.warning(
+            "[EVENT_QUEUE] Reintento %d/%d en %.1fs: event_type=%s handler=%s error=%s",
+            trabajo.intentos,
+            self.max_intentos - 1,
+            delay,
+            trabajo.event.type.value,
+            handler_key(trabajo.handler),
+            mensaje,
+        )
+        if trabajo.outbox_id is not None and self.outbox is not None:
+            # La fila queda reservada mientras el reintento vive en memoria
+            await asyncio.to_thread(
+                self.outbox.reprogramar,
+                trabajo.outbox_id,
+                trabajo.intentos,
+                delay + self.outbox.lease_seg,
+                mensaje,
+            )
+        assert self._loop is not None
+        self._loop.call_later(delay, self._encolar, trabajo)
+
+    async def _sweep_loop(self) -> None:
+        while True:
+            try:
+                await self._sweep()
+            except Exception as e:
+                logger.warning("[EVENT_OUTBOX] Error en sweep: %s", e)
+            await asyncio.sleep(self.sweep_interval)
+
+    async def _sweep(self) -> None:
+        """Reclamar filas vencidas del outbox hasta llenar la cola."""
+        if self.outbox is None or self._queue is None:
+            return
+        libres = self.max_queue - self._queue.qsize()
+        filas = await asyncio.to_thread(self.outbox.reclamar, libres)
+        for fila in filas:
+            handler = self._resolver_handler(fila)
+            if handler is None:
+                logger.warning(
+                    "[EVENT_OUTBOX] Handler '%s' no registrado; id=%s se pospone",
+                    fila.handler,
+                    fila.id,
+                )
+                self._en_segundo_plano(
+                    self.outbox.reprogramar,
+                    fila.id,
+                    fila.intentos,
+                    self.backoff_max,
+                    "handler no registrado",
+                )
+                continue
+            event = Event(
+                type=EventType(fila.event_type),
+                familia_id=fila.familia_id,
+                data=fila.data,
+                source_id=fila.source_id,
+            )
+            self._encolar(
+                _Trabajo(
+                    event=event,
+                    handler=handler,
+                    intentos=fila.intentos,
+                    outbox_id=fila.id,
+                )
+            )
+        if filas:
+            logger.info("[EVENT_OUTBOX] %d trabajos recuperados", len(filas))
+
+    def _resolver_handler(self, fila: OutboxRow) -> AsyncHandler | None:
+        try:
+            event_type = EventType(fila.event_type)
+        except ValueError:
+            return None
+        for handler in self.event_system.handlers_for(event_type):
+            if handler_key(handler) == fila.handler:
+                return handler
+        return None
+
+    def _en_segundo_plano(self, fn: Callable[..., None], *args: object) -> None:
+        """Operación de outbox en un hilo, sin bloquear el loop."""
+        self._seguir(asyncio.to_thread(fn, *args))
+
+    def _seguir(self, coro: Coroutine[Any, Any, None]) -> None:
+        """Crear una task en el loop del pool y retenerla hasta que termine."""
+        if self._loop is None:
+            coro.close()
+            return
+        task = self._loop.create_task(coro)
+        self._en_fondo.add(task)
+        task.add_done_callback(self._en_fondo.discard)
+
+
+def _en_loop(loop: asyncio.AbstractEventLoop) -> bool:
+    try:
+        return asyncio.get_running_loop() is loop
+    except RuntimeError:
+        return False
@@ -11,7 +11,10 @@ import logging
 from collections.abc import Callable, Coroutine
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from core.event_queue import EventWorkerPool
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +45,19 @@ class Event:
 AsyncHandler = Callable[[Event], Coroutine[Any, Any, None]]
 
 
+class EventoReintentable(Exception):
+    """
+    Fallo transitorio de un handler (ej: Ollama caído).
+    En modo worker pool el trabajo se reintenta con backoff; en modo
+    fire-and-forget solo se loguea.
+    """
+
+
+def handler_key(handler: AsyncHandler) -> str:
+    """Nombre estable de un handler, usado para persistirlo en el outbox."""
+    return f"{handler.__module__}.{handler.__qualname__}"
+
+
 class EventSystem:
     """
     Sistema de eventos async con patrón Observer.
@@ -50,6 +66,7 @@ class EventSystem:
 
     def __init__(self) -> None:
         self._handlers: dict[EventType, list[AsyncHandler]] = {}
+        self._worker_pool: EventWorkerPool | None = None
 
     def subscribe(self, event_type: EventType, handler: AsyncHandler) -> None:
         """Suscribir un handler async a un tipo de evento."""
@@ -74,11 +91,26 @@ class EventSystem:
         ]
         await asyncio.gather(*tasks, return_exceptions=True)
 
+    def handlers_for(self, event_type: EventType) -> list[AsyncHandler]:
+        """Handlers suscriptos a un tipo de evento (copia)."""
+        return list(self._handlers.get(event_type, []))
+
+    def attach_worker_pool(self, pool: EventWorkerPool | None) -> None:
+        """
+        Activar (o desactivar con None) el modo worker pool: fire_and_forget
+        encola en el pool acotado en lugar de crear una task por evento.
+        """
+        self._worker_pool = pool
+
     def fire_and_forget(self, event: Event) -> None:
         """
         Publicar evento sin await (fire-and-forget seguro).
         Usar en contextos síncronos o cuando no se quiere esperar.
+        Con worker pool activo, el evento va a su cola (y al outbox).
         """
+        if self._worker_pool is not None:
+            self._worker_pool.submit(event)
+            return
         try:
             loop = asyncio.get_running_loop()
             loop.create_task(_publish_safe(self, event))
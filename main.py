@@ -25,18 +25,28 @@ if _secret == _SECRET_KEY_DEFAULT or not _secret:
     )
 
 
+_memory_observer_activo = False
+
+
 def _setup_memory_observer() -> None:
     """
     Suscribir el MemoryEventHandler al sistema de eventos.
     Esto activa la memoria vectorial automática al guardar gastos.
     Se omite silenciosamente si MEMORY_SERVICE_ENABLED=false.
+    Idempotente: cada sesión de Flet lo llama, pero los handlers se suscriben
+    una vez por proceso (el outbox los identifica por handler_key).
     """
+    global _memory_observer_activo
+    if _memory_observer_activo:
+        return
+
     if not AppConfig.MEMORY_SERVICE_ENABLED:
         logger.info(
             "[MEMORY] Servicio de memoria deshabilitado (MEMORY_SERVICE_ENABLED=false)"
         )
         return
 
+    _memory_observer_activo = True
     try:
         from core.sqlalchemy_session import get_db_session
         from repositories.memoria_repository import MemoriaRepository
@@ -80,6 +90,61 @@ def _setup_memory_observer() -> None:
         logger.warning("[MEMORY] No se pudo inicializar el observer: %s", str(e))
 
 
+_event_worker_pool = None
+
+
+async def _start_event_worker_pool() -> None:
+    """
+    Pasar los handlers del EventSystem a un worker pool acotado con
+    reintentos y outbox en PostgreSQL. Idempotente: todas las sesiones de
+    Flet comparten el mismo pool. EVENT_WORKERS=0 mantiene fire-and-forget.
+    """
+    global _event_worker_pool
+    from core.event_queue import (
+        EVENT_OUTBOX_ENABLED,
+        EVENT_WORKERS,
+        EventOutbox,
+        EventWorkerPool,
+    )
+
+    if EVENT_WORKERS <= 0:
+        logger.info("[EVENT_QUEUE] Worker pool deshabilitado (EVENT_WORKERS=0)")
+        return
+
+    if _event_worker_pool is None:
+        _event_worker_pool = EventWorkerPool(
+            event_system,
+            outbox=EventOutbox() if EVENT_OUTBOX_ENABLED else None,
+        )
+    await _event_worker_pool.start()
+    event_system.attach_worker_pool(_event_worker_pool)
+
+
+async def _detener_event_worker_pool() -> None:
+    """
+    Volver a fire-and-forget y dar a los workers unos segundos para vaciar
+    la cola; lo que quede sigue en el outbox para el próximo arranque.
+    """
+    if _event_worker_pool is None:
+        return
+    event_system.attach_worker_pool(None)
+    await _event_worker_pool.stop()
+
+
+async def _cerrar_clientes_ia() -> None:
+    """
+    Escribir los embeddings que esperan su ventana y cerrar los pools HTTP
+    compartidos de IA (Ollama, NVIDIA, embeddings).
+    """
+    from services.ai.embedding_service import close_http_client
+    from services.ai.embedding_writer import embedding_writer
+    from services.infrastructure.ai_clients import ai_clients
+
+    await embedding_writer.cerrar()
+    await ai_clients.cerrar()
+    await close_http_client()
+
+
 async def main(page: ft.Page):
     try:
         page.title = "Contador Oriental"
@@ -100,6 +165,17 @@ async def main(page: ft.Page):
         # Activar memoria vectorial (Observer Pattern)
         _setup_memory_observer()
 
+        # Gastos e ingresos nuevos invalidan las respuestas cacheadas (idempotente)
+        from services.ai.answer_cache import answer_cache
+
+        answer_cache.suscribir(event_system)
+        await _start_event_worker_pool()
+
+        # Fragmentar y vectorizar ./knowledge una vez por proceso (idempotente)
+        from services.ai.knowledge_index import knowledge_index
+
+        page.run_task(knowledge_index.construir)
+
         # Iniciar scheduler de cotización USD/UYU en background
         from services.infrastructure.exchange_rate_scheduler import (
             exchange_rate_scheduler,
@@ -231,16 +307,29 @@ async def main(page: ft.Page):
         GlobalErrorHandler.handle(page, e)
 
 
+async def _servir(**opciones) -> None:
+    """
+    Correr la app y, al terminar el proceso (ventana cerrada en desktop,
+    SIGTERM/SIGINT en web), vaciar los eventos y los embeddings pendientes.
+    Los clientes viven lo que el proceso y se comparten entre sesiones.
+    """
+    try:
+        await ft.run_async(main, assets_dir="assets", **opciones)
+    finally:
+        await _detener_event_worker_pool()
+        await _cerrar_clientes_ia()
+
+
 # Detectar si estamos en Docker (modo web) o local (modo desktop)
 # Si existe POSTGRES_HOST, estamos en Docker
 if os.getenv("POSTGRES_HOST"):
-    ft.run(
-        main,
-        assets_dir="assets",
-        view=ft.AppView.WEB_BROWSER,
-        port=int(os.getenv("APP_PORT", "8550")),
-        host="0.0.0.0",
+    asyncio.run(
+        _servir(
+            view=ft.AppView.WEB_BROWSER,
+            port=int(os.getenv("APP_PORT", "8550")),
+            host="0.0.0.0",
+        )
     )
 else:
     # Modo desktop para desarrollo local
-    ft.run(main, assets_dir="assets")
+    asyncio.run(_servir())
@@ -0,0 +1,23 @@
+"""
+Migration: add_embedding_cache
+Created at: 2026-10-17
+Adds embedding_cache table: persistent tier of the content-addressed
+embedding cache (model + sha256 of the normalized text).
+"""
+
+
+def up(db):
+    db.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS embedding_cache (
+            model VARCHAR(100) NOT NULL,
+            text_hash CHAR(64) NOT NULL,
+            embedding vector(768) NOT NULL,
+            created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (model, text_hash)
+        )
+    """)
+
+
+def down(db):
+    db.execute("DROP TABLE IF EXISTS embedding_cache")
@@ -0,0 +1,167 @@
+"""
+Migration: add_incremental_monthly_snapshots
+Created at: 2026-10-17
+Keeps monthly_expense_snapshots up to date incrementally.
+
+- monthly_snapshot_estado: one row per materialized (familia, anio, mes),
+  with a dirty flag.
+- Trigger on expenses (INSERT/UPDATE/DELETE): applies +/- deltas to the
+  snapshot of every already-materialized month touched by the row, or marks
+  the month dirty when it was never materialized or a delta cannot be
+  applied safely.
+- Dirty or missing months are recomputed lazily on read
+  (MonthlySnapshotRepository.asegurar_meses).
+"""
+
+
+def up(db):
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS monthly_snapshot_estado (
+            familia_id INTEGER NOT NULL,
+            anio INTEGER NOT NULL,
+            mes INTEGER NOT NULL,
+            dirty BOOLEAN NOT NULL DEFAULT FALSE,
+            actualizado_en TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (familia_id, anio, mes)
+        )
+    """)
+
+    # Los snapshots previos no se conocen consistentes: se recalculan al leerlos
+    db.execute("""
+        INSERT INTO monthly_snapshot_estado (familia_id, anio, mes, dirty)
+        SELECT DISTINCT familia_id, anio, mes, TRUE
+        FROM monthly_expense_snapshots
+        ON CONFLICT (familia_id, anio, mes) DO NOTHING
+    """)
+
+    db.execute("""
+        CREATE OR REPLACE FUNCTION monthly_snapshot_aplicar_delta(
+            p_familia_id INTEGER,
+            p_fecha DATE,
+            p_categoria VARCHAR,
+            p_monto NUMERIC,
+            p_cantidad INTEGER
+        ) RETURNS VOID AS $$
+        DECLARE
+            v_anio INTEGER;
+            v_mes INTEGER;
+            v_dirty BOOLEAN;
+        BEGIN
+            v_anio := EXTRACT(YEAR FROM p_fecha);
+            v_mes := EXTRACT(MONTH FROM p_fecha);
+
+            SELECT dirty INTO v_dirty
+            FROM monthly_snapshot_estado
+            WHERE familia_id = p_familia_id AND anio = v_anio AND mes = v_mes
+            FOR UPDATE;
+
+            -- Mes ya sucio: se recalcula entero al leerlo
+            IF FOUND AND v_dirty THEN
+                RETURN;
+            END IF;
+
+            -- Mes nunca materializado: dejarlo marcado (y bloqueado hasta el
+            -- commit) para que un recálculo concurrente espere a esta fila
+            IF NOT FOUND THEN
+                INSERT INTO monthly_snapshot_estado (familia_id, anio, mes, dirty)
+                VALUES (p_familia_id, v_anio, v_mes, TRUE)
+                ON CONFLICT (familia_id, anio, mes) DO UPDATE SET dirty = TRUE;
+                RETURN;
+            END IF;
+
+            IF p_cantidad > 0 THEN
+                INSERT INTO monthly_expense_snapshots
+                    (familia_id, anio, mes, categoria, total_dinero,
+                     cantidad_compras, ticket_promedio)
+                VALUES
+                    (p_familia_id, v_anio, v_mes, p_categoria, p_monto,
+                     p_cantidad, ROUND(p_monto / p_cantidad, 2))
+                ON CONFLICT (familia_id, anio, mes, categoria) DO UPDATE SET
+                    total_dinero = monthly_expense_snapshots.total_dinero
+                        + EXCLUDED.total_dinero,
+                    cantidad_compras = monthly_expense_snapshots.cantidad_compras
+                        + EXCLUDED.cantidad_compras,
+                    ticket_promedio = ROUND(
+                        (monthly_expense_snapshots.total_dinero
+                            + EXCLUDED.total_dinero)
+                        / (monthly_expense_snapshots.cantidad_compras
+                            + EXCLUDED.cantidad_compras),
+                        2
+                    ),
+                    created_at = CURRENT_TIMESTAMP;
+                RETURN;
+            END IF;
+
+            UPDATE monthly_expense_snapshots SET
+                total_dinero = total_dinero + p_monto,
+                cantidad_compras = cantidad_compras + p_cantidad,
+                ticket_promedio = CASE
+                    WHEN cantidad_compras + p_cantidad > 0
+                    THEN ROUND(
+                        (total_dinero + p_monto) / (cantidad_compras + p_cantidad),
+                        2
+                    )
+                    ELSE 0
+                END,
+                created_at = CURRENT_TIMESTAMP
+            WHERE familia_id = p_familia_id
+              AND anio = v_anio
+              AND mes = v_mes
+              AND categoria = p_categoria
+              AND cantidad_compras + p_cantidad >= 0;
+
+            IF NOT FOUND THEN
+                -- Snapshot inconsistente con el delta: recalcular el mes entero
+                UPDATE monthly_snapshot_estado SET dirty = TRUE
+                WHERE familia_id = p_familia_id AND anio = v_anio AND mes = v_mes;
+                RETURN;
+            END IF;
+
+            DELETE FROM monthly_expense_snapshots
+            WHERE familia_id = p_familia_id
+              AND anio = v_anio
+              AND mes = v_mes
+              AND categoria = p_categoria
+              AND cantidad_compras = 0;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    db.execute("""
+        CREATE OR REPLACE FUNCTION monthly_snapshot_expenses_trigger()
+        RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM monthly_snapshot_aplicar_delta(
+                    OLD.familia_id, OLD.fecha, OLD.categoria, -OLD.monto, -1
+                );
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                PERFORM monthly_snapshot_aplicar_delta(
+                    NEW.familia_id, NEW.fecha, NEW.categoria, NEW.monto, 1
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    db.execute("DROP TRIGGER IF EXISTS trg_expenses_monthly_snapshot ON expenses")
+    # Solo columnas que afectan al snapshot: guardar embeddings no dispara nada
+    db.execute("""
+        CREATE TRIGGER trg_expenses_monthly_snapshot
+        AFTER INSERT OR DELETE OR UPDATE OF familia_id, fecha, categoria, monto
+        ON expenses
+        FOR EACH ROW
+        EXECUTE FUNCTION monthly_snapshot_expenses_trigger()
+    """)
+
+
+def down(db):
+    db.execute("DROP TRIGGER IF EXISTS trg_expenses_monthly_snapshot ON expenses")
+    db.execute("DROP FUNCTION IF EXISTS monthly_snapshot_expenses_trigger()")
+    db.execute(
+        "DROP FUNCTION IF EXISTS "
+        "monthly_snapshot_aplicar_delta(INTEGER, DATE, VARCHAR, NUMERIC, INTEGER)"
+    )
+    db.execute("DROP TABLE IF EXISTS monthly_snapshot_estado")
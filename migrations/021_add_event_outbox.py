@@ -0,0 +1,35 @@
+"""
+Migration: add_event_outbox
+Created at: 2026-10-17
+Adds event_outbox: durable queue for EventSystem handlers in worker-pool
+mode. One row per (event, handler); rows are deleted once the handler
+succeeds, retried with backoff, or left as 'fallido' after max attempts.
+"""
+
+
+def up(db):
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS event_outbox (
+            id BIGSERIAL PRIMARY KEY,
+            event_type VARCHAR(50) NOT NULL,
+            familia_id INTEGER NOT NULL,
+            source_id INTEGER,
+            data JSONB NOT NULL DEFAULT '{}'::jsonb,
+            handler VARCHAR(255) NOT NULL,
+            estado VARCHAR(20) NOT NULL DEFAULT 'pendiente',
+            intentos INTEGER NOT NULL DEFAULT 0,
+            disponible_en TIMESTAMP NOT NULL DEFAULT NOW(),
+            ultimo_error TEXT,
+            created_at TIMESTAMP NOT NULL DEFAULT NOW()
+        )
+    """)
+    # Índice parcial: el sweep solo mira filas pendientes vencidas
+    db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_event_outbox_pendientes
+        ON event_outbox (disponible_en)
+        WHERE estado = 'pendiente'
+    """)
+
+
+def down(db):
+    db.execute("DROP TABLE IF EXISTS event_outbox")
@@ -0,0 +1,19 @@
+"""
+Migration: add_expenses_sin_embedding_index
+Created at: 2026-10-17
+Partial index over expenses.id for rows still missing an embedding: the
+backfill walks them by keyset (id > last_id ORDER BY id) without scanning
+the rows that are already vectorized.
+"""
+
+
+def up(db):
+    db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_expenses_sin_embedding
+        ON expenses (id)
+        WHERE embedding IS NULL
+    """)
+
+
+def down(db):
+    db.execute("DROP INDEX IF EXISTS idx_expenses_sin_embedding")
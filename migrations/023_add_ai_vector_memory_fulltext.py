@@ -0,0 +1,25 @@
+"""
+Migration: add_ai_vector_memory_fulltext
+Created at: 2026-10-17
+Adds a full-text column to ai_vector_memory for hybrid retrieval:
+content_tsv is a stored generated tsvector (Spanish config) with a GIN
+index, so exact terms like merchant names ("Tienda Inglesa", "UTE") are
+matched lexically and fused with the HNSW cosine ranking.
+"""
+
+
+def up(db):
+    db.execute("""
+        ALTER TABLE ai_vector_memory
+        ADD COLUMN IF NOT EXISTS content_tsv tsvector
+        GENERATED ALWAYS AS (to_tsvector('spanish', content)) STORED
+    """)
+    db.execute("""
+        CREATE INDEX IF NOT EXISTS idx_ai_vector_memory_content_tsv
+        ON ai_vector_memory USING gin (content_tsv)
+    """)
+
+
+def down(db):
+    db.execute("DROP INDEX IF EXISTS idx_ai_vector_memory_content_tsv")
+    db.execute("ALTER TABLE ai_vector_memory DROP COLUMN IF EXISTS content_tsv")
@@ -0,0 +1,24 @@
+"""
+Migration: add_merchant_categories
+Created at: 2026-10-17
+Adds merchant_categories: per-family memo of the category the user chose
+for each merchant when confirming a ticket. TicketService looks it up
+before falling back to the cosine search over expenses.embedding.
+"""
+
+
+def up(db):
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS merchant_categories (
+            familia_id INTEGER NOT NULL,
+            comercio VARCHAR(200) NOT NULL,
+            categoria VARCHAR(100) NOT NULL,
+            veces INTEGER NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP NOT NULL DEFAULT NOW(),
+            PRIMARY KEY (familia_id, comercio, categoria)
+        )
+    """)
+
+
+def down(db):
+    db.execute("DROP TABLE IF EXISTS merchant_categories")
@@ -186,6 +186,9 @@ class AIResponse(BaseModel):
     gastos_incluidos: int = Field(
         default=0, description="Cantidad de gastos incluidos en el contexto"
     )
+    desde_cache: bool = Field(
+        default=False, description="Respuesta servida por el AnswerCache"
+    )
     timestamp: datetime = Field(default_factory=datetime.now)
 
     def __str__(self) -> str:
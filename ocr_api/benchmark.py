@@ -0,0 +1,309 @@
+"""Benchmarks del OCR.
+
+Uso:
+    python -m ocr_api.benchmark preproceso carpeta_con_tickets/ [--repeticiones 3]
+    python -m ocr_api.benchmark pipeline [--tickets 40] [--workers 4]
+
+preproceso: para cada imagen (jpg/png/webp) de la carpeta decodifica una vez
+y corre los dos pipelines + Tesseract:
+- anterior:   ampliación 2x fija + filtros
+- adaptativo: recorte al ticket + ancho objetivo + filtros
+Reporta por ticket el tamaño de trabajo, los tiempos de preproceso y de
+Tesseract (mediana de las repeticiones) y la confianza media, y al final
+los promedios de cada pipeline.
+
+pipeline: genera un corpus de tickets sintéticos (corpus_sintetico) y lo
+pasa completo por decodificación, preproceso, Tesseract y parseo (reglas +
+un LLM simulado, sin Ollama) en un pool de procesos como el del servicio.
+Reporta throughput, p50/p95 por etapa, RSS pico y la precisión de monto,
+fecha y comercio contra los datos con que se dibujó cada ticket.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import cv2
+
+from ocr_api.corpus_sintetico import (
+    TicketSintetico,
+    generar_corpus,
+    guardar_corpus,
+)
+from ocr_api.ocr_engine import (
+    aplicar_filtros,
+    decodificar_imagen,
+    ejecutar_tesseract,
+    inicializar_worker,
+    preprocesar_imagen,
+)
+from ocr_api.ticket_parser import parsear_ticket
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    import numpy as np
+
+_EXTENSIONES = {".jpg", ".jpeg", ".png", ".webp"}
+ETAPAS = ("decodificacion", "preproceso", "tesseract", "parseo")
+
+
+def preproceso_anterior(img: np.ndarray) -> np.ndarray:
+    """Pipeline previo: siempre 2x con INTER_CUBIC antes de los filtros."""
+    return aplicar_filtros(
+        cv2.resize(img, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
+    )
+
+
+PIPELINES: dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    "anterior": preproceso_anterior,
+    "adaptativo": preprocesar_imagen,
+}
+
+
+@dataclass(frozen=True)
+class Medicion:
+    pipeline: str
+    ticket: str
+    megapixeles: float
+    preproceso_ms: float
+    tesseract_ms: float
+    confianza: float
+
+
+def medir(nombre: str, img: np.ndarray, pipeline: str, repeticiones: int) -> Medicion:
+    preprocesar = PIPELINES[pipeline]
+    pre_ms: list[float] = []
+    tess_ms: list[float] = []
+    confs: list[float] = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        procesada = preprocesar(img)
+        pre_ms.append((time.perf_counter() - inicio) * 1000)
+
+        inicio = time.perf_counter()
+        _, confs = ejecutar_tesseract(procesada)
+        tess_ms.append((time.perf_counter() - inicio) * 1000)
+
+    return Medicion(
+        pipeline=pipeline,
+        ticket=nombre,
+        megapixeles=procesada.size / 1e6,
+        preproceso_ms=statistics.median(pre_ms),
+        tesseract_ms=statistics.median(tess_ms),
+        confianza=round(sum(confs) / len(confs) / 100, 2) if confs else 0.0,
+    )
+
+
+def _imprimir(mediciones: list[Medicion]) -> None:
+    print(
+        f"{'ticket':<28} {'pipeline':<11} {'MP':>6} "
+        f"{'prepro ms':>10} {'tess ms':>9} {'conf':>5}"
+    )
+    for m in mediciones:
+        print(
+            f"{m.ticket[:28]:<28} {m.pipeline:<11} {m.megapixeles:>6.1f} "
+            f"{m.preproceso_ms:>10.0f} {m.tesseract_ms:>9.0f} {m.confianza:>5.2f}"
+        )
+    print()
+    for pipeline in PIPELINES:
+        propias = [m for m in mediciones if m.pipeline == pipeline]
+        if not propias:
+            continue
+        total = statistics.mean(m.preproceso_ms + m.tesseract_ms for m in propias)
+        print(
+            f"{pipeline:<11} promedio: {total:>7.0f} ms/ticket "
+            f"(prepro {statistics.mean(m.preproceso_ms for m in propias):.0f}, "
+            f"tess {statistics.mean(m.tesseract_ms for m in propias):.0f}) "
+            f"confianza {statistics.mean(m.confianza for m in propias):.2f}"
+        )
+
+
+def _comando_preproceso(args: argparse.Namespace) -> int:
+    archivos = sorted(
+        p for p in args.carpeta.iterdir() if p.suffix.lower() in _EXTENSIONES
+    )
+    if not archivos:
+        print(f"No hay imágenes en {args.carpeta}")
+        return 1
+
+    mediciones: list[Medicion] = []
+    for archivo in archivos:
+        img = decodificar_imagen(archivo.read_bytes())
+        if img is None:
+            print(f"[SKIP] {archivo.name}: no es una imagen válida")
+            continue
+        for pipeline in PIPELINES:
+            mediciones.append(
+                medir(archivo.name, img, pipeline, max(args.repeticiones, 1))
+            )
+
+    _imprimir(mediciones)
+    return 0
+
+
+@dataclass(frozen=True)
+class MedicionPipeline:
+    ticket: str
+    tiempos: dict[str, float]
+    por_reglas: bool
+    monto_ok: bool
+    fecha_ok: bool
+    comercio_ok: bool
+
+
+def _llm_simulado(latencia_ms: float) -> dict | None:
+    """Reemplazo de Ollama: solo consume la latencia, no extrae nada.
+
+    Así la precisión medida es la del parser por reglas y el costo de
+    cada fallback al LLM queda reflejado en el throughput.
+    """
+    time.sleep(latencia_ms / 1000)
+    return None
+
+
+def medir_pipeline(ticket: TicketSintetico, llm_latencia_ms: float) -> MedicionPipeline:
+    """Un ticket por todas las etapas; corre en un proceso del pool."""
+    tiempos: dict[str, float] = {}
+
+    inicio = time.perf_counter()
+    img = decodificar_imagen(ticket.imagen)
+    tiempos["decodificacion"] = (time.perf_counter() - inicio) * 1000
+    if img is None:
+        raise ValueError(f"{ticket.nombre}: no es una imagen válida")
+
+    inicio = time.perf_counter()
+    procesada = preprocesar_imagen(img)
+    tiempos["preproceso"] = (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    lineas, _ = ejecutar_tesseract(procesada)
+    tiempos["tesseract"] = (time.perf_counter() - inicio) * 1000
+
+    inicio = time.perf_counter()
+    # Mismo texto que arma ocr_engine.extraer_texto: una línea por renglón
+    reglas = parsear_ticket("\n".join(lineas))
+    por_reglas = reglas.suficiente()
+    datos = (
+        reglas.como_dict()
+        if por_reglas
+        else reglas.combinar(_llm_simulado(llm_latencia_ms))
+    )
+    tiempos["parseo"] = (time.perf_counter() - inicio) * 1000
+
+    monto = datos.get("monto")
+    return MedicionPipeline(
+        ticket=ticket.nombre,
+        tiempos=tiempos,
+        por_reglas=por_reglas,
+        monto_ok=monto is not None and abs(float(monto) - ticket.monto) < 0.005,
+        fecha_ok=datos.get("fecha") == ticket.fecha.isoformat(),
+        comercio_ok=ticket.comercio.lower() in (datos.get("comercio") or "").lower(),
+    )
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+def _porcentaje(mediciones: list[MedicionPipeline], campo: str) -> str:
+    return f"{100 * sum(getattr(m, campo) for m in mediciones) / len(mediciones):.0f}%"
+
+
+def _comando_pipeline(args: argparse.Namespace) -> int:
+    corpus = generar_corpus(args.tickets, semilla=args.semilla)
+    if args.guardar is not None:
+        guardar_corpus(corpus, args.guardar)
+        print(f"Corpus guardado en {args.guardar}")
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=inicializar_worker
+    ) as pool:
+        mediciones = list(
+            pool.map(
+                medir_pipeline,
+                corpus,
+                [args.llm_latencia_ms] * len(corpus),
+            )
+        )
+    segundos = time.perf_counter() - inicio
+
+    # ru_maxrss está en KB en Linux; CHILDREN = el worker que más usó
+    rss_principal = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    rss_worker = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+    print(
+        f"Corpus: {len(corpus)} tickets sintéticos (semilla {args.semilla}), "
+        f"{args.workers} workers, LLM simulado {args.llm_latencia_ms:.0f} ms"
+    )
+    print(f"Throughput: {len(corpus) / segundos:.2f} tickets/s ({segundos:.1f} s)")
+    print()
+    print(f"{'etapa':<15} {'p50 ms':>8} {'p95 ms':>8}")
+    for etapa in ETAPAS:
+        valores = [m.tiempos[etapa] for m in mediciones]
+        print(
+            f"{etapa:<15} {_percentil(valores, 0.50):>8.1f} "
+            f"{_percentil(valores, 0.95):>8.1f}"
+        )
+    print()
+    print(f"Parser por reglas (sin LLM): {_porcentaje(mediciones, 'por_reglas')}")
+    print(
+        f"Precisión: monto {_porcentaje(mediciones, 'monto_ok')}  "
+        f"fecha {_porcentaje(mediciones, 'fecha_ok')}  "
+        f"comercio {_porcentaje(mediciones, 'comercio_ok')}"
+    )
+    print(
+        f"RSS pico: proceso principal {rss_principal:.0f} MB, "
+        f"worker {rss_worker:.0f} MB"
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    preproceso = comandos.add_parser(
+        "preproceso", help="Pipeline anterior vs adaptativo sobre fotos reales"
+    )
+    preproceso.add_argument("carpeta", type=Path, help="Carpeta con fotos de tickets")
+    preproceso.add_argument("--repeticiones", type=int, default=1)
+    preproceso.set_defaults(ejecutar=_comando_preproceso)
+
+    pipeline = comandos.add_parser(
+        "pipeline", help="Pipeline completo sobre un corpus sintético"
+    )
+    pipeline.add_argument("--tickets", type=int, default=40)
+    pipeline.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    pipeline.add_argument("--semilla", type=int, default=7)
+    pipeline.add_argument(
+        "--llm-latencia-ms",
+        type=float,
+        default=0.0,
+        help="Latencia simulada de cada fallback al LLM",
+    )
+    pipeline.add_argument(
+        "--guardar",
+        type=Path,
+        default=None,
+        help="Escribir el corpus (JPEG + verdad.json) en esta carpeta",
+    )
+    pipeline.set_defaults(ejecutar=_comando_pipeline)
+
+    args = parser.parse_args(argv)
+    return args.ejecutar(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
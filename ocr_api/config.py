@@ -20,21 +20,48 @@ class Settings(BaseSettings):
     postgres_db: str = "auditor_familiar"
     postgres_user: str = "auditor_user"
     postgres_password: str
+    # Pool del engine único del servicio (compartido por todos los requests)
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
+    # LISTEN/NOTIFY para avisar resultados entre workers de uvicorn
+    ocr_notify_enabled: bool = True
+    # Máximo que un long-poll de /resultado/{id}/esperar queda suspendido
+    ocr_long_poll_max_seconds: float = 30.0
 
     # Upload
     max_upload_size: int = 10 * 1024 * 1024  # 10MB
 
+    # Pool de procesos OCR (0 = un worker por core)
+    ocr_workers: int = 0
+    # Tickets que pueden esperar con todos los workers ocupados; más → 429
+    ocr_queue_max: int = 8
+
+    # Cache de tickets repetidos (tabla ocr_cache): pHash + sha256 del archivo
+    ocr_cache_enabled: bool = True
+    ocr_cache_ttl_minutes: int = 60
+    ocr_cache_max_por_familia: int = 200
+
+    # Endpoint de lote: tickets por request y parseos agrupados por prompt
+    ocr_batch_max_files: int = 20
+    ocr_batch_llm_max: int = 4
+    ocr_batch_llm_window_seconds: float = 0.5
+
     # Ollama
     ollama_base_url: str = "http://localhost:11434"
     ollama_model: str = "gemma2:2b"
 
     @property
-    def database_url(self) -> str:
-        """URL de conexión."""
+    def dsn(self) -> str:
+        """DSN libpq (conexión LISTEN directa con asyncpg)."""
         return (
             f"postgresql://{self.postgres_user}:{self.postgres_password}"
             f"@{self.postgres_host}:{self.postgres_port}/{self.postgres_db}"
         )
 
+    @property
+    def database_url(self) -> str:
+        """URL de conexión (driver asyncpg)."""
+        return self.dsn.replace("postgresql://", "postgresql+asyncpg://", 1)
+
 
 settings = Settings()
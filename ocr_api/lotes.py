@@ -0,0 +1,69 @@
+"""Agrupación de parseos con el LLM para el endpoint de lote.
+
+Los tickets de un lote terminan el OCR en momentos distintos. En vez de un
+request a Ollama por ticket, AgrupadorParseo junta los textos que las
+reglas no resolvieron durante una ventana corta (o hasta `max_lote`) y los
+manda en un solo prompt; cada ticket recibe su resultado por un Future.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+
+class AgrupadorParseo:
+    """Coalesce de parseos: una llamada al LLM por cada `max_lote` textos."""
+
+    def __init__(
+        self,
+        parsear_varios: Callable[[list[str]], Awaitable[list[dict | None]]],
+        max_lote: int = 4,
+        ventana_seg: float = 0.5,
+    ) -> None:
+        self.parsear_varios = parsear_varios
+        self.max_lote = max(max_lote, 1)
+        self.ventana_seg = ventana_seg
+        self._pendientes: list[tuple[str, asyncio.Future[dict | None]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tareas: set[asyncio.Task[None]] = set()
+
+    async def parsear(self, texto: str) -> dict | None:
+        """Encola el texto y espera el resultado de su lote."""
+        loop = asyncio.get_running_loop()
+        futuro: asyncio.Future[dict | None] = loop.create_future()
+        self._pendientes.append((texto, futuro))
+        if len(self._pendientes) >= self.max_lote:
+            self._despachar()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.ventana_seg, self._despachar)
+        return await futuro
+
+    def _despachar(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        lote, self._pendientes = self._pendientes, []
+        if not lote:
+            return
+        tarea = asyncio.create_task(self._parsear_lote(lote))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+    async def _parsear_lote(
+        self, lote: list[tuple[str, asyncio.Future[dict | None]]]
+    ) -> None:
+        try:
+            resultados = await self.parsear_varios([texto for texto, _ in lote])
+        except Exception as e:
+            logger.warning("[LOTE] Error parseando %d tickets: %s", len(lote), e)
+            resultados = [None] * len(lote)
+        for (_, futuro), resultado in zip(lote, resultados, strict=True):
+            if not futuro.done():
+                futuro.set_result(resultado)
@@ -2,33 +2,51 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import hashlib
 import json
 import logging
 import os
 import re
-import tempfile
+import time
 from contextlib import asynccontextmanager
 from datetime import UTC, date, datetime, timedelta
 from html import escape as html_escape
-from pathlib import Path
 from typing import TYPE_CHECKING
 
-import cv2
 import httpx
-import numpy as np
-import pytesseract
 import uvicorn
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
-from PIL import Image
-from sqlalchemy import delete, select
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from ocr_api.config import settings
-from ocr_api.models import HealthResponse, OCRResponse, OCRSession, get_engine, init_db
+from ocr_api.lotes import AgrupadorParseo
+from ocr_api.models import (
+    HealthResponse,
+    OCRCache,
+    OCRLoteItem,
+    OCRPoolMetrics,
+    OCRResponse,
+    OCRSession,
+    ParseoMetrics,
+    create_engine,
+    init_db,
+)
+from ocr_api.notificaciones import (
+    CANAL_RESULTADOS,
+    ResultadoListener,
+    resultado_registry,
+)
+from ocr_api.ocr_engine import calcular_phash
+from ocr_api.ocr_pool import OCRPoolSaturado, ocr_pool
+from ocr_api.ticket_parser import parsear_ticket, parser_stats
 
 if TYPE_CHECKING:
-    from collections.abc import AsyncGenerator
+    from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
 
 logging.basicConfig(
     level=logging.INFO,
@@ -36,6 +54,19 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Segundos sugeridos al cliente cuando el pool OCR responde 429
+_RETRY_AFTER_SEG = "5"
+
+# Engine único del proceso: lo crea y lo cierra el lifespan. Cada request
+# toma una conexión del pool en lugar de abrir una nueva contra Postgres.
+_sesiones: async_sessionmaker[AsyncSession] | None = None
+
+
+def _db() -> AsyncSession:
+    if _sesiones is None:
+        raise RuntimeError("Engine de BD no inicializado (lifespan)")
+    return _sesiones()
+
 
 def _resolve_currency(val: object) -> str:
     """Normaliza el código de moneda detectado por OCR.
@@ -72,21 +103,38 @@ _PROMPT_PARSEO = (
     "{texto}"
 )
 
+# Prompt para parsear varios tickets de una vez (endpoint de lote)
+_PROMPT_PARSEO_LOTE = (
+    "Analizá estos {n} textos de tickets de compra uruguayos y extraé los "
+    "datos de cada uno.\n"
+    "Respondé ÚNICAMENTE con un array JSON de {n} objetos, uno por ticket y "
+    "en el mismo orden, sin texto adicional. Cada objeto con este formato:\n"
+    "\n"
+    '{{"monto": 1250.0, "fecha": "2026-02-28", "comercio": "Tienda Inglesa", '
+    '"items": ["leche", "pan"], "currency": null}}\n'
+    "\n"
+    "Si no podés determinar un campo, usá null.\n"
+    "La fecha debe estar en formato YYYY-MM-DD.\n"
+    "El monto debe ser el TOTAL del ticket (número sin símbolos de moneda).\n"
+    "\n"
+    "{tickets}"
+)
 
-async def _cleanup_sesiones_expiradas() -> None:
-    """Elimina sesiones OCR expiradas cada 5 minutos."""
-    import asyncio
 
-    engine = get_engine(settings.database_url)
+async def _cleanup_sesiones_expiradas() -> None:
+    """Elimina sesiones OCR y entradas de cache expiradas cada 5 minutos."""
     while True:
         await asyncio.sleep(300)
         try:
-            from sqlalchemy.orm import Session as SyncSession
-
-            with SyncSession(engine) as session:
+            async with _db() as session:
                 ahora = datetime.now(UTC)
-                session.execute(delete(OCRSession).where(OCRSession.expires_at < ahora))
-                session.commit()
+                await session.execute(
+                    delete(OCRSession).where(OCRSession.expires_at < ahora)
+                )
+                await session.execute(
+                    delete(OCRCache).where(OCRCache.expires_at < ahora)
+                )
+                await session.commit()
                 logger.debug("[DB] Sesiones OCR expiradas eliminadas")
         except Exception as e:
             logger.warning("[DB] Error en cleanup: %s", e)
@@ -95,13 +143,27 @@ async def _cleanup_sesiones_expiradas() -> None:
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Lifecycle."""
-    import asyncio
+    global _sesiones
 
-    init_db(settings.database_url)
+    engine = create_engine(
+        settings.database_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+    )
+    await init_db(engine)
+    _sesiones = async_sessionmaker(engine, expire_on_commit=False)
+    ocr_pool.start()
+    listener = ResultadoListener(settings.dsn, resultado_registry)
+    if settings.ocr_notify_enabled:
+        listener.start()
     logger.info("🚀 OCR Service iniciado en puerto %d", settings.api_port)
     task = asyncio.create_task(_cleanup_sesiones_expiradas())
     yield
     task.cancel()
+    await listener.stop()
+    ocr_pool.shutdown()
+    _sesiones = None
+    await engine.dispose()
     logger.info("👋 OCR Service detenido")
 
 
@@ -120,71 +182,35 @@ app.add_middleware(
 )
 
 
-def _deskew(img: np.ndarray) -> np.ndarray:
-    coords = np.column_stack(np.where(img > 0))
-    if len(coords) == 0:
-        return img
-    angle = cv2.minAreaRect(coords)[-1]
-    if angle < -45:
-        angle = 90 + angle
-    (h, w) = img.shape[:2]
-    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
-    return cv2.warpAffine(
-        img,
-        M,
-        (w, h),
-        flags=cv2.INTER_CUBIC,
-        borderMode=cv2.BORDER_REPLICATE,
-    )
-
+async def extraer_texto_tesseract(contenido: bytes) -> tuple[str, float]:
+    """Extrae texto con Tesseract y retorna (texto, confianza).
 
-def preprocesar_imagen(imagen: Image.Image) -> Image.Image:
-    img = np.array(imagen)
-    if img.ndim == 3:
-        img = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY)
-    img = cv2.resize(img, None, fx=2, fy=2, interpolation=cv2.INTER_CUBIC)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    img = clahe.apply(img)
-    img = cv2.GaussianBlur(img, (3, 3), 0)
-    img = cv2.adaptiveThreshold(
-        img,
-        255,
-        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-        cv2.THRESH_BINARY,
-        31,
-        2,
+    El preprocesamiento y el OCR corren en el pool de procesos, así el
+    event loop sigue atendiendo polls y otras subidas. Lanza
+    OCRPoolSaturado si la cola del pool está llena.
+    """
+    resultado = await ocr_pool.extraer_texto(contenido)
+    logger.info(
+        "[OCR] Extraídos %d chars (confianza=%.2f)",
+        len(resultado.texto),
+        resultado.confianza,
     )
-    img = _deskew(img)
-    return Image.fromarray(img)
-
-
-async def extraer_texto_tesseract(imagen_path: Path) -> tuple[str, float]:
-    """Extrae texto con Tesseract y retorna (texto, confianza)."""
-    try:
-        with Image.open(imagen_path) as img:
-            imagen = preprocesar_imagen(img)
-
-        datos = pytesseract.image_to_data(
-            imagen,
-            lang="spa",
-            config="--psm 6 --oem 3",
-            output_type=pytesseract.Output.DICT,
+    return resultado.texto, resultado.confianza
+
+
+async def _generar_ollama(prompt: str) -> str:
+    """Respuesta completa (sin streaming) de Ollama para el prompt."""
+    async with httpx.AsyncClient(timeout=120.0) as client:
+        response = await client.post(
+            f"{settings.ollama_base_url}/api/generate",
+            json={
+                "model": settings.ollama_model,
+                "prompt": prompt,
+                "stream": False,
+            },
         )
-
-        texto_crudo = " ".join(w for w in datos["text"] if w.strip())
-        confs = [int(c) for c in datos["conf"] if str(c).strip() not in ("-1", "")]
-        confianza = round(sum(confs) / len(confs) / 100, 2) if confs else 0.0
-
-        logger.info(
-            "[OCR] Extraídos %d chars (confianza=%.2f)",
-            len(texto_crudo),
-            confianza,
-        )
-        return texto_crudo, confianza
-
-    except Exception as e:
-        logger.error("[OCR] Error en Tesseract: %s", e)
-        return "", 0.0
+        response.raise_for_status()
+        return response.json().get("response", "")
 
 
 async def parsear_con_ollama(texto: str) -> dict | None:
@@ -192,20 +218,9 @@ async def parsear_con_ollama(texto: str) -> dict | None:
     if not texto.strip():
         return None
 
+    inicio = time.perf_counter()
     try:
-        prompt = _PROMPT_PARSEO.format(texto=texto[:1500])
-
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            response = await client.post(
-                f"{settings.ollama_base_url}/api/generate",
-                json={
-                    "model": settings.ollama_model,
-                    "prompt": prompt,
-                    "stream": False,
-                },
-            )
-            response.raise_for_status()
-            respuesta = response.json().get("response", "")
+        respuesta = await _generar_ollama(_PROMPT_PARSEO.format(texto=texto[:1500]))
 
         if not respuesta:
             logger.warning("[PARSEO] Ollama devolvió respuesta vacía")
@@ -228,6 +243,229 @@ async def parsear_con_ollama(texto: str) -> dict | None:
     except Exception as e:
         logger.warning("[PARSEO] Error parseando con Ollama: %s", e)
         return None
+    finally:
+        ocr_pool.registrar_tiempo("parseo", (time.perf_counter() - inicio) * 1000)
+
+
+async def parsear_varios_con_ollama(textos: list[str]) -> list[dict | None]:
+    """Parsea varios tickets con un solo prompt (respuesta: array JSON).
+
+    Si la respuesta no es un array con un objeto por ticket, se parsea cada
+    texto por separado con parsear_con_ollama.
+    """
+    if len(textos) == 1:
+        return [await parsear_con_ollama(textos[0])]
+
+    inicio = time.perf_counter()
+    try:
+        tickets = "\n\n".join(
+            f"### Ticket {i}\n{texto[:1500]}" for i, texto in enumerate(textos, 1)
+        )
+        respuesta = await _generar_ollama(
+            _PROMPT_PARSEO_LOTE.format(n=len(textos), tickets=tickets)
+        )
+        match = re.search(r"\[.*\]", respuesta, re.DOTALL)
+        datos = json.loads(match.group()) if match else None
+        if (
+            isinstance(datos, list)
+            and len(datos) == len(textos)
+            and all(isinstance(d, dict) for d in datos)
+        ):
+            logger.info("[PARSEO] Lote de %d tickets en un prompt", len(textos))
+            return datos
+        logger.warning("[PARSEO] Respuesta de lote inválida, parseo individual")
+    except Exception as e:
+        logger.warning("[PARSEO] Error parseando lote con Ollama: %s", e)
+    finally:
+        ocr_pool.registrar_tiempo("parseo_lote", (time.perf_counter() - inicio) * 1000)
+    return list(await asyncio.gather(*(parsear_con_ollama(t) for t in textos)))
+
+
+async def parsear_texto(
+    texto: str,
+    llm: Callable[[str], Awaitable[dict | None]] | None = None,
+) -> dict | None:
+    """Parsea el ticket con reglas; Ollama solo si faltan monto/fecha.
+
+    Si las reglas no alcanzan, la respuesta de Ollama completa los campos
+    que faltan. Si Ollama falla, se devuelve lo que encontraron las reglas.
+    """
+    if not texto.strip():
+        return None
+
+    inicio = time.perf_counter()
+    reglas = parsear_ticket(texto)
+    ocr_pool.registrar_tiempo("reglas", (time.perf_counter() - inicio) * 1000)
+    if reglas.suficiente():
+        parser_stats.registrar(por_reglas=True)
+        logger.info(
+            "[PARSEO] Por reglas: comercio=%s monto=%s (tasa reglas=%.0f%%)",
+            reglas.comercio,
+            reglas.monto,
+            parser_stats.tasa_reglas * 100,
+        )
+        return reglas.como_dict()
+
+    parser_stats.registrar(por_reglas=False)
+    datos_llm = await (llm or parsear_con_ollama)(texto)
+    if datos_llm is None and reglas.monto is None and reglas.fecha is None:
+        return None
+    return reglas.combinar(datos_llm)
+
+
+def _str_or_none(val: object) -> str | None:
+    """Convierte string 'null'/'none'/'' a None."""
+    if not val or str(val).strip().lower() in ("null", "none", "n/a", "-"):
+        return None
+    return str(val)
+
+
+async def procesar_ticket(
+    contenido: bytes,
+    familia_id: int,
+    *,
+    llm: Callable[[str], Awaitable[dict | None]] | None = None,
+    limite_ocr: asyncio.Semaphore | None = None,
+) -> OCRResponse:
+    """OCR + parseo de un ticket, con cache por pHash de la imagen.
+
+    Un archivo que la familia ya subió (reintento del formulario o del lote)
+    devuelve el resultado guardado sin pasar por OpenCV, Tesseract ni Ollama.
+    Lanza OCRPoolSaturado si el pool está lleno.
+
+    `llm` reemplaza a parsear_con_ollama (el lote agrupa los parseos) y
+    `limite_ocr` acota cuántos tickets del mismo lote ocupan el pool.
+    """
+    phash = await _calcular_phash(contenido) if settings.ocr_cache_enabled else None
+    sha256 = hashlib.sha256(contenido).hexdigest()
+    if phash is not None:
+        cacheado = await _buscar_en_cache(familia_id, phash, sha256)
+        if cacheado is not None:
+            return cacheado
+
+    # 1. Extraer texto con Tesseract
+    async with limite_ocr or contextlib.nullcontext():
+        texto_crudo, confianza = await extraer_texto_tesseract(contenido)
+    if not texto_crudo or len(texto_crudo) < 20:
+        return OCRResponse(
+            success=False,
+            error="No se pudo extraer texto de la imagen",
+            confianza_ocr=confianza,
+        )
+
+    # 2. Parsear: reglas primero, Ollama solo si no alcanzan
+    parsed = await parsear_texto(texto_crudo, llm)
+    if not parsed:
+        return OCRResponse(
+            success=True,
+            texto_crudo=texto_crudo,
+            confianza_ocr=confianza,
+            error="OCR exitoso pero no se pudo parsear los datos",
+        )
+
+    # 3. Construir respuesta
+    fecha_parsed: date | None = None
+    if parsed.get("fecha"):
+        try:
+            fecha_parsed = date.fromisoformat(parsed["fecha"])
+        except (ValueError, TypeError):
+            pass
+
+    resultado = OCRResponse(
+        success=True,
+        monto=parsed.get("monto"),
+        fecha=fecha_parsed,
+        comercio=_str_or_none(parsed.get("comercio")),
+        items=parsed.get("items") or [],
+        currency=_resolve_currency(parsed.get("currency")),
+        texto_crudo=texto_crudo,
+        confianza_ocr=confianza,
+    )
+    if phash is not None:
+        await _guardar_en_cache(familia_id, phash, sha256, resultado)
+    return resultado
+
+
+async def _calcular_phash(contenido: bytes) -> int | None:
+    """pHash en un hilo: decodifica a 1/8 de resolución, cuesta pocos ms."""
+    inicio = time.perf_counter()
+    try:
+        return await asyncio.to_thread(calcular_phash, contenido)
+    finally:
+        ocr_pool.registrar_tiempo("phash", (time.perf_counter() - inicio) * 1000)
+
+
+async def _buscar_en_cache(
+    familia_id: int, phash: int, sha256: str
+) -> OCRResponse | None:
+    """Resultado vigente del mismo archivo.
+
+    El pHash solo elige el candidato: tickets distintos del mismo comercio
+    comparten diseño y pueden dar el mismo hash, así que el acierto se
+    confirma con el sha256 de los bytes subidos.
+    """
+    try:
+        async with _db() as db:
+            row = (
+                await db.execute(
+                    select(OCRCache.resultado_json, OCRCache.sha256).where(
+                        OCRCache.familia_id == familia_id,
+                        OCRCache.phash == phash,
+                        OCRCache.expires_at > datetime.now(UTC),
+                    )
+                )
+            ).first()
+    except Exception as e:
+        logger.warning("[CACHE] Error buscando ticket en cache: %s", e)
+        return None
+    if row is None:
+        return None
+    if row.sha256 != sha256:
+        logger.info(
+            "[CACHE] Mismo pHash con otro archivo familia=%d: se procesa",
+            familia_id,
+        )
+        return None
+
+    logger.info("[CACHE] Ticket repetido familia=%d: sin OCR", familia_id)
+    resultado = OCRResponse.model_validate_json(row.resultado_json)
+    resultado.desde_cache = True
+    return resultado
+
+
+async def _guardar_en_cache(
+    familia_id: int, phash: int, sha256: str, resultado: OCRResponse
+) -> None:
+    """Guarda el resultado y deja solo las N entradas más nuevas de la familia."""
+    ahora = datetime.now(UTC)
+    try:
+        async with _db() as db:
+            await db.merge(
+                OCRCache(
+                    familia_id=familia_id,
+                    phash=phash,
+                    sha256=sha256,
+                    resultado_json=resultado.model_dump_json(),
+                    created_at=ahora,
+                    expires_at=ahora
+                    + timedelta(minutes=settings.ocr_cache_ttl_minutes),
+                )
+            )
+            recientes = (
+                select(OCRCache.phash)
+                .where(OCRCache.familia_id == familia_id)
+                .order_by(OCRCache.created_at.desc())
+                .limit(settings.ocr_cache_max_por_familia)
+            )
+            await db.execute(
+                delete(OCRCache).where(
+                    OCRCache.familia_id == familia_id,
+                    OCRCache.phash.not_in(recientes),
+                )
+            )
+            await db.commit()
+    except Exception as e:
+        logger.warning("[CACHE] Error guardando ticket en cache: %s", e)
 
 
 @app.get("/health", response_model=HealthResponse)
@@ -236,6 +474,19 @@ async def health() -> HealthResponse:
     return HealthResponse(status="ok", version="1.0.0")
 
 
+@app.get("/metrics", response_model=OCRPoolMetrics)
+async def metrics() -> OCRPoolMetrics:
+    """Cola del pool OCR, latencias p50/p95 por etapa y tasa del parser."""
+    resultado = ocr_pool.metrics()
+    resultado.parseo = ParseoMetrics(
+        tickets=parser_stats.tickets,
+        por_reglas=parser_stats.por_reglas,
+        con_llm=parser_stats.con_llm,
+        tasa_reglas=round(parser_stats.tasa_reglas, 3),
+    )
+    return resultado
+
+
 @app.get("/upload-form", response_class=HTMLResponse)
 async def upload_form(session_id: str, familia_id: int = 1) -> HTMLResponse:
     """Formulario HTML nativo para subir ticket — no depende de FilePicker."""
@@ -396,79 +647,47 @@ async def upload_form_submit(
         "[FORM] Procesando ticket session=%s familia=%d", session_id, familia_id
     )
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-        content = await file.read()
-        if len(content) > settings.max_upload_size:
-            return JSONResponse(
-                {"success": False, "error": f"Archivo excede {settings.max_upload_size // (1024*1024)}MB"},
-                status_code=413,
-            )
-        tmp.write(content)
-        tmp_path = Path(tmp.name)
+    content = await file.read()
+    if len(content) > settings.max_upload_size:
+        return JSONResponse(
+            {"success": False, "error": f"Archivo excede {settings.max_upload_size // (1024*1024)}MB"},
+            status_code=413,
+        )
 
     try:
-        texto_crudo, confianza = await extraer_texto_tesseract(tmp_path)
-            result = {
-                "success": False,
-                "error": "No se pudo extraer texto",
-                "confianza_ocr": confianza,
-            }
-            _guardar_resultado_db(session_id, familia_id, result)
-            return JSONResponse(result)
-
-        parsed = await parsear_con_ollama(texto_crudo)
-
-        fecha_str = (parsed or {}).get("fecha")
-        fecha_iso: str | None = None
-        if fecha_str:
-            try:
-                fecha_iso = date.fromisoformat(fecha_str).isoformat()
-            except (ValueError, TypeError):
-                pass
-
-        def _str_or_none(val: object) -> str | None:
-            """Convierte string 'null'/'none'/'' a None."""
-            if not val or str(val).strip().lower() in ("null", "none", "n/a", "-"):
-                return None
-            return str(val)
-
-        currency = _resolve_currency((parsed or {}).get("currency"))
-
-        result = {
-            "success": True,
-            "monto": (parsed or {}).get("monto"),
-            "fecha": fecha_iso,
-            "comercio": _str_or_none((parsed or {}).get("comercio")),
-            "items": (parsed or {}).get("items") or [],
-            "currency": currency,
-            "confianza_ocr": confianza,
-            "texto_crudo": texto_crudo,
-        }
-        _guardar_resultado_db(session_id, familia_id, result)
-        logger.info("[FORM] Resultado guardado session=%s", session_id)
-        return JSONResponse(result)
-
+        resultado = await procesar_ticket(content, familia_id)
+    except OCRPoolSaturado as e:
+        # No se guarda en la sesión: el usuario puede reintentar la subida
+        logger.warning("[FORM] %s", e)
+        return JSONResponse(
+            {"success": False, "error": str(e)},
+            status_code=429,
+            headers={"Retry-After": _RETRY_AFTER_SEG},
+        )
     except Exception as e:
         logger.error("[FORM] Error: %s", e)
         result = {"success": False, "error": str(e)}
-        _guardar_resultado_db(session_id, familia_id, result)
+        await _guardar_resultado_db(session_id, familia_id, result)
         return JSONResponse(result, status_code=500)
-    finally:
-        try:
-            tmp_path.unlink()
-        except Exception:
-            pass
 
+    result = resultado.model_dump(mode="json")
+    await _guardar_resultado_db(session_id, familia_id, result)
+    logger.info("[FORM] Resultado guardado session=%s", session_id)
+    return JSONResponse(result)
 
-def _guardar_resultado_db(session_id: str, familia_id: int, result: dict) -> None:
-    """Persiste el resultado OCR en PostgreSQL con TTL de 10 minutos."""
-    try:
-        from sqlalchemy.orm import Session as SyncSession
 
-        engine = get_engine(settings.database_url)
+async def _guardar_resultado_db(
+    session_id: str, familia_id: int, result: dict
+) -> None:
+    """Persiste el resultado OCR en PostgreSQL con TTL de 10 minutos.
+
+    Despierta a los long-polls que esperan esta sesión: en este proceso
+    directamente, y en los demás workers vía NOTIFY (se entrega al commit).
+    """
+    try:
         ahora = datetime.now(UTC)
-        with SyncSession(engine) as db:
-            db.merge(
+        async with _db() as db:
+            await db.merge(
                 OCRSession(
                     session_id=session_id,
                     familia_id=familia_id,
@@ -477,47 +696,84 @@ def _guardar_resultado_db(session_id: str, familia_id: int, result: dict) -> Non
                     expires_at=ahora + timedelta(minutes=10),
                 )
             )
-            db.commit()
+            if settings.ocr_notify_enabled:
+                await db.execute(select(func.pg_notify(CANAL_RESULTADOS, session_id)))
+            await db.commit()
+        resultado_registry.notificar(session_id)
     except Exception as e:
         logger.error("[DB] Error guardando sesión OCR: %s", e)
 
 
+async def _leer_resultado(session_id: str) -> dict | None:
+    """Resultado guardado de la sesión, o None si todavía no está."""
+    async with _db() as db:
+        row = (
+            await db.execute(
+                select(OCRSession).where(OCRSession.session_id == session_id)
+            )
+        ).scalar_one_or_none()
+        if row is None or row.resultado_json is None:
+            return None
+        return json.loads(row.resultado_json)
+
+
 @app.get("/resultado/{session_id}")
 async def get_resultado(session_id: str) -> JSONResponse:
     """Polling desde Flet: retorna el resultado OCR cuando esté listo."""
     try:
-        from sqlalchemy.orm import Session as SyncSession
-
-        engine = get_engine(settings.database_url)
-        with SyncSession(engine) as db:
-            row = db.execute(
-                select(OCRSession).where(OCRSession.session_id == session_id)
-            ).scalar_one_or_none()
-            if row is None or row.resultado_json is None:
-                return JSONResponse({"ready": False})
-            data = json.loads(row.resultado_json)
+        data = await _leer_resultado(session_id)
+        if data is None:
+            return JSONResponse({"ready": False})
         return JSONResponse({"ready": True, **data})
     except Exception as e:
         logger.error("[DB] Error leyendo sesión OCR: %s", e)
         return JSONResponse({"ready": False})
 
 
+@app.get("/resultado/{session_id}/esperar")
+async def esperar_resultado(
+    session_id: str,
+    espera: float = Query(25.0, gt=0),
+) -> JSONResponse:
+    """Long-poll: responde apenas el resultado se guarda, o pasados `espera` s.
+
+    Una consulta a la BD al entrar (por si ya estaba listo) y otra al
+    despertar; mientras espera no toca Postgres. Con {"ready": false} el
+    cliente vuelve a llamar.
+    """
+    espera = min(espera, settings.ocr_long_poll_max_seconds)
+    try:
+        async with resultado_registry.suscribir(session_id) as listo:
+            data = await _leer_resultado(session_id)
+            if data is None:
+                try:
+                    await asyncio.wait_for(listo.wait(), espera)
+                except TimeoutError:
+                    return JSONResponse({"ready": False})
+                data = await _leer_resultado(session_id)
+        if data is None:
+            return JSONResponse({"ready": False})
+        return JSONResponse({"ready": True, **data})
+    except Exception as e:
+        logger.error("[DB] Error esperando sesión OCR: %s", e)
+        return JSONResponse({"ready": False})
+
+
 @app.get("/pendiente/{familia_id}")
 async def get_pendiente(familia_id: int) -> JSONResponse:
     """Retorna la sesión OCR más reciente con resultado listo para esta familia."""
     try:
-        from sqlalchemy.orm import Session as SyncSession
-
-        engine = get_engine(settings.database_url)
-        with SyncSession(engine) as db:
-            row = db.execute(
-                select(OCRSession)
-                .where(
-                    OCRSession.familia_id == familia_id,
-                    OCRSession.resultado_json.is_not(None),
+        async with _db() as db:
+            row = (
+                await db.execute(
+                    select(OCRSession)
+                    .where(
+                        OCRSession.familia_id == familia_id,
+                        OCRSession.resultado_json.is_not(None),
+                    )
+                    .order_by(OCRSession.created_at.desc())
+                    .limit(1)
                 )
-                .order_by(OCRSession.created_at.desc())
-                .limit(1)
             ).scalar_one_or_none()
             if row is None or row.resultado_json is None:
                 return JSONResponse({"ready": False})
@@ -539,76 +795,110 @@ async def upload_ocr(
 
     logger.info("Procesando ticket para familia %d", familia_id)
 
-    # Guardar archivo temporal
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp:
-        content = await file.read()
-        if len(content) > settings.max_upload_size:
-            raise HTTPException(
-                413, f"Archivo excede {settings.max_upload_size // (1024*1024)}MB"
-            )
-        tmp.write(content)
-        tmp_path = Path(tmp.name)
-
-    try:
-        # 1. Extraer texto con Tesseract
-        texto_crudo, confianza = await extraer_texto_tesseract(tmp_path)
-
-        if not texto_crudo or len(texto_crudo) < 20:
-            return OCRResponse(
-                success=False,
-                error="No se pudo extraer texto de la imagen",
-                confianza_ocr=confianza,
-            )
-
-        # 2. Parsear con Ollama
-        parsed = await parsear_con_ollama(texto_crudo)
-
-        if not parsed:
-            return OCRResponse(
-                success=True,
-                texto_crudo=texto_crudo,
-                confianza_ocr=confianza,
-                error="OCR exitoso pero no se pudo parsear los datos",
-            )
-
-        # 3. Construir respuesta
-        monto = parsed.get("monto")
-        fecha_str = parsed.get("fecha")
-        comercio = parsed.get("comercio")
-        items = parsed.get("items") or []
-        currency = _resolve_currency(parsed.get("currency"))
-
-        # Convertir fecha
-        fecha_parsed: date | None = None
-        if fecha_str:
-            try:
-                fecha_parsed = date.fromisoformat(fecha_str)
-            except (ValueError, TypeError):
-                pass
-
-        return OCRResponse(
-            success=True,
-            monto=monto,
-            fecha=fecha_parsed,
-            comercio=comercio,
-            items=items,
-            currency=currency,
-            texto_crudo=texto_crudo,
-            confianza_ocr=confianza,
+    # La imagen se procesa en memoria: sin archivo temporal
+    content = await file.read()
+    if len(content) > settings.max_upload_size:
+        raise HTTPException(
+            413, f"Archivo excede {settings.max_upload_size // (1024*1024)}MB"
         )
 
+    try:
+        return await procesar_ticket(content, familia_id)
+    except OCRPoolSaturado as e:
+        raise HTTPException(
+            429, str(e), headers={"Retry-After": _RETRY_AFTER_SEG}
+        ) from e
     except Exception as e:
         logger.error("[OCR] Error procesando ticket: %s", e)
         return OCRResponse(
             success=False,
             error=f"Error interno: {str(e)}",
         )
+
+
+@app.post("/upload-ocr/lote")
+async def upload_ocr_lote(
+    files: list[UploadFile] = File(...),
+    familia_id: int = Form(..., gt=0),
+) -> StreamingResponse:
+    """Procesar varios tickets a la vez, devolviendo cada uno al terminar.
+
+    Responde NDJSON: una línea OCRLoteItem por ticket, en orden de
+    finalización. Los tickets pasan por el pool OCR en paralelo y los que
+    necesitan Ollama se parsean de a varios por prompt.
+    """
+    if len(files) > settings.ocr_batch_max_files:
+        raise HTTPException(
+            413, f"Máximo {settings.ocr_batch_max_files} tickets por lote"
+        )
+
+    logger.info("[LOTE] %d tickets para familia %d", len(files), familia_id)
+    return StreamingResponse(
+        _procesar_lote(files, familia_id), media_type="application/x-ndjson"
+    )
+
+
+async def _procesar_lote(
+    archivos: list[UploadFile], familia_id: int
+) -> AsyncIterator[str]:
+    """Procesa los tickets del lote y emite cada resultado como una línea.
+
+    Los archivos quedan en el spool de Starlette hasta su turno: se validan
+    tipo y tamaño sin leerlos y se leen recién dentro de `en_curso`.
+    """
+    # Como mucho un ticket del lote por worker: el resto espera acá en vez
+    # de llenar la cola del pool (que rechazaría con 429)
+    limite_ocr = asyncio.Semaphore(ocr_pool.workers)
+    # Tickets en memoria: los del OCR más un prompt completo esperando a Ollama
+    en_curso = asyncio.Semaphore(ocr_pool.workers + settings.ocr_batch_llm_max)
+    agrupador = AgrupadorParseo(
+        parsear_varios_con_ollama,
+        max_lote=settings.ocr_batch_llm_max,
+        ventana_seg=settings.ocr_batch_llm_window_seconds,
+    )
+
+    excede = OCRResponse(
+        success=False,
+        error=f"Archivo excede {settings.max_upload_size // (1024 * 1024)}MB",
+    )
+
+    async def _uno(indice: int, archivo: UploadFile) -> OCRLoteItem:
+        nombre = archivo.filename or f"ticket_{indice}"
+        content_type = archivo.content_type
+        if not content_type or not content_type.startswith("image/"):
+            resultado = OCRResponse(success=False, error="Solo imágenes")
+        elif archivo.size is not None and archivo.size > settings.max_upload_size:
+            resultado = excede
+        else:
+            async with en_curso:
+                try:
+                    contenido = await archivo.read()
+                    if len(contenido) > settings.max_upload_size:
+                        resultado = excede
+                    else:
+                        resultado = await procesar_ticket(
+                            contenido,
+                            familia_id,
+                            llm=agrupador.parsear,
+                            limite_ocr=limite_ocr,
+                        )
+                except OCRPoolSaturado as e:
+                    resultado = OCRResponse(success=False, error=str(e))
+                except Exception as e:
+                    logger.error("[LOTE] Error procesando %s: %s", nombre, e)
+                    resultado = OCRResponse(success=False, error=f"Error interno: {e}")
+        return OCRLoteItem(indice=indice, archivo=nombre, **resultado.model_dump())
+
+    tareas = [
+        asyncio.create_task(_uno(i, archivo)) for i, archivo in enumerate(archivos)
+    ]
+    try:
+        for siguiente in asyncio.as_completed(tareas):
+            yield (await siguiente).model_dump_json() + "\n"
     finally:
-        # Limpiar archivo temporal
-        try:
-            tmp_path.unlink()
-        except Exception:
-            pass
+        # Cliente desconectado: no seguir procesando tickets que nadie lee
+        for tarea in tareas:
+            tarea.cancel()
 
 
 def main() -> None:
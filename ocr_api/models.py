@@ -5,8 +5,9 @@ from __future__ import annotations
 from datetime import date, datetime  # noqa: TCH003
 
 from pydantic import BaseModel, Field
-from sqlalchemy import DateTime, Integer, String, Text, create_engine
-from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+from sqlalchemy import BigInteger, DateTime, Integer, String, Text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
 class Base(DeclarativeBase):
@@ -27,18 +28,42 @@ class OCRSession(Base):
     )
 
 
-def get_engine(database_url: str):
-    return create_engine(database_url, pool_pre_ping=True)
+class OCRCache(Base):
+    """Resultados OCR recientes por familia, indexados por pHash de la foto.
 
+    `sha256` es el de los bytes subidos: confirma que el candidato es el mismo
+    archivo y no otro ticket con el mismo diseño.
+    """
 
-def init_db(database_url: str) -> None:
-    engine = get_engine(database_url)
-    Base.metadata.create_all(engine)
+    __tablename__ = "ocr_cache"
 
+    familia_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    phash: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    resultado_json: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
 
-def get_session(database_url: str) -> Session:
-    engine = get_engine(database_url)
-    return Session(engine)
+
+def create_engine(
+    database_url: str, pool_size: int = 5, max_overflow: int = 5
+) -> AsyncEngine:
+    """Engine async (asyncpg). Se crea una sola vez, en el lifespan."""
+    return create_async_engine(
+        database_url,
+        pool_pre_ping=True,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+    )
+
+
+async def init_db(engine: AsyncEngine) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
 
 
 class OCRResponse(BaseModel):
@@ -54,6 +79,15 @@ class OCRResponse(BaseModel):
     confianza_ocr: float = Field(default=0.0, ge=0.0, le=1.0)
     texto_crudo: str = ""
     error: str | None = None
+    # True si es el resultado guardado de un archivo ya procesado
+    desde_cache: bool = False
+
+
+class OCRLoteItem(OCRResponse):
+    """Línea NDJSON del endpoint de lote: un ticket y su posición."""
+
+    indice: int
+    archivo: str
 
 
 class HealthResponse(BaseModel):
@@ -61,3 +95,34 @@ class HealthResponse(BaseModel):
 
     status: str
     version: str
+
+
+class EtapaMetrics(BaseModel):
+    """Latencias de una etapa del pipeline OCR."""
+
+    muestras: int
+    p50_ms: float
+    p95_ms: float
+
+
+class ParseoMetrics(BaseModel):
+    """Tickets resueltos por el parser de reglas vs. los que fueron a Ollama."""
+
+    tickets: int
+    por_reglas: int
+    con_llm: int
+    tasa_reglas: float
+
+
+class OCRPoolMetrics(BaseModel):
+    """Estado del pool de procesos OCR."""
+
+    workers: int
+    max_cola: int
+    en_curso: int
+    en_cola: int
+    procesados: int
+    rechazados: int
+    errores: int
+    etapas: dict[str, EtapaMetrics] = Field(default_factory=dict)
+    parseo: ParseoMetrics | None = None
@@ -0,0 +1,105 @@
+"""Aviso de resultados OCR listos (long-poll).
+
+`GET /resultado/{session_id}/esperar` queda suspendido en un asyncio.Event
+del ResultadoRegistry y se completa apenas `_guardar_resultado_db` escribe,
+sin consultar la BD cada 2 segundos.
+
+Con varios workers de uvicorn el resultado puede escribirlo otro proceso:
+la escritura hace `pg_notify(CANAL_RESULTADOS, session_id)` en la misma
+transacción y cada proceso mantiene una conexión con LISTEN que reenvía el
+aviso a su registry local.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any
+
+import asyncpg
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+
+logger = logging.getLogger(__name__)
+
+CANAL_RESULTADOS = "ocr_resultado"
+_REINTENTO_LISTEN_SEG = 5.0
+
+
+class ResultadoRegistry:
+    """session_id → asyncio.Event compartido por todos los que esperan."""
+
+    def __init__(self) -> None:
+        self._eventos: dict[str, asyncio.Event] = {}
+        self._esperando: dict[str, int] = {}
+
+    @asynccontextmanager
+    async def suscribir(self, session_id: str) -> AsyncIterator[asyncio.Event]:
+        """Registrar la espera antes de mirar la BD, para no perder el aviso."""
+        evento = self._eventos.setdefault(session_id, asyncio.Event())
+        self._esperando[session_id] = self._esperando.get(session_id, 0) + 1
+        try:
+            yield evento
+        finally:
+            self._esperando[session_id] -= 1
+            if self._esperando[session_id] == 0:
+                del self._esperando[session_id]
+                del self._eventos[session_id]
+
+    def notificar(self, session_id: str) -> None:
+        evento = self._eventos.get(session_id)
+        if evento is not None:
+            evento.set()
+
+    @property
+    def esperando(self) -> int:
+        return sum(self._esperando.values())
+
+
+class ResultadoListener:
+    """Conexión LISTEN que reenvía los NOTIFY al registry (se reconecta sola)."""
+
+    def __init__(self, dsn: str, registry: ResultadoRegistry) -> None:
+        self.dsn = dsn
+        self.registry = registry
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._escuchar())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _on_notify(self, _conn: Any, _pid: int, _canal: str, payload: str) -> None:
+        self.registry.notificar(payload)
+
+    async def _escuchar(self) -> None:
+        while True:
+            conn: asyncpg.Connection | None = None
+            try:
+                cerrada = asyncio.Event()
+                conn = await asyncpg.connect(self.dsn)
+                conn.add_termination_listener(lambda _conn, ev=cerrada: ev.set())
+                await conn.add_listener(CANAL_RESULTADOS, self._on_notify)
+                logger.info("[NOTIFY] Escuchando canal %s", CANAL_RESULTADOS)
+                await cerrada.wait()
+                logger.warning("[NOTIFY] Conexión LISTEN cerrada, reconectando")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Mientras no hay LISTEN, el long-poll vence y el cliente
+                # vuelve a consultar: no se pierden resultados, solo latencia
+                logger.warning("[NOTIFY] LISTEN caído: %s", e)
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await conn.close()
+            await asyncio.sleep(_REINTENTO_LISTEN_SEG)
+
+
+resultado_registry = ResultadoRegistry()
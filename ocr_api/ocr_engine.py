@@ -0,0 +1,249 @@
+"""Pipeline CPU del OCR: preprocesamiento OpenCV + Tesseract.
+
+Se ejecuta dentro de los procesos del OCRPool, por eso solo depende de
+OpenCV, NumPy y el binario de Tesseract (nada de FastAPI ni de la BD).
+
+Todo ocurre en memoria: los bytes del upload se decodifican con
+cv2.imdecode sobre un memoryview, la imagen es un único buffer NumPy
+durante el preprocesamiento y llega a Tesseract por stdin (PGM), que
+devuelve el TSV por stdout. Sin archivos temporales ni conversiones a PIL.
+"""
+
+from __future__ import annotations
+
+import csv
+import logging
+import os
+import subprocess
+import time
+from dataclasses import dataclass, field
+
+import cv2
+import numpy as np
+import pytesseract
+
+logger = logging.getLogger(__name__)
+
+_TESSERACT_TIMEOUT_SEG = 120
+# Ancho de trabajo del ticket ya recortado: un ticket térmico de 80 mm a
+# ~300 DPI. Las fotos grandes se reducen hasta acá en vez de duplicarse.
+ANCHO_OBJETIVO_PX = int(os.getenv("OCR_TARGET_WIDTH_PX", "1000"))
+# Ampliación máxima para fotos chicas (el pipeline anterior usaba 2x fijo)
+_MAX_AMPLIACION = 2.0
+# Lado mayor de la copia reducida en la que se busca el contorno del ticket
+_LADO_DETECCION_PX = 800
+# Fracción mínima de la foto que debe cubrir el contorno para recortar
+_AREA_MINIMA_TICKET = 0.15
+_MARGEN_RECORTE = 0.02
+
+
+@dataclass(frozen=True)
+class ResultadoOCR:
+    """Texto extraído, confianza media y tiempos por etapa (ms)."""
+
+    texto: str
+    confianza: float
+    tiempos: dict[str, float] = field(default_factory=dict)
+
+
+def inicializar_worker() -> None:
+    """Un hilo por proceso: el paralelismo lo da el pool, no OpenMP."""
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    cv2.setNumThreads(1)
+
+
+def _deskew(img: np.ndarray) -> np.ndarray:
+    coords = np.column_stack(np.where(img > 0))
+    if len(coords) == 0:
+        return img
+    angle = cv2.minAreaRect(coords)[-1]
+    if angle < -45:
+        angle = 90 + angle
+    (h, w) = img.shape[:2]
+    M = cv2.getRotationMatrix2D((w // 2, h // 2), angle, 1.0)
+    return cv2.warpAffine(
+        img,
+        M,
+        (w, h),
+        flags=cv2.INTER_CUBIC,
+        borderMode=cv2.BORDER_REPLICATE,
+    )
+
+
+def decodificar_imagen(contenido: bytes | memoryview) -> np.ndarray | None:
+    """Bytes de JPG/PNG/WEBP → matriz en escala de grises (sin copiar a disco).
+
+    IMREAD_GRAYSCALE decodifica directo a un canal y respeta la orientación
+    EXIF de las fotos de celular. Devuelve None si no es una imagen válida.
+    """
+    buffer = np.frombuffer(memoryview(contenido), dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+    return cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+
+
+def calcular_phash(contenido: bytes | memoryview) -> int | None:
+    """pHash de 64 bits: DCT de la imagen a 32x32, 8x8 de baja frecuencia.
+
+    Dos subidas de la misma foto (recomprimida o escalada) difieren en pocos
+    bits. Decodifica a 1/8 de resolución, así no cuesta lo que el OCR.
+    Devuelve un entero con signo (BIGINT) o None si no es una imagen.
+    """
+    buffer = np.frombuffer(memoryview(contenido), dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+    img = cv2.imdecode(buffer, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if img is None:
+        return None
+    chica = cv2.resize(img, (32, 32), interpolation=cv2.INTER_AREA)
+    bajas = cv2.dct(chica.astype(np.float32))[:8, :8].flatten()
+    # La mediana sin el componente DC (brillo medio de la foto)
+    bits = bajas > np.median(bajas[1:])
+    valor = int.from_bytes(np.packbits(bits).tobytes(), "big")
+    return valor - (1 << 64) if valor >= (1 << 63) else valor
+
+
+def recortar_ticket(img: np.ndarray) -> np.ndarray:
+    """Recorta la foto al contorno del ticket (papel claro sobre el fondo).
+
+    Busca sobre una copia reducida: umbral de Otsu, cierre morfológico para
+    unir el texto al papel y el contorno externo más grande. Si no hay uno
+    convincente devuelve la imagen entera. El recorte es una vista (slice)
+    del mismo buffer, sin copia.
+    """
+    alto, ancho = img.shape[:2]
+    escala = min(1.0, _LADO_DETECCION_PX / max(alto, ancho))
+    chica = (
+        cv2.resize(img, None, fx=escala, fy=escala, interpolation=cv2.INTER_AREA)
+        if escala < 1.0
+        else img
+    )
+    chica = cv2.GaussianBlur(chica, (5, 5), 0)
+    _, mascara = cv2.threshold(chica, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (15, 15))
+    mascara = cv2.morphologyEx(mascara, cv2.MORPH_CLOSE, kernel)
+    contornos, _ = cv2.findContours(mascara, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    if not contornos:
+        return img
+    mayor = max(contornos, key=cv2.contourArea)
+    if cv2.contourArea(mayor) < _AREA_MINIMA_TICKET * mascara.size:
+        return img
+
+    x, y, w, h = cv2.boundingRect(mayor)
+    margen_x, margen_y = int(w * _MARGEN_RECORTE), int(h * _MARGEN_RECORTE)
+    x0 = max(int((x - margen_x) / escala), 0)
+    y0 = max(int((y - margen_y) / escala), 0)
+    x1 = min(int((x + w + margen_x) / escala), ancho)
+    y1 = min(int((y + h + margen_y) / escala), alto)
+    return img[y0:y1, x0:x1]
+
+
+def normalizar_resolucion(img: np.ndarray) -> np.ndarray:
+    """Lleva el ancho del ticket a ANCHO_OBJETIVO_PX.
+
+    Reduce con INTER_AREA las fotos grandes (una de 12 MP ya no se trabaja a
+    48 MP) y amplía con INTER_CUBIC, hasta _MAX_AMPLIACION, las chicas.
+    """
+    factor = min(ANCHO_OBJETIVO_PX / img.shape[1], _MAX_AMPLIACION)
+    if abs(factor - 1.0) < 0.05:
+        return img
+    interpolacion = cv2.INTER_AREA if factor < 1.0 else cv2.INTER_CUBIC
+    return cv2.resize(img, None, fx=factor, fy=factor, interpolation=interpolacion)
+
+
+def aplicar_filtros(img: np.ndarray) -> np.ndarray:
+    """CLAHE, blur, umbral adaptativo y enderezado sobre la imagen gris."""
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    img = clahe.apply(img)
+    img = cv2.GaussianBlur(img, (3, 3), 0)
+    img = cv2.adaptiveThreshold(
+        img,
+        255,
+        cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+        cv2.THRESH_BINARY,
+        31,
+        2,
+    )
+    return _deskew(img)
+
+
+def preprocesar_imagen(img: np.ndarray) -> np.ndarray:
+    """Recorte al ticket → resolución objetivo → filtros."""
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    img = recortar_ticket(img)
+    img = normalizar_resolucion(img)
+    return aplicar_filtros(img)
+
+
+def leer_tsv(salida: str) -> tuple[list[str], list[float]]:
+    """
+    Líneas del ticket y confianzas a partir del TSV de Tesseract.
+
+    Las palabras se agrupan por (block_num, par_num, line_num): el parser
+    por reglas trabaja línea por línea (TOTAL, encabezado) y no sirve con
+    todo el ticket aplanado en una sola línea.
+    """
+    lineas: dict[tuple[str, str, str], list[str]] = {}
+    confs: list[float] = []
+    filas = csv.DictReader(salida.splitlines(), delimiter="\t", quoting=csv.QUOTE_NONE)
+    for fila in filas:
+        texto = (fila.get("text") or "").strip()
+        conf = float(fila.get("conf") or -1)
+        if texto:
+            clave = (fila["block_num"], fila["par_num"], fila["line_num"])
+            lineas.setdefault(clave, []).append(texto)
+        if conf >= 0:
+            confs.append(conf)
+    return [" ".join(palabras) for palabras in lineas.values()], confs
+
+
+def ejecutar_tesseract(img: np.ndarray) -> tuple[list[str], list[float]]:
+    """Corre Tesseract por stdin/stdout y devuelve (líneas, confianzas)."""
+    ok, pgm = cv2.imencode(".pgm", img)
+    if not ok:
+        raise ValueError("No se pudo codificar la imagen para Tesseract")
+    proceso = subprocess.run(
+        [
+            pytesseract.pytesseract.tesseract_cmd,
+            "stdin",
+            "stdout",
+            "-l",
+            "spa",
+            "--psm",
+            "6",
+            "--oem",
+            "3",
+            "tsv",
+        ],
+        input=pgm.tobytes(),
+        capture_output=True,
+        timeout=_TESSERACT_TIMEOUT_SEG,
+        check=True,
+    )
+    return leer_tsv(proceso.stdout.decode("utf-8", errors="replace"))
+
+
+def extraer_texto(contenido: bytes) -> ResultadoOCR:
+    """Decodifica, preprocesa y extrae texto con Tesseract (bloqueante)."""
+    tiempos: dict[str, float] = {}
+    try:
+        inicio = time.perf_counter()
+        img = decodificar_imagen(contenido)
+        if img is None:
+            logger.warning("[OCR] El archivo no es una imagen decodificable")
+            return ResultadoOCR("", 0.0, tiempos)
+        img = preprocesar_imagen(img)
+        tiempos["preproceso"] = (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        lineas, confs = ejecutar_tesseract(img)
+        tiempos["tesseract"] = (time.perf_counter() - inicio) * 1000
+
+        texto_crudo = "\n".join(lineas)
+        confianza = round(sum(confs) / len(confs) / 100, 2) if confs else 0.0
+        return ResultadoOCR(texto_crudo, confianza, tiempos)
+
+    except Exception as e:
+        logger.error("[OCR] Error en Tesseract: %s", e)
+        return ResultadoOCR("", 0.0, tiempos)
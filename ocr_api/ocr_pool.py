@@ -0,0 +1,128 @@
+"""Pool de procesos para el OCR.
+
+Tesseract y OpenCV son CPU-bound y bloqueantes: corriendo en el event loop,
+un ticket de 10 MB frena `/health`, el polling de `/resultado` y cualquier
+otra subida durante segundos. El pool los ejecuta en procesos aparte (uno
+por core del RK3588) y acota cuántos tickets pueden esperar: pasado ese
+límite `extraer_texto` lanza OCRPoolSaturado y el endpoint responde 429.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from ocr_api.config import settings
+from ocr_api.models import EtapaMetrics, OCRPoolMetrics
+from ocr_api.ocr_engine import ResultadoOCR, extraer_texto, inicializar_worker
+
+logger = logging.getLogger(__name__)
+
+_MUESTRAS_LATENCIA = 500
+
+
+class OCRPoolSaturado(Exception):
+    """Workers ocupados y cola llena: el cliente debe reintentar."""
+
+
+def _percentil(muestras: deque[float], p: float) -> float:
+    if not muestras:
+        return 0.0
+    ordenadas = sorted(muestras)
+    return ordenadas[min(len(ordenadas) - 1, int(p * len(ordenadas)))]
+
+
+class OCRPool:
+    """ProcessPoolExecutor acotado con métricas de cola y por etapa."""
+
+    def __init__(self, workers: int | None = None, max_cola: int | None = None):
+        self.workers = workers or settings.ocr_workers or os.cpu_count() or 1
+        self.max_cola = settings.ocr_queue_max if max_cola is None else max_cola
+        self._executor: ProcessPoolExecutor | None = None
+        # Solo se tocan desde el event loop: no hace falta lock
+        self._en_curso = 0
+        self._procesados = 0
+        self._rechazados = 0
+        self._errores = 0
+        self._tiempos: defaultdict[str, deque[float]] = defaultdict(
+            lambda: deque(maxlen=_MUESTRAS_LATENCIA)
+        )
+
+    def start(self) -> None:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=inicializar_worker
+            )
+            logger.info(
+                "[OCR_POOL] %d workers, cola máxima %d", self.workers, self.max_cola
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def extraer_texto(self, contenido: bytes) -> ResultadoOCR:
+        """Decodificación + preprocesamiento + Tesseract en un proceso del pool."""
+        if self._en_curso >= self.workers + self.max_cola:
+            self._rechazados += 1
+            raise OCRPoolSaturado(
+                f"OCR saturado: {self._en_curso} tickets en proceso, reintentá"
+            )
+        self.start()
+        assert self._executor is not None
+
+        self._en_curso += 1
+        inicio = time.perf_counter()
+        try:
+            resultado = await asyncio.get_running_loop().run_in_executor(
+                self._executor, extraer_texto, contenido
+            )
+        except BrokenProcessPool:
+            # Un worker murió (p. ej. OOM): el próximo ticket crea un pool nuevo
+            logger.error("[OCR_POOL] Pool roto, se recrea en el próximo ticket")
+            self._errores += 1
+            self.shutdown()
+            raise
+        except Exception:
+            self._errores += 1
+            raise
+        finally:
+            self._en_curso -= 1
+
+        total = (time.perf_counter() - inicio) * 1000
+        for etapa, ms in resultado.tiempos.items():
+            self.registrar_tiempo(etapa, ms)
+        self.registrar_tiempo("espera", max(total - sum(resultado.tiempos.values()), 0))
+        self._procesados += 1
+        return resultado
+
+    def registrar_tiempo(self, etapa: str, ms: float) -> None:
+        self._tiempos[etapa].append(ms)
+
+    def metrics(self) -> OCRPoolMetrics:
+        return OCRPoolMetrics(
+            workers=self.workers,
+            max_cola=self.max_cola,
+            en_curso=self._en_curso,
+            en_cola=max(self._en_curso - self.workers, 0),
+            procesados=self._procesados,
+            rechazados=self._rechazados,
+            errores=self._errores,
+            etapas={
+                etapa: EtapaMetrics(
+                    muestras=len(muestras),
+                    p50_ms=round(_percentil(muestras, 0.50), 1),
+                    p95_ms=round(_percentil(muestras, 0.95), 1),
+                )
+                for etapa, muestras in self._tiempos.items()
+            },
+        )
+
+
+ocr_pool = OCRPool()
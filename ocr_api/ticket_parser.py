@@ -0,0 +1,265 @@
+"""
+Parser determinístico de tickets uruguayos (regex + heurísticas).
+
+Extrae total, fecha, comercio, RUT y moneda del texto crudo de Tesseract en
+microsegundos. El LLM queda como fallback: solo se lo llama cuando falta un
+campo requerido (monto, fecha) o la extracción es ambigua.
+
+Única copia del parser: la app principal lo importa vía
+services/infrastructure/ticket_parser.py, que solo lo re-exporta.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any
+
+# Confianza mínima de los campos requeridos para saltear el LLM
+TICKET_PARSER_MIN_CONFIANZA = float(os.getenv("TICKET_PARSER_MIN_CONFIANZA", "0.7"))
+
+CAMPOS_REQUERIDOS = ("monto", "fecha")
+
+# Fechas más viejas que esto se consideran ruido de OCR (vencimientos, CAE)
+_ANTIGUEDAD_MAXIMA = timedelta(days=366)
+_LINEAS_ENCABEZADO = 6
+
+_MONTO = re.compile(r"\d{1,3}(?:[.,]\d{3})+(?:[.,]\d{2})?|\d+(?:[.,]\d{1,2})?")
+_TOTAL = re.compile(r"\bT[O0]TAL\b", re.IGNORECASE)
+_TOTAL_A_PAGAR = re.compile(r"\bA\s+PAGAR\b", re.IGNORECASE)
+_NO_TOTAL = re.compile(
+    r"SUB\s*-?\s*T[O0]TAL|\bIVA\b|DESCUENTO|ART[IÍ]CULOS|\bITEMS?\b|UNIDADES|\bCANT",
+    re.IGNORECASE,
+)
+_FECHA_DMY = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})\b")
+_FECHA_ISO = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_RUT = re.compile(r"\bR\.?U\.?T\.?\b[\s:.#Nº°-]*(\d[\d .-]{10,16}\d)", re.IGNORECASE)
+_USD = re.compile(r"U\$S|US\$|\bUSD\b|D[OÓ]LAR", re.IGNORECASE)
+_UYU = re.compile(r"\$|\bUYU\b|\bPESOS\b", re.IGNORECASE)
+_NO_COMERCIO = re.compile(
+    r"\bRUT\b|TICKET|FACTURA|CONSUMO\s+FINAL|\bFECHA\b|\bCAJA\b|CONTADO|"
+    r"\bCOPIA\b|\bTEL\b|TEL[EÉ]FONO|\bDIR\b|WWW\.|\bCAE\b|\bSERIE\b",
+    re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class TicketParseado:
+    """Campos extraídos por reglas, con la confianza (0-1) de cada uno."""
+
+    monto: float | None = None
+    fecha: date | None = None
+    comercio: str | None = None
+    rut: str | None = None
+    currency: str | None = None
+    confianzas: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def confianza(self) -> float:
+        """Confianza del parseo: la del campo requerido más débil."""
+        return min(self.confianzas.get(c, 0.0) for c in CAMPOS_REQUERIDOS)
+
+    def suficiente(self, minimo: float = TICKET_PARSER_MIN_CONFIANZA) -> bool:
+        """True si los campos requeridos alcanzan para no llamar al LLM."""
+        return self.confianza >= minimo
+
+    def como_dict(self) -> dict[str, Any]:
+        """Mismo formato que el JSON que devuelve el LLM."""
+        return {
+            "monto": self.monto,
+            "fecha": self.fecha.isoformat() if self.fecha else None,
+            "comercio": self.comercio,
+            "items": [],
+            "currency": self.currency,
+            "rut": self.rut,
+        }
+
+    def combinar(
+        self,
+        llm: dict[str, Any] | None,
+        minimo: float = TICKET_PARSER_MIN_CONFIANZA,
+    ) -> dict[str, Any]:
+        """
+        Completa el resultado por reglas con la respuesta del LLM.
+        Los campos que las reglas extrajeron con confianza suficiente se
+        mantienen; el resto (y los items) se toman del LLM.
+        """
+        datos = self.como_dict()
+        for campo, valor in (llm or {}).items():
+            if _es_nulo(valor):
+                continue
+            if datos.get(campo) in (None, []) or self.confianzas.get(campo, 0) < minimo:
+                datos[campo] = valor
+        return datos
+
+
+class ParserStats:
+    """Contadores del fast-path por reglas (tasa de tickets sin LLM)."""
+
+    def __init__(self) -> None:
+        self.tickets = 0
+        self.por_reglas = 0
+        self.con_llm = 0
+
+    def registrar(self, *, por_reglas: bool) -> None:
+        self.tickets += 1
+        if por_reglas:
+            self.por_reglas += 1
+        else:
+            self.con_llm += 1
+
+    @property
+    def tasa_reglas(self) -> float:
+        return self.por_reglas / self.tickets if self.tickets else 0.0
+
+
+parser_stats = ParserStats()
+
+
+def parsear_ticket(texto: str, hoy: date | None = None) -> TicketParseado:
+    """Extraer los campos del ticket con reglas, sin I/O."""
+    lineas = [ln.strip() for ln in texto.splitlines() if ln.strip()]
+    confianzas: dict[str, float] = {}
+
+    monto, conf = _extraer_monto(lineas)
+    if monto is not None:
+        confianzas["monto"] = conf
+    fecha, conf = _extraer_fecha(texto, hoy or date.today())
+    if fecha is not None:
+        confianzas["fecha"] = conf
+
+    match_rut = _RUT.search(texto)
+    rut = re.sub(r"\D", "", match_rut.group(1)) if match_rut else None
+    if rut is not None and len(rut) != 12:
+        rut = None
+
+    comercio, conf = _extraer_comercio(lineas)
+    if comercio is not None:
+        confianzas["comercio"] = conf
+
+    currency = _extraer_moneda(lineas)
+    if currency is not None:
+        confianzas["currency"] = 1.0
+
+    return TicketParseado(
+        monto=monto,
+        fecha=fecha,
+        comercio=comercio,
+        rut=rut,
+        currency=currency,
+        confianzas=confianzas,
+    )
+
+
+def _es_nulo(valor: object) -> bool:
+    if valor is None or valor == []:
+        return True
+    return isinstance(valor, str) and valor.strip().lower() in (
+        "",
+        "null",
+        "none",
+        "n/a",
+        "-",
+    )
+
+
+def _a_float(numero: str) -> float:
+    """
+    Convierte '1.250,00', '1,250.00', '1250.00' o '1.250' a float.
+    Un separador seguido de 1-2 dígitos al final es decimal; si no, de miles.
+    """
+    if "," in numero and "." in numero:
+        corte = max(numero.rfind(","), numero.rfind("."))
+        return float(re.sub(r"\D", "", numero[:corte]) + "." + numero[corte + 1 :])
+    for sep in (",", "."):
+        if sep in numero:
+            partes = numero.split(sep)
+            if len(partes[-1]) <= 2:
+                return float("".join(partes[:-1]) + "." + partes[-1])
+            return float("".join(partes))
+    return float(numero)
+
+
+def _extraer_monto(lineas: list[str]) -> tuple[float | None, float]:
+    """
+    Monto de la línea TOTAL (o de la siguiente, si el número quedó abajo).
+    'TOTAL A PAGAR' tiene prioridad; varias líneas TOTAL con montos distintos
+    se toman como ambiguas y bajan la confianza.
+    """
+    candidatos: list[tuple[bool, float]] = []
+    for i, linea in enumerate(lineas):
+        match = _TOTAL.search(linea)
+        if match is None or _NO_TOTAL.search(linea):
+            continue
+        numeros = _MONTO.findall(linea[match.end() :])
+        if not numeros and i + 1 < len(lineas):
+            numeros = _MONTO.findall(lineas[i + 1])
+        if not numeros:
+            continue
+        valor = _a_float(numeros[-1])
+        if valor > 0:
+            candidatos.append((bool(_TOTAL_A_PAGAR.search(linea)), valor))
+
+    if not candidatos:
+        return None, 0.0
+    a_pagar = [valor for es_a_pagar, valor in candidatos if es_a_pagar]
+    if a_pagar:
+        return a_pagar[-1], 1.0
+    valores = {valor for _, valor in candidatos}
+    return candidatos[-1][1], 1.0 if len(valores) == 1 else 0.5
+
+
+def _extraer_fecha(texto: str, hoy: date) -> tuple[date | None, float]:
+    """Fecha dd/mm/aaaa (o ISO) no futura y de menos de un año."""
+    fechas: list[date | None] = []
+    for dia, mes, anio in _FECHA_DMY.findall(texto):
+        fechas.append(_fecha_o_none(int(anio), int(mes), int(dia)))
+    for anio, mes, dia in _FECHA_ISO.findall(texto):
+        fechas.append(_fecha_o_none(int(anio), int(mes), int(dia)))
+
+    validas = [
+        f
+        for f in fechas
+        if f is not None and hoy - _ANTIGUEDAD_MAXIMA <= f <= hoy + timedelta(days=1)
+    ]
+    if not validas:
+        return None, 0.0
+    return validas[0], 1.0 if len(set(validas)) == 1 else 0.5
+
+
+def _fecha_o_none(anio: int, mes: int, dia: int) -> date | None:
+    if anio < 100:
+        anio += 2000
+    try:
+        return date(anio, mes, dia)
+    except ValueError:
+        return None
+
+
+def _extraer_comercio(lineas: list[str]) -> tuple[str | None, float]:
+    """
+    Primera línea del encabezado que parece un nombre (mayoría de letras).
+    Si está antes de la línea del RUT, la confianza es mayor.
+    """
+    for i, linea in enumerate(lineas[:_LINEAS_ENCABEZADO]):
+        if _NO_COMERCIO.search(linea):
+            continue
+        letras = sum(c.isalpha() for c in linea)
+        if letras < 3 or letras / len(linea.replace(" ", "")) < 0.6:
+            continue
+        antes_de_rut = any(_RUT.search(ln) for ln in lineas[i + 1 : i + 4])
+        return " ".join(linea.split()), 0.8 if antes_de_rut else 0.5
+    return None, 0.0
+
+
+def _extraer_moneda(lineas: list[str]) -> str | None:
+    """Moneda según los símbolos de las líneas TOTAL (o del ticket entero)."""
+    totales = " ".join(ln for ln in lineas if _TOTAL.search(ln))
+    for texto in (totales, " ".join(lineas)):
+        if _USD.search(texto):
+            return "USD"
+        if _UYU.search(texto):
+            return "UYU"
+    return None
@@ -0,0 +1,136 @@
+"""
+AggregationRepository — Totales de gastos e ingresos calculados por PostgreSQL.
+
+Devuelve sumas agrupadas por (mes, moneda, categoría) con un único
+`GROUP BY ... UNION ALL` sobre expenses e incomes: sin hidratar modelos ORM
+ni Pydantic, un solo round-trip para todo el rango pedido.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import case, extract, func, literal, null, or_, select, union_all
+from sqlalchemy.orm import Session
+
+from database.tables import ExpenseTable, IncomeTable
+
+TIPO_GASTO = "gasto"
+TIPO_INGRESO = "ingreso"
+
+
+@dataclass(frozen=True)
+class TotalAgrupado:
+    """
+    Suma de un grupo (tipo, mes, moneda, categoría).
+
+    Para ingresos recurrentes `anio` y `mes` son None: cuentan en todos los
+    meses, igual que en IncomeService.list_for_months.
+    """
+
+    tipo: str  # TIPO_GASTO | TIPO_INGRESO
+    anio: int | None
+    mes: int | None
+    currency: str
+    categoria: str
+    total: Decimal
+    cantidad: int
+
+
+class AggregationRepository:
+    """Consultas de agregación de solo lectura, filtradas por familia."""
+
+    def __init__(self, session: Session, familia_id: int | None = None) -> None:
+        self.session = session
+        self.familia_id = familia_id
+
+    def totales_agrupados(
+        self, fecha_ini: date, fecha_fin: date
+    ) -> list[TotalAgrupado]:
+        """
+        Totales por (tipo, mes, moneda, categoría) entre dos fechas (inclusive).
+
+        Los filtros usan `fecha BETWEEN` (sargable) sobre los índices
+        familia_id + fecha; los ingresos recurrentes de cualquier fecha se
+        suman aparte con mes NULL.
+        """
+        gastos = select(
+            literal(TIPO_GASTO).label("tipo"),
+            extract("year", ExpenseTable.fecha).label("anio"),
+            extract("month", ExpenseTable.fecha).label("mes"),
+            ExpenseTable.currency,
+            ExpenseTable.categoria,
+            func.sum(ExpenseTable.monto).label("total"),
+            func.count().label("cantidad"),
+        ).where(ExpenseTable.fecha.between(fecha_ini, fecha_fin))
+
+        recurrente = IncomeTable.es_recurrente.is_(True)
+        anio_ingreso = case(
+            (recurrente, null()), else_=extract("year", IncomeTable.fecha)
+        )
+        mes_ingreso = case(
+            (recurrente, null()), else_=extract("month", IncomeTable.fecha)
+        )
+        ingresos = select(
+            literal(TIPO_INGRESO).label("tipo"),
+            anio_ingreso.label("anio"),
+            mes_ingreso.label("mes"),
+            IncomeTable.currency,
+            IncomeTable.categoria,
+            func.sum(IncomeTable.monto).label("total"),
+            func.count().label("cantidad"),
+        ).where(or_(recurrente, IncomeTable.fecha.between(fecha_ini, fecha_fin)))
+
+        if self.familia_id is not None:
+            gastos = gastos.where(ExpenseTable.familia_id == self.familia_id)
+            ingresos = ingresos.where(IncomeTable.familia_id == self.familia_id)
+
+        gastos = gastos.group_by(
+            extract("year", ExpenseTable.fecha),
+            extract("month", ExpenseTable.fecha),
+            ExpenseTable.currency,
+            ExpenseTable.categoria,
+        )
+        ingresos = ingresos.group_by(
+            anio_ingreso, mes_ingreso, IncomeTable.currency, IncomeTable.categoria
+        )
+
+        rows = self.session.execute(union_all(gastos, ingresos)).all()
+        return [
+            TotalAgrupado(
+                tipo=row.tipo,
+                anio=int(row.anio) if row.anio is not None else None,
+                mes=int(row.mes) if row.mes is not None else None,
+                currency=row.currency,
+                categoria=row.categoria,
+                total=Decimal(row.total),
+                cantidad=int(row.cantidad),
+            )
+            for row in rows
+        ]
+
+
+def agrupar_por_mes(
+    totales: Iterable[TotalAgrupado], meses: list[tuple[int, int]]
+) -> dict[tuple[int, int], list[TotalAgrupado]]:
+    """
+    Repartir los totales en los meses pedidos.
+
+    Los ingresos recurrentes (mes None) se agregan a todos los meses.
+
+    Returns:
+        Dict {(anio, mes): [TotalAgrupado, ...]} con una entrada por mes pedido.
+    """
+    resultado: dict[tuple[int, int], list[TotalAgrupado]] = {m: [] for m in meses}
+    for total in totales:
+        if total.anio is None or total.mes is None:
+            for grupo in resultado.values():
+                grupo.append(total)
+            continue
+        grupo = resultado.get((total.anio, total.mes))
+        if grupo is not None:
+            grupo.append(total)
+    return resultado
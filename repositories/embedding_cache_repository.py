@@ -0,0 +1,85 @@
+"""
+EmbeddingCacheRepository — Nivel persistente del cache de embeddings.
+Usa SQL directo sobre la tabla embedding_cache (pgvector, PK model + text_hash).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_vector(value: Any) -> list[float]:
+    """Convertir el valor devuelto por pgvector (str '[..]' o array) a lista."""
+    if isinstance(value, str):
+        return [float(v) for v in json.loads(value)]
+    return [float(v) for v in value]
+
+
+class EmbeddingCacheRepository:
+    """
+    Repository para embedding_cache.
+    No filtra por familia: el embedding de un texto no depende del tenant.
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def obtener_varios(
+        self, model: str, text_hashes: list[str]
+    ) -> dict[str, list[float]]:
+        """
+        Buscar embeddings cacheados para varios hashes en una sola query.
+
+        Returns:
+            Dict {text_hash: embedding} solo con los hashes encontrados.
+        """
+        if not text_hashes:
+            return {}
+        try:
+            rows = self.session.execute(
+                text("""
+                    SELECT text_hash, embedding
+                    FROM embedding_cache
+                    WHERE model = :model
+                      AND text_hash = ANY(:hashes)
+                """),
+                {"model": model, "hashes": list(text_hashes)},
+            ).fetchall()
+            return {row[0]: _parse_vector(row[1]) for row in rows}
+        except Exception as e:
+            logger.error("[EMBEDDING_CACHE_REPO] Error al leer: %s", str(e))
+            return {}
+
+    def guardar_varios(self, model: str, embeddings: dict[str, list[float]]) -> int:
+        """
+        Insertar embeddings nuevos; los hashes ya presentes se ignoran.
+
+        Returns:
+            Cantidad de filas insertadas.
+        """
+        if not embeddings:
+            return 0
+        try:
+            result = self.session.execute(
+                text("""
+                    INSERT INTO embedding_cache (model, text_hash, embedding)
+                    VALUES (:model, :hash, CAST(:emb AS vector))
+                    ON CONFLICT (model, text_hash) DO NOTHING
+                """),
+                [
+                    {"model": model, "hash": h, "emb": str(emb)}
+                    for h, emb in embeddings.items()
+                ],
+            )
+            self.session.flush()
+            return int(result.rowcount or 0)
+        except Exception as e:
+            logger.error("[EMBEDDING_CACHE_REPO] Error al guardar: %s", str(e))
+            return 0
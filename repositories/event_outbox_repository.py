@@ -0,0 +1,163 @@
+"""
+EventOutboxRepository — Cola persistente de trabajos del EventSystem.
+Usa SQL directo sobre event_outbox (una fila por evento + handler).
+
+Reclamar una fila es un lease: se corre `disponible_en` hacia adelante con
+FOR UPDATE SKIP LOCKED, así ningún otro worker la toma mientras se procesa,
+y si el proceso muere la fila vuelve a estar disponible al vencer el lease.
+El commit lo hace el UnitOfWork del caller.
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+
+@dataclass(frozen=True)
+class OutboxRow:
+    """Trabajo persistido, tal como se lee de event_outbox."""
+
+    id: int
+    event_type: str
+    familia_id: int
+    source_id: int | None
+    data: dict[str, Any]
+    handler: str
+    intentos: int
+
+
+class EventOutboxRepository:
+    """Repository para event_outbox."""
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+
+    def insertar(
+        self,
+        event_type: str,
+        familia_id: int,
+        source_id: int | None,
+        data: dict[str, Any],
+        handlers: list[str],
+        lease_seg: float,
+    ) -> list[int]:
+        """
+        Persistir un trabajo por handler.
+
+        Con lease_seg > 0 las filas nacen reclamadas por quien las inserta;
+        con 0 quedan disponibles para el próximo sweep.
+
+        Returns:
+            IDs creados, en el mismo orden que `handlers`.
+        """
+        if not handlers:
+            return []
+        rows = self.session.execute(
+            text("""
+                INSERT INTO event_outbox
+                    (event_type, familia_id, source_id, data, handler, disponible_en)
+                SELECT :event_type, :familia_id, :source_id,
+                       CAST(:data AS jsonb), h.handler,
+                       NOW() + make_interval(secs => :lease)
+                FROM unnest(CAST(:handlers AS text[]))
+                     WITH ORDINALITY AS h(handler, orden)
+                ORDER BY h.orden
+                RETURNING id
+            """),
+            {
+                "event_type": event_type,
+                "familia_id": familia_id,
+                "source_id": source_id,
+                "data": json.dumps(data, default=str),
+                "handlers": handlers,
+                "lease": lease_seg,
+            },
+        ).fetchall()
+        self.session.flush()
+        return [int(row[0]) for row in rows]
+
+    def reclamar(self, limite: int, lease_seg: float) -> list[OutboxRow]:
+        """Tomar hasta `limite` trabajos pendientes vencidos (lease incluido)."""
+        if limite <= 0:
+            return []
+        rows = self.session.execute(
+            text("""
+                UPDATE event_outbox o
+                SET disponible_en = NOW() + make_interval(secs => :lease)
+                FROM (
+                    SELECT id
+                    FROM event_outbox
+                    WHERE estado = 'pendiente'
+                      AND disponible_en <= NOW()
+                    ORDER BY disponible_en, id
+                    LIMIT :limite
+                    FOR UPDATE SKIP LOCKED
+                ) AS vencidos
+                WHERE o.id = vencidos.id
+                RETURNING o.id, o.event_type, o.familia_id, o.source_id,
+                          o.data, o.handler, o.intentos
+            """),
+            {"limite": limite, "lease": lease_seg},
+        ).fetchall()
+        self.session.flush()
+        return [
+            OutboxRow(
+                id=int(row.id),
+                event_type=row.event_type,
+                familia_id=int(row.familia_id),
+                source_id=row.source_id,
+                data=row.data if isinstance(row.data, dict) else json.loads(row.data),
+                handler=row.handler,
+                intentos=int(row.intentos),
+            )
+            for row in rows
+        ]
+
+    def completar(self, outbox_id: int) -> None:
+        """Borrar un trabajo terminado con éxito."""
+        self.session.execute(
+            text("DELETE FROM event_outbox WHERE id = :id"), {"id": outbox_id}
+        )
+        self.session.flush()
+
+    def reprogramar(
+        self, outbox_id: int, intentos: int, delay_seg: float, error: str
+    ) -> None:
+        """Registrar un intento fallido y diferir el próximo `delay_seg` segundos."""
+        self.session.execute(
+            text("""
+                UPDATE event_outbox
+                SET intentos = :intentos,
+                    disponible_en = NOW() + make_interval(secs => :delay),
+                    ultimo_error = :error
+                WHERE id = :id
+            """),
+            {"id": outbox_id, "intentos": intentos, "delay": delay_seg, "error": error},
+        )
+        self.session.flush()
+
+    def marcar_fallido(self, outbox_id: int, intentos: int, error: str) -> None:
+        """Dejar el trabajo como fallido (no se reintenta más)."""
+        self.session.execute(
+            text("""
+                UPDATE event_outbox
+                SET estado = 'fallido', intentos = :intentos, ultimo_error = :error
+                WHERE id = :id
+            """),
+            {"id": outbox_id, "intentos": intentos, "error": error},
+        )
+        self.session.flush()
+
+    def contar_pendientes(self) -> int:
+        """Cantidad de trabajos pendientes (incluye reclamados en curso)."""
+        return int(
+            self.session.execute(
+                text("SELECT COUNT(*) FROM event_outbox WHERE estado = 'pendiente'")
+            ).scalar()
+            or 0
+        )
@@ -4,9 +4,12 @@ Repository para gestión de gastos familiares
 
 from __future__ import annotations
 
-from collections.abc import Sequence
+import calendar
+from collections.abc import Iterator, Sequence
 from datetime import date
+from typing import Any
 
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from database.tables import ExpenseTable
@@ -49,14 +52,23 @@ class ExpenseRepository(BaseTableRepository[Expense, ExpenseTable]):
 
     def get_by_month(self, year: int, month: int) -> Sequence[Expense]:
         """Obtener gastos de un mes específico de la familia"""
-        from sqlalchemy import extract
+        ultimo_dia = calendar.monthrange(year, month)[1]
+        return self.get_by_date_range(
+            date(year, month, 1), date(year, month, ultimo_dia)
+        )
+
+    def get_by_date_range(self, fecha_ini: date, fecha_fin: date) -> Sequence[Expense]:
+        """
+        Obtener gastos de la familia entre dos fechas (inclusive).
 
+        Usa `fecha BETWEEN` (sargable) para aprovechar idx_expenses_familia_fecha:
+        un rango de N meses es una sola query en lugar de N.
+        """
         query = self.session.query(ExpenseTable).filter(
-            extract("year", ExpenseTable.fecha) == year,
-            extract("month", ExpenseTable.fecha) == month,
+            ExpenseTable.fecha.between(fecha_ini, fecha_fin)
         )
         query = self._filter_by_family(query)
-        rows = query.all()
+        rows = query.order_by(ExpenseTable.fecha).all()
         return [to_domain(row) for row in rows]
 
     def guardar_embedding(self, expense_id: int, embedding: list[float]) -> None:
@@ -67,6 +79,69 @@ class ExpenseRepository(BaseTableRepository[Expense, ExpenseTable]):
         ).update({"embedding": embedding})
         self.session.commit()
 
+    def iterar_sin_embedding(
+        self, desde_id: int, limite: int, lote: int
+    ) -> Iterator[list[dict[str, Any]]]:
+        """
+        Gastos con embedding NULL e id > desde_id, en orden de id (keyset).
+
+        Usa un cursor del lado del servidor: trae `lote` filas por fetch en
+        vez de materializar las `limite` filas de la página de una vez.
+        Cada fila es un dict con los campos que usa formatear_gasto.
+        """
+        query = (
+            select(
+                ExpenseTable.id,
+                ExpenseTable.descripcion,
+                ExpenseTable.monto,
+                ExpenseTable.categoria,
+                ExpenseTable.metodo_pago,
+                ExpenseTable.fecha,
+            )
+            .where(ExpenseTable.embedding.is_(None), ExpenseTable.id > desde_id)
+            .order_by(ExpenseTable.id)
+            .limit(limite)
+        )
+        query = self._filter_by_family(query)
+        result = self.session.execute(
+            query.execution_options(stream_results=True, yield_per=lote)
+        )
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+    def guardar_embeddings(self, embeddings: dict[int, list[float]]) -> int:
+        """
+        Persistir varios embeddings con un solo UPDATE ... FROM (VALUES ...).
+        No hace commit: lo decide el caller (una transacción por chunk).
+
+        Returns:
+            Cantidad de filas actualizadas.
+        """
+        if not embeddings:
+            return 0
+        from sqlalchemy import text
+
+        valores: list[str] = []
+        params: dict[str, Any] = {}
+        for i, (expense_id, embedding) in enumerate(embeddings.items()):
+            valores.append(f"(:id_{i}, CAST(:emb_{i} AS vector))")
+            params[f"id_{i}"] = expense_id
+            params[f"emb_{i}"] = str(embedding)
+
+        sql = f"""
+            UPDATE expenses AS e
+            SET embedding = v.embedding
+            FROM (VALUES {", ".join(valores)}) AS v(id, embedding)
+            WHERE e.id = v.id
+        """
+        if self.familia_id is not None:
+            sql += " AND e.familia_id = :fid"
+            params["fid"] = self.familia_id
+
+        result = self.session.execute(text(sql), params)
+        self.session.flush()
+        return int(result.rowcount or 0)
+
     def buscar_por_similitud(
         self,
         embedding: list[float],
@@ -4,8 +4,11 @@ Repository para gestión de ingresos familiares
 
 from __future__ import annotations
 
+import calendar
 from collections.abc import Sequence
+from datetime import date
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from database.tables import IncomeTable
@@ -48,12 +51,31 @@ class IncomeRepository(BaseTableRepository[Income, IncomeTable]):
 
     def get_by_month(self, year: int, month: int) -> Sequence[Income]:
         """Obtener ingresos de un mes específico de la familia"""
-        from sqlalchemy import extract
+        ultimo_dia = calendar.monthrange(year, month)[1]
+        return self.get_by_date_range(
+            date(year, month, 1), date(year, month, ultimo_dia)
+        )
 
-        query = self.session.query(IncomeTable).filter(
-            extract("year", IncomeTable.fecha) == year,
-            extract("month", IncomeTable.fecha) == month,
+    def get_by_date_range(
+        self,
+        fecha_ini: date,
+        fecha_fin: date,
+        incluir_recurrentes: bool = False,
+    ) -> Sequence[Income]:
+        """
+        Obtener ingresos de la familia entre dos fechas (inclusive).
+
+        Usa `fecha BETWEEN` (sargable) sobre idx_incomes_familia_fecha.
+        Con incluir_recurrentes=True suma en la misma query los ingresos
+        recurrentes de cualquier fecha (sueldo, alquiler cobrado, etc.).
+        """
+        en_rango = IncomeTable.fecha.between(fecha_ini, fecha_fin)
+        condicion = (
+            or_(IncomeTable.es_recurrente.is_(True), en_rango)
+            if incluir_recurrentes
+            else en_rango
         )
+        query = self.session.query(IncomeTable).filter(condicion)
         query = self._filter_by_family(query)
-        rows = query.all()
+        rows = query.order_by(IncomeTable.fecha).all()
         return [income_to_domain(row) for row in rows]
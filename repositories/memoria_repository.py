@@ -1,11 +1,17 @@
 """
 MemoriaRepository — Acceso a la tabla ai_vector_memory con búsqueda semántica.
 Usa SQL directo para las operaciones vectoriales (pgvector <=> cosine distance).
+
+Modo híbrido: además del ranking HNSW, rankea por full-text (content_tsv,
+configuración 'spanish') y fusiona ambas listas con Reciprocal Rank Fusion
+en una sola query.
 """
 
 from __future__ import annotations
 
 import logging
+import os
+import re
 from typing import Any
 
 from sqlalchemy import text
@@ -13,6 +19,27 @@ from sqlalchemy.orm import Session
 
 logger = logging.getLogger(__name__)
 
+# Candidatos que aporta cada ranking (vector y full-text) antes de fusionar
+MEMORY_HYBRID_CANDIDATES = int(os.getenv("MEMORY_HYBRID_CANDIDATES", "40"))
+# Constante k de RRF: score = Σ 1 / (k + rank)
+RRF_K = 60
+
+_PALABRA = re.compile(r"\w+")
+
+
+def consulta_tsquery(pregunta: str) -> str:
+    """
+    Términos de la pregunta unidos con OR para to_tsquery.
+
+    websearch_to_tsquery/plainto_tsquery exigen TODOS los términos ("¿Cuánto
+    pagué de UTE?" → 'cuant' & 'pag' & 'ute') y casi ningún recuerdo los
+    tiene. Con OR alcanza con compartir uno ('ute'); ts_rank_cd premia a los
+    que comparten más. Solo pasan caracteres de palabra, así que el usuario
+    no puede inyectar operadores; las stopwords las descarta to_tsquery.
+    """
+    terminos = dict.fromkeys(p.lower() for p in _PALABRA.findall(pregunta))
+    return " | ".join(terminos)
+
 
 class MemoriaRepository:
     """
@@ -66,6 +93,7 @@ class MemoriaRepository:
         embedding: list[float],
         limit: int = 5,
         source_type: str | None = None,
+        consulta: str | None = None,
     ) -> list[dict[str, Any]]:
         """
         Buscar registros semánticamente similares usando cosine distance HNSW.
@@ -74,10 +102,16 @@ class MemoriaRepository:
             embedding: Vector de consulta (768 dims de nomic-embed-text).
             limit: Máximo de resultados.
             source_type: Filtrar por tipo ('expense', 'income', 'snapshot').
+            consulta: Texto de la pregunta; si viene, la búsqueda es híbrida
+                (vector + full-text fusionados con RRF).
 
         Returns:
-            Lista de dicts con {id, content, source_type, source_id, distance}.
+            Lista de dicts con {id, content, source_type, source_id, distance}
+            (más `score` RRF en modo híbrido).
         """
+        tsquery = consulta_tsquery(consulta) if consulta else ""
+        if tsquery:
+            return self._buscar_hibrido(embedding, tsquery, limit, source_type)
         try:
             if source_type:
                 result = self.session.execute(
@@ -129,6 +163,97 @@ class MemoriaRepository:
             logger.error("[MEMORIA_REPO] Error en búsqueda semántica: %s", str(e))
             return []
 
+    def _buscar_hibrido(
+        self,
+        embedding: list[float],
+        tsquery: str,
+        limit: int,
+        source_type: str | None,
+    ) -> list[dict[str, Any]]:
+        """
+        Vector + full-text fusionados con RRF en una sola query.
+
+        Cada rama toma sus MEMORY_HYBRID_CANDIDATES mejores (HNSW y GIN) y
+        un recuerdo suma 1 / (RRF_K + rank) por cada ranking en el que
+        aparece. Si la consulta no tiene términos indexables (solo stopwords)
+        la rama full-text queda vacía y el resultado es el ranking vectorial.
+        Si la query falla (ej: falta content_tsv porque no corrió la
+        migración 023) se revierte solo su SAVEPOINT, sin descartar lo
+        pendiente en la sesión, y se cae a la búsqueda vectorial.
+        """
+        filtro_tipo = "AND source_type = :src_type" if source_type else ""
+        try:
+            with self.session.begin_nested():
+                result = self.session.execute(
+                    text(f"""
+                        WITH vec AS (
+                            SELECT id, ROW_NUMBER() OVER (ORDER BY distance) AS rnk
+                            FROM (
+                                SELECT id,
+                                       embedding <=> CAST(:emb AS vector) AS distance
+                                FROM ai_vector_memory
+                                WHERE familia_id = :fam_id {filtro_tipo}
+                                ORDER BY distance
+                                LIMIT :candidatos
+                            ) v
+                        ),
+                        fts AS (
+                            SELECT id, ROW_NUMBER() OVER (ORDER BY rank DESC, id) AS rnk
+                            FROM (
+                                SELECT id, ts_rank_cd(content_tsv, q) AS rank
+                                FROM ai_vector_memory,
+                                     to_tsquery('spanish', :consulta) AS q
+                                WHERE familia_id = :fam_id {filtro_tipo}
+                                  AND content_tsv @@ q
+                                ORDER BY rank DESC, id
+                                LIMIT :candidatos
+                            ) f
+                        ),
+                        fusion AS (
+                            SELECT id, SUM(1.0 / (:rrf_k + rnk)) AS score
+                            FROM (
+                                SELECT id, rnk FROM vec
+                                UNION ALL
+                                SELECT id, rnk FROM fts
+                            ) r
+                            GROUP BY id
+                        )
+                        SELECT m.id, m.content, m.source_type, m.source_id,
+                               m.embedding <=> CAST(:emb AS vector) AS distance,
+                               f.score
+                        FROM fusion f
+                        JOIN ai_vector_memory m ON m.id = f.id
+                        ORDER BY f.score DESC, distance
+                        LIMIT :lim
+                    """),
+                    {
+                        "fam_id": self.familia_id,
+                        "emb": str(embedding),
+                        "consulta": tsquery,
+                        "src_type": source_type,
+                        "candidatos": max(MEMORY_HYBRID_CANDIDATES, limit),
+                        "rrf_k": RRF_K,
+                        "lim": limit,
+                    },
+                )
+                filas = result.fetchall()
+            return [
+                {
+                    "id": row[0],
+                    "content": row[1],
+                    "source_type": row[2],
+                    "source_id": row[3],
+                    "distance": float(row[4]) if row[4] is not None else 1.0,
+                    "score": float(row[5]),
+                }
+                for row in filas
+            ]
+        except Exception as e:
+            logger.warning(
+                "[MEMORIA_REPO] Búsqueda híbrida falló, se usa solo vector: %s", str(e)
+            )
+            return self.buscar_similares(embedding, limit, source_type)
+
     def buscar_por_source(
         self, source_type: str, source_id: int
     ) -> dict[str, Any] | None:
@@ -0,0 +1,81 @@
+"""
+MerchantCategoryRepository — Categoría aprendida por comercio y familia.
+Usa SQL directo sobre merchant_categories (PK familia_id + comercio + categoria).
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Sufijos societarios que el OCR lee o no según el ticket
+_SUFIJOS = re.compile(r"\b(s ?a|s ?r ?l|ltda|sas|s ?en ?c)\b$")
+
+
+def normalizar_comercio(nombre: str) -> str:
+    """
+    Clave del comercio: minúsculas, sin tildes, sin puntuación ni sufijos
+    societarios. 'TIENDA INGLESA S.A.' y 'Tienda Inglesa' dan la misma clave.
+    """
+    sin_tildes = unicodedata.normalize("NFKD", nombre).encode("ascii", "ignore")
+    clave = re.sub(r"[^a-z0-9]+", " ", sin_tildes.decode().lower()).strip()
+    return _SUFIJOS.sub("", clave).strip()[:200]
+
+
+class MerchantCategoryRepository:
+    """
+    Repository para merchant_categories.
+    Cada confirmación suma una vez a (comercio, categoría); la sugerencia es
+    la categoría más elegida para ese comercio.
+    """
+
+    def __init__(self, session: Session, familia_id: int | None) -> None:
+        self.session = session
+        self.familia_id = familia_id
+
+    def sugerir(self, comercio: str) -> str | None:
+        """Categoría más confirmada para el comercio, o None si es nuevo."""
+        clave = normalizar_comercio(comercio)
+        if not clave or self.familia_id is None:
+            return None
+        try:
+            row = self.session.execute(
+                text("""
+                    SELECT categoria
+                    FROM merchant_categories
+                    WHERE familia_id = :fid AND comercio = :comercio
+                    ORDER BY veces DESC, updated_at DESC
+                    LIMIT 1
+                """),
+                {"fid": self.familia_id, "comercio": clave},
+            ).first()
+            return row[0] if row else None
+        except Exception as e:
+            logger.error("[MERCHANT_REPO] Error al leer: %s", str(e))
+            return None
+
+    def registrar(self, comercio: str, categoria: str) -> None:
+        """Sumar una confirmación de `categoria` para el comercio."""
+        clave = normalizar_comercio(comercio)
+        if not clave or self.familia_id is None:
+            return
+        try:
+            self.session.execute(
+                text("""
+                    INSERT INTO merchant_categories (familia_id, comercio, categoria)
+                    VALUES (:fid, :comercio, :categoria)
+                    ON CONFLICT (familia_id, comercio, categoria)
+                    DO UPDATE SET veces = merchant_categories.veces + 1,
+                                  updated_at = NOW()
+                """),
+                {"fid": self.familia_id, "comercio": clave, "categoria": categoria},
+            )
+            self.session.flush()
+        except Exception as e:
+            logger.error("[MERCHANT_REPO] Error al guardar: %s", str(e))
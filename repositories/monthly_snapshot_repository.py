@@ -1,11 +1,15 @@
 """
 Repositorio para snapshots mensuales de gastos.
 Usa SQL con window function LAG para comparativa mes a mes.
+Los snapshots se mantienen por deltas (trigger en expenses) y solo los meses
+sucios se recalculan al leerlos.
 """
 
 from __future__ import annotations
 
+import calendar
 import logging
+from datetime import date
 from decimal import Decimal
 
 from sqlalchemy import text
@@ -24,50 +28,100 @@ class MonthlySnapshotRepository:
         self.familia_id = familia_id
 
     # ------------------------------------------------------------------
-    # ESCRITURA — upsert del mes actual
+    # ESCRITURA — recálculo perezoso de meses sucios
     # ------------------------------------------------------------------
+    # Los deltas de cada INSERT/UPDATE/DELETE en expenses los aplica el
+    # trigger trg_expenses_monthly_snapshot (migración 020). Un mes se
+    # recalcula entero solo si nunca se materializó o quedó marcado dirty.
 
-    def upsert_mes_actual(self, anio: int, mes: int) -> int:
+    def meses_pendientes(self, meses: list[tuple[int, int]]) -> list[tuple[int, int]]:
         """
-        Calcula y guarda (INSERT OR UPDATE) las métricas del mes indicado
-        directamente desde la tabla expenses.
+        Meses (anio, mes) que necesitan recálculo: sin estado o dirty.
+        Una sola lectura por PK de monthly_snapshot_estado.
+        """
+        if not meses:
+            return []
+        rows = self.session.execute(
+            text("""
+                SELECT anio, mes
+                FROM monthly_snapshot_estado
+                WHERE familia_id = :familia_id
+                  AND anio = ANY(:anios)
+                  AND dirty = FALSE
+            """),
+            {
+                "familia_id": self.familia_id,
+                "anios": sorted({anio for anio, _ in meses}),
+            },
+        ).fetchall()
+        al_dia = {(row.anio, row.mes) for row in rows}
+        return [m for m in dict.fromkeys(meses) if m not in al_dia]
+
+    def recalcular_mes(self, anio: int, mes: int) -> int:
+        """
+        Recalcula desde expenses las métricas del mes y lo marca al día.
+
+        Primero toma el lock de la fila de estado: un trigger concurrente
+        espera a este commit (y luego aplica su delta) o ya commiteó y su
+        gasto entra en el GROUP BY.
 
         Returns:
             Cantidad de categorías guardadas.
         """
-        sql = text("""
-            INSERT INTO monthly_expense_snapshots
-                (familia_id, anio, mes, categoria, total_dinero,
-                 cantidad_compras, ticket_promedio)
-            SELECT
-                :familia_id,
-                :anio,
-                :mes,
-                categoria,
-                SUM(monto)                              AS total_dinero,
-                COUNT(id)                               AS cantidad_compras,
-                ROUND(SUM(monto)::NUMERIC / COUNT(id), 2) AS ticket_promedio
-            FROM expenses
-            WHERE familia_id = :familia_id
-              AND EXTRACT(YEAR  FROM fecha) = :anio
-              AND EXTRACT(MONTH FROM fecha) = :mes
-            GROUP BY categoria
-            ON CONFLICT (familia_id, anio, mes, categoria)
-            DO UPDATE SET
-                total_dinero     = EXCLUDED.total_dinero,
-                cantidad_compras = EXCLUDED.cantidad_compras,
-                ticket_promedio  = EXCLUDED.ticket_promedio,
-                created_at       = CURRENT_TIMESTAMP
-        """)
-
+        params = {
+            "familia_id": self.familia_id,
+            "anio": anio,
+            "mes": mes,
+            "fecha_ini": date(anio, mes, 1),
+            "fecha_fin": date(anio, mes, calendar.monthrange(anio, mes)[1]),
+        }
+        self.session.execute(
+            text("""
+                INSERT INTO monthly_snapshot_estado (familia_id, anio, mes, dirty)
+                VALUES (:familia_id, :anio, :mes, TRUE)
+                ON CONFLICT (familia_id, anio, mes) DO UPDATE SET dirty = TRUE
+            """),
+            params,
+        )
+        self.session.execute(
+            text("""
+                DELETE FROM monthly_expense_snapshots
+                WHERE familia_id = :familia_id AND anio = :anio AND mes = :mes
+            """),
+            params,
+        )
         result = self.session.execute(
-            sql,
-            {"familia_id": self.familia_id, "anio": anio, "mes": mes},
+            text("""
+                INSERT INTO monthly_expense_snapshots
+                    (familia_id, anio, mes, categoria, total_dinero,
+                     cantidad_compras, ticket_promedio)
+                SELECT
+                    :familia_id,
+                    :anio,
+                    :mes,
+                    categoria,
+                    SUM(monto)                              AS total_dinero,
+                    COUNT(id)                               AS cantidad_compras,
+                    ROUND(SUM(monto)::NUMERIC / COUNT(id), 2) AS ticket_promedio
+                FROM expenses
+                WHERE familia_id = :familia_id
+                  AND fecha BETWEEN :fecha_ini AND :fecha_fin
+                GROUP BY categoria
+            """),
+            params,
+        )
+        self.session.execute(
+            text("""
+                UPDATE monthly_snapshot_estado
+                SET dirty = FALSE, actualizado_en = NOW()
+                WHERE familia_id = :familia_id AND anio = :anio AND mes = :mes
+            """),
+            params,
         )
         self.session.commit()
         count: int = result.rowcount
         logger.info(
-            "Snapshot upsert: familia=%s %s/%s → %s categorías",
+            "Snapshot recalculado: familia=%s %s/%s → %s categorías",
             self.familia_id,
             mes,
             anio,
@@ -75,6 +129,18 @@ class MonthlySnapshotRepository:
         )
         return count
 
+    def asegurar_meses(self, meses: list[tuple[int, int]]) -> int:
+        """
+        Recalcula solo los meses pendientes; el resto ya está al día por deltas.
+
+        Returns:
+            Cantidad de meses recalculados (0 en el camino habitual).
+        """
+        pendientes = self.meses_pendientes(meses)
+        for anio, mes in pendientes:
+            self.recalcular_mes(anio, mes)
+        return len(pendientes)
+
     # ------------------------------------------------------------------
     # LECTURA — comparativa con LAG
     # ------------------------------------------------------------------
@@ -97,6 +163,9 @@ class MonthlySnapshotRepository:
         Returns:
             Lista de CategoryMetric con variaciones ya calculadas.
         """
+        # Row comparison sobre (familia_id, anio, mes): range scan del índice
+        anio_ini, mes_ini = divmod(anio * 12 + mes - 1 - meses_atras, 12)
+        mes_ini += 1
         sql = text("""
             WITH metricas AS (
                 SELECT
@@ -117,11 +186,7 @@ class MonthlySnapshotRepository:
                     ) AS ticket_anterior
                 FROM monthly_expense_snapshots
                 WHERE familia_id = :familia_id
-                  AND (
-                      (anio = :anio AND mes = :mes)
-                      OR (anio * 12 + mes BETWEEN (:anio * 12 + :mes - :meses_atras)
-                                              AND (:anio * 12 + :mes - 1))
-                  )
+                  AND (anio, mes) BETWEEN (:anio_ini, :mes_ini) AND (:anio, :mes)
             )
             SELECT *
             FROM metricas
@@ -135,7 +200,8 @@ class MonthlySnapshotRepository:
                 "familia_id": self.familia_id,
                 "anio": anio,
                 "mes": mes,
-                "meses_atras": meses_atras,
+                "anio_ini": anio_ini,
+                "mes_ini": mes_ini,
             },
         ).fetchall()
 
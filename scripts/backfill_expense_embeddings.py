@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+backfill_expense_embeddings.py  Backfill de expenses.embedding
+===============================================================
+Genera los embeddings de los gastos que todavía no lo tienen (históricos,
+importados o creados con Ollama caído) y los guarda en PostgreSQL.
+
+Reanudable: el último id procesado se guarda en --checkpoint tras cada
+chunk; volver a ejecutar el comando retoma desde ahí.
+
+Uso:
+  uv run python scripts/backfill_expense_embeddings.py [--familia-id 1]
+      [--chunk-size 512] [--batch-size 64] [--concurrency 2]
+      [--checkpoint .backfill_embeddings.json] [--desde-cero]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al path para imports
+_project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_project_root))
+
+# Auto-detectar si estamos fuera de Docker: si no puede resolver 'postgres',
+# fuerza POSTGRES_HOST=localhost para que funcione desde el host del servidor.
+_default_host = os.getenv("POSTGRES_HOST", "postgres")
+if _default_host == "postgres":
+    try:
+        socket.gethostbyname("postgres")
+    except socket.gaierror:
+        os.environ["POSTGRES_HOST"] = "localhost"
+
+from services.ai.embedding_backfill import (
+    BACKFILL_CHUNK_SIZE,
+    BACKFILL_CONCURRENCY,
+    BackfillCheckpoint,
+    BackfillStats,
+    EmbeddingBackfill,
+)
+from services.ai.embedding_service import (
+    EMBEDDING_BATCH_SIZE,
+    EmbeddingService,
+    close_http_client,
+)
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Backfill de expenses.embedding")
+    parser.add_argument("--familia-id", type=int, default=None,
+                        help="Limitar a una familia (default: todas)")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE,
+                        help="Filas por chunk (un UPDATE + commit por chunk)")
+    parser.add_argument("--batch-size", type=int, default=EMBEDDING_BATCH_SIZE,
+                        help="Textos por request de embeddings a Ollama")
+    parser.add_argument("--concurrency", type=int, default=BACKFILL_CONCURRENCY,
+                        help="Requests de embeddings en vuelo")
+    parser.add_argument("--checkpoint", type=Path,
+                        default=_project_root / ".backfill_embeddings.json",
+                        help="Archivo donde se guarda el último id procesado")
+    parser.add_argument("--desde-cero", action="store_true",
+                        help="Ignorar el checkpoint y empezar desde el id 0")
+    return parser.parse_args()
+
+
+def _reportar(stats: BackfillStats) -> None:
+    print(
+        f"[BACKFILL] chunk {stats.chunks}: {stats.actualizadas} actualizadas, "
+        f"{stats.errores} con error, last_id={stats.last_id} "
+        f"({stats.filas_por_seg:.1f} filas/s)"
+    )
+
+
+async def main() -> int:
+    args = _parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    backfill = EmbeddingBackfill(
+        # Textos que no se repiten: sin EmbeddingCache para no desplazar
+        # las preguntas frecuentes
+        EmbeddingService(usar_cache=False),
+        familia_id=args.familia_id,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        checkpoint=BackfillCheckpoint(args.checkpoint, args.familia_id),
+        on_progress=_reportar,
+    )
+    try:
+        stats = await backfill.run(desde_id=0 if args.desde_cero else None)
+    finally:
+        await close_http_client()
+
+    print(
+        f"[OK] {stats.actualizadas}/{stats.leidas} gastos con embedding en "
+        f"{stats.segundos:.1f}s ({stats.filas_por_seg:.1f} filas/s)"
+    )
+    if stats.errores:
+        print(
+            f"[WARN] {stats.errores} gastos sin embedding; "
+            "volver a ejecutar con --desde-cero"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+benchmark_prefill.py  Prefill de Ollama: layout anterior vs prefijo estable
+===========================================================================
+Manda a Ollama las mismas preguntas, alternadas como en la vista del
+Contador, con dos layouts de prompt:
+
+- anterior: reglas, instrucciones de la consulta, normativa y memoria
+  (dependen de la pregunta) y recién después los datos de la familia.
+- estable:  el de AIAdvisorService._construir_prompt: PREFIJO_CONTADOR,
+  datos de la familia, normativa/memoria, instrucciones y pregunta.
+
+Con num_predict=1 casi todo el tiempo es prefill. Ollama reporta en
+prompt_eval_count los tokens que evaluó de verdad (los del prefijo que ya
+tenía en KV-cache no cuentan) y en prompt_eval_duration cuánto tardó.
+La primera llamada de cada layout carga el modelo y no se mide.
+
+Uso:
+  uv run python scripts/benchmark_prefill.py [--rondas 3]
+      [--modelo contador-oriental] [--keep-alive 30m]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al path para imports
+_project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_project_root))
+
+from ollama import AsyncClient
+
+from services.ai.ai_advisor_service import (
+    OLLAMA_KEEP_ALIVE,
+    PREFIJO_CONTADOR,
+    AIAdvisorService,
+)
+
+PREGUNTAS = [
+    "¿Cuánto gasté este mes?",
+    "¿En qué categoría gasté más?",
+    "¿Me conviene pagar la patente en una sola cuota?",
+    "¿Puedo deducir el alquiler del IRPF?",
+]
+
+# Datos de una familia tipo, con el formato de _formatear_datos_financieros
+DATOS = "\n".join(
+    ["DATOS FINANCIEROS DEL MES (calculados por el sistema):"]
+    + [
+        f"- {categoria}: $ {monto} en {cantidad} gastos (débito {cantidad // 2})"
+        for categoria, monto, cantidad in [
+            ("Almacén", "18 450", 23),
+            ("Supermercado", "32 900", 11),
+            ("Servicios", "9 870", 5),
+            ("Transporte", "6 300", 14),
+            ("Salud", "4 150", 3),
+            ("Educación", "12 000", 2),
+            ("Ocio", "5 480", 7),
+            ("Hogar", "7 260", 6),
+        ]
+    ]
+    + [
+        "TOTAL GASTOS: $ 96 410",
+        "INGRESOS: $ 142 000",
+        "BALANCE: $ 45 590",
+        "INTEGRANTES: 4",
+    ]
+)
+
+
+def _prompt_anterior(svc: AIAdvisorService, pregunta: str) -> str:
+    """Mismo contenido en el orden de antes: lo variable antes que los datos."""
+    normativa, _ = svc._seleccionar_contexto(pregunta)
+    seccion_normativa = (
+        f"NORMATIVA URUGUAYA RELEVANTE:\n{normativa}\n\n" if normativa else ""
+    )
+    return (
+        f"{PREFIJO_CONTADOR}"
+        "- PRIORIDAD: Los datos reales del usuario (abajo) mandan sobre cualquier"
+        " normativa general. Respondé basándote en esos datos primero.\n"
+        "- Máximo 4 líneas de respuesta.\n\n"
+        f"{seccion_normativa}{DATOS}\n\n"
+        f"PREGUNTA: {pregunta}\n\nRESPUESTA:"
+    )
+
+
+def _prompt_estable(svc: AIAdvisorService, pregunta: str) -> str:
+    normativa, _ = svc._seleccionar_contexto(pregunta)
+    return svc._construir_prompt(pregunta, normativa, DATOS)
+
+
+async def _medir(
+    client: AsyncClient,
+    modelo: str,
+    keep_alive: str,
+    prompts: list[str],
+) -> list[tuple[int, float]]:
+    """(tokens evaluados, ms de prefill) por prompt, sin la llamada de carga."""
+    mediciones: list[tuple[int, float]] = []
+    for i, prompt in enumerate(prompts):
+        respuesta = await client.generate(
+            model=modelo,
+            prompt=prompt,
+            keep_alive=keep_alive,
+            options={"temperature": 0.0, "num_predict": 1},
+        )
+        if i > 0:
+            mediciones.append(
+                (
+                    respuesta.get("prompt_eval_count") or 0,
+                    (respuesta.get("prompt_eval_duration") or 0) / 1e6,
+                )
+            )
+    return mediciones
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Prefill: layout anterior vs estable")
+    parser.add_argument("--rondas", type=int, default=3,
+                        help="Veces que se repite la lista de preguntas")
+    parser.add_argument("--modelo", default="contador-oriental",
+                        help="Modelo de Ollama (el del Modelfile)")
+    parser.add_argument("--keep-alive", default=OLLAMA_KEEP_ALIVE,
+                        help="keep_alive enviado en cada request")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = _parse_args()
+    svc = AIAdvisorService()
+    client = AsyncClient(host=os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"))
+    preguntas = PREGUNTAS * max(args.rondas, 1)
+
+    print(f"{len(preguntas)} consultas por layout, modelo {args.modelo}\n")
+    print(f"{'layout':<10} {'tokens eval':>12} {'p50 ms':>8} {'media ms':>9}")
+    for nombre, armar in (("anterior", _prompt_anterior), ("estable", _prompt_estable)):
+        prompts = [armar(svc, p) for p in preguntas]
+        try:
+            mediciones = await _medir(client, args.modelo, args.keep_alive, prompts)
+        except Exception as e:
+            print(f"[ERROR] Ollama no respondió: {e}")
+            return 1
+        tokens = [t for t, _ in mediciones]
+        tiempos = [ms for _, ms in mediciones]
+        print(
+            f"{nombre:<10} {statistics.mean(tokens):>12.0f} "
+            f"{statistics.median(tiempos):>8.0f} {statistics.mean(tiempos):>9.0f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+index_knowledge.py  Índice vectorial de ./knowledge
+===================================================
+Fragmenta y vectoriza la normativa igual que al arrancar la app. Con
+EMBEDDING_CACHE_PERSISTENT=true los vectores quedan en la tabla
+embedding_cache y el próximo arranque no vuelve a llamar a Ollama.
+
+Con --pregunta muestra qué fragmentos irían al prompt y su similitud,
+útil para ajustar KNOWLEDGE_CHUNK_CHARS / KNOWLEDGE_MIN_SIMILITUD.
+
+Uso:
+  uv run python scripts/index_knowledge.py [--pregunta "¿cuánto deduzco por hijo?"]
+      [--top-k 3]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+# Agregar raíz del proyecto al path para imports
+_project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_project_root))
+
+from result import Err
+
+from services.ai.embedding_service import close_http_client
+from services.ai.knowledge_index import KNOWLEDGE_TOP_K, knowledge_index
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Índice vectorial de ./knowledge")
+    parser.add_argument("--pregunta", default=None,
+                        help="Mostrar los fragmentos que recupera esta pregunta")
+    parser.add_argument("--top-k", type=int, default=KNOWLEDGE_TOP_K,
+                        help="Fragmentos a mostrar para --pregunta")
+    return parser.parse_args()
+
+
+async def main() -> int:
+    args = _parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    try:
+        resultado = await knowledge_index.construir()
+        if isinstance(resultado, Err):
+            print(f"[ERROR] {resultado.err().message}")
+            return 1
+
+        print(f"[OK] {resultado.ok()} fragmentos de "
+              f"{len(knowledge_index.documentos)} archivos")
+        for fragmento in knowledge_index.fragmentos:
+            print(f"  {len(fragmento.texto):>5} chars  {fragmento.seccion}")
+
+        if args.pregunta:
+            emb = await knowledge_index.embedding.generar_embedding(args.pregunta)
+            if isinstance(emb, Err):
+                print(f"[ERROR] {emb.err().message}")
+                return 1
+            print(f"\nPregunta: {args.pregunta}")
+            for fragmento, similitud in knowledge_index.buscar(
+                emb.ok(), k=args.top_k, min_similitud=-1.0
+            ):
+                print(f"  {similitud:.3f}  {fragmento.seccion}")
+    finally:
+        await close_http_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
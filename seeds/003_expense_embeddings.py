@@ -14,7 +14,11 @@ import os
 from database.engine import get_session
 from database.tables import ExpenseTable
 from repositories.expense_repository import ExpenseRepository
-from services.ai.embedding_service import EmbeddingService
+from services.ai.embedding_service import (
+    EMBEDDING_BATCH_SIZE,
+    EmbeddingService,
+    close_http_client,
+)
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
@@ -66,18 +70,25 @@ async def _poblar(session) -> tuple[int, int]:
     )
     ok_count = 0
 
-    for g in gastos:
-        texto = _formatear_gasto(g)
-        result = await embedding_service.generar_embedding(texto)
-        if hasattr(result, "ok") and result.ok():
-            repo.guardar_embedding(g.id, result.ok())
+    for inicio in range(0, len(gastos), EMBEDDING_BATCH_SIZE):
+        lote = gastos[inicio : inicio + EMBEDDING_BATCH_SIZE]
+        result = await embedding_service.generar_embeddings(
+            [_formatear_gasto(g) for g in lote]
+        )
+        if result.is_err():
+            print(f"  ❌ Error embedding lote desde #{inicio}: {result.err()}")
+            continue
+        repo.guardar_embeddings(
+            {g.id: emb for g, emb in zip(lote, result.ok(), strict=True)}
+        )
+        session.commit()
+        for g in lote:
             ok_count += 1
             print(
                 f"  ✅ [{ok_count:02d}/{len(gastos)}] {g.fecha} | {g.descripcion[:45]}"
             )
-        else:
-            print(f"  ❌ Error embedding: {g.descripcion} — {result}")
 
+    await close_http_client()
     return ok_count, familia_id
 
 
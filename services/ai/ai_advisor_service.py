@@ -9,18 +9,79 @@ from __future__ import annotations
 
 import logging
 import os
+from collections.abc import Callable
 from decimal import Decimal
 
 from result import Err, Ok, Result
 
 from models.ai_model import AIContext, AIRequest, AIResponse
 from models.errors import AppError
+from services.ai.answer_cache import AnswerCache, answer_cache, huella_contexto
+from services.ai.knowledge_index import (
+    KNOWLEDGE_MIN_SIMILITUD,
+    KnowledgeIndex,
+    formatear_fragmentos,
+    knowledge_index,
+)
 from services.ai.model_router import ModelRouter
+from services.ai.prompt_budget import (
+    SeccionPrompt,
+    ajustar_a_presupuesto,
+    estimar_tokens,
+    presupuesto_para,
+)
+from services.infrastructure.ai_clients import ai_clients
 from services.infrastructure.formatters import format_pesos_ai
 from services.infrastructure.nvidia_client import NVIDIAClient
 
 logger = logging.getLogger(__name__)
 
+# Tiempo que Ollama mantiene el modelo (y su KV-cache) cargado tras la
+# última consulta; el default de Ollama (5m) obliga a recargar gemma2 en RAM
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+# Bloque fijo al inicio de todos los prompts del Contador: no depende de la
+# pregunta, del modelo ni de la cuota, así Ollama reutiliza su KV-cache
+# entre consultas. Todo lo variable va después (ver _armar_prompt).
+PREFIJO_CONTADOR = """Sos el Contador Oriental, un contador público uruguayo.
+
+TU ROL:
+- Leer los datos que te da el sistema y narrarlos en español rioplatense.
+- Dar consejos contables basados en la normativa uruguaya si te la preguntan.
+
+REGLAS ESTRICTAS (NO LAS ROMPAS NUNCA):
+- NUNCA inventar números. NUNCA hacer cálculos. NUNCA dividir ni derivar valores.
+- NUNCA decir "la mitad" o "un tercio" o porcentajes inventados. Solo usá los números exactos que aparecen en los datos.
+- Si una cuota es $ 650 y otra es $ 240, NO digas "la mitad". Decí "$ 650 y $ 240 respectivamente".
+- Los totales, balances y sumas YA están calculados por el sistema. Solo leer y narrar.
+- Si un dato no aparece explícitamente en los datos, NO lo menciones ni lo calcules.
+- Si hay pocos gastos este mes (principio de mes), usá la sección "CIERRE DEL MES ANTERIOR" para dar contexto del cierre del mes pasado.
+- La sección "CIERRE DEL MES ANTERIOR" es REFERENCIA: NO la mezcles con los datos del mes actual.
+
+SÍMBOLOS MONETARIOS (estricto):
+- Reportá cada moneda por separado: $ para UYU, USD para USD.
+- Usá $ para Pesos Uruguayos (moneda principal del usuario). Ejemplo: $ 650, $ 890, $ 173 720
+- Usá USD para Dólares. NUNCA uses U$S ni $U.
+- NUNCA conviertas ni sumes monedas distintas
+
+TONO: Profesional pero de confianza. Evitá tecnicismos. Si algo está mal, decilo directo.
+"""
+
+
+def _log_prefill(respuesta) -> None:
+    """
+    Loguear el prefill que reporta Ollama. prompt_eval_count son los tokens
+    evaluados de verdad: con el prefijo en KV-cache es menor que el prompt.
+    """
+    tokens = respuesta.get("prompt_eval_count") or 0
+    duracion_ns = respuesta.get("prompt_eval_duration") or 0
+    if tokens or duracion_ns:
+        logger.info(
+            "[PROMPT] Prefill Ollama: %d tokens evaluados en %.0f ms",
+            tokens,
+            duracion_ns / 1e6,
+        )
+
 
 class AIAdvisorService:
     """
@@ -31,17 +92,30 @@ class AIAdvisorService:
     - Llama 3 70B (NVIDIA cloud) para consultas complejas/normativas
     - ModelRouter decide qué modelo usar
     - QuotaManager controla cuotas diarias de Llama 3
+    - AnswerCache devuelve sin llamar al modelo las preguntas ya respondidas
+      con el mismo contexto (`AIResponse.desde_cache`; en streaming,
+      el callback `on_cache_hit` de cada llamada)
     """
 
     def __init__(
         self,
         model_router: ModelRouter | None = None,
         nvidia_client: NVIDIAClient | None = None,
-        knowledge_path: str = "./knowledge",
+        knowledge_path: str | None = None,
+        knowledge: KnowledgeIndex | None = None,
+        cache: AnswerCache | None = None,
     ):
         self.router = model_router or ModelRouter()
         self.nvidia_client = nvidia_client or NVIDIAClient()
-        self.knowledge_path = knowledge_path
+        self.cache = cache or answer_cache
+        if knowledge is None:
+            knowledge = (
+                knowledge_index
+                if knowledge_path in (None, knowledge_index.knowledge_path)
+                else KnowledgeIndex(knowledge_path)
+            )
+        self.knowledge = knowledge
+        self.knowledge_path = knowledge.knowledge_path
         self.mapa_conocimiento = {
             "irpf_familia_uy.md": {
                 "keywords": [
@@ -124,9 +198,62 @@ class AIAdvisorService:
             },
         }
 
+    async def _recuperar_normativa(self, pregunta: str) -> tuple[str, str | None]:
+        """
+        Fragmentos de normativa relevantes para la pregunta.
+
+        Con el KnowledgeIndex listo van al prompt solo los top-k fragmentos
+        por similitud; el embedding de la pregunta sale del EmbeddingCache
+        (el controller ya lo calculó). Sin índice, sin embedding o sin
+        fragmentos sobre el umbral, cae a la selección de archivo por
+        palabras clave.
+
+        Returns:
+            (texto_normativa, archivos_usados)
+        """
+        if self.knowledge.listo:
+            emb_result = await self.knowledge.embedding.generar_embedding(pregunta)
+            if isinstance(emb_result, Ok):
+                resultados = self.knowledge.buscar(emb_result.ok())
+                if resultados:
+                    logger.info(
+                        "[KNOWLEDGE] %d fragmentos para la pregunta (%s)",
+                        len(resultados),
+                        ", ".join(f"{s:.2f}" for _, s in resultados),
+                    )
+                    archivos = list(dict.fromkeys(f.archivo for f, _ in resultados))
+                    return formatear_fragmentos(resultados), ", ".join(archivos)
+                logger.info(
+                    "[KNOWLEDGE] Ningún fragmento supera KNOWLEDGE_MIN_SIMILITUD=%.2f:"
+                    " se usan palabras clave",
+                    KNOWLEDGE_MIN_SIMILITUD,
+                )
+            else:
+                logger.warning(
+                    "[KNOWLEDGE] Sin embedding de la pregunta: %s", emb_result.err()
+                )
+        return self._seleccionar_contexto(pregunta)
+
+    async def _embedding_para_cache(self, pregunta: str) -> list[float] | None:
+        """
+        Embedding de la pregunta para el AnswerCache (sale del EmbeddingCache,
+        el mismo que usa _recuperar_normativa). None si la caché está apagada
+        o Ollama no responde: la consulta sigue sin caché.
+        """
+        if not self.cache.enabled:
+            return None
+        emb_result = await self.knowledge.embedding.generar_embedding(pregunta)
+        if isinstance(emb_result, Ok):
+            return emb_result.ok()
+        logger.warning(
+            "[ANSWER_CACHE] Sin embedding de la pregunta: %s", emb_result.err()
+        )
+        return None
+
     def _seleccionar_contexto(self, pregunta: str) -> tuple[str, str | None]:
         """
-        Selecciona el archivo de conocimiento más relevante
+        Selecciona el archivo de conocimiento más relevante por palabras clave
+        (fallback cuando el índice vectorial no está disponible).
 
         Returns:
             (contenido_archivo, nombre_archivo)
@@ -145,12 +272,12 @@ class AIAdvisorService:
         archivo_seleccionado = max(scores, key=scores.get)
 
         if scores[archivo_seleccionado] > 0:
-            ruta = os.path.join(self.knowledge_path, archivo_seleccionado)
             try:
-                with open(ruta, encoding="utf-8") as f:
-                    return f.read(), archivo_seleccionado
-            except FileNotFoundError:
+                documentos = self.knowledge.cargar_documentos()
+            except OSError:
                 return "", None
+            if archivo_seleccionado in documentos:
+                return documentos[archivo_seleccionado], archivo_seleccionado
 
         return "", None
 
@@ -383,27 +510,71 @@ class AIAdvisorService:
             cuota_agotada: Si True, agrega aviso de precisión reducida.
             modelo: 'gemma2' o 'llama3' — ajusta restricciones del prompt.
         """
-        seccion_rag = (
-            f"NORMATIVA URUGUAYA RELEVANTE:\n{contexto_legal}\n"
-            if contexto_legal
-            else ""
+        datos_reales = bool(gastos_formateados or memoria_vectorial)
+        secciones = [
+            SeccionPrompt(
+                "normativa",
+                contexto_legal,
+                prioridad=1,
+                envoltura="NORMATIVA URUGUAYA RELEVANTE:\n{}\n\n",
+            ),
+            SeccionPrompt(
+                "memoria",
+                memoria_vectorial,
+                prioridad=2,
+                envoltura=(
+                    "CONTEXTO HISTÓRICO (meses anteriores, solo referencia):\n"
+                    "{}\n"
+                    "IMPORTANTE: estos registros históricos son de meses anteriores."
+                    " Los datos reales del mes actual son los de arriba.\n\n"
+                ),
+            ),
+            SeccionPrompt("datos", gastos_formateados, prioridad=3, envoltura="{}\n\n"),
+        ]
+
+        # Medir el prompt sin secciones y recortar lo que no entre en num_ctx
+        fijo = self._armar_prompt(pregunta, "", "", cuota_agotada, modelo, datos_reales)
+        textos, informe = ajustar_a_presupuesto(
+            estimar_tokens(fijo), secciones, presupuesto_para(modelo)
         )
+        logger.info("[PROMPT] Tokens estimados (%s): %s", modelo, informe.resumen())
+        if informe.recortadas:
+            logger.warning(
+                "[PROMPT] Secciones recortadas para entrar en contexto: %s",
+                ", ".join(informe.recortadas),
+            )
 
-        seccion_memoria = (
-            f"CONTEXTO HISTÓRICO (meses anteriores, solo referencia):\n"
-            f"{memoria_vectorial}\n"
-            f"IMPORTANTE: estos registros históricos son de meses anteriores."
-            f" Los datos reales del mes actual están abajo.\n"
-            if memoria_vectorial
-            else ""
+        return self._armar_prompt(
+            pregunta,
+            textos["datos"],
+            textos["normativa"] + textos["memoria"],
+            cuota_agotada,
+            modelo,
+            datos_reales,
         )
 
-        seccion_gastos = f"{gastos_formateados}\n" if gastos_formateados else ""
+    @staticmethod
+    def _armar_prompt(
+        pregunta: str,
+        datos: str,
+        contexto: str,
+        cuota_agotada: bool,
+        modelo: str,
+        datos_reales: bool,
+    ) -> str:
+        """
+        Plantilla del prompt con las secciones ya ajustadas al presupuesto.
 
-        datos_reales = bool(seccion_gastos or seccion_memoria)
+        Orden de más estable a más variable, para maximizar el prefijo que
+        Ollama reutiliza de la consulta anterior: PREFIJO_CONTADOR (igual
+        siempre), datos de la familia (cambian al cargar un gasto),
+        normativa y memoria (dependen de la pregunta), instrucciones de
+        esta consulta y la pregunta.
+        """
         prioridad = (
-            "- PRIORIDAD: Los datos reales del usuario (abajo) mandan sobre cualquier"
-            " normativa general. Respondé basándote en esos datos primero.\n"
+            "- PRIORIDAD: Los datos reales del usuario (arriba) mandan sobre"
+            " cualquier normativa general. Respondé basándote en esos datos"
+            " primero.\n"
             if datos_reales
             else ""
         )
@@ -412,7 +583,7 @@ class AIAdvisorService:
         aviso_cuota = ""
         if cuota_agotada:
             aviso_cuota = (
-                "\nADVERTENCIA: Estás respondiendo con información limitada "
+                "- ADVERTENCIA: Estás respondiendo con información limitada "
                 "(modelo local). Sé conservador y agregá que la respuesta "
                 "puede ser menos precisa.\n"
             )
@@ -420,71 +591,48 @@ class AIAdvisorService:
         # Límite de líneas depende del modelo
         max_lineas = "6 líneas" if modelo == "llama3" else "4 líneas"
 
-        prompt = f"""Sos el Contador Oriental, un contador público uruguayo.
-
-TU ROL:
-- Leer los datos que te da el sistema y narrarlos en español rioplatense.
-- Dar consejos contables basados en la normativa uruguaya si te la preguntan.
-
-REGLAS ESTRICTAS (NO LAS ROMPAS NUNCA):
-- NUNCA inventar números. NUNCA hacer cálculos. NUNCA dividir ni derivar valores.
-- NUNCA decir "la mitad" o "un tercio" o porcentajes inventados. Solo usá los números exactos que aparecen en los datos.
-- Si una cuota es $ 650 y otra es $ 240, NO digas "la mitad". Decí "$ 650 y $ 240 respectivamente".
-- Los totales, balances y sumas YA están calculados por el sistema. Solo leer y narrar.
-- Si un dato no aparece explícitamente en los datos, NO lo menciones ni lo calcules.
-- Si hay pocos gastos este mes (principio de mes), usá la sección "CIERRE DEL MES ANTERIOR" para dar contexto del cierre del mes pasado.
-- La sección "CIERRE DEL MES ANTERIOR" es REFERENCIA: NO la mezcles con los datos del mes actual.
-
-SÍMBOLOS MONETARIOS (estricto):
-- Reportá cada moneda por separado: $ para UYU, USD para USD.
-- Usá $ para Pesos Uruguayos (moneda principal del usuario). Ejemplo: $ 650, $ 890, $ 173 720
-- Usá USD para Dólares. NUNCA uses U$S ni $U.
-- NUNCA conviertas ni sumes monedas distintas
-
-TONO: Profesional pero de confianza. Evitá tecnicismos. Si algo está mal, decilo directo.
-{aviso_cuota}{prioridad}- Máximo {max_lineas} de respuesta.
-
-{seccion_rag}{seccion_memoria}{seccion_gastos}PREGUNTA: {pregunta}
-
-RESPUESTA:"""
-
-        return prompt
+        return (
+            f"{PREFIJO_CONTADOR}\n{datos}{contexto}"
+            f"INSTRUCCIONES PARA ESTA CONSULTA:\n"
+            f"{aviso_cuota}{prioridad}- Máximo {max_lineas} de respuesta.\n\n"
+            f"PREGUNTA: {pregunta}\n\nRESPUESTA:"
+        )
 
     async def _call_ollama(self, prompt: str) -> dict:
         """
         Llama a Ollama (Gemma 2:2b local) sin streaming.
         Retorna el dict completo con 'response' key.
         """
-        from ollama import AsyncClient
-
-        _ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        client = AsyncClient(host=_ollama_url)
+        client = ai_clients.ollama()
 
-        return await client.generate(
+        response = await client.generate(
             model="contador-oriental",
             prompt=prompt,
+            keep_alive=OLLAMA_KEEP_ALIVE,
             options={"temperature": 0.0, "num_predict": 512},
         )
+        _log_prefill(response)
+        return response
 
     async def _call_ollama_stream(self, prompt: str):
         """
         Llama a Ollama (Gemma 2:2b local) con streaming.
         Yield tokens a medida que el modelo los genera.
         """
-        from ollama import AsyncClient
-
-        _ollama_url = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        client = AsyncClient(host=_ollama_url)
+        client = ai_clients.ollama()
 
         async for part in await client.generate(
             model="contador-oriental",
             prompt=prompt,
             stream=True,
+            keep_alive=OLLAMA_KEEP_ALIVE,
             options={"temperature": 0.0, "num_predict": 512},
         ):
             token: str = part.get("response", "")
             if token:
                 yield token
+            if part.get("done"):
+                _log_prefill(part)
 
     async def _call_nvidia(self, prompt: str) -> dict:
         """
@@ -517,6 +665,7 @@ RESPUESTA:"""
         has_quota: bool = True,
         from_history: bool = False,
         range_months: int = 1,
+        on_cache_hit: Callable[[], None] | None = None,
     ):
         """
         Versión streaming de consultar().
@@ -530,6 +679,8 @@ RESPUESTA:"""
             has_quota: Si la familia tiene cuota de Llama 3 disponible.
             from_history: Si la pregunta viene del botón de Historial.
             range_months: Cantidad de meses que abarca la consulta.
+            on_cache_hit: Se llama antes del primer token si la respuesta
+                sale del AnswerCache (sin modelo, no consume cuota).
 
         Yields:
             str — fragmento de texto generado por el modelo.
@@ -541,18 +692,7 @@ RESPUESTA:"""
 
         ai_logger = get_logger("AIAdvisor.stream")
 
-        # 1. Seleccionar contexto legal
-        contexto, _ = self._seleccionar_contexto(request.pregunta)
-
-        # 2. Formatear gastos
-        gastos_formateados = ""
-        if request.incluir_gastos_recientes and ctx:
-            gastos_formateados = self._formatear_datos_financieros(ctx)
-            comparativa_str = self._formatear_comparativa(ctx)
-            if comparativa_str:
-                gastos_formateados += comparativa_str
-
-        # 3. Routing: decidir qué modelo usar
+        # 1. Routing: decidir qué modelo usar
         modelo = self.router.route(
             pregunta=request.pregunta,
             ctx=ctx,
@@ -562,6 +702,30 @@ RESPUESTA:"""
         )
         cuota_agotada = modelo == "gemma2" and not has_quota
 
+        # 2. AnswerCache: misma huella de contexto y pregunta casi igual
+        ctx_prompt = ctx if request.incluir_gastos_recientes else None
+        huella = huella_contexto(ctx_prompt, modelo, cuota_agotada)
+        embedding = await self._embedding_para_cache(request.pregunta)
+        if embedding is not None:
+            cacheada = self.cache.buscar(request.familia_id, huella, embedding)
+            if cacheada is not None:
+                ai_logger.info("⚡ STREAM desde AnswerCache (%s)", modelo)
+                if on_cache_hit is not None:
+                    on_cache_hit()
+                for linea in cacheada.respuesta.splitlines(keepends=True):
+                    yield linea
+                return
+
+        # 3. Seleccionar contexto legal y formatear gastos
+        contexto, archivo = await self._recuperar_normativa(request.pregunta)
+
+        gastos_formateados = ""
+        if request.incluir_gastos_recientes and ctx:
+            gastos_formateados = self._formatear_datos_financieros(ctx)
+            comparativa_str = self._formatear_comparativa(ctx)
+            if comparativa_str:
+                gastos_formateados += comparativa_str
+
         # 4. Construir prompt con flags de modelo
         prompt = self._construir_prompt(
             request.pregunta,
@@ -587,28 +751,45 @@ RESPUESTA:"""
         ai_logger.info("🔴 STREAM iniciado (%s chars prompt)", len(prompt))
 
         # 5. Llamar al modelo seleccionado
+        generados: list[str] = []
         try:
             if modelo == "llama3":
                 ai_logger.info("🤖 streaming con Llama 3 70B (NVIDIA)")
                 async for token in self._call_nvidia_stream(prompt):
+                    generados.append(token)
                     yield token
             else:
                 ai_logger.info("🤖 streaming con Gemma 2:2b (Ollama)")
                 if cuota_agotada:
-                    yield "⚠️ Respuesta con precisión reducida. "
-                    yield "La cuota diaria de consultas avanzadas está agotada. "
-                    yield "Se renueva a medianoche.\n\n"
+                    for token in (
+                        "⚠️ Respuesta con precisión reducida. ",
+                        "La cuota diaria de consultas avanzadas está agotada. ",
+                        "Se renueva a medianoche.\n\n",
+                    ):
+                        generados.append(token)
+                        yield token
                 async for token in self._call_ollama_stream(prompt):
+                    generados.append(token)
                     yield token
         except (ConnectionError, TimeoutError, RuntimeError, Exception) as e:
             ai_logger.error("❌ Error en stream: %s", e)
-            # Fallback a Ollama si NVIDIA falla
+            # Fallback a Ollama si NVIDIA falla (la respuesta no se cachea)
             if modelo == "llama3":
                 ai_logger.info("🔄 Fallback a Gemma 2 por error en NVIDIA")
                 async for token in self._call_ollama_stream(prompt):
                     yield token
             else:
                 raise
+        else:
+            if embedding is not None:
+                self.cache.guardar(
+                    request.familia_id,
+                    huella,
+                    request.pregunta,
+                    embedding,
+                    "".join(generados),
+                    archivo,
+                )
 
         ai_logger.info("✅ STREAM completado (%s)", modelo)
 
@@ -666,19 +847,7 @@ RESPUESTA:"""
         ai_logger = get_logger("AIAdvisor")
 
         try:
-            # 1. Seleccionar contexto legal
-            contexto, archivo = self._seleccionar_contexto(request.pregunta)
-
-            # 2. Formatear gastos si están disponibles
-            gastos_formateados = ""
-
-            if request.incluir_gastos_recientes and ctx:
-                gastos_formateados = self._formatear_datos_financieros(ctx)
-                comparativa_str = self._formatear_comparativa(ctx)
-                if comparativa_str:
-                    gastos_formateados += comparativa_str
-
-            # 3. Routing: decidir qué modelo usar
+            # 1. Routing: decidir qué modelo usar
             modelo = self.router.route(
                 pregunta=request.pregunta,
                 ctx=ctx,
@@ -687,6 +856,35 @@ RESPUESTA:"""
                 range_months=range_months,
             )
             cuota_agotada = modelo == "gemma2" and not has_quota
+            gastos_incluidos = ctx.total_gastos_count if ctx else 0
+
+            # 2. AnswerCache: misma huella de contexto y pregunta casi igual
+            ctx_prompt = ctx if request.incluir_gastos_recientes else None
+            huella = huella_contexto(ctx_prompt, modelo, cuota_agotada)
+            embedding = await self._embedding_para_cache(request.pregunta)
+            if embedding is not None:
+                cacheada = self.cache.buscar(request.familia_id, huella, embedding)
+                if cacheada is not None:
+                    ai_logger.info("⚡ Respuesta desde AnswerCache (%s)", modelo)
+                    return Ok(
+                        AIResponse(
+                            respuesta=cacheada.respuesta,
+                            archivo_usado=cacheada.archivo_usado,
+                            gastos_incluidos=gastos_incluidos,
+                            desde_cache=True,
+                        )
+                    )
+
+            # 3. Seleccionar contexto legal y formatear gastos
+            contexto, archivo = await self._recuperar_normativa(request.pregunta)
+
+            gastos_formateados = ""
+
+            if request.incluir_gastos_recientes and ctx:
+                gastos_formateados = self._formatear_datos_financieros(ctx)
+                comparativa_str = self._formatear_comparativa(ctx)
+                if comparativa_str:
+                    gastos_formateados += comparativa_str
 
             # 4. Construir prompt con flags de modelo
             prompt = self._construir_prompt(
@@ -716,19 +914,32 @@ RESPUESTA:"""
 
             # 5. Llamar al modelo seleccionado
             respuesta_texto = ""
+            cacheable = True
 
             if modelo == "llama3":
-                respuesta_texto = await self._consultar_llama3(prompt, ai_logger)
+                respuesta_texto, cacheable = await self._consultar_llama3(
+                    prompt, ai_logger
+                )
             else:
                 respuesta_texto = await self._consultar_gemma2(
                     prompt, ai_logger, cuota_agotada
                 )
 
+            if cacheable and embedding is not None:
+                self.cache.guardar(
+                    request.familia_id,
+                    huella,
+                    request.pregunta,
+                    embedding,
+                    respuesta_texto,
+                    archivo,
+                )
+
             # 6. Construir respuesta
             ai_response = AIResponse(
                 respuesta=respuesta_texto,
                 archivo_usado=archivo,
-                gastos_incluidos=ctx.total_gastos_count if ctx else 0,
+                gastos_incluidos=gastos_incluidos,
             )
 
             return Ok(ai_response)
@@ -736,10 +947,13 @@ RESPUESTA:"""
         except Exception as e:
             return Err(AppError(message=f"Error en el Contador Oriental: {str(e)}"))
 
-    async def _consultar_llama3(self, prompt: str, ai_logger) -> str:
+    async def _consultar_llama3(self, prompt: str, ai_logger) -> tuple[str, bool]:
         """
         Llama a Llama 3 70B via NVIDIA API.
         Si falla, hace fallback automático a Gemma 2:2b.
+
+        Returns:
+            (respuesta, True si la generó Llama 3 y no el fallback)
         """
         ai_logger.info("🤖 Generando respuesta con Llama 3 70B (NVIDIA)")
         try:
@@ -751,13 +965,13 @@ RESPUESTA:"""
                 result.get("prompt_tokens", 0),
                 result.get("completion_tokens", 0),
             )
-            return respuesta
+            return respuesta, True
         except (ConnectionError, TimeoutError, RuntimeError) as e:
             ai_logger.warning("⚠️ NVIDIAClient falló: %s. Fallback a Gemma 2", e)
-            return await self._consultar_gemma2(prompt, ai_logger, cuota_agotada=False)
         except Exception as e:
             ai_logger.warning("⚠️ Error inesperado en NVIDIA: %s. Fallback a Gemma 2", e)
-            return await self._consultar_gemma2(prompt, ai_logger, cuota_agotada=False)
+        fallback = await self._consultar_gemma2(prompt, ai_logger, cuota_agotada=False)
+        return fallback, False
 
     async def _consultar_gemma2(
         self, prompt: str, ai_logger, cuota_agotada: bool = False
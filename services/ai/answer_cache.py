@@ -0,0 +1,203 @@
+"""
+AnswerCache — Respuestas del Contador reutilizables entre consultas.
+
+Las familias repiten preguntas ("¿cuánto gasté este mes?") y los chips de
+preguntas rápidas de AIAdvisorView mandan prompts idénticos. Si los números
+del AIContext no cambiaron y la pregunta es casi la misma, la respuesta del
+modelo también: no hace falta volver a pagar prefill en Gemma ni gastar
+cuota de Llama 3.
+
+Cada respuesta se guarda por familia con la huella del contexto (hash de
+los datos que recibe el modelo, el modelo elegido y el aviso de cuota) y el
+vector normalizado de la pregunta. Un hit exige la misma huella y
+similitud coseno >= ANSWER_CACHE_MIN_SIMILITUD con una pregunta guardada.
+GASTO_CREADO, INGRESO_CREADO y COMPRA_CUOTAS_CREADA vacían la caché de la
+familia (la memoria vectorial también cambia con ellos).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import os
+import time
+from array import array
+from dataclasses import dataclass
+
+from core.events import Event, EventSystem, EventType
+from models.ai_model import AIContext
+
+logger = logging.getLogger(__name__)
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_MIN_SIMILITUD = float(os.getenv("ANSWER_CACHE_MIN_SIMILITUD", "0.97"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_POR_FAMILIA = int(os.getenv("ANSWER_CACHE_MAX_POR_FAMILIA", "32"))
+
+# Eventos que cambian los datos (o la memoria) de los que sale la respuesta
+_EVENTOS_INVALIDAN = (
+    EventType.GASTO_CREADO,
+    EventType.INGRESO_CREADO,
+    EventType.COMPRA_CUOTAS_CREADA,
+)
+
+
+def huella_contexto(ctx: AIContext | None, modelo: str, cuota_agotada: bool) -> str:
+    """
+    Hash de todo lo que, además de la pregunta, define la respuesta.
+
+    ctx=None (consulta sin gastos) tiene su propia huella.
+    """
+    datos = ctx.model_dump_json() if ctx is not None else ""
+    contenido = f"{modelo}|{cuota_agotada}|{datos}"
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+
+def _normalizar(vector: list[float]) -> array:
+    norma = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return array("d", (x / norma for x in vector))
+
+
+@dataclass
+class RespuestaCacheada:
+    """Una respuesta del modelo con la pregunta y el contexto que la generaron."""
+
+    huella: str
+    pregunta: str
+    vector: array
+    respuesta: str
+    archivo_usado: str | None
+    creada: float
+
+
+class AnswerCache:
+    """
+    Caché semántica de respuestas por familia, en memoria y con LRU.
+
+    La búsqueda es lineal: con ANSWER_CACHE_MAX_POR_FAMILIA entradas son
+    unas decenas de productos punto, nada al lado de una llamada al modelo.
+    """
+
+    def __init__(
+        self,
+        min_similitud: float = ANSWER_CACHE_MIN_SIMILITUD,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        max_por_familia: int = ANSWER_CACHE_MAX_POR_FAMILIA,
+        enabled: bool = ANSWER_CACHE_ENABLED,
+    ) -> None:
+        self.min_similitud = min_similitud
+        self.ttl_seconds = ttl_seconds
+        self.max_por_familia = max_por_familia
+        self.enabled = enabled
+        self._entradas: dict[int, list[RespuestaCacheada]] = {}
+        self._suscripta_a: set[int] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _vigentes(self, familia_id: int) -> list[RespuestaCacheada]:
+        """Entradas de la familia, descartando las vencidas por TTL."""
+        limite = time.monotonic() - self.ttl_seconds
+        entradas = [e for e in self._entradas.get(familia_id, []) if e.creada > limite]
+        if entradas:
+            self._entradas[familia_id] = entradas
+        else:
+            self._entradas.pop(familia_id, None)
+        return entradas
+
+    def buscar(
+        self, familia_id: int, huella: str, embedding: list[float]
+    ) -> RespuestaCacheada | None:
+        """Respuesta guardada con la misma huella y la pregunta más parecida."""
+        if not self.enabled:
+            return None
+        consulta = _normalizar(embedding)
+        mejor: RespuestaCacheada | None = None
+        mejor_similitud = self.min_similitud
+        for entrada in self._vigentes(familia_id):
+            if entrada.huella != huella:
+                continue
+            similitud = sum(
+                a * b for a, b in zip(consulta, entrada.vector, strict=True)
+            )
+            if similitud >= mejor_similitud:
+                mejor, mejor_similitud = entrada, similitud
+
+        if mejor is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        # LRU: la usada pasa al final, se descartan primero las del principio
+        entradas = self._entradas[familia_id]
+        entradas.remove(mejor)
+        entradas.append(mejor)
+        logger.info(
+            "[ANSWER_CACHE] Hit familia=%s similitud=%.3f pregunta_cacheada='%s'",
+            familia_id,
+            mejor_similitud,
+            mejor.pregunta,
+        )
+        return mejor
+
+    def guardar(
+        self,
+        familia_id: int,
+        huella: str,
+        pregunta: str,
+        embedding: list[float],
+        respuesta: str,
+        archivo_usado: str | None = None,
+    ) -> None:
+        """Guardar una respuesta completa del modelo."""
+        if not self.enabled or not respuesta.strip():
+            return
+        vector = _normalizar(embedding)
+        entradas = [
+            e
+            for e in self._vigentes(familia_id)
+            if not (
+                e.huella == huella
+                and sum(a * b for a, b in zip(vector, e.vector, strict=True))
+                >= self.min_similitud
+            )
+        ]
+        entradas.append(
+            RespuestaCacheada(
+                huella=huella,
+                pregunta=pregunta,
+                vector=vector,
+                respuesta=respuesta,
+                archivo_usado=archivo_usado,
+                creada=time.monotonic(),
+            )
+        )
+        self._entradas[familia_id] = entradas[-self.max_por_familia :]
+
+    def invalidar(self, familia_id: int) -> int:
+        """Vaciar la caché de una familia. Devuelve cuántas respuestas tiraba."""
+        descartadas = len(self._entradas.pop(familia_id, []))
+        if descartadas:
+            logger.info(
+                "[ANSWER_CACHE] %d respuestas invalidadas (familia=%s)",
+                descartadas,
+                familia_id,
+            )
+        return descartadas
+
+    async def invalidar_por_evento(self, event: Event) -> None:
+        """Handler del EventSystem: un gasto o ingreso nuevo cambia las respuestas."""
+        self.invalidar(event.familia_id)
+
+    def suscribir(self, event_system: EventSystem) -> None:
+        """Suscribir la invalidación a los eventos de datos (idempotente)."""
+        if id(event_system) in self._suscripta_a:
+            return
+        for event_type in _EVENTOS_INVALIDAN:
+            event_system.subscribe(event_type, self.invalidar_por_evento)
+        self._suscripta_a.add(id(event_system))
+        logger.info("[ANSWER_CACHE] Invalidación suscrita al EventSystem ✅")
+
+
+# Singleton global del proceso
+answer_cache = AnswerCache()
@@ -0,0 +1,120 @@
+"""
+ContextPipeline — Ejecuta el armado del contexto del Contador como un DAG async.
+
+Cada etapa declara de qué otras depende; las independientes corren en
+paralelo (embedding por HTTP, lecturas de BD en un pool de hilos, cotización,
+memoria vectorial) y cada una registra su duración para diagnosticar el
+time-to-first-token.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+AI_CONTEXT_DB_WORKERS = int(os.getenv("AI_CONTEXT_DB_WORKERS", "4"))
+
+# Pool acotado para lecturas de BD: no supera el pool de conexiones del engine
+_db_executor = ThreadPoolExecutor(
+    max_workers=AI_CONTEXT_DB_WORKERS,
+    thread_name_prefix="ai-context-db",
+)
+
+_SIN_FALLBACK = object()
+
+StageFn = Callable[[dict[str, Any]], Awaitable[Any]]
+
+
+async def run_in_db_pool[T](fn: Callable[[], T]) -> T:
+    """Ejecutar una función bloqueante (SQLAlchemy síncrono) en el pool de BD."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_executor, fn)
+
+
+@dataclass
+class _Stage:
+    name: str
+    fn: StageFn
+    depends_on: tuple[str, ...]
+    fallback: Any = _SIN_FALLBACK
+
+
+class ContextPipeline:
+    """
+    DAG mínimo de etapas async.
+
+    Uso:
+        pipeline = ContextPipeline()
+        pipeline.add_stage("embedding", generar)
+        pipeline.add_stage("memoria", buscar, depends_on=("embedding",))
+        resultados = await pipeline.run()
+        pipeline.timings  # {"embedding": 41.2, "memoria": 12.8, ...} en ms
+
+    Cada etapa recibe un dict con los resultados de sus dependencias.
+    Si una etapa define `fallback`, sus excepciones se loguean y se usa ese
+    valor; si no, la excepción cancela el resto y se propaga al caller.
+    """
+
+    def __init__(self) -> None:
+        self.timings: dict[str, float] = {}
+        self._stages: dict[str, _Stage] = {}
+
+    def add_stage(
+        self,
+        name: str,
+        fn: StageFn,
+        depends_on: tuple[str, ...] = (),
+        fallback: Any = _SIN_FALLBACK,
+    ) -> None:
+        """Registrar una etapa; sus dependencias deben estar ya registradas."""
+        faltantes = [d for d in depends_on if d not in self._stages]
+        if faltantes:
+            raise ValueError(
+                f"Etapa '{name}' depende de etapas no registradas: {faltantes}"
+            )
+        self._stages[name] = _Stage(name, fn, depends_on, fallback)
+
+    async def run(self) -> dict[str, Any]:
+        """Ejecutar todas las etapas respetando dependencias."""
+        tasks: dict[str, asyncio.Task[Any]] = {}
+
+        async def _ejecutar(stage: _Stage) -> Any:
+            deps = {d: await tasks[d] for d in stage.depends_on}
+            inicio = time.perf_counter()
+            try:
+                return await stage.fn(deps)
+            except Exception as e:
+                if stage.fallback is _SIN_FALLBACK:
+                    raise
+                logger.warning("[PIPELINE] Etapa '%s' falló: %s", stage.name, e)
+                return stage.fallback
+            finally:
+                self.timings[stage.name] = (time.perf_counter() - inicio) * 1000
+
+        inicio_total = time.perf_counter()
+        for stage in self._stages.values():
+            tasks[stage.name] = asyncio.create_task(_ejecutar(stage))
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            self.timings["total"] = (time.perf_counter() - inicio_total) * 1000
+
+        return {name: task.result() for name, task in tasks.items()}
+
+    def resumen_timings(self) -> str:
+        """Timings formateados para logs: 'embedding=41ms memoria=13ms ...'."""
+        return " ".join(f"{k}={v:.0f}ms" for k, v in self.timings.items())
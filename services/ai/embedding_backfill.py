@@ -0,0 +1,190 @@
+"""
+EmbeddingBackfill — Completa expenses.embedding para gastos históricos.
+
+Recorre los gastos con embedding NULL por keyset (id > último id), leyendo
+cada chunk con un cursor del lado del servidor en lotes de `batch_size`.
+Cada lote es un request multi-input a Ollama, con hasta `concurrency` lotes
+en vuelo, y el chunk entero se persiste con un solo
+UPDATE ... FROM (VALUES ...) y un commit.
+
+El último id procesado se guarda en un checkpoint (JSON) tras cada chunk:
+si el proceso se interrumpe, la próxima corrida retoma desde ahí.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from result import Err
+
+from core.unit_of_work import UnitOfWork
+from repositories.expense_repository import ExpenseRepository
+from services.ai.embedding_service import EMBEDDING_BATCH_SIZE, EmbeddingService
+from services.ai.embedding_writer import escribir_embeddings
+from services.ai.memory_event_handler import formatear_gasto
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_CHUNK_SIZE = 512
+BACKFILL_CONCURRENCY = 2
+
+Lote = list[dict[str, Any]]
+
+
+@dataclass
+class BackfillStats:
+    """Progreso acumulado de una corrida."""
+
+    leidas: int = 0
+    actualizadas: int = 0
+    errores: int = 0
+    chunks: int = 0
+    last_id: int = 0
+    inicio: float = field(default_factory=time.perf_counter)
+
+    @property
+    def segundos(self) -> float:
+        return time.perf_counter() - self.inicio
+
+    @property
+    def filas_por_seg(self) -> float:
+        return self.actualizadas / self.segundos if self.segundos > 0 else 0.0
+
+
+class BackfillCheckpoint:
+    """Último id procesado, persistido en un archivo JSON."""
+
+    def __init__(self, path: Path, familia_id: int | None = None) -> None:
+        self.path = path
+        self.familia_id = familia_id
+
+    def leer(self) -> int:
+        """Id desde el cual retomar (0 si no hay checkpoint compatible)."""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0
+        if data.get("familia_id") != self.familia_id:
+            logger.warning(
+                "[BACKFILL] Checkpoint de otra familia (%s); se ignora",
+                data.get("familia_id"),
+            )
+            return 0
+        return int(data.get("last_id", 0))
+
+    def guardar(self, last_id: int) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"familia_id": self.familia_id, "last_id": last_id}),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+    def borrar(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+
+class EmbeddingBackfill:
+    """
+    Backfill de expenses.embedding por chunks.
+
+    Los lotes que Ollama rechaza se cuentan como errores y sus filas quedan
+    en NULL; una corrida con desde_id=0 las vuelve a intentar.
+    """
+
+    def __init__(
+        self,
+        embedding_service: EmbeddingService,
+        familia_id: int | None = None,
+        chunk_size: int = BACKFILL_CHUNK_SIZE,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        concurrency: int = BACKFILL_CONCURRENCY,
+        checkpoint: BackfillCheckpoint | None = None,
+        on_progress: Callable[[BackfillStats], None] | None = None,
+    ) -> None:
+        self.embedding_service = embedding_service
+        self.familia_id = familia_id
+        self.chunk_size = max(chunk_size, 1)
+        self.batch_size = max(min(batch_size, self.chunk_size), 1)
+        self.concurrency = max(concurrency, 1)
+        self.checkpoint = checkpoint
+        self.on_progress = on_progress
+
+    async def run(self, desde_id: int | None = None) -> BackfillStats:
+        """
+        Procesar todos los gastos pendientes.
+
+        Args:
+            desde_id: Id desde el cual arrancar; None retoma del checkpoint.
+        """
+        stats = BackfillStats()
+        if desde_id is None:
+            desde_id = self.checkpoint.leer() if self.checkpoint else 0
+        stats.last_id = desde_id
+
+        while True:
+            lotes = await asyncio.to_thread(self._leer_chunk, stats.last_id)
+            if not lotes:
+                break
+
+            embeddings = await self._embeber(lotes, stats)
+            stats.actualizadas += await asyncio.to_thread(self._guardar, embeddings)
+            stats.leidas += sum(len(lote) for lote in lotes)
+            stats.last_id = max(fila["id"] for lote in lotes for fila in lote)
+            stats.chunks += 1
+
+            if self.checkpoint is not None:
+                self.checkpoint.guardar(stats.last_id)
+            if self.on_progress is not None:
+                self.on_progress(stats)
+
+        if self.checkpoint is not None and stats.errores == 0:
+            self.checkpoint.borrar()
+        return stats
+
+    def _leer_chunk(self, desde_id: int) -> list[Lote]:
+        with UnitOfWork() as uow:
+            repo = ExpenseRepository(uow.session, self.familia_id)
+            return list(
+                repo.iterar_sin_embedding(desde_id, self.chunk_size, self.batch_size)
+            )
+
+    def _guardar(self, embeddings: dict[int, list[float]]) -> int:
+        if not embeddings:
+            return 0
+        return escribir_embeddings({self.familia_id: embeddings})
+
+    async def _embeber(
+        self, lotes: list[Lote], stats: BackfillStats
+    ) -> dict[int, list[float]]:
+        semaforo = asyncio.Semaphore(self.concurrency)
+
+        async def _lote(lote: Lote) -> dict[int, list[float]]:
+            async with semaforo:
+                result = await self.embedding_service.generar_embeddings(
+                    [formatear_gasto(fila) for fila in lote],
+                    batch_size=len(lote),
+                )
+            if isinstance(result, Err):
+                stats.errores += len(lote)
+                logger.warning(
+                    "[BACKFILL] Lote ids %s-%s falló: %s",
+                    lote[0]["id"],
+                    lote[-1]["id"],
+                    result.err().message,
+                )
+                return {}
+            return {
+                fila["id"]: emb for fila, emb in zip(lote, result.ok(), strict=True)
+            }
+
+        resultados = await asyncio.gather(*(_lote(lote) for lote in lotes))
+        return {k: v for parcial in resultados for k, v in parcial.items()}
@@ -0,0 +1,198 @@
+"""
+EmbeddingCache — Cache direccionado por contenido para embeddings.
+
+La clave es (modelo, sha256 del texto normalizado): el mismo texto con el
+mismo modelo siempre produce el mismo vector, así que preguntas repetidas
+(botones de consulta rápida, pregunta embebida dos veces por consulta)
+no vuelven a llamar a nomic-embed-text.
+
+Dos niveles:
+- Memoria: LRU acotado por cantidad de entradas (vectores en array('d')).
+- Persistente (opcional): tabla embedding_cache en PostgreSQL, sobrevive
+  reinicios y se comparte entre procesos. Sus queries son SQLAlchemy
+  síncrono y corren en el pool de BD, nunca en el event loop.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+from services.ai.context_pipeline import run_in_db_pool
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "1024"))
+EMBEDDING_CACHE_PERSISTENT = (
+    os.getenv("EMBEDDING_CACHE_PERSISTENT", "false").lower() == "true"
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalizar_texto(texto: str) -> str:
+    """Normalizar Unicode (NFC) y colapsar espacios antes de vectorizar."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", texto)).strip()
+
+
+def hash_texto(texto_normalizado: str) -> str:
+    """sha256 hex del texto ya normalizado."""
+    return hashlib.sha256(texto_normalizado.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Contadores del cache (snapshot, no se actualiza solo)."""
+
+    hits: int = 0
+    misses: int = 0
+    persistent_hits: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache:
+    """
+    Cache LRU de embeddings con nivel persistente opcional.
+
+    `get_many`/`put_many` reciben textos ya normalizados y resuelven todo el
+    lote con a lo sumo una query al nivel persistente. Los errores del nivel
+    persistente se loguean y se tratan como miss: el cache nunca rompe la
+    generación de embeddings.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = EMBEDDING_CACHE_MAX_ENTRIES,
+        persistent: bool = EMBEDDING_CACHE_PERSISTENT,
+    ) -> None:
+        self.max_entries = max_entries
+        self.persistent = persistent
+        self._entries: OrderedDict[tuple[str, str], array] = OrderedDict()
+        self._stats = EmbeddingCacheStats()
+
+    async def get(self, model: str, texto: str) -> list[float] | None:
+        """Buscar el embedding de un texto normalizado."""
+        return (await self.get_many(model, [texto])).get(texto)
+
+    async def put(self, model: str, texto: str, embedding: list[float]) -> None:
+        """Guardar el embedding de un texto normalizado."""
+        await self.put_many(model, {texto: embedding})
+
+    async def get_many(self, model: str, textos: list[str]) -> dict[str, list[float]]:
+        """
+        Buscar embeddings para varios textos normalizados.
+
+        Returns:
+            Dict {texto: embedding} solo con los textos encontrados.
+        """
+        encontrados: dict[str, list[float]] = {}
+        pendientes: dict[str, str] = {}
+
+        for texto in dict.fromkeys(textos):
+            clave = (model, hash_texto(texto))
+            vector = self._entries.get(clave)
+            if vector is not None:
+                self._entries.move_to_end(clave)
+                encontrados[texto] = vector.tolist()
+            else:
+                pendientes[clave[1]] = texto
+
+        if pendientes and self.persistent:
+            desde_db = await run_in_db_pool(
+                lambda: self._leer_persistente(model, list(pendientes))
+            )
+            for text_hash, embedding in desde_db.items():
+                texto = pendientes.pop(text_hash)
+                encontrados[texto] = embedding
+                self._guardar_en_memoria((model, text_hash), embedding)
+            self._stats.persistent_hits += len(desde_db)
+
+        self._stats.hits += len(encontrados)
+        self._stats.misses += len(pendientes)
+        if encontrados:
+            logger.debug(
+                "[EMBEDDING_CACHE] %d hits / %d misses (modelo=%s)",
+                len(encontrados),
+                len(pendientes),
+                model,
+            )
+        return encontrados
+
+    async def put_many(self, model: str, embeddings: dict[str, list[float]]) -> None:
+        """Guardar embeddings de textos normalizados en ambos niveles."""
+        if not embeddings:
+            return
+        por_hash = {hash_texto(t): emb for t, emb in embeddings.items()}
+        for text_hash, embedding in por_hash.items():
+            self._guardar_en_memoria((model, text_hash), embedding)
+        if self.persistent:
+            await run_in_db_pool(lambda: self._guardar_persistente(model, por_hash))
+
+    def stats(self) -> EmbeddingCacheStats:
+        """Copia de los contadores actuales."""
+        return replace(self._stats)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        """Vaciar el nivel en memoria y reiniciar contadores (útil en tests)."""
+        self._entries.clear()
+        self._stats = EmbeddingCacheStats()
+
+    def _guardar_en_memoria(
+        self, clave: tuple[str, str], embedding: list[float]
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[clave] = array("d", embedding)
+        self._entries.move_to_end(clave)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def _leer_persistente(
+        self, model: str, text_hashes: list[str]
+    ) -> dict[str, list[float]]:
+        try:
+            from core.unit_of_work import UnitOfWork
+            from repositories.embedding_cache_repository import (
+                EmbeddingCacheRepository,
+            )
+
+            with UnitOfWork() as uow:
+                return EmbeddingCacheRepository(uow.session).obtener_varios(
+                    model, text_hashes
+                )
+        except Exception as e:
+            logger.warning("[EMBEDDING_CACHE] Nivel persistente no disponible: %s", e)
+            return {}
+
+    def _guardar_persistente(
+        self, model: str, embeddings: dict[str, list[float]]
+    ) -> None:
+        try:
+            from core.unit_of_work import UnitOfWork
+            from repositories.embedding_cache_repository import (
+                EmbeddingCacheRepository,
+            )
+
+            with UnitOfWork() as uow:
+                EmbeddingCacheRepository(uow.session).guardar_varios(model, embeddings)
+        except Exception as e:
+            logger.warning("[EMBEDDING_CACHE] No se pudo persistir: %s", e)
+
+
+# Singleton global del proceso
+embedding_cache = EmbeddingCache()
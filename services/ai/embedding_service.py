@@ -1,38 +1,107 @@
 """
 EmbeddingService — Genera vectores de texto usando nomic-embed-text via Ollama.
 Diseñado para Orange Pi 5 Plus: async, liviano, resiliente a fallos.
+
+Todas las instancias comparten un único httpx.AsyncClient por proceso
+(pool keep-alive): cada embedding reutiliza la conexión TCP con Ollama
+en lugar de abrir una nueva por texto. Antes de llamar a Ollama se consulta
+el EmbeddingCache (modelo + hash del texto normalizado).
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
+from typing import Any
 
 import httpx
 from result import Err, Ok, Result
 
 from models.errors import AppError
+from services.ai.embedding_cache import (
+    EmbeddingCache,
+    embedding_cache,
+    normalizar_texto,
+)
 
 logger = logging.getLogger(__name__)
 
 OLLAMA_URL = os.getenv("OLLAMA_BASE_URL", "http://host.docker.internal:11434")
 EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "nomic-embed-text")
 EMBEDDING_TIMEOUT = 30.0
+EMBEDDING_BATCH_TIMEOUT = 120.0
+EMBEDDING_BATCH_SIZE = int(os.getenv("OLLAMA_EMBEDDING_BATCH_SIZE", "64"))
+MAX_TEXT_CHARS = 8000
+
+_POOL_LIMITS = httpx.Limits(
+    max_connections=8,
+    max_keepalive_connections=4,
+    keepalive_expiry=60.0,
+)
+
+_shared_client: httpx.AsyncClient | None = None
+_shared_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Devolver el cliente httpx compartido del proceso, creándolo si hace falta.
+
+    Las conexiones de httpx quedan atadas al event loop que las abrió, así que
+    si cambia el loop (ej: seeds con asyncio.run sucesivos) se crea un cliente
+    nuevo en lugar de reutilizar sockets de un loop cerrado.
+    """
+    global _shared_client, _shared_client_loop
+
+    loop = asyncio.get_running_loop()
+    if (
+        _shared_client is None
+        or _shared_client.is_closed
+        or _shared_client_loop is not loop
+    ):
+        _shared_client = httpx.AsyncClient(
+            timeout=EMBEDDING_TIMEOUT,
+            limits=_POOL_LIMITS,
+        )
+        _shared_client_loop = loop
+        logger.debug("[EMBEDDING] Cliente HTTP compartido creado")
+    return _shared_client
+
+
+async def close_http_client() -> None:
+    """Cerrar el cliente compartido (shutdown de la app o fin de un script)."""
+    global _shared_client, _shared_client_loop
+
+    client = _shared_client
+    _shared_client = None
+    _shared_client_loop = None
+    if client is not None and not client.is_closed:
+        await client.aclose()
 
 
 class EmbeddingService:
     """
     Genera embeddings de 768 dimensiones usando nomic-embed-text vía Ollama.
     100% offline, optimizado para hardware ARM.
+
+    Con `usar_cache=False` no lee ni escribe el EmbeddingCache: el backfill
+    vectoriza miles de textos que no se repiten y solo desplazarían del LRU
+    (y de la tabla embedding_cache) a las preguntas frecuentes.
     """
 
     def __init__(
         self,
         ollama_url: str = OLLAMA_URL,
         model: str = EMBEDDING_MODEL,
+        cache: EmbeddingCache | None = None,
+        usar_cache: bool = True,
     ) -> None:
         self.ollama_url = ollama_url
         self.model = model
+        self.cache: EmbeddingCache | None = None
+        if usar_cache:
+            self.cache = cache if cache is not None else embedding_cache
 
     async def generar_embedding(self, texto: str) -> Result[list[float], AppError]:
         """
@@ -47,33 +116,124 @@ class EmbeddingService:
         if not texto or not texto.strip():
             return Err(AppError(message="Texto vacío: no se puede generar embedding."))
 
-        texto_limpio = texto.strip()[:8000]
+        texto_limpio = normalizar_texto(texto)[:MAX_TEXT_CHARS]
 
-        try:
-            async with httpx.AsyncClient(timeout=EMBEDDING_TIMEOUT) as client:
-                response = await client.post(
-                    f"{self.ollama_url}/api/embeddings",
-                    json={"model": self.model, "prompt": texto_limpio},
-                )
-                if response.status_code == 200:
-                    embedding = response.json().get("embedding", [])
-                    if not embedding:
-                        return Err(AppError(message="Ollama devolvió embedding vacío."))
-                    logger.debug(
-                        "Embedding generado: %d dims para '%s...'",
-                        len(embedding),
-                        texto_limpio[:40],
-                    )
-                    return Ok(embedding)
+        if self.cache is not None:
+            cacheado = await self.cache.get(self.model, texto_limpio)
+            if cacheado is not None:
+                return Ok(cacheado)
+
+        response_result = await self._post(
+            "/api/embeddings",
+            {"model": self.model, "prompt": texto_limpio},
+            timeout=EMBEDDING_TIMEOUT,
+        )
+        if isinstance(response_result, Err):
+            return response_result
+
+        embedding = response_result.ok().get("embedding", [])
+        if not embedding:
+            return Err(AppError(message="Ollama devolvió embedding vacío."))
+        logger.debug(
+            "Embedding generado: %d dims para '%s...'",
+            len(embedding),
+            texto_limpio[:40],
+        )
+        if self.cache is not None:
+            await self.cache.put(self.model, texto_limpio, embedding)
+        return Ok(embedding)
+
+    async def generar_embeddings(
+        self,
+        textos: list[str],
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+    ) -> Result[list[list[float]], AppError]:
+        """
+        Vectorizar varios textos usando el endpoint multi-input /api/embed.
+
+        Los textos ya cacheados no se envían; el resto viaja en lotes de
+        `batch_size` por request, de modo que un backfill de cientos de filas
+        cuesta unos pocos round-trips.
 
+        Args:
+            textos: Textos a vectorizar; ninguno puede estar vacío.
+            batch_size: Cantidad máxima de textos por request a Ollama.
+
+        Returns:
+            Ok([[float, ...], ...]) en el mismo orden que `textos`,
+            o Err si algún lote falla.
+        """
+        if not textos:
+            return Ok([])
+        if any(not t or not t.strip() for t in textos):
+            return Err(AppError(message="Texto vacío: no se puede generar embedding."))
+
+        limpios = [normalizar_texto(t)[:MAX_TEXT_CHARS] for t in textos]
+        resueltos = (
+            await self.cache.get_many(self.model, limpios)
+            if self.cache is not None
+            else {}
+        )
+        faltantes = [t for t in dict.fromkeys(limpios) if t not in resueltos]
+        paso = max(batch_size, 1)
+
+        for inicio in range(0, len(faltantes), paso):
+            lote = faltantes[inicio : inicio + paso]
+            response_result = await self._post(
+                "/api/embed",
+                {"model": self.model, "input": lote},
+                timeout=EMBEDDING_BATCH_TIMEOUT,
+            )
+            if isinstance(response_result, Err):
+                return response_result
+
+            vectores = response_result.ok().get("embeddings", [])
+            if len(vectores) != len(lote) or any(not v for v in vectores):
                 return Err(
                     AppError(
                         message=(
-                            f"Ollama error {response.status_code}: "
-                            f"{response.text[:200]}"
+                            f"Ollama devolvió {len(vectores)} embeddings "
+                            f"para un lote de {len(lote)} textos."
                         )
                     )
                 )
+            nuevos = dict(zip(lote, vectores, strict=True))
+            if self.cache is not None:
+                await self.cache.put_many(self.model, nuevos)
+            resueltos.update(nuevos)
+
+        logger.debug(
+            "Embeddings en lote: %d textos, %d desde cache (batch_size=%d)",
+            len(limpios),
+            len(limpios) - len(faltantes),
+            batch_size,
+        )
+        return Ok([resueltos[t] for t in limpios])
+
+    async def _post(
+        self,
+        path: str,
+        payload: dict[str, Any],
+        timeout: float,
+    ) -> Result[dict[str, Any], AppError]:
+        """POST a Ollama con el cliente compartido; traduce fallos a AppError."""
+        try:
+            client = get_http_client()
+            response = await client.post(
+                f"{self.ollama_url}{path}",
+                json=payload,
+                timeout=timeout,
+            )
+            if response.status_code == 200:
+                return Ok(response.json())
+
+            return Err(
+                AppError(
+                    message=(
+                        f"Ollama error {response.status_code}: {response.text[:200]}"
+                    )
+                )
+            )
         except httpx.ConnectError:
             logger.warning(
                 "[EMBEDDING_FAILED] Ollama no disponible en %s", self.ollama_url
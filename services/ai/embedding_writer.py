@@ -0,0 +1,176 @@
+"""
+EmbeddingWriter — Escritura agrupada de expenses.embedding.
+
+Guardar cada embedding por separado es una sesión, un UPDATE y un commit
+(un fsync) por gasto: en una importación masiva eso domina el costo.
+El writer acumula los embeddings durante una ventana corta y los persiste
+juntos: una transacción por flush y un solo UPDATE ... FROM (VALUES ...)
+por familia.
+
+Cada `encolar` devuelve un Future que se resuelve recién cuando el lote
+quedó escrito: MemoryEventHandler lo espera, así el trabajo del outbox no
+se completa con el embedding solo en memoria. Si el guardado falla, el lote
+vuelve a la cola y los Futures fallan (el outbox reintenta el evento).
+Lo que no se llegue a escribir termina con embedding NULL y lo recupera
+scripts/backfill_expense_embeddings.py.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from collections.abc import Callable
+
+from core.unit_of_work import UnitOfWork
+from repositories.expense_repository import ExpenseRepository
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_WRITER_WINDOW_MS = int(os.getenv("EMBEDDING_WRITER_WINDOW_MS", "250"))
+EMBEDDING_WRITER_MAX_BATCH = int(os.getenv("EMBEDDING_WRITER_MAX_BATCH", "256"))
+
+# familia_id -> {expense_id: embedding}
+Pendientes = dict[int | None, dict[int, list[float]]]
+
+
+def escribir_embeddings(pendientes: Pendientes) -> int:
+    """
+    Persistir embeddings agrupados por familia en una sola transacción.
+
+    Returns:
+        Cantidad de gastos actualizados.
+    """
+    actualizados = 0
+    with UnitOfWork() as uow:
+        for familia_id, embeddings in pendientes.items():
+            if embeddings:
+                repo = ExpenseRepository(uow.session, familia_id)
+                actualizados += repo.guardar_embeddings(embeddings)
+    return actualizados
+
+
+class EmbeddingWriter:
+    """
+    Coalescer de embeddings de gastos.
+
+    `encolar` no bloquea: el flush ocurre al vencer la ventana o apenas se
+    juntan `max_lote` embeddings. Debe usarse desde el event loop.
+
+    Con el worker pool, cada worker espera su Future: un lote junta a lo
+    sumo EVENT_WORKERS gastos por ventana (la carga masiva va por backfill).
+    """
+
+    def __init__(
+        self,
+        ventana_seg: float = EMBEDDING_WRITER_WINDOW_MS / 1000,
+        max_lote: int = EMBEDDING_WRITER_MAX_BATCH,
+        escribir: Callable[[Pendientes], int] = escribir_embeddings,
+    ) -> None:
+        self.ventana_seg = ventana_seg
+        self.max_lote = max(max_lote, 1)
+        self._escribir = escribir
+        self._pendientes: Pendientes = {}
+        self._cantidad = 0
+        self._esperando: list[asyncio.Future[None]] = []
+        self._lock = asyncio.Lock()
+        self._timer: asyncio.Task[None] | None = None
+        self._tareas: set[asyncio.Task[int]] = set()
+
+    @property
+    def pendientes(self) -> int:
+        return self._cantidad
+
+    def encolar(
+        self, familia_id: int | None, expense_id: int, embedding: list[float]
+    ) -> asyncio.Future[None]:
+        """
+        Agregar un embedding; si el gasto ya estaba pendiente, gana el último.
+
+        Returns:
+            Future que se resuelve cuando el lote se escribió, o falla con
+            el error del guardado.
+        """
+        por_familia = self._pendientes.setdefault(familia_id, {})
+        if expense_id not in por_familia:
+            self._cantidad += 1
+        por_familia[expense_id] = embedding
+        escrito: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._esperando.append(escrito)
+
+        if self._cantidad >= self.max_lote:
+            tarea = asyncio.create_task(self.flush())
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_tras_ventana())
+        return escrito
+
+    async def flush(self) -> int:
+        """
+        Escribir ya todo lo pendiente. Devuelve los gastos actualizados.
+
+        Si el guardado falla, el lote vuelve a la cola (sin pisar embeddings
+        más nuevos del mismo gasto) y se devuelve 0.
+        """
+        async with self._lock:
+            if not self._cantidad:
+                return 0
+            pendientes, cantidad = self._pendientes, self._cantidad
+            esperando = self._esperando
+            self._pendientes, self._cantidad, self._esperando = {}, 0, []
+            try:
+                actualizados = await asyncio.to_thread(self._escribir, pendientes)
+            except Exception as e:
+                logger.error(
+                    "[EMBEDDING_WRITER] Error guardando %s embeddings, "
+                    "vuelven a la cola: %s",
+                    cantidad,
+                    e,
+                )
+                self._reencolar(pendientes)
+                for escrito in esperando:
+                    if not escrito.done():
+                        escrito.set_exception(e)
+                return 0
+            for escrito in esperando:
+                if not escrito.done():
+                    escrito.set_result(None)
+            logger.info(
+                "[EMBEDDING_WRITER] %s embeddings guardados (%s familias)",
+                actualizados,
+                len(pendientes),
+            )
+            return actualizados
+
+    async def cerrar(self) -> None:
+        """Cancelar la ventana en curso y escribir lo pendiente."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._tareas:
+            await asyncio.gather(*self._tareas, return_exceptions=True)
+        await self.flush()
+        if self._cantidad:
+            logger.error(
+                "[EMBEDDING_WRITER] %s embeddings sin guardar al cerrar "
+                "(los recupera el backfill)",
+                self._cantidad,
+            )
+
+    def _reencolar(self, pendientes: Pendientes) -> None:
+        for familia_id, embeddings in pendientes.items():
+            por_familia = self._pendientes.setdefault(familia_id, {})
+            for expense_id, embedding in embeddings.items():
+                if expense_id not in por_familia:
+                    por_familia[expense_id] = embedding
+                    self._cantidad += 1
+
+    async def _flush_tras_ventana(self) -> None:
+        await asyncio.sleep(self.ventana_seg)
+        # Lo que llegue durante el flush abre una ventana nueva
+        self._timer = None
+        await self.flush()
+
+
+embedding_writer = EmbeddingWriter()
@@ -6,6 +6,7 @@ Coordina EmbeddingService + MemoriaRepository para guardar y recuperar recuerdos
 from __future__ import annotations
 
 import logging
+import os
 
 from result import Err, Ok, Result
 
@@ -16,6 +17,8 @@ from services.ai.embedding_service import EmbeddingService
 logger = logging.getLogger(__name__)
 
 MAX_CONTEXT_CHARS = 15000
+# Búsqueda híbrida (vector + full-text con RRF) cuando hay texto de pregunta
+MEMORY_HYBRID_SEARCH = os.getenv("MEMORY_HYBRID_SEARCH", "true").lower() == "true"
 
 
 class IAMemoryService:
@@ -26,7 +29,7 @@ class IAMemoryService:
         texto → EmbeddingService → vector 768d → MemoriaRepository → PostgreSQL
 
     Flujo de consulta:
-        pregunta → embedding → HNSW cosine search → contexto relevante
+        pregunta → embedding → HNSW cosine + full-text (RRF) → contexto relevante
     """
 
     def __init__(
@@ -113,32 +116,54 @@ class IAMemoryService:
             )
             return Err(embedding_result.err())
 
-        recuerdos = self.repo.buscar_similares(
-            embedding=embedding_result.ok(),
+        contextos = self.buscar_contexto_con_embedding(
+            embedding_result.ok(),
             limit=limit,
             source_type=source_type,
+            consulta=pregunta,
+        )
+        logger.info(
+            "[MEMORY] Contexto recuperado: %d recuerdos (%d chars) para '%s...'",
+            len(contextos),
+            sum(len(c) for c in contextos),
+            pregunta[:50],
         )
+        return Ok(contextos)
+
+    def buscar_contexto_con_embedding(
+        self,
+        embedding: list[float],
+        limit: int = 5,
+        source_type: str | None = None,
+        consulta: str | None = None,
+    ) -> list[str]:
+        """
+        Variante síncrona con el embedding de la pregunta ya calculado.
+        Permite que el caller reutilice el vector y corra la búsqueda en un
+        pool de hilos sin bloquear el event loop.
 
-        if not recuerdos:
-            return Ok([])
+        Con `consulta` (y MEMORY_HYBRID_SEARCH activo) la búsqueda es híbrida:
+        recupera también los recuerdos que nombran el comercio literalmente.
 
-        contextos = [r["content"] for r in recuerdos]
+        Returns:
+            Contextos más relevantes, recortados a MAX_CONTEXT_CHARS.
+        """
+        recuerdos = self.repo.buscar_similares(
+            embedding=embedding,
+            limit=limit,
+            source_type=source_type,
+            consulta=consulta if MEMORY_HYBRID_SEARCH else None,
+        )
 
         contextos_validos: list[str] = []
         longitud_acumulada = 0
-        for ctx in contextos:
-            if longitud_acumulada + len(ctx) > MAX_CONTEXT_CHARS:
+        for recuerdo in recuerdos:
+            contenido = recuerdo["content"]
+            if longitud_acumulada + len(contenido) > MAX_CONTEXT_CHARS:
                 break
-            contextos_validos.append(ctx)
-            longitud_acumulada += len(ctx)
-
-        logger.info(
-            "[MEMORY] Contexto recuperado: %d recuerdos (%d chars) para '%s...'",
-            len(contextos_validos),
-            longitud_acumulada,
-            pregunta[:50],
-        )
-        return Ok(contextos_validos)
+            contextos_validos.append(contenido)
+            longitud_acumulada += len(contenido)
+        return contextos_validos
 
     def tiene_memoria(self) -> bool:
         """Verificar si hay registros en memoria para esta familia."""
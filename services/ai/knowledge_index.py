@@ -0,0 +1,204 @@
+"""
+KnowledgeIndex — Índice vectorial de la normativa en ./knowledge.
+
+Al arrancar la app (o con scripts/index_knowledge.py) cada archivo .md se
+parte en fragmentos por sección (## ...) de a lo sumo KNOWLEDGE_CHUNK_CHARS,
+se vectorizan todos en un solo request multi-input a nomic-embed-text y los
+vectores normalizados quedan en memoria. Por pregunta solo se hace un
+producto punto contra ~40 fragmentos y al prompt van los top-k relevantes,
+no el archivo entero: menos prefill en Gemma y cero lecturas de disco.
+
+Los vectores pasan por el EmbeddingCache: con EMBEDDING_CACHE_PERSISTENT=true
+quedan en la tabla embedding_cache (pgvector) y un reinicio no vuelve a
+llamar a Ollama para fragmentos que no cambiaron.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import os
+import re
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+
+from result import Err, Ok, Result
+
+from models.errors import AppError
+from services.ai.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
+
+KNOWLEDGE_PATH = os.getenv("KNOWLEDGE_PATH", "./knowledge")
+KNOWLEDGE_CHUNK_CHARS = int(os.getenv("KNOWLEDGE_CHUNK_CHARS", "800"))
+KNOWLEDGE_TOP_K = int(os.getenv("KNOWLEDGE_TOP_K", "3"))
+KNOWLEDGE_MIN_SIMILITUD = float(os.getenv("KNOWLEDGE_MIN_SIMILITUD", "0.5"))
+
+# El README describe la carpeta; no es normativa
+_EXCLUIDOS = {"README.md"}
+_SECCION = re.compile(r"^##\s+(.+)$", re.MULTILINE)
+_TITULO = re.compile(r"^#\s+(.+)$", re.MULTILINE)
+
+
+@dataclass(frozen=True)
+class Fragmento:
+    """Un pedazo de un archivo de normativa, listo para el prompt."""
+
+    archivo: str
+    seccion: str
+    texto: str
+
+    @property
+    def texto_embedding(self) -> str:
+        """Texto que se vectoriza: el título de la sección da contexto."""
+        return f"{self.seccion}\n{self.texto}"
+
+
+def dividir_markdown(
+    archivo: str, contenido: str, max_chars: int = KNOWLEDGE_CHUNK_CHARS
+) -> list[Fragmento]:
+    """
+    Partir un markdown en fragmentos por sección (## ...).
+
+    Las secciones más largas que max_chars se cortan por párrafos; el texto
+    previo a la primera sección queda bajo el título del documento (# ...).
+    """
+    match_titulo = _TITULO.search(contenido)
+    titulo = match_titulo.group(1).strip() if match_titulo else archivo
+
+    secciones: list[tuple[str, str]] = []
+    cortes = list(_SECCION.finditer(contenido))
+    inicio_cuerpo = match_titulo.end() if match_titulo else 0
+    fin_intro = cortes[0].start() if cortes else len(contenido)
+    secciones.append((titulo, contenido[inicio_cuerpo:fin_intro]))
+    for i, corte in enumerate(cortes):
+        fin = cortes[i + 1].start() if i + 1 < len(cortes) else len(contenido)
+        secciones.append(
+            (f"{titulo} › {corte.group(1).strip()}", contenido[corte.end() : fin])
+        )
+
+    fragmentos: list[Fragmento] = []
+    for seccion, cuerpo in secciones:
+        actual = ""
+        for parrafo in (p.strip() for p in cuerpo.split("\n\n")):
+            if not parrafo:
+                continue
+            if actual and len(actual) + len(parrafo) + 2 > max_chars:
+                fragmentos.append(Fragmento(archivo, seccion, actual))
+                actual = parrafo
+            else:
+                actual = f"{actual}\n\n{parrafo}" if actual else parrafo
+        if actual:
+            fragmentos.append(Fragmento(archivo, seccion, actual))
+    return fragmentos
+
+
+def _normalizar(vector: list[float]) -> array:
+    norma = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return array("d", (x / norma for x in vector))
+
+
+class KnowledgeIndex:
+    """
+    Fragmentos de ./knowledge con sus vectores normalizados, en memoria.
+
+    `construir()` es idempotente y seguro de llamar desde varias sesiones
+    de Flet a la vez: solo la primera llamada lee y vectoriza.
+    """
+
+    def __init__(
+        self,
+        knowledge_path: str = KNOWLEDGE_PATH,
+        embedding_service: EmbeddingService | None = None,
+        max_chars: int = KNOWLEDGE_CHUNK_CHARS,
+    ) -> None:
+        self.knowledge_path = knowledge_path
+        self.embedding = embedding_service or EmbeddingService()
+        self.max_chars = max_chars
+        self.documentos: dict[str, str] = {}
+        self.fragmentos: list[Fragmento] = []
+        self._vectores: list[array] = []
+        self._lock = asyncio.Lock()
+
+    @property
+    def listo(self) -> bool:
+        """True si hay fragmentos vectorizados para buscar."""
+        return bool(self._vectores)
+
+    def cargar_documentos(self) -> dict[str, str]:
+        """Leer los .md de la carpeta una sola vez por proceso."""
+        if not self.documentos:
+            carpeta = Path(self.knowledge_path)
+            for ruta in sorted(carpeta.glob("*.md")):
+                if ruta.name not in _EXCLUIDOS:
+                    self.documentos[ruta.name] = ruta.read_text(encoding="utf-8")
+        return self.documentos
+
+    async def construir(self) -> Result[int, AppError]:
+        """
+        Fragmentar y vectorizar la normativa.
+
+        Returns:
+            Ok(cantidad de fragmentos) o Err si Ollama no respondió; en ese
+            caso el asesor sigue con la selección por palabras clave.
+        """
+        async with self._lock:
+            if self.listo:
+                return Ok(len(self.fragmentos))
+
+            try:
+                documentos = await asyncio.to_thread(self.cargar_documentos)
+            except OSError as e:
+                return Err(AppError(message=f"No se pudo leer la normativa: {e}"))
+            fragmentos = [
+                f
+                for archivo, contenido in documentos.items()
+                for f in dividir_markdown(archivo, contenido, self.max_chars)
+            ]
+            if not fragmentos:
+                return Err(AppError(message=f"Sin normativa en {self.knowledge_path}"))
+
+            emb_result = await self.embedding.generar_embeddings(
+                [f.texto_embedding for f in fragmentos]
+            )
+            if isinstance(emb_result, Err):
+                logger.warning(
+                    "[KNOWLEDGE] No se pudo vectorizar la normativa: %s",
+                    emb_result.err(),
+                )
+                return emb_result
+
+            self.fragmentos = fragmentos
+            self._vectores = [_normalizar(v) for v in emb_result.ok()]
+            logger.info(
+                "[KNOWLEDGE] Índice listo: %d fragmentos de %d archivos",
+                len(fragmentos),
+                len(documentos),
+            )
+            return Ok(len(fragmentos))
+
+    def buscar(
+        self,
+        embedding_pregunta: list[float],
+        k: int = KNOWLEDGE_TOP_K,
+        min_similitud: float = KNOWLEDGE_MIN_SIMILITUD,
+    ) -> list[tuple[Fragmento, float]]:
+        """Top-k fragmentos por similitud coseno, descartando los lejanos."""
+        consulta = _normalizar(embedding_pregunta)
+        puntajes = [
+            (fragmento, sum(a * b for a, b in zip(consulta, vector, strict=True)))
+            for fragmento, vector in zip(self.fragmentos, self._vectores, strict=True)
+        ]
+        puntajes.sort(key=lambda par: par[1], reverse=True)
+        return [(f, s) for f, s in puntajes[:k] if s >= min_similitud]
+
+
+def formatear_fragmentos(resultados: list[tuple[Fragmento, float]]) -> str:
+    """Bloque de normativa para el prompt, un fragmento por sección."""
+    return "\n\n".join(f"[{f.seccion}]\n{f.texto}" for f, _ in resultados)
+
+
+# Singleton global del proceso
+knowledge_index = KnowledgeIndex()
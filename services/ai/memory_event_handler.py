@@ -8,38 +8,61 @@ from __future__ import annotations
 import logging
 from typing import Any
 
-from core.events import Event, EventType
+from result import Err, Result
+
+from core.events import Event, EventoReintentable, EventType
+from models.errors import AppError
+from services.ai.embedding_writer import EmbeddingWriter, embedding_writer
 from services.ai.ia_memory_service import IAMemoryService
 from services.infrastructure.formatters import format_pesos_ai
 
 logger = logging.getLogger(__name__)
 
 
+def formatear_gasto(data: dict[str, Any]) -> str:
+    """
+    Texto que se vectoriza para un gasto.
+    Compartido con el backfill para que gastos viejos y nuevos usen el mismo
+    texto (y el mismo embedding) en expenses.embedding.
+    """
+    monto = data.get("monto", 0)
+    return (
+        f"Gasto registrado: {data.get('descripcion', '')} "
+        f"por {format_pesos_ai(monto)} "
+        f"en categoría {data.get('categoria', '')}. "
+        f"Método: {data.get('metodo_pago', '')}. "
+        f"Fecha: {data.get('fecha', '')}."
+    )
+
+
 class MemoryEventHandler:
     """
     Handler Observer para registrar eventos contables en la memoria vectorial.
     Se ejecuta en background: no bloquea la UI de Flet.
+    Los fallos transitorios se propagan como EventoReintentable; el resto se
+    loguea y se descarta.
     """
 
-    def __init__(self, memory_service: IAMemoryService) -> None:
+    def __init__(
+        self,
+        memory_service: IAMemoryService,
+        writer: EmbeddingWriter | None = None,
+    ) -> None:
         self.memory_service = memory_service
+        self.writer = writer or embedding_writer
 
     async def handle(self, event: Event) -> None:
         """Despachar evento al formateador correcto y memorizar."""
         try:
             if event.type == EventType.GASTO_CREADO:
                 texto = self._formatear_gasto(event.data)
-                await self.memory_service.registrar_evento_contable(
-                    texto_plano=texto,
-                    source_type=event.type.value,
-                    source_id=event.source_id,
-                )
+                # Primero el embedding del gasto (idempotente): si su guardado
+                # falla, el reintento no duplica la fila de memoria
                 await self._guardar_embedding_en_gasto(
                     texto=texto,
                     expense_id=event.source_id,
                     familia_id=event.familia_id,
                 )
-                return
             elif event.type == EventType.COMPRA_CUOTAS_CREADA:
                 texto = self._formatear_compra_cuotas(event.data)
             elif event.type == EventType.INGRESO_CREADO:
@@ -51,12 +74,16 @@ class MemoryEventHandler:
             else:
                 return
 
-            await self.memory_service.registrar_evento_contable(
-                texto_plano=texto,
-                source_type=event.type.value,
-                source_id=event.source_id,
+            self._verificar(
+                await self.memory_service.registrar_evento_contable(
+                    texto_plano=texto,
+                    source_type=event.type.value,
+                    source_id=event.source_id,
+                )
             )
 
+        except EventoReintentable:
+            raise
         except Exception as e:
             logger.error(
                 "[MEMORY_HANDLER] familia_id=%s event_type=%s error=%s",
@@ -65,18 +92,28 @@ class MemoryEventHandler:
                 str(e),
             )
 
+    @staticmethod
+    def _verificar(resultado: Result[int, AppError]) -> None:
+        """
+        Un Err al memorizar (Ollama caído, BD no disponible) es transitorio:
+        en modo worker pool el EventSystem reintenta el evento con backoff.
+        """
+        if isinstance(resultado, Err):
+            raise EventoReintentable(resultado.err().message)
+
     async def _guardar_embedding_en_gasto(
         self,
         texto: str,
         expense_id: int | None,
         familia_id: int,
     ) -> None:
-        """Genera el embedding y lo guarda en expenses.embedding (fire-and-forget)."""
+        """
+        Genera el embedding y lo encola en el EmbeddingWriter, que lo guarda
+        en expenses.embedding junto con los demás gastos de la ventana.
+        Espera a que el lote se escriba: si falla, EventoReintentable.
+        """
         if expense_id is None:
             return
-        from result import Err
-        from database.engine import get_session
-        from repositories.expense_repository import ExpenseRepository
 
         embedding_result = (
             await self.memory_service.embedding_service.generar_embedding(texto)
@@ -88,32 +125,15 @@ class MemoryEventHandler:
             )
             return
 
-        session = get_session()
         try:
-            repo = ExpenseRepository(session, familia_id)
-            repo.guardar_embedding(expense_id, embedding_result.ok())
-            logger.info(
-                "[MEMORY_HANDLER] Embedding guardado en expenses id=%s", expense_id
-            )
+            await self.writer.encolar(familia_id, expense_id, embedding_result.ok())
         except Exception as e:
-            session.rollback()
-            logger.error(
-                "[MEMORY_HANDLER] Error guardando embedding gasto id=%s: %s",
-                expense_id,
-                e,
-            )
-        finally:
-            session.close()
+            raise EventoReintentable(
+                f"No se pudo guardar el embedding del gasto id={expense_id}: {e}"
+            ) from e
 
     def _formatear_gasto(self, data: dict[str, Any]) -> str:
-        monto = data.get("monto", 0)
-        return (
-            f"Gasto registrado: {data.get('descripcion', '')} "
-            f"por {format_pesos_ai(monto)} "
-            f"en categoría {data.get('categoria', '')}. "
-            f"Método: {data.get('metodo_pago', '')}. "
-            f"Fecha: {data.get('fecha', '')}."
-        )
+        return formatear_gasto(data)
 
     def _formatear_compra_cuotas(self, data: dict[str, Any]) -> str:
         return (
@@ -0,0 +1,143 @@
+"""
+Presupuesto de tokens del prompt del Contador.
+
+El Modelfile de contador-oriental fija num_ctx 4096: lo que se pase de eso
+Ollama lo trunca en silencio después de pagar el prefill completo. Acá se
+estima cuántos tokens ocupa cada sección del prompt (sin tokenizer real,
+con una aproximación por regex calibrada para español y números) y, si el
+total no entra, se recortan líneas desde el final de las secciones menos
+prioritarias: primero normativa, después memoria histórica y por último
+los datos financieros del usuario.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass, field
+
+PROMPT_NUM_CTX = int(os.getenv("PROMPT_NUM_CTX", "4096"))
+PROMPT_NUM_CTX_LLAMA3 = int(os.getenv("PROMPT_NUM_CTX_LLAMA3", "8192"))
+# Lugar para la respuesta (num_predict 512) y el SYSTEM del Modelfile
+PROMPT_RESERVA_TOKENS = int(os.getenv("PROMPT_RESERVA_TOKENS", "768"))
+
+# Gemma y Llama 3 parten los números en dígitos sueltos (o de a pocos):
+# contar un token por dígito sobreestima apenas y los datos son puro número
+_PIEZAS = re.compile(r"\d|[^\W\d_]+|[^\w\s]")
+
+
+def estimar_tokens(texto: str) -> int:
+    """
+    Aproximación rápida de tokens SentencePiece/BPE para texto en español.
+
+    Un token por dígito y por signo; las palabras cuestan uno más uno
+    cada 6 letras (las largas se parten en subpalabras).
+    """
+    tokens = 0
+    for pieza in _PIEZAS.findall(texto):
+        tokens += 1 + len(pieza) // 6 if pieza.isalpha() else 1
+    return tokens
+
+
+def presupuesto_para(modelo: str) -> int:
+    """Tokens disponibles para el prompt según el contexto del modelo."""
+    num_ctx = PROMPT_NUM_CTX_LLAMA3 if modelo == "llama3" else PROMPT_NUM_CTX
+    return max(num_ctx - PROMPT_RESERVA_TOKENS, 0)
+
+
+@dataclass(frozen=True)
+class SeccionPrompt:
+    """
+    Sección recortable del prompt.
+
+    `envoltura` es el encabezado/pie con un {} donde va el texto; si el
+    texto queda vacío la sección entera (envoltura incluida) desaparece.
+    Mayor `prioridad` = se recorta más tarde.
+    """
+
+    nombre: str
+    texto: str
+    prioridad: int
+    envoltura: str = "{}"
+
+    def renderizar(self, texto: str) -> str:
+        return self.envoltura.format(texto) if texto else ""
+
+
+@dataclass
+class InformeTokens:
+    """Tokens por sección antes y después de ajustar al presupuesto."""
+
+    presupuesto: int
+    fijo: int
+    originales: dict[str, int] = field(default_factory=dict)
+    finales: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return self.fijo + sum(self.finales.values())
+
+    @property
+    def recortadas(self) -> list[str]:
+        return [n for n, t in self.finales.items() if t < self.originales[n]]
+
+    def resumen(self) -> str:
+        """Una línea para el log: fijo, cada sección (original→final) y total."""
+        partes = [f"fijo={self.fijo}"]
+        for nombre, final in self.finales.items():
+            original = self.originales[nombre]
+            partes.append(
+                f"{nombre}={final}"
+                if final == original
+                else f"{nombre}={original}→{final}"
+            )
+        partes.append(f"total={self.total}/{self.presupuesto}")
+        return " ".join(partes)
+
+
+def ajustar_a_presupuesto(
+    fijo: int,
+    secciones: list[SeccionPrompt],
+    presupuesto: int,
+) -> tuple[dict[str, str], InformeTokens]:
+    """
+    Recortar las secciones hasta que el prompt entre en el presupuesto.
+
+    Args:
+        fijo: Tokens del resto del prompt (reglas, pregunta), que no se recorta.
+        secciones: Secciones recortables, en cualquier orden.
+        presupuesto: Tokens máximos del prompt completo.
+
+    Returns:
+        ({nombre: sección renderizada o ""}, informe de tokens)
+    """
+    informe = InformeTokens(presupuesto=presupuesto, fijo=fijo)
+    # estimar_tokens es aditivo por línea: se cuenta cada línea una sola vez
+    lineas: dict[str, list[tuple[str, int]]] = {}
+    for seccion in secciones:
+        lineas[seccion.nombre] = [
+            (linea, estimar_tokens(linea)) for linea in seccion.texto.splitlines()
+        ]
+        tokens = estimar_tokens(seccion.renderizar(seccion.texto))
+        informe.originales[seccion.nombre] = tokens
+        informe.finales[seccion.nombre] = tokens
+
+    exceso = informe.total - presupuesto
+    for seccion in sorted(secciones, key=lambda s: s.prioridad):
+        restantes = lineas[seccion.nombre]
+        while restantes and exceso > 0:
+            _, tokens = restantes.pop()
+            if not any(linea.strip() for linea, _ in restantes):
+                # Sin contenido se va también la envoltura
+                restantes.clear()
+                tokens = informe.finales[seccion.nombre]
+            exceso -= tokens
+            informe.finales[seccion.nombre] -= tokens
+
+    textos = {
+        s.nombre: s.renderizar(
+            "\n".join(linea for linea, _ in lineas[s.nombre]).strip()
+        )
+        for s in secciones
+    }
+    return textos, informe
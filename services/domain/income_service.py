@@ -4,6 +4,8 @@ Servicio de lógica de negocio para ingresos familiares
 
 from __future__ import annotations
 
+import calendar
+from datetime import date
 from decimal import Decimal
 
 from result import Err, Result
@@ -70,13 +72,37 @@ class IncomeService:
         - Recurrentes: siempre se muestran (sueldo, alquiler cobrado, etc.)
         - No recurrentes: solo los registrados en ese mes específico
         """
-        todos = self.list_incomes()
-        resultado = []
-        for inc in todos:
-            if inc.es_recurrente:
-                resultado.append(inc)
-            elif inc.fecha.year == year and inc.fecha.month == month:
-                resultado.append(inc)
+        return self.list_for_months([(year, month)])[(year, month)]
+
+    def list_for_months(
+        self, meses: list[tuple[int, int]]
+    ) -> dict[tuple[int, int], list[Income]]:
+        """
+        Ingresos relevantes para varios meses con una sola query.
+
+        Aplica la misma regla que list_for_month a cada (anio, mes):
+        los recurrentes aparecen en todos los meses, los demás solo en el suyo.
+
+        Returns:
+            Dict {(anio, mes): [Income, ...]} con una entrada por mes pedido.
+        """
+        if not meses:
+            return {}
+        anio_ini, mes_ini = min(meses)
+        anio_fin, mes_fin = max(meses)
+        incomes = self._repo.get_by_date_range(
+            date(anio_ini, mes_ini, 1),
+            date(anio_fin, mes_fin, calendar.monthrange(anio_fin, mes_fin)[1]),
+            incluir_recurrentes=True,
+        )
+        recurrentes = [inc for inc in incomes if inc.es_recurrente]
+        resultado: dict[tuple[int, int], list[Income]] = {
+            mes: list(recurrentes) for mes in meses
+        }
+        for inc in incomes:
+            clave = (inc.fecha.year, inc.fecha.month)
+            if not inc.es_recurrente and clave in resultado:
+                resultado[clave].append(inc)
         return resultado
 
     def delete_income(self, income_id: int) -> Result[None, DatabaseError]:
@@ -0,0 +1,101 @@
+"""
+AIClientRegistry — Clientes HTTP de larga vida para los modelos del Contador.
+
+Antes cada consulta creaba un ollama.AsyncClient nuevo y cada llamada a
+NVIDIA abría un httpx.AsyncClient (handshake TLS completo contra
+integrate.api.nvidia.com). El registro mantiene un cliente por destino con
+pool keep-alive, y el de NVIDIA negocia HTTP/2 (una conexión multiplexa
+todos los streams). Los crea en el primer uso y la app los cierra al apagar.
+
+Como en embedding_service.get_http_client, las conexiones quedan atadas al
+event loop que las abrió: si cambia el loop (scripts con asyncio.run
+sucesivos) los clientes se recrean.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from importlib.util import find_spec
+
+import httpx
+from ollama import AsyncClient
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv("AI_HTTP_MAX_CONNECTIONS", "8"))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv("AI_HTTP_MAX_KEEPALIVE", "4"))
+AI_HTTP_KEEPALIVE_SECONDS = float(os.getenv("AI_HTTP_KEEPALIVE_SECONDS", "120"))
+NVIDIA_HTTP2 = os.getenv("NVIDIA_HTTP2", "true").lower() == "true"
+
+# HTTP/2 en httpx requiere el extra httpx[http2] (paquete h2)
+_H2_DISPONIBLE = find_spec("h2") is not None
+
+
+class AIClientRegistry:
+    """Un cliente Ollama y uno NVIDIA compartidos por todo el proceso."""
+
+    def __init__(
+        self,
+        ollama_url: str = OLLAMA_URL,
+        max_connections: int = AI_HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = AI_HTTP_MAX_KEEPALIVE,
+        keepalive_seconds: float = AI_HTTP_KEEPALIVE_SECONDS,
+        http2: bool = NVIDIA_HTTP2,
+    ) -> None:
+        self.ollama_url = ollama_url
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_seconds,
+        )
+        self.http2 = http2 and _H2_DISPONIBLE
+        if http2 and not _H2_DISPONIBLE:
+            logger.warning(
+                "[AI_CLIENTS] h2 no instalado: NVIDIA usa HTTP/1.1 keep-alive"
+            )
+        self._ollama: AsyncClient | None = None
+        self._nvidia: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _verificar_loop(self) -> None:
+        """Descartar clientes de un loop anterior (sus sockets no sirven)."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._ollama = None
+            self._nvidia = None
+            self._loop = loop
+
+    def ollama(self) -> AsyncClient:
+        """Cliente de Ollama (Gemma local) con pool keep-alive."""
+        self._verificar_loop()
+        if self._ollama is None:
+            self._ollama = AsyncClient(host=self.ollama_url, limits=self.limits)
+            logger.debug("[AI_CLIENTS] Cliente Ollama creado (%s)", self.ollama_url)
+        return self._ollama
+
+    def nvidia(self) -> httpx.AsyncClient:
+        """Cliente httpx para NVIDIA API; los timeouts van por request."""
+        self._verificar_loop()
+        if self._nvidia is None or self._nvidia.is_closed:
+            self._nvidia = httpx.AsyncClient(http2=self.http2, limits=self.limits)
+            logger.debug("[AI_CLIENTS] Cliente NVIDIA creado (http2=%s)", self.http2)
+        return self._nvidia
+
+    async def cerrar(self) -> None:
+        """Cerrar ambos clientes (shutdown de la app o fin de un script)."""
+        ollama, nvidia = self._ollama, self._nvidia
+        self._ollama = None
+        self._nvidia = None
+        self._loop = None
+        if ollama is not None:
+            await ollama.close()
+        if nvidia is not None and not nvidia.is_closed:
+            await nvidia.aclose()
+        logger.info("[AI_CLIENTS] Clientes de IA cerrados")
+
+
+# Singleton global del proceso
+ai_clients = AIClientRegistry()
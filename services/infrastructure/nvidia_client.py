@@ -1,7 +1,8 @@
 """
 NVIDIAClient — Cliente async para NVIDIA API (Llama 3 70B).
 
-Usa httpx AsyncClient con timeout de 60s.
+Usa el httpx.AsyncClient compartido de ai_clients (keep-alive, HTTP/2):
+las consultas no repiten el handshake TLS. Timeout de 60s por request.
 Retorna dict con 'response' y 'usage' compatible con el formato de Ollama.
 
 Raises:
@@ -18,6 +19,8 @@ import os
 
 import httpx
 
+from services.infrastructure.ai_clients import ai_clients
+
 logger = logging.getLogger(__name__)
 
 # Configuración desde environment
@@ -100,51 +103,50 @@ class NVIDIAClient:
             len(prompt),
         )
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            try:
-                response = await client.post(url, json=payload, headers=headers)
-                response.raise_for_status()
+        client = ai_clients.nvidia()
+        try:
+            response = await client.post(
+                url, json=payload, headers=headers, timeout=60.0
+            )
+            response.raise_for_status()
 
-                data = response.json()
+            data = response.json()
 
-                # Extraer respuesta y uso de tokens
-                content = data["choices"][0]["message"]["content"].strip()
-                usage = data.get("usage", {})
+            # Extraer respuesta y uso de tokens
+            content = data["choices"][0]["message"]["content"].strip()
+            usage = data.get("usage", {})
 
-                result = {
-                    "response": content,
-                    "prompt_tokens": usage.get("prompt_tokens", 0),
-                    "completion_tokens": usage.get("completion_tokens", 0),
-                }
+            result = {
+                "response": content,
+                "prompt_tokens": usage.get("prompt_tokens", 0),
+                "completion_tokens": usage.get("completion_tokens", 0),
+            }
+
+            logger.info(
+                "[NVIDIA] Respuesta: %d chars, %d+%d tokens",
+                len(content),
+                result["prompt_tokens"],
+                result["completion_tokens"],
+            )
+
+            return result
 
-                logger.info(
-                    "[NVIDIA] Respuesta: %d chars, %d+%d tokens",
-                    len(content),
-                    result["prompt_tokens"],
-                    result["completion_tokens"],
-                )
-
-                return result
-
-            except httpx.TimeoutException:
-                logger.error("[NVIDIA] Timeout (60s) llamando a la API")
-                raise TimeoutError(
-                    "Timeout al consultar NVIDIA API. "
-                    "El servidor no respondió en 60 segundos."
-                )
-            except httpx.HTTPStatusError as e:
-                logger.error(
-                    "[NVIDIA] Error HTTP %d: %s", e.response.status_code, str(e)
-                )
-                raise RuntimeError(
-                    f"Error HTTP {e.response.status_code} al consultar NVIDIA API."
-                )
-            except httpx.ConnectError:
-                logger.error("[NVIDIA] Error de conexión a NVIDIA API")
-                raise ConnectionError(
-                    "No se pudo conectar a NVIDIA API. "
-                    "Verifique la conexión a internet."
-                )
+        except httpx.TimeoutException:
+            logger.error("[NVIDIA] Timeout (60s) llamando a la API")
+            raise TimeoutError(
+                "Timeout al consultar NVIDIA API. "
+                "El servidor no respondió en 60 segundos."
+            )
+        except httpx.HTTPStatusError as e:
+            logger.error("[NVIDIA] Error HTTP %d: %s", e.response.status_code, str(e))
+            raise RuntimeError(
+                f"Error HTTP {e.response.status_code} al consultar NVIDIA API."
+            )
+        except httpx.ConnectError:
+            logger.error("[NVIDIA] Error de conexión a NVIDIA API")
+            raise ConnectionError(
+                "No se pudo conectar a NVIDIA API. Verifique la conexión a internet."
+            )
 
     async def generate_stream(
         self,
@@ -196,34 +198,34 @@ class NVIDIAClient:
         )
 
         timeout = httpx.Timeout(120.0, connect=15.0)
-        async with httpx.AsyncClient(timeout=timeout) as client:
-            try:
-                async with client.stream(
-                    "POST", url, json=payload, headers=headers
-                ) as response:
-                    response.raise_for_status()
-
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # Remove "data: " prefix
-                            if data_str.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(data_str)
-                                delta = chunk.get("choices", [{}])[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    yield content
-                            except (json.JSONDecodeError, KeyError, IndexError):
-                                continue
-
-                logger.info("[NVIDIA] Stream completado")
-
-            except httpx.TimeoutException:
-                raise TimeoutError("Timeout al consultar NVIDIA API (stream).")
-            except httpx.HTTPStatusError as e:
-                raise RuntimeError(
-                    f"Error HTTP {e.response.status_code} al consultar NVIDIA API."
-                )
-            except httpx.ConnectError:
-                raise ConnectionError("No se pudo conectar a NVIDIA API.")
+        client = ai_clients.nvidia()
+        try:
+            async with client.stream(
+                "POST", url, json=payload, headers=headers, timeout=timeout
+            ) as response:
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data_str = line[6:]  # Remove "data: " prefix
+                        if data_str.strip() == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data_str)
+                            delta = chunk.get("choices", [{}])[0].get("delta", {})
+                            content = delta.get("content", "")
+                            if content:
+                                yield content
+                        except (json.JSONDecodeError, KeyError, IndexError):
+                            continue
+
+            logger.info("[NVIDIA] Stream completado")
+
+        except httpx.TimeoutException:
+            raise TimeoutError("Timeout al consultar NVIDIA API (stream).")
+        except httpx.HTTPStatusError as e:
+            raise RuntimeError(
+                f"Error HTTP {e.response.status_code} al consultar NVIDIA API."
+            )
+        except httpx.ConnectError:
+            raise ConnectionError("No se pudo conectar a NVIDIA API.")
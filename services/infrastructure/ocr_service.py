@@ -29,6 +29,25 @@ except ImportError:
     _TESSERACT_DISPONIBLE = False
 
 
+def _reconstruir_lineas(datos: dict) -> list[str]:
+    """
+    Rearma las líneas del ticket con las columnas block_num/par_num/line_num
+    de image_to_data. El parser por reglas trabaja línea por línea (TOTAL,
+    encabezado): con todas las palabras en una sola línea no encuentra nada.
+    """
+    lineas: dict[tuple[int, int, int], list[str]] = {}
+    for texto, bloque, parrafo, linea in zip(
+        datos["text"],
+        datos["block_num"],
+        datos["par_num"],
+        datos["line_num"],
+        strict=False,
+    ):
+        if texto.strip():
+            lineas.setdefault((bloque, parrafo, linea), []).append(texto.strip())
+    return [" ".join(palabras) for palabras in lineas.values()]
+
+
 class OCRService:
     """Extrae texto de imágenes de tickets usando Tesseract (local, sin GPU)."""
 
@@ -80,7 +99,7 @@ class OCRService:
                 output_type=pytesseract.Output.DICT,
             )
 
-            texto_crudo = " ".join(w for w in datos["text"] if w.strip())
+            texto_crudo = "\n".join(_reconstruir_lineas(datos))
 
             # Confianza promedio de palabras con conf > 0
             confs = [c for c in datos["conf"] if c > 0]
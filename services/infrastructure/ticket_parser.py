@@ -0,0 +1,25 @@
+"""
+Parser determinístico de tickets uruguayos (regex + heurísticas).
+
+El módulo vive en ocr_api/ticket_parser.py: el Dockerfile del microservicio
+lo copia tal cual y la app principal (que lleva ocr_api/ en su imagen) lo
+re-exporta desde acá, así hay una sola copia del parser.
+"""
+
+from ocr_api.ticket_parser import (
+    CAMPOS_REQUERIDOS,
+    TICKET_PARSER_MIN_CONFIANZA,
+    ParserStats,
+    TicketParseado,
+    parsear_ticket,
+    parser_stats,
+)
+
+__all__ = [
+    "CAMPOS_REQUERIDOS",
+    "TICKET_PARSER_MIN_CONFIANZA",
+    "ParserStats",
+    "TicketParseado",
+    "parsear_ticket",
+    "parser_stats",
+]
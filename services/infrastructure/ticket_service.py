@@ -1,8 +1,10 @@
 """
 Orquestador del flujo OCR completo:
   1. OCRService extrae texto crudo con Tesseract
-  2. Gemma parsea el texto y extrae monto/fecha/comercio/items
-  3. ExpenseRepository busca categoría por similitud cosine
+  2. El parser por reglas extrae monto/fecha/comercio; Gemma solo se llama
+     si faltan campos requeridos o son ambiguos
+  3. La categoría sale del memo comercio→categoría de la familia; si el
+     comercio es nuevo, de la similitud cosine en ExpenseRepository
   4. Retorna PartialExpense listo para mostrar al usuario en vista de confirmación
 """
 
@@ -22,6 +24,7 @@ from models.errors import AppError
 from models.ticket_model import PartialExpense
 from services.ai.embedding_service import EmbeddingService
 from services.infrastructure.ocr_service import OCRService
+from services.infrastructure.ticket_parser import parsear_ticket, parser_stats
 
 logger = logging.getLogger(__name__)
 
@@ -57,11 +60,13 @@ class TicketService:
         embedding_service: EmbeddingService,
         expense_repo,  # ExpenseRepository — inyectado
         ai_service,  # AIAdvisorService — inyectado para llamada_directa()
+        merchant_repo=None,  # MerchantCategoryRepository — opcional
     ):
         self.ocr = ocr_service
         self.embedding = embedding_service
         self.expense_repo = expense_repo
         self.ai_service = ai_service
+        self.merchant_repo = merchant_repo
 
     async def procesar_ticket(
         self,
@@ -88,12 +93,12 @@ class TicketService:
                 partial.confianza_ocr,
             )
 
-        # 2. Parsear con Gemma
+        # 2. Parsear: reglas primero, Gemma solo si no alcanzan
         await progreso(
-            "Gemma está analizando los datos...",
+            "Analizando los datos...",
             f"{len(partial.texto_crudo)} caracteres detectados",
         )
-        parsed = await self._parsear_con_gemma(partial.texto_crudo)
+        parsed = await self._parsear(partial.texto_crudo, progreso)
         if parsed:
             monto_raw = parsed.get("monto")
             partial.monto = Decimal(str(monto_raw)) if monto_raw is not None else None
@@ -108,14 +113,16 @@ class TicketService:
                 except (ValueError, TypeError):
                     partial.fecha = None
 
-        # 3. Sugerir categoría via cosine search
+        # 3. Sugerir categoría: memo por comercio, luego cosine search
         await progreso(
             "Buscando categoría...",
-            "Similitud cosine sobre gastos históricos",
+            "Comercios conocidos y gastos históricos",
         )
         termino = partial.comercio or " ".join(partial.items[:3])
         if termino:
-            partial.categoria_sugerida = await self._sugerir_categoria(termino)
+            partial.categoria_sugerida = await self._sugerir_categoria(
+                termino, comercio=partial.comercio
+            )
 
         logger.info(
             "[TICKET] Procesado: comercio=%s monto=%s categoria=%s confianza=%.2f",
@@ -126,6 +133,35 @@ class TicketService:
         )
         return Ok(partial)
 
+    async def _parsear(
+        self,
+        texto: str,
+        progreso: Callable[[str, str], Awaitable[None]],
+    ) -> dict | None:
+        """
+        Parser por reglas (microsegundos) y, si falta monto/fecha o son
+        ambiguos, Gemma para completar lo que las reglas no resolvieron.
+        """
+        if not texto.strip():
+            return None
+        reglas = parsear_ticket(texto)
+        if reglas.suficiente():
+            parser_stats.registrar(por_reglas=True)
+            logger.info(
+                "[TICKET] Parseo por reglas: comercio=%s monto=%s (tasa reglas=%.0f%%)",
+                reglas.comercio,
+                reglas.monto,
+                parser_stats.tasa_reglas * 100,
+            )
+            return reglas.como_dict()
+
+        parser_stats.registrar(por_reglas=False)
+        await progreso(
+            "Gemma está analizando los datos...",
+            "El parser por reglas no encontró monto o fecha",
+        )
+        return reglas.combinar(await self._parsear_con_gemma(texto))
+
     async def _parsear_con_gemma(self, texto: str) -> dict | None:
         """
         Pide a Gemma que extraiga monto/fecha/comercio/items del texto crudo.
@@ -160,8 +196,19 @@ class TicketService:
             logger.warning("[TICKET] Error parseando respuesta de Gemma: %s", e)
             return None
 
-    async def _sugerir_categoria(self, termino: str) -> str | None:
-        """Busca la categoría más probable via cosine search en expenses.embedding."""
+    async def _sugerir_categoria(
+        self, termino: str, comercio: str | None = None
+    ) -> str | None:
+        """
+        Categoría más probable para el ticket.
+        Un comercio conocido se resuelve con una lectura indexada del memo;
+        solo los nuevos pagan embedding + cosine search en expenses.embedding.
+        """
+        if comercio and self.merchant_repo is not None:
+            categoria = self.merchant_repo.sugerir(comercio)
+            if categoria:
+                logger.info("[TICKET] Categoría por comercio conocido: %s", comercio)
+                return categoria
         try:
             emb_result = await self.embedding.generar_embedding(termino)
             if isinstance(emb_result, Err):
@@ -0,0 +1,72 @@
+"""
+Tests para AIClientRegistry: un cliente por destino y por event loop,
+reutilizado entre consultas y cerrado en el shutdown.
+"""
+
+import asyncio
+
+import httpx
+
+from services.infrastructure import nvidia_client
+from services.infrastructure.ai_clients import AIClientRegistry
+from services.infrastructure.nvidia_client import NVIDIAClient
+
+
+class TestAIClientRegistry:
+    async def test_reutiliza_los_clientes_y_los_cierra(self):
+        registro = AIClientRegistry(http2=False)
+
+        ollama, nvidia = registro.ollama(), registro.nvidia()
+
+        assert registro.ollama() is ollama
+        assert registro.nvidia() is nvidia
+        await registro.cerrar()
+        assert nvidia.is_closed
+        assert registro.nvidia() is not nvidia
+
+    def test_un_loop_nuevo_crea_clientes_nuevos(self):
+        registro = AIClientRegistry(http2=False)
+
+        async def _clientes():
+            return registro.ollama(), registro.nvidia()
+
+        primeros = asyncio.run(_clientes())
+        segundos = asyncio.run(_clientes())
+
+        assert primeros[0] is not segundos[0]
+        assert primeros[1] is not segundos[1]
+
+
+class _RegistroFake:
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client
+
+    def nvidia(self) -> httpx.AsyncClient:
+        return self.client
+
+
+class TestNVIDIAClientCompartido:
+    async def test_consultas_sucesivas_usan_el_mismo_cliente(self, monkeypatch):
+        pedidos: list[httpx.Request] = []
+
+        def responder(request: httpx.Request) -> httpx.Response:
+            pedidos.append(request)
+            return httpx.Response(
+                200,
+                json={
+                    "choices": [{"message": {"content": "Hola"}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 2},
+                },
+            )
+
+        client = httpx.AsyncClient(transport=httpx.MockTransport(responder))
+        monkeypatch.setattr(nvidia_client, "NVIDIA_API_KEY", "clave")
+        monkeypatch.setattr(nvidia_client, "ai_clients", _RegistroFake(client))
+        nvidia = NVIDIAClient()
+
+        for _ in range(2):
+            assert (await nvidia.generate("¿Cuánto gasté?"))["response"] == "Hola"
+
+        assert len(pedidos) == 2
+        assert not client.is_closed
+        await client.aclose()
@@ -1,6 +1,6 @@
 """Tests para el system prompt del asesor IA."""
 
-from services.ai.ai_advisor_service import AIAdvisorService
+from services.ai.ai_advisor_service import PREFIJO_CONTADOR, AIAdvisorService
 
 
 class TestAIPrompt:
@@ -19,3 +19,21 @@ class TestAIPrompt:
         assert "NUNCA hacer cálculos" in prompt
         assert "Reportá cada moneda por separado" in prompt
         assert "NUNCA conviertas ni sumes monedas distintas" in prompt
+
+    def test_prefijo_estable_entre_consultas(self):
+        svc = AIAdvisorService()
+        datos = "GASTOS DEL MES:\n- Almacén: $ 650"
+        prompts = [
+            svc._construir_prompt("¿Cuánto gasté?", "", datos),
+            svc._construir_prompt(
+                "¿Y la patente?",
+                "Descuento por pago anual",
+                datos,
+                memoria_vectorial="Marzo: patente $ 3 200",
+                cuota_agotada=True,
+            ),
+            svc._construir_prompt("¿Cómo vengo?", "", datos, modelo="llama3"),
+        ]
+
+        for prompt in prompts:
+            assert prompt.startswith(f"{PREFIJO_CONTADOR}\n{datos}\n")
@@ -0,0 +1,188 @@
+"""
+Tests para AnswerCache: huella de contexto, umbral de similitud,
+invalidación por eventos y uso desde AIAdvisorService.
+"""
+
+from decimal import Decimal
+
+from result import Ok
+
+from core.events import Event, EventSystem, EventType
+from models.ai_model import AIContext, AIRequest
+from services.ai.ai_advisor_service import AIAdvisorService
+from services.ai.answer_cache import AnswerCache, huella_contexto
+from services.ai.knowledge_index import KnowledgeIndex
+
+_MES = [1.0, 0.0, 0.0]
+_MES_PARAFRASIS = [0.99, 0.05, 0.0]
+_PATENTE = [0.0, 1.0, 0.0]
+
+
+class _EmbeddingFake:
+    _VECTORES = {
+        "¿Cuánto gasté este mes?": _MES,
+        "¿cuanto gaste este mes?": _MES_PARAFRASIS,
+        "¿Cuándo vence la patente?": _PATENTE,
+    }
+
+    async def generar_embedding(self, texto):
+        return Ok(self._VECTORES[texto])
+
+
+class _RouterFijo:
+    def route(self, **kwargs) -> str:
+        return "gemma2"
+
+
+def _servicio(tmp_path, cache: AnswerCache) -> AIAdvisorService:
+    svc = AIAdvisorService(
+        model_router=_RouterFijo(),
+        knowledge=KnowledgeIndex(str(tmp_path), embedding_service=_EmbeddingFake()),
+        cache=cache,
+    )
+    svc.llamadas = 0
+
+    async def _stream_fake(prompt):
+        svc.llamadas += 1
+        for token in ("Gastaste ", "$ 650\n", "en Almacén."):
+            yield token
+
+    async def _generate_fake(prompt):
+        svc.llamadas += 1
+        return {"response": "Gastaste $ 650 en Almacén."}
+
+    svc._call_ollama_stream = _stream_fake
+    svc._call_ollama = _generate_fake
+    return svc
+
+
+def _request(pregunta: str, familia_id: int = 1) -> AIRequest:
+    return AIRequest(pregunta=pregunta, familia_id=familia_id)
+
+
+async def _consumir(
+    svc: AIAdvisorService, request: AIRequest, ctx: AIContext
+) -> tuple[str, bool]:
+    """Texto del stream y si salió del AnswerCache."""
+    hits: list[bool] = []
+    tokens = [
+        t
+        async for t in svc.consultar_stream(
+            request, ctx=ctx, on_cache_hit=lambda: hits.append(True)
+        )
+    ]
+    return "".join(tokens), bool(hits)
+
+
+class TestAnswerCache:
+    def test_pregunta_parecida_con_misma_huella_es_hit(self):
+        cache = AnswerCache(min_similitud=0.97)
+        cache.guardar(1, "h", "¿Cuánto gasté este mes?", _MES, "Gastaste $ 650.")
+
+        assert cache.buscar(1, "h", _MES_PARAFRASIS).respuesta == "Gastaste $ 650."
+        assert cache.buscar(1, "h", _PATENTE) is None
+        assert cache.buscar(1, "otra", _MES) is None
+        assert cache.buscar(2, "h", _MES) is None
+
+    def test_respeta_ttl_y_maximo_por_familia(self):
+        vencida = AnswerCache(ttl_seconds=0)
+        vencida.guardar(1, "h", "p", _MES, "r")
+        assert vencida.buscar(1, "h", _MES) is None
+
+        cache = AnswerCache(max_por_familia=2)
+        for i, vector in enumerate((_MES, _PATENTE, [0.0, 0.0, 1.0])):
+            cache.guardar(1, "h", f"p{i}", vector, f"r{i}")
+        assert cache.buscar(1, "h", _MES) is None
+        assert cache.buscar(1, "h", _PATENTE).respuesta == "r1"
+
+    def test_huella_cambia_con_los_numeros_del_contexto(self):
+        ctx = AIContext(total_gastos_mes=Decimal("650"))
+        otro = AIContext(total_gastos_mes=Decimal("890"))
+
+        assert huella_contexto(ctx, "gemma2", False) == huella_contexto(
+            ctx.model_copy(), "gemma2", False
+        )
+        assert huella_contexto(ctx, "gemma2", False) != huella_contexto(
+            otro, "gemma2", False
+        )
+        assert huella_contexto(ctx, "gemma2", False) != huella_contexto(
+            ctx, "gemma2", True
+        )
+
+    async def test_gasto_o_ingreso_nuevo_invalida_la_familia(self):
+        cache = AnswerCache()
+        sistema = EventSystem()
+        cache.suscribir(sistema)
+        cache.suscribir(sistema)
+        cache.guardar(1, "h", "p", _MES, "r")
+        cache.guardar(2, "h", "p", _MES, "r")
+
+        await sistema.publish(
+            Event(type=EventType.INGRESO_CREADO, familia_id=1, data={})
+        )
+
+        assert len(sistema.handlers_for(EventType.GASTO_CREADO)) == 1
+        assert cache.buscar(1, "h", _MES) is None
+        assert cache.buscar(2, "h", _MES) is not None
+
+
+class TestConsultarConCache:
+    async def test_stream_repetido_se_sirve_sin_llamar_al_modelo(self, tmp_path):
+        svc = _servicio(tmp_path, AnswerCache())
+        ctx = AIContext(total_gastos_mes=Decimal("650"))
+
+        primera, primera_cache = await _consumir(
+            svc, _request("¿Cuánto gasté este mes?"), ctx
+        )
+        segunda, segunda_cache = await _consumir(
+            svc, _request("¿cuanto gaste este mes?"), ctx
+        )
+
+        assert segunda == primera == "Gastaste $ 650\nen Almacén."
+        assert (primera_cache, segunda_cache) == (False, True)
+        assert svc.llamadas == 1
+
+    async def test_contexto_nuevo_vuelve_a_consultar(self, tmp_path):
+        svc = _servicio(tmp_path, AnswerCache())
+        pregunta = "¿Cuánto gasté este mes?"
+
+        await _consumir(svc, _request(pregunta), AIContext(total_gastos_mes=650))
+        _, desde_cache = await _consumir(
+            svc, _request(pregunta), AIContext(total_gastos_mes=890)
+        )
+
+        assert not desde_cache
+        assert svc.llamadas == 2
+
+    async def test_streams_superpuestos_no_se_pisan_el_aviso(self, tmp_path):
+        svc = _servicio(tmp_path, AnswerCache())
+        pregunta = "¿Cuánto gasté este mes?"
+        await _consumir(svc, _request(pregunta), AIContext(total_gastos_mes=650))
+
+        hits: list[bool] = []
+        cacheado = svc.consultar_stream(
+            _request(pregunta),
+            ctx=AIContext(total_gastos_mes=650),
+            on_cache_hit=lambda: hits.append(True),
+        )
+        primer_token = await anext(cacheado)
+        _, otro_desde_cache = await _consumir(
+            svc, _request(pregunta), AIContext(total_gastos_mes=890)
+        )
+        resto = [t async for t in cacheado]
+
+        assert primer_token + "".join(resto) == "Gastaste $ 650\nen Almacén."
+        assert hits == [True]
+        assert not otro_desde_cache
+
+    async def test_consultar_marca_la_respuesta_cacheada(self, tmp_path):
+        svc = _servicio(tmp_path, AnswerCache())
+        request = _request("¿Cuánto gasté este mes?")
+
+        primera = (await svc.consultar(request, ctx=AIContext())).ok()
+        segunda = (await svc.consultar(request, ctx=AIContext())).ok()
+
+        assert not primera.desde_cache
+        assert segunda.desde_cache
+        assert segunda.respuesta == primera.respuesta
+        assert svc.llamadas == 1
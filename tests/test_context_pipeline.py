@@ -0,0 +1,128 @@
+"""
+Tests para ContextPipeline (DAG async del contexto del Contador)
+y el período consultado que usa AIController.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import date, datetime
+
+import pytest
+
+from controllers.ai_controller import _Periodo
+from services.ai.context_pipeline import ContextPipeline, run_in_db_pool
+
+
+class TestContextPipeline:
+    async def test_etapas_independientes_corren_en_paralelo(self):
+        pipeline = ContextPipeline()
+
+        async def _lenta(_):
+            await asyncio.sleep(0.1)
+            return "ok"
+
+        for nombre in ("a", "b", "c"):
+            pipeline.add_stage(nombre, _lenta)
+
+        inicio = asyncio.get_running_loop().time()
+        resultados = await pipeline.run()
+        duracion = asyncio.get_running_loop().time() - inicio
+
+        assert resultados == {"a": "ok", "b": "ok", "c": "ok"}
+        assert duracion < 0.25
+
+    async def test_dependencias_reciben_resultados(self):
+        pipeline = ContextPipeline()
+        orden: list[str] = []
+
+        async def _embedding(_):
+            await asyncio.sleep(0.01)
+            orden.append("embedding")
+            return [0.1, 0.2]
+
+        async def _memoria(deps):
+            orden.append("memoria")
+            return len(deps["embedding"])
+
+        pipeline.add_stage("embedding", _embedding)
+        pipeline.add_stage("memoria", _memoria, depends_on=("embedding",))
+        resultados = await pipeline.run()
+
+        assert resultados["memoria"] == 2
+        assert orden == ["embedding", "memoria"]
+
+    async def test_fallback_absorbe_errores(self):
+        pipeline = ContextPipeline()
+
+        async def _rota(_):
+            raise RuntimeError("snapshot no disponible")
+
+        pipeline.add_stage("comparativa", _rota, fallback=[])
+        resultados = await pipeline.run()
+        assert resultados["comparativa"] == []
+
+    async def test_error_sin_fallback_se_propaga_y_cancela(self):
+        pipeline = ContextPipeline()
+        cancelada = asyncio.Event()
+
+        async def _rota(_):
+            raise ValueError("sin BD")
+
+        async def _larga(_):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelada.set()
+                raise
+
+        pipeline.add_stage("gastos", _rota)
+        pipeline.add_stage("proyeccion", _larga)
+        with pytest.raises(ValueError):
+            await pipeline.run()
+        assert cancelada.is_set()
+
+    async def test_timings_por_etapa(self):
+        pipeline = ContextPipeline()
+
+        async def _etapa(_):
+            return 1
+
+        pipeline.add_stage("cotizacion", _etapa)
+        await pipeline.run()
+        assert set(pipeline.timings) == {"cotizacion", "total"}
+        assert "cotizacion=" in pipeline.resumen_timings()
+
+    def test_dependencia_no_registrada_falla(self):
+        pipeline = ContextPipeline()
+
+        async def _etapa(_):
+            return None
+
+        with pytest.raises(ValueError):
+            pipeline.add_stage("memoria", _etapa, depends_on=("embedding",))
+
+    async def test_run_in_db_pool_no_bloquea_el_loop(self):
+        import time
+
+        tick = asyncio.create_task(asyncio.sleep(0.01))
+        resultado = await run_in_db_pool(lambda: time.sleep(0.05) or 42)
+        assert resultado == 42
+        assert tick.done()
+
+
+class TestPeriodo:
+    def test_mes_actual(self):
+        periodo = _Periodo.desde_intencion(None, datetime(2026, 1, 15))
+        assert not periodo.es_rango
+        assert periodo.meses() == [(2026, 1)]
+        assert (periodo.anio_prev, periodo.mes_prev) == (2025, 12)
+        assert periodo.fecha_min is None
+        assert periodo.label == "de Enero 2026"
+
+    def test_rango_cruza_anio(self):
+        periodo = _Periodo.desde_intencion((11, 2025, 2, 2026), datetime(2026, 3, 1))
+        assert periodo.meses() == [(2025, 11), (2025, 12), (2026, 1), (2026, 2)]
+        assert periodo.fecha_min == date(2025, 11, 1)
+        assert periodo.fecha_max == date(2026, 2, 28)
+        assert periodo.label == "de Noviembre 2025 a Febrero 2026"
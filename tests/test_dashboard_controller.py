@@ -0,0 +1,123 @@
+"""
+Tests para DashboardController y la agregación SQL de totales.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from controllers.dashboard_controller import DashboardController
+from controllers.history_controller import HistoryController, ultimos_meses
+from repositories.aggregation_repository import (
+    TIPO_GASTO,
+    TIPO_INGRESO,
+    TotalAgrupado,
+    agrupar_por_mes,
+)
+
+
+def _total(tipo, anio, mes, currency, categoria, total, cantidad=1):
+    return TotalAgrupado(
+        tipo=tipo,
+        anio=anio,
+        mes=mes,
+        currency=currency,
+        categoria=categoria,
+        total=Decimal(total),
+        cantidad=cantidad,
+    )
+
+
+class TestUltimosMeses:
+    def test_cruza_el_anio(self):
+        assert ultimos_meses(2026, 2, 3) == [(2026, 2), (2026, 1), (2025, 12)]
+
+
+class TestAgruparPorMes:
+    def test_recurrentes_en_todos_los_meses(self):
+        sueldo = _total(TIPO_INGRESO, None, None, "UYU", "Sueldo", "50000")
+        gasto = _total(TIPO_GASTO, 2026, 9, "UYU", "Almacén", "1200")
+        fuera = _total(TIPO_GASTO, 2026, 5, "UYU", "Almacén", "999")
+
+        por_mes = agrupar_por_mes([sueldo, gasto, fuera], [(2026, 10), (2026, 9)])
+
+        assert por_mes[(2026, 10)] == [sueldo]
+        assert por_mes[(2026, 9)] == [sueldo, gasto]
+
+
+class TestArmarSnapshot:
+    def test_totales_y_categorias_del_mes(self):
+        totales = [
+            _total(TIPO_INGRESO, None, None, "UYU", "Sueldo", "50000"),
+            _total(TIPO_INGRESO, 2026, 10, "USD", "Otros", "100"),
+            _total(TIPO_GASTO, 2026, 10, "UYU", "Almacén", "1200", 3),
+            _total(TIPO_GASTO, 2026, 10, "UYU", "Ocio", "800", 2),
+            _total(TIPO_GASTO, 2026, 9, "UYU", "Almacén", "4000", 5),
+        ]
+        periodos = ultimos_meses(2026, 10, 3)
+
+        snapshot = DashboardController.armar_snapshot(2026, 10, periodos, totales)
+
+        assert snapshot.ingresos("UYU") == Decimal("50000")
+        assert snapshot.ingresos("USD") == Decimal("100")
+        assert snapshot.gastos("UYU") == Decimal("2000")
+        assert snapshot.gastos("USD") == Decimal("0")
+        assert snapshot.balance("UYU") == Decimal("48000")
+        assert snapshot.gastos_por_categoria == {
+            ("Almacén", "UYU"): Decimal("1200"),
+            ("Ocio", "UYU"): Decimal("800"),
+        }
+        assert snapshot.ingresos_por_categoria[("Sueldo", "UYU")] == Decimal("50000")
+
+        meses = snapshot.historial.meses
+        assert [(m.year, m.month) for m in meses] == periodos
+        assert meses[0].cantidad_gastos == 5
+        assert meses[1].total_gastos == {"UYU": Decimal("4000")}
+        assert meses[1].total_ingresos == {"UYU": Decimal("50000")}
+        assert meses[2].total_gastos == {}
+
+
+class TestArmarHistorial:
+    def test_variacion_y_top_categorias(self):
+        totales = [
+            _total(TIPO_GASTO, 2026, 10, "UYU", "Almacén", "1500"),
+            _total(TIPO_GASTO, 2026, 9, "UYU", "Almacén", "1000"),
+            _total(TIPO_GASTO, 2026, 9, "USD", "Viajes", "300"),
+        ]
+
+        data = HistoryController.armar_historial(ultimos_meses(2026, 10, 3), totales)
+
+        assert data.variacion_gastos == Decimal("50")
+        assert data.max_gasto == Decimal("1500")
+        assert data.top_categorias[0] == ("Almacén", "UYU", Decimal("2500"))
+
+
+class TestAggregationRepository:
+    @pytest.fixture
+    def controller(self, db_session):
+        return DashboardController(db_session, familia_id=1)
+
+    def test_snapshot_suma_en_sql(self, controller, db_session):
+        from controllers.expense_controller import ExpenseController
+        from models.categories import ExpenseCategory
+        from models.expense_model import Expense
+
+        hoy = date.today()
+        antes = controller.get_snapshot(hoy.year, hoy.month)
+
+        ExpenseController(db_session, familia_id=1).add_expense(
+            Expense(
+                familia_id=1,
+                monto=500.00,
+                fecha=hoy,
+                descripcion="Test snapshot",
+                categoria=ExpenseCategory.ALMACEN,
+                currency="UYU",
+            )
+        )
+        despues = controller.get_snapshot(hoy.year, hoy.month)
+
+        assert despues.gastos("UYU") - antes.gastos("UYU") == Decimal("500")
+        clave = (ExpenseCategory.ALMACEN.value, "UYU")
+        assert despues.gastos_por_categoria[clave] >= Decimal("500")
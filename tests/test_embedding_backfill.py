@@ -0,0 +1,127 @@
+"""
+Tests para EmbeddingBackfill: chunks por keyset, concurrencia acotada,
+un guardado por chunk y checkpoint reanudable.
+"""
+
+import asyncio
+from unittest.mock import MagicMock
+
+from result import Err, Ok
+
+from models.errors import AppError
+from services.ai.embedding_backfill import BackfillCheckpoint, EmbeddingBackfill
+
+
+def _gasto(expense_id: int) -> dict:
+    return {
+        "id": expense_id,
+        "descripcion": f"Gasto {expense_id}",
+        "monto": 100,
+        "categoria": "Almacén",
+        "metodo_pago": "efectivo",
+        "fecha": "2026-10-01",
+    }
+
+
+class _EmbeddingFake:
+    def __init__(self, fallar_con: str | None = None) -> None:
+        self.fallar_con = fallar_con
+        self.llamadas: list[list[str]] = []
+        self.en_vuelo = 0
+        self.max_en_vuelo = 0
+
+    async def generar_embeddings(self, textos, batch_size=64):
+        self.llamadas.append(textos)
+        self.en_vuelo += 1
+        self.max_en_vuelo = max(self.max_en_vuelo, self.en_vuelo)
+        await asyncio.sleep(0.001)
+        self.en_vuelo -= 1
+        if self.fallar_con and any(self.fallar_con in t for t in textos):
+            return Err(AppError(message="Ollama no disponible"))
+        return Ok([[float(len(t))] for t in textos])
+
+
+def _backfill(ids: list[int], servicio, **kwargs) -> tuple[EmbeddingBackfill, list]:
+    """Backfill con lectura/escritura en memoria en lugar de PostgreSQL."""
+    pendientes = list(ids)
+    guardados: list[dict[int, list[float]]] = []
+    backfill = EmbeddingBackfill(servicio, **kwargs)
+
+    def leer_chunk(desde_id: int):
+        filas = [_gasto(i) for i in pendientes if i > desde_id][: backfill.chunk_size]
+        lote = backfill.batch_size
+        return [filas[i : i + lote] for i in range(0, len(filas), lote)]
+
+    def guardar(embeddings):
+        if embeddings:
+            guardados.append(embeddings)
+            for expense_id in embeddings:
+                pendientes.remove(expense_id)
+        return len(embeddings)
+
+    backfill._leer_chunk = leer_chunk
+    backfill._guardar = guardar
+    return backfill, guardados
+
+
+class TestEmbeddingBackfill:
+    async def test_un_guardado_por_chunk_y_concurrencia_acotada(self):
+        servicio = _EmbeddingFake()
+        progreso = MagicMock()
+        backfill, guardados = _backfill(
+            list(range(1, 26)),
+            servicio,
+            chunk_size=10,
+            batch_size=3,
+            concurrency=2,
+            on_progress=progreso,
+        )
+
+        stats = await backfill.run()
+
+        assert stats.actualizadas == 25
+        assert stats.chunks == 3
+        assert [len(g) for g in guardados] == [10, 10, 5]
+        assert all(len(textos) <= 3 for textos in servicio.llamadas)
+        assert servicio.max_en_vuelo <= 2
+        assert progreso.call_count == 3
+        assert stats.last_id == 25
+
+    async def test_lote_fallido_se_cuenta_y_no_frena(self):
+        servicio = _EmbeddingFake(fallar_con="Gasto 4")
+        backfill, guardados = _backfill(
+            list(range(1, 7)), servicio, chunk_size=6, batch_size=3
+        )
+
+        stats = await backfill.run()
+
+        assert stats.errores == 3
+        assert stats.actualizadas == 3
+        assert set(guardados[0]) == {1, 2, 3}
+
+    async def test_retoma_desde_checkpoint(self, tmp_path):
+        checkpoint = BackfillCheckpoint(tmp_path / "cp.json", familia_id=1)
+        checkpoint.guardar(4)
+        servicio = _EmbeddingFake(fallar_con="Gasto 9")
+        backfill, guardados = _backfill(
+            list(range(1, 10)),
+            servicio,
+            familia_id=1,
+            chunk_size=2,
+            batch_size=2,
+            checkpoint=checkpoint,
+        )
+
+        stats = await backfill.run()
+
+        assert sorted(k for g in guardados for k in g) == [5, 6, 7, 8]
+        # Con errores el checkpoint queda en el último id visto
+        assert checkpoint.leer() == 9
+        assert stats.errores == 1
+
+    def test_checkpoint_de_otra_familia_se_ignora(self, tmp_path):
+        path = tmp_path / "cp.json"
+        BackfillCheckpoint(path, familia_id=1).guardar(50)
+
+        assert BackfillCheckpoint(path, familia_id=2).leer() == 0
+        assert BackfillCheckpoint(path, familia_id=1).leer() == 50
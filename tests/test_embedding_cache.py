@@ -0,0 +1,173 @@
+"""
+Tests para EmbeddingCache y su integración con EmbeddingService.
+No requieren Ollama ni PostgreSQL (nivel persistente mockeado).
+"""
+
+from __future__ import annotations
+
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from result import Ok
+
+from services.ai.embedding_cache import EmbeddingCache, hash_texto, normalizar_texto
+from services.ai.embedding_service import EmbeddingService
+
+FAKE_EMBEDDING = [0.1] * 768
+
+
+def _cliente_ollama(embedding: list[float] = FAKE_EMBEDDING) -> MagicMock:
+    def _respuesta(url, json, timeout):
+        response = MagicMock()
+        response.status_code = 200
+        if "input" in json:
+            response.json.return_value = {
+                "embeddings": [embedding for _ in json["input"]]
+            }
+        else:
+            response.json.return_value = {"embedding": embedding}
+        return response
+
+    return MagicMock(post=AsyncMock(side_effect=_respuesta))
+
+
+class TestNormalizacion:
+    def test_colapsa_espacios(self):
+        assert normalizar_texto("  ¿cuánto   gasté\n este mes? ") == (
+            "¿cuánto gasté este mes?"
+        )
+
+    def test_unicode_nfc(self):
+        descompuesto = "gaste\u0301"
+        assert normalizar_texto(descompuesto) == "gast\u00e9"
+
+    def test_hash_estable(self):
+        assert hash_texto("hola") == hash_texto("hola")
+        assert len(hash_texto("hola")) == 64
+
+
+class TestEmbeddingCache:
+    async def test_miss_y_hit(self):
+        cache = EmbeddingCache(max_entries=10, persistent=False)
+        assert await cache.get("m", "texto") is None
+        await cache.put("m", "texto", [1.0, 2.0])
+        assert await cache.get("m", "texto") == [1.0, 2.0]
+        stats = cache.stats()
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert stats.hit_rate == 0.5
+
+    async def test_clave_incluye_modelo(self):
+        cache = EmbeddingCache(max_entries=10, persistent=False)
+        await cache.put("modelo-a", "texto", [1.0])
+        assert await cache.get("modelo-b", "texto") is None
+
+    async def test_lru_desaloja_el_menos_usado(self):
+        cache = EmbeddingCache(max_entries=2, persistent=False)
+        await cache.put("m", "a", [1.0])
+        await cache.put("m", "b", [2.0])
+        await cache.get("m", "a")
+        await cache.put("m", "c", [3.0])
+        assert await cache.get("m", "b") is None
+        assert await cache.get("m", "a") == [1.0]
+        assert cache.stats().evictions == 1
+        assert len(cache) == 2
+
+    async def test_max_entries_cero_deshabilita_memoria(self):
+        cache = EmbeddingCache(max_entries=0, persistent=False)
+        await cache.put("m", "a", [1.0])
+        assert await cache.get("m", "a") is None
+
+    async def test_nivel_persistente_promueve_a_memoria(self):
+        cache = EmbeddingCache(max_entries=10, persistent=True)
+        with patch.object(
+            cache,
+            "_leer_persistente",
+            return_value={hash_texto("a"): [4.0]},
+        ) as leer:
+            assert await cache.get_many("m", ["a", "b"]) == {"a": [4.0]}
+            leer.assert_called_once()
+        assert await cache.get("m", "a") == [4.0]
+        assert cache.stats().persistent_hits == 1
+
+    async def test_put_persistente_escribe_lote(self):
+        cache = EmbeddingCache(max_entries=10, persistent=True)
+        with patch.object(cache, "_guardar_persistente") as guardar:
+            await cache.put_many("m", {"a": [1.0], "b": [2.0]})
+        guardar.assert_called_once()
+        assert len(guardar.call_args.args[1]) == 2
+
+    async def test_nivel_persistente_corre_fuera_del_event_loop(self):
+        cache = EmbeddingCache(max_entries=10, persistent=True)
+        hilos: list[str] = []
+
+        def _leer(model, text_hashes):
+            hilos.append(threading.current_thread().name)
+            return {}
+
+        with patch.object(cache, "_leer_persistente", side_effect=_leer):
+            assert await cache.get("m", "a") is None
+        assert hilos and hilos[0].startswith("ai-context-db")
+
+
+class TestEmbeddingServiceConCache:
+    async def test_pregunta_repetida_no_llama_a_ollama(self):
+        cliente = _cliente_ollama()
+        svc = EmbeddingService(cache=EmbeddingCache(persistent=False))
+        with patch(
+            "services.ai.embedding_service.get_http_client", return_value=cliente
+        ):
+            primero = await svc.generar_embedding("¿Cuánto gasté este mes?")
+            segundo = await svc.generar_embedding("  ¿Cuánto gasté   este mes? ")
+        assert isinstance(primero, Ok)
+        assert segundo.ok() == primero.ok()
+        assert cliente.post.call_count == 1
+
+    async def test_lote_solo_envia_faltantes(self):
+        cache = EmbeddingCache(persistent=False)
+        await cache.put("nomic-embed-text", "ya cacheado", [9.0])
+        cliente = _cliente_ollama()
+        svc = EmbeddingService(model="nomic-embed-text", cache=cache)
+        with patch(
+            "services.ai.embedding_service.get_http_client", return_value=cliente
+        ):
+            result = await svc.generar_embeddings(["ya cacheado", "nuevo", "nuevo"])
+        assert isinstance(result, Ok)
+        assert result.ok()[0] == [9.0]
+        assert len(result.ok()) == 3
+        assert cliente.post.call_args.kwargs["json"]["input"] == ["nuevo"]
+
+    async def test_lote_totalmente_cacheado_no_hace_requests(self):
+        cache = EmbeddingCache(persistent=False)
+        await cache.put("nomic-embed-text", "a", [1.0])
+        cliente = _cliente_ollama()
+        svc = EmbeddingService(model="nomic-embed-text", cache=cache)
+        with patch(
+            "services.ai.embedding_service.get_http_client", return_value=cliente
+        ):
+            result = await svc.generar_embeddings(["a"])
+        assert result.ok() == [[1.0]]
+        cliente.post.assert_not_called()
+
+    async def test_sin_cache_no_lee_ni_escribe(self):
+        cache = MagicMock(spec=EmbeddingCache)
+        cliente = _cliente_ollama()
+        svc = EmbeddingService(cache=cache, usar_cache=False)
+        with patch(
+            "services.ai.embedding_service.get_http_client", return_value=cliente
+        ):
+            uno = await svc.generar_embedding("Gasto registrado: UTE")
+            lote = await svc.generar_embeddings(["a", "b"])
+        assert uno.ok() == FAKE_EMBEDDING
+        assert len(lote.ok()) == 2
+        assert cliente.post.call_count == 2
+        assert not cache.method_calls
+
+    @pytest.mark.parametrize("texto", ["", "   "])
+    async def test_texto_vacio_no_consulta_cache(self, texto):
+        cache = MagicMock(spec=EmbeddingCache)
+        svc = EmbeddingService(cache=cache)
+        result = await svc.generar_embedding(texto)
+        assert result.is_err()
+        cache.get.assert_not_called()
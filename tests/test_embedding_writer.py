@@ -0,0 +1,155 @@
+"""
+Tests para EmbeddingWriter: coalescing por ventana, flush por tamaño,
+un guardado por flush agrupado por familia y reencolado si falla.
+"""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from result import Ok
+
+from core.events import Event, EventoReintentable, EventType
+from services.ai.embedding_writer import EmbeddingWriter
+
+
+class _Escritor:
+    def __init__(self, fallar: bool = False) -> None:
+        self.fallar = fallar
+        self.llamadas: list[dict] = []
+
+    def __call__(self, pendientes):
+        self.llamadas.append(pendientes)
+        if self.fallar:
+            raise RuntimeError("BD no disponible")
+        return sum(len(e) for e in pendientes.values())
+
+
+class TestEmbeddingWriter:
+    async def test_agrupa_la_ventana_en_un_solo_guardado(self):
+        escritor = _Escritor()
+        writer = EmbeddingWriter(ventana_seg=0.01, escribir=escritor)
+
+        writer.encolar(1, 10, [0.1])
+        writer.encolar(1, 11, [0.2])
+        writer.encolar(2, 20, [0.3])
+        await asyncio.sleep(0.05)
+
+        assert escritor.llamadas == [{1: {10: [0.1], 11: [0.2]}, 2: {20: [0.3]}}]
+        assert writer.pendientes == 0
+
+    async def test_flush_inmediato_al_llegar_al_maximo(self):
+        escritor = _Escritor()
+        writer = EmbeddingWriter(ventana_seg=60, max_lote=2, escribir=escritor)
+
+        writer.encolar(1, 10, [0.1])
+        writer.encolar(1, 11, [0.2])
+        await asyncio.sleep(0.01)
+
+        assert escritor.llamadas == [{1: {10: [0.1], 11: [0.2]}}]
+        await writer.cerrar()
+
+    async def test_mismo_gasto_gana_el_ultimo(self):
+        escritor = _Escritor()
+        writer = EmbeddingWriter(ventana_seg=60, escribir=escritor)
+
+        writer.encolar(1, 10, [0.1])
+        writer.encolar(1, 10, [0.9])
+        assert writer.pendientes == 1
+        await writer.cerrar()
+
+        assert escritor.llamadas == [{1: {10: [0.9]}}]
+
+    async def test_el_future_se_resuelve_al_escribir_el_lote(self):
+        writer = EmbeddingWriter(ventana_seg=0.01, escribir=_Escritor())
+
+        escrito = writer.encolar(1, 10, [0.1])
+        assert not escrito.done()
+
+        await asyncio.wait_for(escrito, 1)
+
+    async def test_error_al_guardar_devuelve_el_lote_a_la_cola(self):
+        escritor = _Escritor(fallar=True)
+        writer = EmbeddingWriter(ventana_seg=60, escribir=escritor)
+
+        escrito = writer.encolar(1, 10, [0.1])
+
+        assert await writer.flush() == 0
+        assert writer.pendientes == 1
+        with pytest.raises(RuntimeError):
+            await escrito
+
+        escritor.fallar = False
+        reintento = writer.encolar(1, 11, [0.2])
+        assert await writer.flush() == 2
+        await reintento
+        assert escritor.llamadas[-1] == {1: {10: [0.1], 11: [0.2]}}
+
+    async def test_el_reencolado_no_pisa_un_embedding_mas_nuevo(self):
+        escritor = _Escritor(fallar=True)
+        liberar = threading.Event()
+
+        def _escribir_lento(pendientes):
+            liberar.wait(1)
+            return escritor(pendientes)
+
+        writer = EmbeddingWriter(ventana_seg=60, escribir=_escribir_lento)
+        viejo = writer.encolar(1, 10, [0.1])
+        flush = asyncio.create_task(writer.flush())
+        await asyncio.sleep(0.01)
+        nuevo = writer.encolar(1, 10, [0.9])
+        liberar.set()
+        await flush
+
+        with pytest.raises(RuntimeError):
+            await viejo
+        assert writer.pendientes == 1
+        escritor.fallar = False
+        await writer.cerrar()
+        await nuevo
+        assert escritor.llamadas[-1] == {1: {10: [0.9]}}
+
+
+def _gasto_creado() -> Event:
+    return Event(
+        type=EventType.GASTO_CREADO,
+        familia_id=3,
+        source_id=42,
+        data={"descripcion": "UTE", "monto": 3500},
+    )
+
+
+class TestMemoryEventHandlerUsaWriter:
+    async def test_gasto_creado_encola_embedding(self):
+        from services.ai.memory_event_handler import MemoryEventHandler
+
+        memory_service = MagicMock()
+        memory_service.registrar_evento_contable = AsyncMock(return_value=Ok(1))
+        memory_service.embedding_service.generar_embedding = AsyncMock(
+            return_value=Ok([0.5, 0.5])
+        )
+        writer = MagicMock(spec=EmbeddingWriter)
+        writer.encolar = AsyncMock()
+        handler = MemoryEventHandler(memory_service, writer=writer)
+
+        await handler.handle(_gasto_creado())
+
+        writer.encolar.assert_awaited_once_with(3, 42, [0.5, 0.5])
+        memory_service.registrar_evento_contable.assert_awaited_once()
+
+    async def test_error_al_escribir_es_reintentable_y_no_memoriza(self):
+        from services.ai.memory_event_handler import MemoryEventHandler
+
+        memory_service = MagicMock()
+        memory_service.registrar_evento_contable = AsyncMock(return_value=Ok(1))
+        memory_service.embedding_service.generar_embedding = AsyncMock(
+            return_value=Ok([0.5, 0.5])
+        )
+        writer = EmbeddingWriter(ventana_seg=0.01, escribir=_Escritor(fallar=True))
+        handler = MemoryEventHandler(memory_service, writer=writer)
+
+        with pytest.raises(EventoReintentable):
+            await handler.handle(_gasto_creado())
+
+        memory_service.registrar_evento_contable.assert_not_awaited()
@@ -0,0 +1,266 @@
+"""
+Tests para EventWorkerPool: cola acotada, reintentos con backoff y outbox.
+"""
+
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from result import Err
+
+from core.event_queue import EventOutbox, EventWorkerPool, calcular_backoff
+from core.events import Event, EventoReintentable, EventSystem, EventType, handler_key
+from models.errors import AppError
+from repositories.event_outbox_repository import OutboxRow
+
+
+def _evento(source_id: int = 1) -> Event:
+    return Event(
+        type=EventType.GASTO_CREADO,
+        familia_id=1,
+        source_id=source_id,
+        data={"descripcion": "UTE", "monto": "3500"},
+    )
+
+
+class _OutboxFake(EventOutbox):
+    """Outbox en memoria con la misma interfaz que el de PostgreSQL."""
+
+    def __init__(self, pendientes: list[OutboxRow] | None = None) -> None:
+        super().__init__(lease_seg=60)
+        self.pendientes = list(pendientes or [])
+        self.registrados: list[tuple[str, list[str], bool]] = []
+        self.completados: list[int] = []
+        self.reprogramados: list[tuple[int, int]] = []
+        self.fallidos: list[int] = []
+
+    def registrar(self, event, handlers, reclamado):
+        self.registrados.append((event.type.value, handlers, reclamado))
+        base = len(self.registrados) * 100
+        return [base + i for i in range(len(handlers))]
+
+    def reclamar(self, limite):
+        filas, self.pendientes = self.pendientes[:limite], self.pendientes[limite:]
+        return filas
+
+    def completar(self, outbox_id):
+        self.completados.append(outbox_id)
+
+    def reprogramar(self, outbox_id, intentos, delay_seg, error):
+        self.reprogramados.append((outbox_id, intentos))
+
+    def marcar_fallido(self, outbox_id, intentos, error):
+        self.fallidos.append(outbox_id)
+
+
+def _pool(sistema: EventSystem, **kwargs) -> EventWorkerPool:
+    kwargs.setdefault("backoff_base", 0.001)
+    kwargs.setdefault("backoff_max", 0.01)
+    return EventWorkerPool(sistema, **kwargs)
+
+
+class TestCalcularBackoff:
+    def test_exponencial_con_tope(self):
+        assert 1.0 <= calcular_backoff(1, base=2, maximo=60) <= 2.0
+        assert 4.0 <= calcular_backoff(3, base=2, maximo=60) <= 8.0
+        assert calcular_backoff(20, base=2, maximo=60) <= 60.0
+
+
+class TestEventWorkerPool:
+    async def test_procesa_eventos_con_workers_acotados(self):
+        sistema = EventSystem()
+        concurrentes = 0
+        maximo = 0
+
+        async def handler(event: Event):
+            nonlocal concurrentes, maximo
+            concurrentes += 1
+            maximo = max(maximo, concurrentes)
+            await asyncio.sleep(0.001)
+            concurrentes -= 1
+
+        sistema.subscribe(EventType.GASTO_CREADO, handler)
+        pool = _pool(sistema, workers=2)
+        await pool.start()
+        sistema.attach_worker_pool(pool)
+
+        for i in range(10):
+            sistema.fire_and_forget(_evento(i))
+        await pool.join()
+
+        assert maximo <= 2
+        metrics = pool.metrics()
+        assert metrics.procesados == 10
+        assert metrics.profundidad == 0
+        await pool.stop()
+
+    async def test_reintenta_hasta_exito(self):
+        sistema = EventSystem()
+        handler = AsyncMock(side_effect=[EventoReintentable("caído"), None])
+        handler.__qualname__ = "handler"
+        sistema.subscribe(EventType.GASTO_CREADO, handler)
+        outbox = _OutboxFake()
+        pool = _pool(sistema, outbox=outbox, sweep_interval=3600)
+        await pool.start()
+
+        pool.submit(_evento())
+        for _ in range(100):
+            if outbox.completados:
+                break
+            await asyncio.sleep(0.005)
+
+        assert handler.await_count == 2
+        assert outbox.reprogramados == [(100, 1)]
+        assert outbox.completados == [100]
+        assert pool.metrics().reintentos == 1
+        await pool.stop()
+
+    async def test_marca_fallido_tras_max_intentos(self):
+        sistema = EventSystem()
+
+        async def handler_roto(event: Event):
+            raise EventoReintentable("Ollama no disponible")
+
+        sistema.subscribe(EventType.GASTO_CREADO, handler_roto)
+        outbox = _OutboxFake()
+        pool = _pool(sistema, max_intentos=3, outbox=outbox, sweep_interval=3600)
+        await pool.start()
+
+        pool.submit(_evento())
+        for _ in range(100):
+            if outbox.fallidos:
+                break
+            await asyncio.sleep(0.005)
+
+        assert outbox.fallidos == [100]
+        metrics = pool.metrics()
+        assert metrics.reintentos == 2
+        assert metrics.fallidos == 1
+        await pool.stop()
+
+    async def test_cola_llena_sin_outbox_descarta(self):
+        sistema = EventSystem()
+        liberar = asyncio.Event()
+
+        async def handler_lento(event: Event):
+            await liberar.wait()
+
+        sistema.subscribe(EventType.GASTO_CREADO, handler_lento)
+        pool = _pool(sistema, workers=1, max_queue=1)
+        await pool.start()
+
+        for i in range(4):
+            pool.submit(_evento(i))
+        await asyncio.sleep(0.01)
+
+        # 1 en ejecución + 1 en cola; el resto se descarta
+        assert pool.metrics().descartados >= 1
+        liberar.set()
+        await pool.join()
+        await pool.stop()
+
+    async def test_submit_desde_otro_hilo(self):
+        sistema = EventSystem()
+        recibidos = []
+
+        async def handler(event: Event):
+            recibidos.append(event.source_id)
+
+        sistema.subscribe(EventType.GASTO_CREADO, handler)
+        pool = _pool(sistema)
+        await pool.start()
+
+        hilo = threading.Thread(target=pool.submit, args=(_evento(7),))
+        hilo.start()
+        hilo.join()
+        for _ in range(100):
+            if recibidos:
+                break
+            await asyncio.sleep(0.005)
+
+        assert recibidos == [7]
+        await pool.stop()
+
+    async def test_outbox_se_registra_fuera_del_event_loop(self):
+        sistema = EventSystem()
+        sistema.subscribe(EventType.GASTO_CREADO, AsyncMock(__qualname__="h"))
+        hilos: list[threading.Thread] = []
+
+        class _OutboxLento(_OutboxFake):
+            def registrar(self, event, handlers, reclamado):
+                hilos.append(threading.current_thread())
+                return super().registrar(event, handlers, reclamado)
+
+        outbox = _OutboxLento()
+        pool = _pool(sistema, outbox=outbox, sweep_interval=3600)
+        await pool.start()
+
+        pool.submit(_evento())
+        assert outbox.registrados == []
+        await pool.join()
+
+        assert hilos and hilos[0] is not threading.current_thread()
+        assert outbox.completados == [100]
+        await pool.stop()
+
+    async def test_sweep_recupera_pendientes_del_outbox(self):
+        sistema = EventSystem()
+        recibidos = []
+
+        async def handler(event: Event):
+            recibidos.append((event.source_id, event.data["monto"]))
+
+        sistema.subscribe(EventType.GASTO_CREADO, handler)
+        fila = OutboxRow(
+            id=42,
+            event_type=EventType.GASTO_CREADO.value,
+            familia_id=1,
+            source_id=9,
+            data={"monto": "3500"},
+            handler=handler_key(handler),
+            intentos=1,
+        )
+        outbox = _OutboxFake(pendientes=[fila])
+        pool = _pool(sistema, outbox=outbox, sweep_interval=3600)
+        await pool.start()
+
+        for _ in range(100):
+            if outbox.completados:
+                break
+            await asyncio.sleep(0.005)
+
+        assert recibidos == [(9, "3500")]
+        assert outbox.completados == [42]
+        await pool.stop()
+
+    async def test_sin_pool_sigue_fire_and_forget(self):
+        sistema = EventSystem()
+        handler = AsyncMock()
+        handler.__qualname__ = "handler"
+        sistema.subscribe(EventType.GASTO_CREADO, handler)
+
+        sistema.fire_and_forget(_evento())
+        await asyncio.sleep(0.01)
+
+        handler.assert_awaited_once()
+
+
+class TestMemoryEventHandlerReintentable:
+    async def test_err_de_memoria_es_reintentable(self):
+        from services.ai.ia_memory_service import IAMemoryService
+        from services.ai.memory_event_handler import MemoryEventHandler
+
+        svc = MagicMock(spec=IAMemoryService)
+        svc.registrar_evento_contable = AsyncMock(
+            return_value=Err(AppError(message="Ollama no disponible"))
+        )
+        handler = MemoryEventHandler(svc)
+        event = Event(
+            type=EventType.INGRESO_CREADO,
+            familia_id=1,
+            data={"descripcion": "Sueldo", "monto": 50000.0},
+        )
+
+        with pytest.raises(EventoReintentable):
+            await handler.handle(event)
@@ -133,3 +133,52 @@ class TestIncomeService:
         assert isinstance(summary, dict)
         assert (IncomeCategory.SUELDO.value, "UYU") in summary
         assert (IncomeCategory.SUELDO.value, "USD") in summary
+
+
+class TestIncomeServiceListForMonths:
+    """list_for_months: una query por rango, recurrentes en todos los meses."""
+
+    @staticmethod
+    def _income(fecha: date, recurrente: bool = False) -> Income:
+        from models.categories import RecurrenceFrequency
+
+        return Income(
+            family_member_id=1,
+            monto=1000,
+            fecha=fecha,
+            descripcion="Sueldo" if recurrente else "Changa",
+            categoria=IncomeCategory.SUELDO,
+            es_recurrente=recurrente,
+            frecuencia=RecurrenceFrequency.MENSUAL if recurrente else None,
+        )
+
+    def test_una_query_para_todo_el_rango(self):
+        from unittest.mock import MagicMock
+
+        sueldo = self._income(date(2025, 1, 5), recurrente=True)
+        changa = self._income(date(2026, 2, 10))
+        repo = MagicMock()
+        repo.get_by_date_range.return_value = [sueldo, changa]
+        service = IncomeService(repo)
+
+        por_mes = service.list_for_months([(2026, 1), (2026, 2), (2026, 3)])
+
+        repo.get_by_date_range.assert_called_once_with(
+            date(2026, 1, 1), date(2026, 3, 31), incluir_recurrentes=True
+        )
+        assert por_mes[(2026, 1)] == [sueldo]
+        assert por_mes[(2026, 2)] == [sueldo, changa]
+        assert por_mes[(2026, 3)] == [sueldo]
+
+    def test_list_for_month_usa_el_mismo_camino(self):
+        from unittest.mock import MagicMock
+
+        repo = MagicMock()
+        repo.get_by_date_range.return_value = []
+        service = IncomeService(repo)
+
+        assert service.list_for_month(2026, 2) == []
+        repo.get_by_date_range.assert_called_once_with(
+            date(2026, 2, 1), date(2026, 2, 28), incluir_recurrentes=True
+        )
+        repo.get_all.assert_not_called()
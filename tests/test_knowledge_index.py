@@ -0,0 +1,144 @@
+"""
+Tests para KnowledgeIndex: fragmentación por sección, construcción única
+y recuperación top-k en el AIAdvisorService.
+"""
+
+from result import Err, Ok
+
+from models.errors import AppError
+from services.ai.ai_advisor_service import AIAdvisorService
+from services.ai.knowledge_index import KnowledgeIndex, dividir_markdown
+
+# Un eje por tema: los textos que mencionan el tema apuntan hacia ese eje
+_TEMAS = ("alquiler", "patente", "ahorro")
+
+
+class _EmbeddingFake:
+    def __init__(self, fallar: bool = False) -> None:
+        self.fallar = fallar
+        self.lotes: list[list[str]] = []
+
+    @staticmethod
+    def _vector(texto: str) -> list[float]:
+        texto = texto.lower()
+        return [1.0 if tema in texto else 0.0 for tema in _TEMAS] + [0.1]
+
+    async def generar_embeddings(self, textos, batch_size=64):
+        self.lotes.append(textos)
+        if self.fallar:
+            return Err(AppError(message="Ollama no disponible"))
+        return Ok([self._vector(t) for t in textos])
+
+    async def generar_embedding(self, texto):
+        return Ok(self._vector(texto))
+
+
+def _knowledge(tmp_path, embedding) -> KnowledgeIndex:
+    (tmp_path / "irpf.md").write_text(
+        "# IRPF\n\nIntro del impuesto.\n\n"
+        "## Crédito por Alquiler\n\nSe recupera el 6% del alquiler anual.\n\n"
+        "## Hijos\n\nDeducción por hijo a cargo.\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "sucive.md").write_text(
+        "# SUCIVE\n\n## Descuentos\n\nLa patente tiene descuento por pago anual.\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "README.md").write_text("# Índice\n\nalquiler", encoding="utf-8")
+    return KnowledgeIndex(str(tmp_path), embedding_service=embedding)
+
+
+class TestDividirMarkdown:
+    def test_una_seccion_por_fragmento_con_titulo(self):
+        fragmentos = dividir_markdown(
+            "irpf.md", "# IRPF\n\nIntro.\n\n## Alquiler\n\nTexto.\n\n## Hijos\n\nOtro."
+        )
+
+        assert [f.seccion for f in fragmentos] == [
+            "IRPF",
+            "IRPF › Alquiler",
+            "IRPF › Hijos",
+        ]
+        assert fragmentos[1].texto == "Texto."
+        assert fragmentos[1].texto_embedding == "IRPF › Alquiler\nTexto."
+
+    def test_secciones_largas_se_cortan_por_parrafo(self):
+        cuerpo = "\n\n".join("x" * 40 for _ in range(5))
+
+        fragmentos = dividir_markdown("a.md", f"# A\n\n## S\n\n{cuerpo}", max_chars=100)
+
+        assert len(fragmentos) == 3
+        assert all(len(f.texto) <= 100 for f in fragmentos)
+
+
+class TestKnowledgeIndex:
+    async def test_construye_una_sola_vez_en_un_lote(self, tmp_path):
+        embedding = _EmbeddingFake()
+        index = _knowledge(tmp_path, embedding)
+
+        assert (await index.construir()).ok() == 4
+        assert (await index.construir()).ok() == 4
+
+        assert len(embedding.lotes) == 1
+        assert "README.md" not in index.documentos
+
+    async def test_buscar_devuelve_top_k_sobre_el_umbral(self, tmp_path):
+        index = _knowledge(tmp_path, _EmbeddingFake())
+        await index.construir()
+
+        resultados = index.buscar([1.0, 0.0, 0.0, 0.1], k=3, min_similitud=0.5)
+
+        assert [f.seccion for f, _ in resultados] == ["IRPF › Crédito por Alquiler"]
+
+    async def test_ollama_caido_deja_el_indice_sin_construir(self, tmp_path):
+        index = _knowledge(tmp_path, _EmbeddingFake(fallar=True))
+
+        assert isinstance(await index.construir(), Err)
+        assert not index.listo
+
+
+class TestRecuperarNormativa:
+    async def test_con_indice_usa_solo_los_fragmentos_relevantes(self, tmp_path):
+        index = _knowledge(tmp_path, _EmbeddingFake())
+        await index.construir()
+        svc = AIAdvisorService(knowledge=index)
+
+        texto, archivo = await svc._recuperar_normativa(
+            "¿Cuánto recupero del alquiler?"
+        )
+
+        assert archivo == "irpf.md"
+        assert "6% del alquiler" in texto
+        assert "Deducción por hijo" not in texto
+
+    async def test_sin_indice_cae_a_palabras_clave_en_memoria(self, tmp_path):
+        (tmp_path / "sucive_patentes_uy.md").write_text(
+            "# SUCIVE\n\nPatente", encoding="utf-8"
+        )
+        svc = AIAdvisorService(
+            knowledge=KnowledgeIndex(str(tmp_path), embedding_service=_EmbeddingFake())
+        )
+
+        texto, archivo = await svc._recuperar_normativa("¿Cuándo vence la patente?")
+
+        assert archivo == "sucive_patentes_uy.md"
+        assert texto == "# SUCIVE\n\nPatente"
+
+    async def test_sin_fragmentos_sobre_el_umbral_cae_a_palabras_clave(
+        self, tmp_path, caplog
+    ):
+        (tmp_path / "sucive_patentes_uy.md").write_text(
+            "# SUCIVE\n\nPatente", encoding="utf-8"
+        )
+        index = _knowledge(tmp_path, _EmbeddingFake())
+        await index.construir()
+        index.buscar = lambda embedding: []
+        svc = AIAdvisorService(knowledge=index)
+
+        with caplog.at_level("INFO"):
+            texto, archivo = await svc._recuperar_normativa("¿Cuándo vence la patente?")
+
+        assert archivo == "sucive_patentes_uy.md"
+        assert texto == "# SUCIVE\n\nPatente"
+        assert "Ningún fragmento supera" in caplog.text
+        assert "Sin embedding" not in caplog.text
@@ -12,6 +12,7 @@ from result import Err, Ok
 
 from core.events import Event, EventSystem, EventType
 from services.ai.embedding_service import EmbeddingService
+from services.ai.embedding_writer import EmbeddingWriter
 from services.ai.ia_memory_service import IAMemoryService
 from services.ai.memory_event_handler import MemoryEventHandler
 
@@ -147,12 +148,97 @@ class TestIAMemoryService:
         svc = IAMemoryService(repo, mock_embedding_service)
         assert svc.tiene_memoria() is False
 
+    @pytest.mark.asyncio
+    async def test_busqueda_hibrida_pasa_la_pregunta(
+        self, memory_service, mock_memoria_repo
+    ):
+        await memory_service.buscar_contexto_para_pregunta("¿Cuánto pagué de UTE?")
+        kwargs = mock_memoria_repo.buscar_similares.call_args.kwargs
+        assert kwargs["consulta"] == "¿Cuánto pagué de UTE?"
+
+
+class TestMemoriaRepositoryHibrido:
+    def test_una_sola_query_con_rrf(self):
+        from repositories.memoria_repository import RRF_K, MemoriaRepository
+
+        session = MagicMock()
+        session.execute.return_value.fetchall.return_value = [
+            (7, "Pago UTE $3500", "gasto_creado", 3, 0.4, 2 / (RRF_K + 1)),
+        ]
+        repo = MemoriaRepository(session, familia_id=1)
+
+        resultados = repo.buscar_similares(FAKE_EMBEDDING, limit=3, consulta="UTE")
+
+        session.execute.assert_called_once()
+        sql = str(session.execute.call_args.args[0])
+        params = session.execute.call_args.args[1]
+        assert "to_tsquery('spanish', :consulta)" in sql
+        assert "UNION ALL" in sql
+        assert params["consulta"] == "ute"
+        assert params["rrf_k"] == RRF_K
+        assert resultados[0]["id"] == 7
+        assert resultados[0]["score"] > 0
+
+    def test_sin_consulta_usa_solo_vector(self):
+        from repositories.memoria_repository import MemoriaRepository
+
+        session = MagicMock()
+        session.execute.return_value.fetchall.return_value = []
+        repo = MemoriaRepository(session, familia_id=1)
+
+        repo.buscar_similares(FAKE_EMBEDDING, limit=3, consulta="  ")
+
+        sql = str(session.execute.call_args.args[0])
+        assert "tsquery" not in sql
+
+    def test_pregunta_de_varias_palabras_usa_or(self):
+        from repositories.memoria_repository import consulta_tsquery
+
+        assert consulta_tsquery("¿Cuánto pagué de UTE? ¿UTE!") == (
+            "cuánto | pagué | de | ute"
+        )
+        assert consulta_tsquery("¿?") == ""
+
+    def test_pregunta_de_varias_palabras_matchea_un_solo_termino(self, db_session):
+        from sqlalchemy import text
+
+        from repositories.memoria_repository import consulta_tsquery
+
+        match = db_session.execute(
+            text(
+                "SELECT to_tsvector('spanish', 'Pago UTE $3500')"
+                " @@ to_tsquery('spanish', :q)"
+            ),
+            {"q": consulta_tsquery("¿Cuánto pagué de UTE?")},
+        ).scalar()
+
+        assert match is True
+
+    def test_si_falla_el_full_text_cae_a_vector(self):
+        from repositories.memoria_repository import MemoriaRepository
+
+        session = MagicMock()
+        vectorial = MagicMock()
+        vectorial.fetchall.return_value = [(7, "Pago UTE $3500", "gasto", 3, 0.4)]
+        session.execute.side_effect = [Exception("no existe content_tsv"), vectorial]
+        repo = MemoriaRepository(session, familia_id=1)
+
+        resultados = repo.buscar_similares(FAKE_EMBEDDING, limit=3, consulta="UTE")
+
+        # Solo se revierte el SAVEPOINT: lo pendiente del caller sigue en pie
+        session.begin_nested.assert_called_once()
+        session.rollback.assert_not_called()
+        assert "tsquery" not in str(session.execute.call_args.args[0])
+        assert resultados[0]["content"] == "Pago UTE $3500"
+
 
 class TestMemoryEventHandler:
     @pytest.mark.asyncio
     async def test_handle_gasto_creado(self, mock_memoria_repo, mock_embedding_service):
         memory_service = IAMemoryService(mock_memoria_repo, mock_embedding_service)
-        handler = MemoryEventHandler(memory_service)
+        writer = MagicMock(spec=EmbeddingWriter)
+        writer.encolar = AsyncMock()
+        handler = MemoryEventHandler(memory_service, writer=writer)
         event = Event(
             type=EventType.GASTO_CREADO,
             familia_id=1,
@@ -167,6 +253,7 @@ class TestMemoryEventHandler:
         )
         await handler.handle(event)
         assert mock_embedding_service.generar_embedding.call_count == 2
+        writer.encolar.assert_awaited_once()
         mock_memoria_repo.guardar.assert_called_once()
 
     @pytest.mark.asyncio
@@ -280,6 +367,14 @@ class TestEventSystem:
 
 
 class TestEmbeddingServiceMock:
+    @pytest.fixture(autouse=True)
+    def _cache_limpio(self):
+        from services.ai.embedding_cache import embedding_cache
+
+        embedding_cache.clear()
+        yield
+        embedding_cache.clear()
+
     @pytest.mark.asyncio
     async def test_texto_vacio_devuelve_err(self):
         with patch("httpx.AsyncClient") as _:
@@ -290,14 +385,72 @@ class TestEmbeddingServiceMock:
     @pytest.mark.asyncio
     async def test_texto_demasiado_largo_se_trunca(self):
         texto_largo = "A" * 10000
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_response = MagicMock()
-            mock_response.status_code = 200
-            mock_response.json.return_value = {"embedding": FAKE_EMBEDDING}
-            mock_client.return_value.__aenter__ = AsyncMock(
-                return_value=MagicMock(post=AsyncMock(return_value=mock_response))
-            )
-            mock_client.return_value.__aexit__ = AsyncMock(return_value=None)
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"embedding": FAKE_EMBEDDING}
+        client = MagicMock(post=AsyncMock(return_value=mock_response))
+        with patch(
+            "services.ai.embedding_service.get_http_client", return_value=client
+        ):
             svc = EmbeddingService()
             result = await svc.generar_embedding(texto_largo)
             assert isinstance(result, Ok)
+            enviado = client.post.call_args.kwargs["json"]["prompt"]
+            assert len(enviado) == 8000
+
+    @pytest.mark.asyncio
+    async def test_cliente_http_compartido_entre_instancias(self):
+        from services.ai.embedding_service import close_http_client, get_http_client
+
+        primero = get_http_client()
+        assert get_http_client() is primero
+        await close_http_client()
+        assert primero.is_closed
+        assert get_http_client() is not primero
+        await close_http_client()
+
+    @pytest.mark.asyncio
+    async def test_generar_embeddings_en_lotes(self):
+        def _respuesta(url, json, timeout):
+            response = MagicMock()
+            response.status_code = 200
+            response.json.return_value = {
+                "embeddings": [FAKE_EMBEDDING for _ in json["input"]]
+            }
+            return response
+
+        client = MagicMock(post=AsyncMock(side_effect=_respuesta))
+        with patch(
+            "services.ai.embedding_service.get_http_client", return_value=client
+        ):
+            svc = EmbeddingService()
+            result = await svc.generar_embeddings(
+                [f"gasto {i}" for i in range(5)], batch_size=2
+            )
+        assert isinstance(result, Ok)
+        assert len(result.ok()) == 5
+        assert client.post.call_count == 3
+        assert client.post.call_args.args[0].endswith("/api/embed")
+
+    @pytest.mark.asyncio
+    async def test_generar_embeddings_lista_vacia(self):
+        result = await EmbeddingService().generar_embeddings([])
+        assert isinstance(result, Ok)
+        assert result.ok() == []
+
+    @pytest.mark.asyncio
+    async def test_generar_embeddings_rechaza_texto_vacio(self):
+        result = await EmbeddingService().generar_embeddings(["ok", "  "])
+        assert isinstance(result, Err)
+
+    @pytest.mark.asyncio
+    async def test_generar_embeddings_respuesta_incompleta_es_err(self):
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {"embeddings": [FAKE_EMBEDDING]}
+        client = MagicMock(post=AsyncMock(return_value=response))
+        with patch(
+            "services.ai.embedding_service.get_http_client", return_value=client
+        ):
+            result = await EmbeddingService().generar_embeddings(["a", "b"])
+        assert isinstance(result, Err)
@@ -0,0 +1,70 @@
+"""
+Tests para MonthlySnapshotRepository: recálculo perezoso de meses sucios.
+"""
+
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from repositories.monthly_snapshot_repository import MonthlySnapshotRepository
+
+
+class TestMesesPendientes:
+    def _repo(self, al_dia: list[tuple[int, int]]) -> MonthlySnapshotRepository:
+        session = MagicMock()
+        session.execute.return_value.fetchall.return_value = [
+            SimpleNamespace(anio=a, mes=m) for a, m in al_dia
+        ]
+        return MonthlySnapshotRepository(session, familia_id=1)
+
+    def test_solo_meses_sin_estado_o_dirty(self):
+        repo = self._repo(al_dia=[(2026, 10)])
+        assert repo.meses_pendientes([(2026, 10), (2026, 9)]) == [(2026, 9)]
+
+    def test_sin_meses_no_consulta(self):
+        repo = self._repo(al_dia=[])
+        assert repo.meses_pendientes([]) == []
+        repo.session.execute.assert_not_called()
+
+    def test_asegurar_meses_no_recalcula_si_todo_al_dia(self):
+        repo = self._repo(al_dia=[(2026, 10), (2026, 9)])
+        repo.recalcular_mes = MagicMock()
+
+        assert repo.asegurar_meses([(2026, 10), (2026, 9)]) == 0
+        repo.recalcular_mes.assert_not_called()
+        repo.session.commit.assert_not_called()
+
+
+class TestSnapshotIncremental:
+    def test_delta_tras_recalculo(self, db_session):
+        from controllers.expense_controller import ExpenseController
+        from models.categories import ExpenseCategory
+        from models.expense_model import Expense
+
+        hoy = date.today()
+        repo = MonthlySnapshotRepository(db_session, familia_id=1)
+        repo.recalcular_mes(hoy.year, hoy.month)
+        antes = {
+            m.categoria: m.total_actual
+            for m in repo.obtener_comparativa_mensual(hoy.year, hoy.month)
+        }
+
+        ExpenseController(db_session, familia_id=1).add_expense(
+            Expense(
+                familia_id=1,
+                monto=250.00,
+                fecha=hoy,
+                descripcion="Test snapshot delta",
+                categoria=ExpenseCategory.OCIO,
+                currency="UYU",
+            )
+        )
+
+        assert repo.meses_pendientes([(hoy.year, hoy.month)]) == []
+        despues = {
+            m.categoria: m.total_actual
+            for m in repo.obtener_comparativa_mensual(hoy.year, hoy.month)
+        }
+        categoria = ExpenseCategory.OCIO.value
+        assert despues[categoria] - antes.get(categoria, Decimal("0")) == Decimal("250")
@@ -0,0 +1,121 @@
+"""
+Tests para el pipeline CPU del microservicio OCR (ocr_api/ocr_engine.py).
+"""
+
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# ocr_api se despliega con sus propias dependencias (ocr_api/pyproject.toml)
+cv2 = pytest.importorskip("cv2")
+
+import numpy as np  # noqa: E402
+
+import ocr_api.ocr_engine as ocr_engine  # noqa: E402
+from ocr_api.ticket_parser import parsear_ticket  # noqa: E402
+
+HOY = date(2026, 10, 17)
+
+# Formato del corpus sintético: encabezado, ítems, SUBTOTAL/IVA y TOTAL
+LINEAS_TICKET = [
+    "DISCO",
+    "RUT 21 098765 0012",
+    "Fecha 12/10/2026 09:15",
+    "YERBA CANARIA 1KG 310,00",
+    "AZUCAR BELLA UNION 95,00",
+    "SUBTOTAL 331,97",
+    "IVA 22% 73,03",
+    "TOTAL $ 405,00",
+]
+
+
+def _tsv_tesseract(lineas: list[str]) -> bytes:
+    """Salida TSV del binario de Tesseract: encabezado y cuerpo en bloques."""
+    filas = [
+        "level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\t"
+        "left\ttop\twidth\theight\tconf\ttext",
+        "1\t1\t0\t0\t0\t0\t0\t0\t500\t900\t-1\t",
+    ]
+    for i, linea in enumerate(lineas):
+        bloque, linea_num = (1, i + 1) if i < 3 else (2, i - 2)
+        filas.append(f"4\t1\t{bloque}\t1\t{linea_num}\t0\t0\t0\t500\t20\t-1\t")
+        for n, palabra in enumerate(linea.split(), start=1):
+            filas.append(
+                f"5\t1\t{bloque}\t1\t{linea_num}\t{n}\t0\t0\t40\t20\t91\t{palabra}"
+            )
+    return "\n".join(filas).encode()
+
+
+def _png_en_blanco() -> bytes:
+    _, png = cv2.imencode(".png", np.full((400, 200), 255, dtype=np.uint8))
+    return png.tobytes()
+
+
+class TestLeerTsv:
+    def test_agrupa_palabras_por_bloque_parrafo_y_linea(self):
+        lineas, confs = ocr_engine.leer_tsv(_tsv_tesseract(LINEAS_TICKET).decode())
+
+        assert lineas == LINEAS_TICKET
+        assert set(confs) == {91.0}
+
+
+class TestExtraerTexto:
+    def test_el_parser_resuelve_el_texto_que_devuelve_el_ocr(self):
+        proceso = MagicMock(stdout=_tsv_tesseract(LINEAS_TICKET))
+
+        with patch.object(ocr_engine.subprocess, "run", return_value=proceso):
+            resultado = ocr_engine.extraer_texto(_png_en_blanco())
+
+        r = parsear_ticket(resultado.texto, hoy=HOY)
+
+        assert resultado.texto == "\n".join(LINEAS_TICKET)
+        assert resultado.confianza == 0.91
+        assert r.monto == 405.0
+        assert r.comercio == "DISCO"
+        assert r.fecha == date(2026, 10, 12)
+        assert r.suficiente()
+
+
+def _foto_ticket(lineas: list[str]) -> np.ndarray:
+    img = np.full((1200, 900), 255, dtype=np.uint8)
+    for i, linea in enumerate(lineas):
+        cv2.putText(img, linea, (30, 80 + i * 70), cv2.FONT_HERSHEY_SIMPLEX, 1.2, 0, 4)
+    return img
+
+
+def _distancia(a: int, b: int) -> int:
+    return ((a ^ b) & ((1 << 64) - 1)).bit_count()
+
+
+class TestCalcularPhash:
+    def test_la_misma_foto_recomprimida_difiere_en_pocos_bits(self):
+        foto = _foto_ticket(LINEAS_TICKET)
+        _, png = cv2.imencode(".png", foto)
+        _, jpg = cv2.imencode(
+            ".jpg", cv2.resize(foto, (450, 600)), [cv2.IMWRITE_JPEG_QUALITY, 60]
+        )
+
+        original = ocr_engine.calcular_phash(png.tobytes())
+        recomprimida = ocr_engine.calcular_phash(jpg.tobytes())
+
+        assert -(1 << 63) <= original < (1 << 63)
+        assert _distancia(original, recomprimida) <= 4
+
+    def test_otro_ticket_queda_lejos(self):
+        _, disco = cv2.imencode(".png", _foto_ticket(LINEAS_TICKET))
+        _, tata = cv2.imencode(
+            ".png", _foto_ticket(["TATA", "ARROZ 80,00", "TOTAL 80,00"])
+        )
+
+        assert (
+            _distancia(
+                ocr_engine.calcular_phash(disco.tobytes()),
+                ocr_engine.calcular_phash(tata.tobytes()),
+            )
+            > 4
+        )
+
+    @pytest.mark.parametrize("contenido", [b"", b"no es una imagen"])
+    def test_bytes_que_no_son_imagen_devuelven_none(self, contenido):
+        assert ocr_engine.calcular_phash(contenido) is None
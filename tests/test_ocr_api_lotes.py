@@ -0,0 +1,59 @@
+"""
+Tests para AgrupadorParseo del microservicio OCR (parseos de a varios).
+"""
+
+import asyncio
+
+from ocr_api.lotes import AgrupadorParseo
+
+
+def _llm_fake(llamadas: list[list[str]]):
+    async def _parsear_varios(textos: list[str]) -> list[dict | None]:
+        llamadas.append(textos)
+        return [{"comercio": texto} for texto in textos]
+
+    return _parsear_varios
+
+
+class TestAgrupadorParseo:
+    async def test_junta_los_textos_de_la_ventana_en_una_llamada(self):
+        llamadas: list[list[str]] = []
+        agrupador = AgrupadorParseo(_llm_fake(llamadas), max_lote=4, ventana_seg=0.01)
+
+        resultados = await asyncio.gather(
+            *(agrupador.parsear(t) for t in ("DISCO", "TATA", "DEVOTO"))
+        )
+
+        assert llamadas == [["DISCO", "TATA", "DEVOTO"]]
+        assert [r["comercio"] for r in resultados] == ["DISCO", "TATA", "DEVOTO"]
+
+    async def test_max_lote_despacha_sin_esperar_la_ventana(self):
+        llamadas: list[list[str]] = []
+        agrupador = AgrupadorParseo(_llm_fake(llamadas), max_lote=2, ventana_seg=60)
+
+        resultados = await asyncio.wait_for(
+            asyncio.gather(agrupador.parsear("DISCO"), agrupador.parsear("TATA")), 1
+        )
+
+        assert llamadas == [["DISCO", "TATA"]]
+        assert resultados[1] == {"comercio": "TATA"}
+
+    async def test_lo_que_llega_despues_del_despacho_abre_otro_lote(self):
+        llamadas: list[list[str]] = []
+        agrupador = AgrupadorParseo(_llm_fake(llamadas), max_lote=2, ventana_seg=0.01)
+
+        await asyncio.gather(*(agrupador.parsear(t) for t in ("A", "B", "C")))
+
+        assert llamadas == [["A", "B"], ["C"]]
+
+    async def test_error_del_llm_resuelve_none_para_cada_ticket(self):
+        async def _falla(textos: list[str]) -> list[dict | None]:
+            raise RuntimeError("Ollama caído")
+
+        agrupador = AgrupadorParseo(_falla, max_lote=2, ventana_seg=0.01)
+
+        resultados = await asyncio.gather(
+            agrupador.parsear("DISCO"), agrupador.parsear("TATA")
+        )
+
+        assert resultados == [None, None]
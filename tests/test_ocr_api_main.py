@@ -0,0 +1,315 @@
+"""
+Tests para los endpoints del microservicio OCR (ocr_api/main.py) y su pool.
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Self
+from unittest.mock import AsyncMock
+
+import pytest
+
+# ocr_api se despliega con sus propias dependencias (ocr_api/pyproject.toml)
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("asyncpg")
+pytest.importorskip("cv2")
+
+os.environ.setdefault("POSTGRES_PASSWORD", "test")
+
+from fastapi import UploadFile  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+from starlette.datastructures import Headers  # noqa: E402
+
+import ocr_api.main as ocr_main  # noqa: E402
+import ocr_api.ocr_pool as ocr_pool_module  # noqa: E402
+from ocr_api.models import OCRResponse  # noqa: E402
+from ocr_api.ocr_engine import ResultadoOCR  # noqa: E402
+from ocr_api.ocr_pool import OCRPool, OCRPoolSaturado  # noqa: E402
+
+# Texto que las reglas no resuelven (sin TOTAL ni fecha): va al LLM
+_ILEGIBLE = "ticket borroso {n} sin importes legibles"
+
+
+@pytest.fixture
+def lote(monkeypatch):
+    """Lote sin cache de pHash ni Tesseract: el OCR devuelve `_ILEGIBLE`."""
+    monkeypatch.setattr(ocr_main.settings, "ocr_cache_enabled", False)
+    monkeypatch.setattr(ocr_main.settings, "ocr_batch_llm_max", 4)
+    monkeypatch.setattr(ocr_main.settings, "ocr_batch_llm_window_seconds", 0.01)
+
+    async def _ocr(contenido: bytes) -> tuple[str, float]:
+        return _ILEGIBLE.format(n=contenido.decode()), 0.8
+
+    monkeypatch.setattr(ocr_main, "extraer_texto_tesseract", _ocr)
+
+
+def _archivo(
+    i: int,
+    content_type: str = "image/png",
+    contenido: bytes | None = None,
+    size: int | None = -1,
+) -> UploadFile:
+    """UploadFile como los arma Starlette; `size=None` si el cliente no lo mandó."""
+    contenido = str(i).encode() if contenido is None else contenido
+    return UploadFile(
+        io.BytesIO(contenido),
+        size=len(contenido) if size == -1 else size,
+        filename=f"ticket_{i}.png",
+        headers=Headers({"content-type": content_type}),
+    )
+
+
+async def _lineas(archivos: list[UploadFile]) -> list[dict]:
+    lineas = [json.loads(linea) async for linea in ocr_main._procesar_lote(archivos, 1)]
+    return sorted(lineas, key=lambda linea: linea["indice"])
+
+
+class TestProcesarLote:
+    async def test_los_parseos_del_lote_van_en_un_solo_prompt(self, lote, monkeypatch):
+        respuesta = [
+            {"comercio": f"TIENDA {i}", "monto": 100 * (i + 1), "fecha": "2026-10-12"}
+            for i in range(3)
+        ]
+        generar = AsyncMock(return_value=json.dumps(respuesta))
+        monkeypatch.setattr(ocr_main, "_generar_ollama", generar)
+
+        lineas = await _lineas([_archivo(i) for i in range(3)])
+
+        generar.assert_awaited_once()
+        assert "Ticket 3" in generar.await_args.args[0]
+        assert [linea["monto"] for linea in lineas] == [100, 200, 300]
+        assert [linea["archivo"] for linea in lineas] == [
+            "ticket_0.png",
+            "ticket_1.png",
+            "ticket_2.png",
+        ]
+
+    async def test_archivos_invalidos_dan_una_linea_de_error(self, lote, monkeypatch):
+        monkeypatch.setattr(ocr_main.settings, "max_upload_size", 1)
+        monkeypatch.setattr(ocr_main, "_generar_ollama", AsyncMock(return_value="[]"))
+
+        grande = _archivo(1, contenido=b"12")
+        grande.read = AsyncMock()
+        sin_size = _archivo(2, contenido=b"12", size=None)
+
+        lineas = await _lineas([_archivo(0, "application/pdf"), grande, sin_size])
+
+        assert [(linea["indice"], linea["success"]) for linea in lineas] == [
+            (0, False),
+            (1, False),
+            (2, False),
+        ]
+        assert lineas[0]["error"] == "Solo imágenes"
+        assert lineas[1]["error"].startswith("Archivo excede")
+        grande.read.assert_not_awaited()
+        assert lineas[2]["error"].startswith("Archivo excede")
+
+    async def test_pool_saturado_o_error_no_cortan_el_lote(self, lote, monkeypatch):
+        async def _ocr(contenido: bytes) -> tuple[str, float]:
+            if contenido == b"0":
+                raise OCRPoolSaturado("OCR saturado")
+            raise ValueError("imagen corrupta")
+
+        monkeypatch.setattr(ocr_main, "extraer_texto_tesseract", _ocr)
+
+        lineas = await _lineas([_archivo(0), _archivo(1)])
+
+        assert lineas[0]["error"] == "OCR saturado"
+        assert lineas[1]["error"] == "Error interno: imagen corrupta"
+
+    def test_endpoint_lee_los_archivos_mientras_emite(self, lote, monkeypatch):
+        monkeypatch.setattr(ocr_main, "_generar_ollama", AsyncMock(return_value="[]"))
+
+        respuesta = TestClient(ocr_main.app).post(
+            "/upload-ocr/lote",
+            files=[
+                ("files", ("a.png", b"0", "image/png")),
+                ("files", ("b.png", b"1", "image/png")),
+            ],
+            data={"familia_id": "1"},
+        )
+
+        lineas = [json.loads(linea) for linea in respuesta.text.splitlines()]
+        assert respuesta.status_code == 200
+        assert sorted(linea["archivo"] for linea in lineas) == ["a.png", "b.png"]
+        assert all("texto_crudo" in linea for linea in lineas)
+
+
+class TestParsearVarios:
+    async def test_array_de_otro_largo_cae_al_parseo_individual(self, monkeypatch):
+        monkeypatch.setattr(
+            ocr_main, "_generar_ollama", AsyncMock(return_value='[{"monto": 1}]')
+        )
+        individual = AsyncMock(side_effect=lambda texto: {"comercio": texto})
+        monkeypatch.setattr(ocr_main, "parsear_con_ollama", individual)
+
+        resultados = await ocr_main.parsear_varios_con_ollama(["DISCO", "TATA"])
+
+        assert resultados == [{"comercio": "DISCO"}, {"comercio": "TATA"}]
+        assert individual.await_count == 2
+
+    async def test_respuesta_sin_json_cae_al_parseo_individual(self, monkeypatch):
+        monkeypatch.setattr(
+            ocr_main, "_generar_ollama", AsyncMock(return_value="No entendí")
+        )
+        monkeypatch.setattr(
+            ocr_main, "parsear_con_ollama", AsyncMock(return_value=None)
+        )
+
+        assert await ocr_main.parsear_varios_con_ollama(["a", "b"]) == [None, None]
+
+
+class TestOCRPoolSaturado:
+    async def test_rechaza_pasada_la_cola_y_lo_cuenta(self, monkeypatch):
+        liberar = threading.Event()
+
+        def _ocr_lento(contenido: bytes) -> ResultadoOCR:
+            liberar.wait(5)
+            return ResultadoOCR(texto="TOTAL 100", confianza=0.9, tiempos={})
+
+        monkeypatch.setattr(ocr_pool_module, "extraer_texto", _ocr_lento)
+        pool = OCRPool(workers=1, max_cola=1)
+        pool._executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            tareas = [asyncio.create_task(pool.extraer_texto(b"x")) for _ in range(2)]
+            await asyncio.sleep(0)
+
+            with pytest.raises(OCRPoolSaturado):
+                await pool.extraer_texto(b"x")
+            metricas = pool.metrics()
+            assert (metricas.en_curso, metricas.en_cola) == (2, 1)
+            assert metricas.rechazados == 1
+
+            liberar.set()
+            await asyncio.gather(*tareas)
+            assert pool.metrics().procesados == 2
+            assert pool.metrics().en_curso == 0
+        finally:
+            liberar.set()
+            pool.shutdown()
+
+    def test_upload_responde_429_con_retry_after(self, monkeypatch):
+        monkeypatch.setattr(ocr_main.settings, "ocr_cache_enabled", False)
+        monkeypatch.setattr(
+            ocr_main.ocr_pool,
+            "extraer_texto",
+            AsyncMock(side_effect=OCRPoolSaturado("OCR saturado")),
+        )
+
+        respuesta = TestClient(ocr_main.app).post(
+            "/upload-ocr",
+            files={"file": ("ticket.png", b"png", "image/png")},
+            data={"familia_id": "1"},
+        )
+
+        assert respuesta.status_code == 429
+        assert respuesta.headers["Retry-After"] == ocr_main._RETRY_AFTER_SEG
+
+
+class _SesionFake:
+    """AsyncSession mínima: registra el SELECT y devuelve `fila`."""
+
+    def __init__(self, fila: SimpleNamespace | None) -> None:
+        self.fila = fila
+        self.consultas: list = []
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc: object) -> None:
+        return None
+
+    async def execute(self, consulta):
+        self.consultas.append(consulta)
+        return SimpleNamespace(first=lambda: self.fila)
+
+
+def _sha256(contenido: bytes) -> str:
+    return hashlib.sha256(contenido).hexdigest()
+
+
+class TestCachePorPhash:
+    @pytest.fixture
+    def cache(self, monkeypatch):
+        monkeypatch.setattr(ocr_main.settings, "ocr_cache_enabled", True)
+        monkeypatch.setattr(ocr_main, "_calcular_phash", AsyncMock(return_value=123))
+        ocr = AsyncMock(return_value=("DISCO\nFecha 12/10/2026\nTOTAL $ 405,00", 0.9))
+        monkeypatch.setattr(ocr_main, "extraer_texto_tesseract", ocr)
+        guardar = AsyncMock()
+        monkeypatch.setattr(ocr_main, "_guardar_en_cache", guardar)
+        return SimpleNamespace(ocr=ocr, guardar=guardar)
+
+    async def test_foto_repetida_no_pasa_por_el_ocr(self, cache, monkeypatch):
+        cacheado = OCRResponse(success=True, monto=405.0, desde_cache=True)
+        buscar = AsyncMock(return_value=cacheado)
+        monkeypatch.setattr(ocr_main, "_buscar_en_cache", buscar)
+
+        resultado = await ocr_main.procesar_ticket(b"png", familia_id=1)
+
+        assert resultado is cacheado
+        buscar.assert_awaited_once_with(1, 123, _sha256(b"png"))
+        cache.ocr.assert_not_awaited()
+        cache.guardar.assert_not_awaited()
+
+    async def test_foto_nueva_se_procesa_y_se_guarda(self, cache, monkeypatch):
+        monkeypatch.setattr(ocr_main, "_buscar_en_cache", AsyncMock(return_value=None))
+
+        resultado = await ocr_main.procesar_ticket(b"png", familia_id=1)
+
+        assert resultado.monto == 405.0
+        assert not resultado.desde_cache
+        cache.guardar.assert_awaited_once_with(1, 123, _sha256(b"png"), resultado)
+
+    async def test_otro_ticket_con_el_mismo_diseno_no_usa_el_guardado(
+        self, cache, monkeypatch
+    ):
+        # Dos tickets del mismo comercio: mismo pHash, otros bytes y otro monto
+        guardado = OCRResponse(success=True, comercio="DISCO", monto=999.0)
+        sesion = _SesionFake(
+            SimpleNamespace(
+                resultado_json=guardado.model_dump_json(),
+                sha256=_sha256(b"ticket DISCO 999"),
+            )
+        )
+        monkeypatch.setattr(ocr_main, "_db", lambda: sesion)
+
+        resultado = await ocr_main.procesar_ticket(b"ticket DISCO 405", familia_id=1)
+
+        cache.ocr.assert_awaited_once()
+        assert resultado.monto == 405.0
+        assert not resultado.desde_cache
+
+    async def test_buscar_filtra_por_familia_y_phash(self, monkeypatch):
+        guardado = OCRResponse(success=True, comercio="DISCO", monto=405.0)
+        sesion = _SesionFake(
+            SimpleNamespace(
+                resultado_json=guardado.model_dump_json(), sha256=_sha256(b"png")
+            )
+        )
+        monkeypatch.setattr(ocr_main, "_db", lambda: sesion)
+
+        resultado = await ocr_main._buscar_en_cache(1, 123, _sha256(b"png"))
+
+        sql = str(sesion.consultas[0].compile(dialect=postgresql.dialect()))
+        assert "ocr_cache.phash =" in sql
+        assert "ocr_cache.familia_id =" in sql
+        assert resultado.comercio == "DISCO"
+        assert resultado.desde_cache
+
+    async def test_sin_coincidencia_o_con_error_de_bd_es_miss(self, monkeypatch):
+        monkeypatch.setattr(ocr_main, "_db", lambda: _SesionFake(None))
+        assert await ocr_main._buscar_en_cache(1, 123, _sha256(b"png")) is None
+
+        def _sin_engine():
+            raise RuntimeError("Engine de BD no inicializado (lifespan)")
+
+        monkeypatch.setattr(ocr_main, "_db", _sin_engine)
+        assert await ocr_main._buscar_en_cache(1, 123, _sha256(b"png")) is None
@@ -0,0 +1,58 @@
+"""
+Tests para ResultadoRegistry del microservicio OCR (aviso del long-poll).
+"""
+
+import asyncio
+
+import pytest
+
+# ocr_api se despliega con sus propias dependencias (ocr_api/pyproject.toml)
+pytest.importorskip("asyncpg")
+
+from ocr_api.notificaciones import ResultadoRegistry  # noqa: E402
+
+
+class TestResultadoRegistry:
+    async def test_notificar_despierta_a_todos_los_que_esperan(self):
+        registry = ResultadoRegistry()
+
+        async def _esperar() -> bool:
+            async with registry.suscribir("s1") as listo:
+                await asyncio.wait_for(listo.wait(), 1)
+                return True
+
+        tareas = [asyncio.create_task(_esperar()) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert registry.esperando == 2
+
+        registry.notificar("s1")
+
+        assert await asyncio.gather(*tareas) == [True, True]
+
+    async def test_notificar_otra_sesion_no_despierta(self):
+        registry = ResultadoRegistry()
+
+        async with registry.suscribir("s1") as listo:
+            registry.notificar("s2")
+            await asyncio.sleep(0)
+
+            assert not listo.is_set()
+
+    async def test_limpia_la_sesion_al_salir_el_ultimo(self):
+        registry = ResultadoRegistry()
+
+        async with registry.suscribir("s1") as primero:
+            async with registry.suscribir("s1") as segundo:
+                assert primero is segundo
+            assert registry.esperando == 1
+
+        assert registry.esperando == 0
+        async with registry.suscribir("s1") as nuevo:
+            assert nuevo is not primero
+
+    def test_notificar_sin_suscriptos_no_hace_nada(self):
+        registry = ResultadoRegistry()
+
+        registry.notificar("s1")
+
+        assert registry.esperando == 0
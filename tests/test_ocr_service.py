@@ -27,6 +27,9 @@ def datos_tesseract_validos():
     return {
         "text": ["", "Tienda", "Inglesa", "", "Leche", "$", "120", "Total", "$1250"],
         "conf": [-1, 92, 88, -1, 85, 90, 91, 87, 93, -1],
+        "block_num": [1, 1, 1, 2, 2, 2, 2, 2, 2],
+        "par_num": [0, 1, 1, 0, 1, 1, 1, 1, 1],
+        "line_num": [0, 1, 1, 0, 1, 1, 1, 2, 2],
     }
 
 
@@ -36,6 +39,9 @@ def datos_tesseract_ilegibles():
     return {
         "text": ["", "   ", ""],
         "conf": [-1, 10, -1],
+        "block_num": [1, 1, 1],
+        "par_num": [0, 1, 1],
+        "line_num": [0, 1, 1],
     }
 
 
@@ -69,7 +75,7 @@ class TestOCRServiceExtraerTexto:
         assert isinstance(resultado, Ok)
         partial = resultado.ok()
         assert isinstance(partial, PartialExpense)
-        assert "Tienda" in partial.texto_crudo
+        assert partial.texto_crudo == "Tienda Inglesa\nLeche $ 120\nTotal $1250"
         assert partial.confianza_ocr > 0.0
         assert partial.imagen_path == "/fake/ticket.jpg"
 
@@ -0,0 +1,81 @@
+"""
+Tests para el presupuesto de tokens del prompt: estimación, orden de
+recorte por prioridad e informe por sección.
+"""
+
+from services.ai.ai_advisor_service import AIAdvisorService
+from services.ai.prompt_budget import (
+    SeccionPrompt,
+    ajustar_a_presupuesto,
+    estimar_tokens,
+    presupuesto_para,
+)
+
+
+def _secciones(lineas: int = 10) -> list[SeccionPrompt]:
+    texto = "\n".join(f"linea {i}" for i in range(lineas))  # 2 tokens por línea
+    return [
+        SeccionPrompt("normativa", texto, prioridad=1, envoltura="NORMATIVA:\n{}\n"),
+        SeccionPrompt("memoria", texto, prioridad=2),
+        SeccionPrompt("datos", texto, prioridad=3),
+    ]
+
+
+class TestEstimarTokens:
+    def test_digitos_y_signos_cuentan_uno_cada_uno(self):
+        assert estimar_tokens("$ 1.250") == 6
+
+    def test_palabras_largas_cuestan_mas(self):
+        assert estimar_tokens("gasto") == 1
+        assert estimar_tokens("contabilidad") == 3
+
+    def test_es_aditiva_por_linea(self):
+        a, b = "Gastos del mes: $ 650", "- Almacén: $ 240 (débito)"
+
+        assert estimar_tokens(f"{a}\n{b}") == estimar_tokens(a) + estimar_tokens(b)
+
+
+class TestAjustarAPresupuesto:
+    def test_sin_exceso_no_recorta(self):
+        textos, informe = ajustar_a_presupuesto(100, _secciones(), presupuesto=1000)
+
+        assert informe.recortadas == []
+        assert textos["datos"] == _secciones()[2].texto
+        assert informe.total == 100 + 23 + 20 + 20
+
+    def test_recorta_normativa_antes_que_memoria_y_datos(self):
+        textos, informe = ajustar_a_presupuesto(100, _secciones(), presupuesto=130)
+
+        assert textos["normativa"] == ""
+        assert informe.finales["normativa"] == 0
+        assert textos["memoria"].splitlines() == [f"linea {i}" for i in range(5)]
+        assert textos["datos"] == _secciones()[2].texto
+        assert informe.recortadas == ["normativa", "memoria"]
+        assert informe.total <= 130
+
+    def test_resumen_muestra_original_y_final(self):
+        _, informe = ajustar_a_presupuesto(100, _secciones(), presupuesto=130)
+
+        assert informe.resumen() == (
+            "fijo=100 normativa=23→0 memoria=20→10 datos=20 total=130/130"
+        )
+
+    def test_presupuesto_por_modelo(self):
+        assert presupuesto_para("llama3") > presupuesto_para("gemma2")
+
+
+class TestPromptConPresupuesto:
+    def test_prompt_de_gemma_entra_en_num_ctx(self):
+        gastos = "\n".join(f"- Gasto {i}: $ {i * 137} (débito)" for i in range(400))
+
+        prompt = AIAdvisorService()._construir_prompt(
+            pregunta="¿En qué gasté más?",
+            contexto_legal="NORMATIVA\n" * 50,
+            gastos_formateados=gastos,
+            memoria_vectorial="recuerdo\n" * 50,
+        )
+
+        assert estimar_tokens(prompt) <= presupuesto_para("gemma2")
+        assert "- Gasto 0: $ 0 (débito)" in prompt
+        assert "NORMATIVA URUGUAYA RELEVANTE" not in prompt
+        assert prompt.endswith("RESPUESTA:")
@@ -0,0 +1,175 @@
+"""
+Tests para el parser de tickets por reglas (sin LLM).
+"""
+
+from __future__ import annotations
+
+import pathlib
+from datetime import date
+from unittest.mock import MagicMock, patch
+
+import services.infrastructure.ocr_service as ocr_module
+from services.infrastructure.ocr_service import OCRService
+from services.infrastructure.ticket_parser import ParserStats, parsear_ticket
+
+HOY = date(2026, 10, 17)
+
+TICKET_TIENDA = """TIENDA INGLESA
+RUT: 21 012345 0019
+Av. Italia 5775
+e-Ticket Contado
+Fecha: 14/10/2026 18:32
+LECHE CONAPROLE 1L     45,00
+PAN FLAUTA             85,00
+SUBTOTAL            1.025,00
+IVA 22%               225,50
+TOTAL $           1.250,50
+EFECTIVO          1.300,00
+"""
+
+
+class TestParsearTicket:
+    def test_ticket_completo_es_suficiente(self):
+        r = parsear_ticket(TICKET_TIENDA, hoy=HOY)
+
+        assert r.monto == 1250.50
+        assert r.fecha == date(2026, 10, 14)
+        assert r.comercio == "TIENDA INGLESA"
+        assert r.rut == "210123450019"
+        assert r.currency == "UYU"
+        assert r.suficiente()
+
+    def test_formatos_de_monto(self):
+        for linea, esperado in [
+            ("TOTAL 1.250", 1250.0),
+            ("TOTAL 1,250.00", 1250.0),
+            ("TOTAL 1250.5", 1250.5),
+            ("T0TAL $ 12,50", 12.5),
+        ]:
+            assert parsear_ticket(linea, hoy=HOY).monto == esperado, linea
+
+    def test_total_en_la_linea_siguiente_y_dolares(self):
+        r = parsear_ticket("DEVOTO\n01/10/26\nTOTAL U$S\n45.90", hoy=HOY)
+
+        assert r.monto == 45.90
+        assert r.fecha == date(2026, 10, 1)
+        assert r.currency == "USD"
+
+    def test_total_a_pagar_tiene_prioridad(self):
+        r = parsear_ticket(
+            "TOTAL 1.300,00\nTOTAL A PAGAR 1.200,00\n10/10/2026", hoy=HOY
+        )
+
+        assert r.monto == 1200.0
+        assert r.suficiente()
+
+    def test_totales_distintos_son_ambiguos(self):
+        r = parsear_ticket("TOTAL 1.300,00\nTOTAL 1.200,00\n10/10/2026", hoy=HOY)
+
+        assert not r.suficiente()
+
+    def test_sin_fecha_no_es_suficiente(self):
+        r = parsear_ticket("TOTAL 1250", hoy=HOY)
+
+        assert r.monto == 1250.0
+        assert r.fecha is None
+        assert not r.suficiente()
+
+    def test_ignora_fechas_futuras_e_invalidas(self):
+        r = parsear_ticket(
+            "Vto CAE 31/12/2027\n32/13/2026\n05/10/2026\nTOTAL 100", hoy=HOY
+        )
+
+        assert r.fecha == date(2026, 10, 5)
+
+
+def _palabras_tesseract(texto: str) -> list[tuple[int, int, int, str]]:
+    """(block_num, par_num, line_num, palabra) como las numera Tesseract."""
+    lineas = texto.strip().splitlines()
+    palabras = []
+    for i, linea in enumerate(lineas):
+        # Encabezado en el bloque 1, el resto en el 2 (line_num reinicia)
+        bloque, linea_num = (1, i + 1) if i < 5 else (2, i - 4)
+        palabras += [(bloque, 1, linea_num, p) for p in linea.split()]
+    return palabras
+
+
+def _image_to_data(texto: str) -> dict[str, list]:
+    """Salida de pytesseract.image_to_data(output_type=DICT) para el texto."""
+    palabras = [(1, 0, 0, "")] + _palabras_tesseract(texto)
+    return {
+        "block_num": [b for b, _, _, _ in palabras],
+        "par_num": [p for _, p, _, _ in palabras],
+        "line_num": [ln for _, _, ln, _ in palabras],
+        "text": [w for _, _, _, w in palabras],
+        "conf": [-1] + [90] * (len(palabras) - 1),
+    }
+
+
+# Tesseract separa las palabras con un espacio, sin el relleno del ticket
+_LINEAS_TIENDA = [" ".join(ln.split()) for ln in TICKET_TIENDA.strip().splitlines()]
+
+
+class TestTextoDelOCR:
+    """El parser recibe exactamente el texto que arma OCRService."""
+
+    async def test_ocr_service_conserva_las_lineas(self):
+        ocr = OCRService()
+        with (
+            patch.object(ocr_module.Image, "open", return_value=MagicMock()),
+            patch.object(ocr, "_preprocesar_imagen", return_value=MagicMock()),
+            patch.object(
+                ocr_module.pytesseract,
+                "image_to_data",
+                return_value=_image_to_data(TICKET_TIENDA),
+            ),
+            patch.object(pathlib.Path, "exists", return_value=True),
+        ):
+            texto = (await ocr.extraer_texto("/fake/ticket.jpg")).ok().texto_crudo
+
+        r = parsear_ticket(texto, hoy=HOY)
+
+        assert texto.splitlines() == _LINEAS_TIENDA
+        assert r.monto == 1250.50
+        assert r.comercio == "TIENDA INGLESA"
+        assert r.suficiente()
+
+
+class TestCombinar:
+    def test_llm_completa_solo_campos_faltantes(self):
+        reglas = parsear_ticket("TOTAL $ 1.250,50", hoy=HOY)
+
+        datos = reglas.combinar(
+            {
+                "monto": 999.0,
+                "fecha": "2026-10-14",
+                "comercio": "Disco",
+                "items": ["leche"],
+                "currency": "null",
+            }
+        )
+
+        assert datos["monto"] == 1250.50
+        assert datos["fecha"] == "2026-10-14"
+        assert datos["comercio"] == "Disco"
+        assert datos["items"] == ["leche"]
+        assert datos["currency"] == "UYU"
+
+    def test_llm_caido_devuelve_lo_de_reglas(self):
+        datos = parsear_ticket("TOTAL 1250", hoy=HOY).combinar(None)
+
+        assert datos["monto"] == 1250.0
+        assert datos["fecha"] is None
+
+
+class TestParserStats:
+    def test_tasa_reglas(self):
+        stats = ParserStats()
+        assert stats.tasa_reglas == 0.0
+
+        for por_reglas in (True, True, True, False):
+            stats.registrar(por_reglas=por_reglas)
+
+        assert stats.tickets == 4
+        assert stats.con_llm == 1
+        assert stats.tasa_reglas == 0.75
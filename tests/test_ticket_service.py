@@ -7,6 +7,7 @@ No requieren Tesseract, Ollama ni base de datos.
 from __future__ import annotations
 
 from datetime import date
+from decimal import Decimal
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -94,7 +95,7 @@ class TestTicketServiceProcesarTicket:
         assert partial.fecha == date(2026, 2, 28)
         assert partial.categoria_sugerida == "🛒 Almacén"
 
-    async def test_gemma_falla_retorna_partial_sin_datos(
+    async def test_gemma_falla_conserva_lo_extraido_por_reglas(
         self,
         ticket_service,
         mock_ocr,
@@ -111,7 +112,10 @@ class TestTicketServiceProcesarTicket:
 
         assert isinstance(resultado, Ok)
         partial = resultado.ok()
-        assert partial.monto is None
+        # Sin fecha las reglas no alcanzan y se llama a Gemma; el TOTAL se conserva
+        mock_ai.llamada_directa.assert_awaited_once()
+        assert partial.monto == 1250
+        assert partial.fecha is None
         assert partial.comercio is None
         assert partial.categoria_sugerida is None
         assert partial.texto_crudo != ""  # el texto crudo siempre está
@@ -138,6 +142,26 @@ class TestTicketServiceProcesarTicket:
 
         assert "Confianza OCR baja" in caplog.text
 
+    async def test_ticket_legible_no_llama_a_gemma(
+        self, ticket_service, mock_ocr, mock_ai, mock_embedding
+    ):
+        hoy = date.today().strftime("%d/%m/%Y")
+        mock_ocr.extraer_texto.return_value = Ok(
+            PartialExpense(
+                texto_crudo=f"DISCO\nRUT 210123450019\n{hoy}\nTOTAL $ 1.250,50",
+                confianza_ocr=0.9,
+            )
+        )
+        mock_embedding.generar_embedding.return_value = Err(AppError("x"))
+
+        resultado = await ticket_service.procesar_ticket("/fake/ticket.jpg")
+
+        partial = resultado.ok()
+        mock_ai.llamada_directa.assert_not_called()
+        assert partial.monto == Decimal("1250.5")
+        assert partial.fecha == date.today()
+        assert partial.comercio == "DISCO"
+
 
 class TestTicketServiceParsearConGemma:
     async def test_json_valido_retorna_datos(self, ticket_service, mock_ai):
@@ -219,3 +243,56 @@ class TestTicketServiceSugerirCategoria:
         resultado = await ticket_service._sugerir_categoria("algo raro")
 
         assert resultado is None
+
+
+class TestTicketServiceMemoComercio:
+    async def test_comercio_conocido_no_genera_embedding(
+        self, mock_ocr, mock_embedding, mock_expense_repo, mock_ai
+    ):
+        merchant_repo = MagicMock()
+        merchant_repo.sugerir.return_value = "🛒 Almacén"
+        service = TicketService(
+            ocr_service=mock_ocr,
+            embedding_service=mock_embedding,
+            expense_repo=mock_expense_repo,
+            ai_service=mock_ai,
+            merchant_repo=merchant_repo,
+        )
+
+        resultado = await service._sugerir_categoria(
+            "Tienda Inglesa", comercio="Tienda Inglesa"
+        )
+
+        assert resultado == "🛒 Almacén"
+        merchant_repo.sugerir.assert_called_once_with("Tienda Inglesa")
+        mock_embedding.generar_embedding.assert_not_called()
+        mock_expense_repo.buscar_por_similitud.assert_not_called()
+
+    async def test_comercio_nuevo_usa_cosine_search(
+        self, mock_ocr, mock_embedding, mock_expense_repo, mock_ai
+    ):
+        merchant_repo = MagicMock()
+        merchant_repo.sugerir.return_value = None
+        mock_embedding.generar_embedding.return_value = Ok([0.1] * 768)
+        mock_gasto = MagicMock()
+        mock_gasto.categoria.value = "🏠 Hogar"
+        mock_expense_repo.buscar_por_similitud.return_value = [(mock_gasto, 0.1)]
+        service = TicketService(
+            ocr_service=mock_ocr,
+            embedding_service=mock_embedding,
+            expense_repo=mock_expense_repo,
+            ai_service=mock_ai,
+            merchant_repo=merchant_repo,
+        )
+
+        resultado = await service._sugerir_categoria("Sodimac", comercio="Sodimac")
+
+        assert resultado == "🏠 Hogar"
+        mock_embedding.generar_embedding.assert_awaited_once_with("Sodimac")
+
+    def test_normalizar_comercio(self):
+        from repositories.merchant_category_repository import normalizar_comercio
+
+        assert normalizar_comercio("TIENDA INGLESA S.A.") == "tienda inglesa"
+        assert normalizar_comercio("Café  Brasilero") == "cafe brasilero"
+        assert normalizar_comercio("Farmacia Pigalle S.R.L.") == "farmacia pigalle"
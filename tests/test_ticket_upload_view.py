@@ -0,0 +1,92 @@
+"""
+Tests para la espera del resultado OCR en TicketUploadView (long-poll).
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import httpx
+import pytest
+
+import views.pages.ticket_upload_view as view_module
+from views.pages.ticket_upload_view import TicketUploadView, _Estado
+
+_ASYNC_CLIENT = httpx.AsyncClient
+
+
+@pytest.fixture
+def esperas(monkeypatch) -> list[float]:
+    """Registra los asyncio.sleep del módulo sin esperar de verdad."""
+    registradas: list[float] = []
+    sleep_real = view_module.asyncio.sleep
+
+    async def _sleep(segundos: float) -> None:
+        registradas.append(segundos)
+        await sleep_real(0)
+
+    monkeypatch.setattr(view_module.asyncio, "sleep", _sleep)
+    return registradas
+
+
+def _vista_falsa() -> SimpleNamespace:
+    vista = SimpleNamespace(
+        _estado=_Estado.IDLE,
+        _session_id="s1",
+        _procesar_resultado_ocr=AsyncMock(),
+    )
+    vista._cambiar_estado = lambda estado: setattr(vista, "_estado", estado)
+    return vista
+
+
+def _servir(monkeypatch, responder) -> list[httpx.Request]:
+    """Atiende los requests de la vista con `responder` y los registra."""
+    pedidos: list[httpx.Request] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        pedidos.append(request)
+        return responder(request, len(pedidos))
+
+    monkeypatch.setattr(
+        view_module.httpx,
+        "AsyncClient",
+        lambda **kwargs: _ASYNC_CLIENT(
+            transport=httpx.MockTransport(_handler), **kwargs
+        ),
+    )
+    return pedidos
+
+
+class TestEsperarResultado:
+    async def test_no_listo_inmediato_espera_antes_de_reintentar(
+        self, monkeypatch, esperas
+    ):
+        vista = _vista_falsa()
+        _servir(
+            monkeypatch,
+            lambda _req, n: httpx.Response(200, json={"ready": n > 2, "success": True}),
+        )
+
+        await TicketUploadView._esperar_resultado(vista)
+
+        assert esperas == [view_module._REINTENTO_SEG] * 2
+        assert vista._estado == _Estado.LOADING
+        vista._procesar_resultado_ocr.assert_awaited_once()
+
+    async def test_ocr_api_sin_long_poll_pasa_a_polling(self, monkeypatch, esperas):
+        vista = _vista_falsa()
+
+        def _responder(request: httpx.Request, _n: int) -> httpx.Response:
+            if request.url.path.endswith("/esperar"):
+                return httpx.Response(404, json={"detail": "Not Found"})
+            return httpx.Response(200, json={"ready": True, "success": True})
+
+        pedidos = _servir(monkeypatch, _responder)
+
+        await TicketUploadView._esperar_resultado(vista)
+
+        assert [p.url.path for p in pedidos] == [
+            "/resultado/s1/esperar",
+            "/resultado/s1",
+        ]
+        assert esperas == [view_module._REINTENTO_SEG]
+        vista._procesar_resultado_ocr.assert_awaited_once()
@@ -10,10 +10,9 @@ from decimal import Decimal
 import flet as ft
 
 from constants.responsive import Responsive
-from controllers.expense_controller import ExpenseController
+from controllers.dashboard_controller import DashboardController
 from controllers.exchange_rate_controller import ExchangeRateController
-from controllers.history_controller import HistoryController
-from controllers.income_controller import IncomeController
+from controllers.history_controller import HistoryData
 from controllers.installment_controller import InstallmentController
 from core.session import SessionManager
 from core.state import AppState
@@ -59,10 +58,8 @@ class DashboardView:
         familia_id = SessionManager.get_familia_id(page)
 
         # Controllers
-        self.income_controller = IncomeController(familia_id=familia_id)
-        self.expense_controller = ExpenseController(familia_id=familia_id)
+        self.dashboard_controller = DashboardController(familia_id=familia_id)
         self.installment_controller = InstallmentController(familia_id=familia_id)
-        self.history_controller = HistoryController(familia_id=familia_id)
 
         # Contenedores para los datos
         self.balance_card = ft.Container()
@@ -73,7 +70,7 @@ class DashboardView:
     def render(self):
         """Renderizar la vista completa"""
         # Si __init__ abortó temprano por una redirección, los controllers no existirán
-        if not hasattr(self, 'income_controller'):
+        if not hasattr(self, 'dashboard_controller'):
             return ft.Container()
 
         # Obtener mes y año actual
@@ -88,14 +85,16 @@ class DashboardView:
         except Exception:
             pass  # No bloquear dashboard por error de cuotas
 
-        # Obtener totales por moneda
-        ingresos_uyu = self._get_total_ingresos(year, month, "UYU")
-        gastos_uyu = self._get_total_gastos(year, month, "UYU")
-        balance_uyu = ingresos_uyu - gastos_uyu
+        # Totales por moneda y categoría: una sola query agregada
+        snapshot = self.dashboard_controller.get_snapshot(year, month)
 
-        ingresos_usd = self._get_total_ingresos(year, month, "USD")
-        gastos_usd = self._get_total_gastos(year, month, "USD")
-        balance_usd = ingresos_usd - gastos_usd
+        ingresos_uyu = snapshot.ingresos("UYU")
+        gastos_uyu = snapshot.gastos("UYU")
+        balance_uyu = snapshot.balance("UYU")
+
+        ingresos_usd = snapshot.ingresos("USD")
+        gastos_usd = snapshot.gastos("USD")
+        balance_usd = snapshot.balance("USD")
 
         # Cotización y Patrimonio Consolidado
         exchange_ctrl = ExchangeRateController()
@@ -128,7 +127,7 @@ class DashboardView:
                     size=title_size,
                     weight=ft.FontWeight.BOLD,
                 ),
-                self._build_history_hook(year, month),
+                self._build_history_hook(snapshot.historial),
                 ft.Divider(),
                 # Tarjetas de Balance por moneda
                 ft.ResponsiveRow(
@@ -200,9 +199,7 @@ class DashboardView:
                     controls=[
                         self._build_category_summary_card(
                             title="💰 Ingresos por categoría",
-                            summary=self.income_controller.get_summary_by_categories(
-                                year=year, month=month
-                            ),
+                            summary=snapshot.ingresos_por_categoria,
                             color=ft.Colors.GREEN,
                             color_bg=ft.Colors.GREEN_100,
                             title_color=ft.Colors.TEAL_700,
@@ -212,9 +209,7 @@ class DashboardView:
                         ),
                         self._build_category_summary_card(
                             title="💸 Gastos por categoría",
-                            summary=self.expense_controller.get_summary_by_categories(
-                                year=year, month=month
-                            ),
+                            summary=snapshot.gastos_por_categoria,
                             color=ft.Colors.RED,
                             color_bg=ft.Colors.RED_100,
                             title_color=ft.Colors.ORANGE_700,
@@ -486,13 +481,8 @@ class DashboardView:
             col=Responsive.COL_HALF,
         )
 
-    def _build_history_hook(self, year: int, month: int) -> ft.Container:
+    def _build_history_hook(self, data: HistoryData) -> ft.Container:
         """Strip con los últimos 3 meses y link al Historial completo."""
-        try:
-            data = self.history_controller.get_last_3_months()
-        except Exception:
-            return ft.Container()
-
         if not data.meses:
             return ft.Container()
 
@@ -586,20 +576,6 @@ class DashboardView:
             on_click=lambda _: self.router.navigate("/planes"),
         )
 
-    def _get_total_ingresos(self, year: int, month: int, currency: str) -> Decimal:
-        """Obtener total de ingresos del mes para una moneda."""
-        totals = self.income_controller.get_total_by_month(
-            year, month, currency=currency
-        )
-        return totals.get(currency, Decimal("0"))
-
-    def _get_total_gastos(self, year: int, month: int, currency: str) -> Decimal:
-        """Obtener total de gastos del mes para una moneda."""
-        totals = self.expense_controller.get_total_by_month(
-            year, month, currency=currency
-        )
-        return totals.get(currency, Decimal("0"))
-
     def _get_month_name(self, month: int) -> str:
         """Obtener nombre del mes en español"""
         months = {
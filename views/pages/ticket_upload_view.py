@@ -18,6 +18,7 @@ import httpx
 from result import Ok
 
 from controllers.expense_controller import ExpenseController
+from controllers.ocr_controller import OCRController
 from core.session import SessionManager
 from models.categories import ExpenseCategory, PaymentMethod
 from models.expense_model import Expense
@@ -28,6 +29,15 @@ from views.layouts.main_layout import MainLayout
 _OCR_INTERNAL = os.getenv("OCR_API_URL", "http://ocr_api:8551")
 _OCR_PUBLIC = os.getenv("OCR_API_PUBLIC_URL", "http://localhost:8551")
 
+# Espera del resultado OCR: tope total, duración de cada long-poll y pausa
+# tras un error (o un "no listo" inmediato) antes de reintentar (segundos)
+_ESPERA_MAX_SEG = 120
+_LONG_POLL_SEG = 25
+_REINTENTO_SEG = 2
+# Un "no listo" más rápido que esto no fue un long-poll vencido sino un
+# error del microservicio: se espera _REINTENTO_SEG para no martillarlo
+_RESPUESTA_INMEDIATA_SEG = _LONG_POLL_SEG / 2
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,6 +62,7 @@ class TicketUploadView:
         familia_id = SessionManager.get_familia_id(page)
         self._familia_id = familia_id
         self.expense_controller = ExpenseController(familia_id=familia_id)
+        self.ocr_controller = OCRController(familia_id=familia_id)
 
         self._estado = _Estado.IDLE
         self._partial: PartialExpense | None = None
@@ -142,7 +153,7 @@ class TicketUploadView:
 
     def _build_idle(self) -> ft.Control:
         url = self._preparar_sesion()
-        asyncio.create_task(self._iniciar_polling(None))
+        asyncio.create_task(self._esperar_resultado())
 
         return ft.Column(
             horizontal_alignment=ft.CrossAxisAlignment.CENTER,
@@ -445,37 +456,53 @@ class TicketUploadView:
             f"&familia_id={self._familia_id}"
         )
 
-    async def _iniciar_polling(self, _):
-        """Polling en background: espera el resultado OCR y avanza solo.
-        Permanece en IDLE hasta recibir el resultado; solo entonces
-        cambia a LOADING brevemente antes de pasar a CONFIRM o ERROR.
-        """
-        max_espera = 120  # segundos maximos esperando
-        intervalo = 2  # segundos entre cada polling
-        intentos = max_espera // intervalo
-
-        for i in range(intentos):
-            await asyncio.sleep(intervalo)
-
-            if self._estado != _Estado.IDLE:
-                return
+    async def _esperar_resultado(self) -> None:
+        """Long-poll en background: espera el resultado OCR y avanza solo.
+        El microservicio responde apenas guarda el resultado (o a los
+        _LONG_POLL_SEG sin novedades, y se vuelve a pedir). Permanece en IDLE
+        hasta recibirlo; solo entonces cambia a LOADING brevemente antes de
+        pasar a CONFIRM o ERROR.
 
-            try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    resp = await client.get(
-                        f"{_OCR_INTERNAL}/resultado/{self._session_id}"
-                    )
+        Un ocr_api anterior sin la ruta /esperar responde 404: se pasa al
+        polling de /resultado cada _REINTENTO_SEG.
+        """
+        loop = asyncio.get_running_loop()
+        limite = loop.time() + _ESPERA_MAX_SEG
+        url = f"{_OCR_INTERNAL}/resultado/{self._session_id}/esperar"
+        params: dict[str, float] = {"espera": _LONG_POLL_SEG}
+
+        async with httpx.AsyncClient(timeout=_LONG_POLL_SEG + 10) as client:
+            while loop.time() < limite:
+                if self._estado != _Estado.IDLE:
+                    return
+
+                inicio = loop.time()
+                try:
+                    resp = await client.get(url, params=params)
+                    if resp.status_code == 404 and params:
+                        logger.info(
+                            "[OCR] ocr_api sin long-poll: polling cada %ss",
+                            _REINTENTO_SEG,
+                        )
+                        url = f"{_OCR_INTERNAL}/resultado/{self._session_id}"
+                        params = {}
+                    resp.raise_for_status()
                     data = resp.json()
-            except Exception as e:
-                logger.warning("[OCR] Polling error intento %d: %s", i, e)
-                continue
-
-            if not data.get("ready"):
-                continue
-
-            self._cambiar_estado(_Estado.LOADING)
-            await self._procesar_resultado_ocr(data)
-            return
+                except Exception as e:
+                    logger.warning("[OCR] Error esperando resultado: %s", e)
+                    await asyncio.sleep(_REINTENTO_SEG)
+                    continue
+
+                if not data.get("ready"):
+                    if loop.time() - inicio < _RESPUESTA_INMEDIATA_SEG:
+                        await asyncio.sleep(_REINTENTO_SEG)
+                    continue
+
+                if self._estado != _Estado.IDLE:
+                    return
+                self._cambiar_estado(_Estado.LOADING)
+                await self._procesar_resultado_ocr(data)
+                return
 
         logger.warning("[OCR] Timeout esperando foto session=%s", self._session_id)
 
@@ -498,13 +525,21 @@ class TicketUploadView:
             except (ValueError, TypeError):
                 pass
 
+        # Comercio ya conocido por la familia: la categoría que suele elegir
+        comercio = data.get("comercio")
+        categoria = data.get("categoria_sugerida")
+        if not categoria and comercio:
+            categoria = await asyncio.to_thread(
+                self.ocr_controller.sugerir_categoria, comercio
+            )
+
         monto_val = data.get("monto")
         self._partial = PartialExpense(
             monto=Decimal(str(monto_val)) if monto_val is not None else None,
             fecha=fecha_val,
-            comercio=data.get("comercio"),
+            comercio=comercio,
             items=data.get("items") or [],
-            categoria_sugerida=data.get("categoria_sugerida"),
+            categoria_sugerida=categoria,
             confianza_ocr=data.get("confianza_ocr", 0.0),
             texto_crudo=data.get("texto_crudo", ""),
         )
@@ -562,6 +597,10 @@ class TicketUploadView:
 
             resultado = self.expense_controller.add_expense(gasto)
             if isinstance(resultado, Ok):
+                if self._partial and self._partial.comercio:
+                    self.ocr_controller.aprender_categoria(
+                        self._partial.comercio, categoria.value
+                    )
                 self.page.overlay.append(
                     ft.SnackBar(ft.Text("✅ Gasto guardado correctamente"), open=True)
                 )